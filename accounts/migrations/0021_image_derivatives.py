@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_readingprogress_is_verified_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Gerado automaticamente (core/services/image_derivative_service.py)', verbose_name='Versões Responsivas do Avatar'),
+        ),
+    ]
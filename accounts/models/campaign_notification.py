@@ -70,13 +70,33 @@ class CampaignNotification(BaseNotification):
         Returns:
             CampaignNotification criada
         """
+        notification = cls.build_premium_granted_notification(campaign, grant)
+        notification.user = user
+        notification.save()
+
+        return notification
+
+    @classmethod
+    def build_premium_granted_notification(cls, campaign, grant):
+        """
+        Monta (sem salvar) a notificação de Premium concedido.
+
+        Usado pela execução em lote de campanhas com bulk_create.
+
+        Args:
+            campaign: Campanha que concedeu
+            grant: CampaignGrant criado
+
+        Returns:
+            CampaignNotification não persistida
+        """
         message = (
             f"🎉 Parabéns! Você recebeu {campaign.duration_days} dias de Premium "
             f"através da campanha '{campaign.name}'!"
         )
 
-        notification = cls.objects.create(
-            user=user,
+        return cls(
+            user_id=grant.user_id,
             campaign=campaign,
             campaign_grant=grant,
             notification_type='premium_granted',
@@ -92,8 +112,6 @@ class CampaignNotification(BaseNotification):
             }
         )
 
-        return notification
-
     @classmethod
     def create_expiring_notification(cls, user, grant):
         """
@@ -367,6 +367,7 @@ class ReadingProgress(models.Model):
         quando a leitura é concluída.
         """
         from accounts.models import BookShelf
+        from core.services.library_service import invalidate_library_cache
 
         # Remove da prateleira "Lendo"
         BookShelf.objects.filter(
@@ -384,6 +385,7 @@ class ReadingProgress(models.Model):
                 'notes': f'Concluído em {timezone.now().strftime("%d/%m/%Y")}'
             }
         )
+        invalidate_library_cache(self.user_id)
 
     # ========== NOVOS MÉTODOS - GESTÃO DE ABANDONO ==========
 
@@ -406,6 +408,7 @@ class ReadingProgress(models.Model):
 
         # Move para prateleira de abandonados
         from accounts.models import BookShelf
+        from core.services.library_service import invalidate_library_cache
 
         # Remove de "reading" se estiver lá
         BookShelf.objects.filter(
@@ -424,6 +427,7 @@ class ReadingProgress(models.Model):
                          else f'Abandonado manualmente em {timezone.now().strftime("%d/%m/%Y")}'
             }
         )
+        invalidate_library_cache(self.user_id)
 
         return True
 
@@ -444,6 +448,7 @@ class ReadingProgress(models.Model):
 
         # Move de volta para prateleira "reading"
         from accounts.models import BookShelf
+        from core.services.library_service import invalidate_library_cache
 
         # Remove de "abandoned"
         BookShelf.objects.filter(
@@ -462,6 +467,7 @@ class ReadingProgress(models.Model):
                 'notes': f'Restaurado de abandonados em {timezone.now().strftime("%d/%m/%Y")}'
             }
         )
+        invalidate_library_cache(self.user_id)
 
         return True
 
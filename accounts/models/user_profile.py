@@ -58,6 +58,13 @@ class UserProfile(models.Model):
         verbose_name="Avatar",
         help_text="Foto de perfil (máx. 5MB, 500x500px)"
     )
+    avatar_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Versões Responsivas do Avatar",
+        help_text="Gerado automaticamente (core/services/image_derivative_service.py)"
+    )
 
     @property
     def cached_avatar_url(self):
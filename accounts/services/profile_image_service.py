@@ -0,0 +1,267 @@
+"""
+accounts/services/profile_image_service.py
+
+Processamento fora da requisição das imagens do perfil (avatar, banner e
+background).
+
+A view só valida o arquivo e o grava como veio em um armazenamento local
+temporário (stage_upload), devolvendo a resposta na hora. A task Celery
+accounts.tasks.process_profile_image faz o trabalho pesado:
+
+- decodifica com Image.draft(), que faz o decoder JPEG já reduzir a foto
+  (1/2, 1/4 ou 1/8) na leitura — fotos de celular de 12MP não são
+  decodificadas em resolução cheia;
+- corrige a orientação EXIF, recorta/redimensiona para o formato do campo;
+- codifica em WebP e envia para o storage remoto;
+- atualiza o UserProfile e invalida o cache de cached_avatar_url.
+
+Enquanto o processamento não termina, o estado fica em cache e pode ser
+consultado por get_upload_status() (view profile_image_status). Se o broker
+estiver indisponível, o upload é processado na própria requisição para não
+perder a imagem do usuário.
+"""
+import logging
+import math
+import os
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Tipo de imagem -> campo do UserProfile, pasta no storage e formato final
+PROFILE_IMAGE_SPECS = {
+    'avatar': {
+        'field': 'avatar',
+        'upload_dir': 'users/avatars',
+        'size': (500, 500),
+        'mode': 'square',
+        'max_bytes': 5 * 1024 * 1024,
+    },
+    'banner': {
+        'field': 'banner',
+        'upload_dir': 'users/banners',
+        'size': (1200, 300),
+        'mode': 'crop',
+        'max_bytes': 5 * 1024 * 1024,
+    },
+    'background': {
+        'field': 'custom_background',
+        'upload_dir': 'users/backgrounds',
+        'size': (1920, 1080),
+        'mode': 'fit',
+        'max_bytes': 10 * 1024 * 1024,
+    },
+}
+
+STATE_PENDING = 'pending'
+STATE_DONE = 'done'
+STATE_ERROR = 'error'
+
+# Formatos aceitos no upload (lidos apenas pelo cabeçalho na requisição)
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP', 'BMP', 'MPO'}
+
+
+class ProfileImageError(Exception):
+    """Arquivo de imagem de perfil inválido."""
+
+
+def get_profile_image_settings():
+    """Retorna as configurações de upload de imagens do perfil com valores padrão seguros."""
+    defaults = {
+        'TEMP_DIR': os.path.join(settings.MEDIA_ROOT, 'tmp', 'profile_uploads'),
+        'QUALITY': {'avatar': 90, 'banner': 90, 'background': 85},
+        'STATUS_TIMEOUT': 600,
+    }
+    return {**defaults, **getattr(settings, 'PROFILE_IMAGE_UPLOADS', {})}
+
+
+def temp_storage():
+    return FileSystemStorage(location=get_profile_image_settings()['TEMP_DIR'])
+
+
+def status_cache_key(user_id, kind):
+    return f'profile_image_upload_{user_id}_{kind}'
+
+
+def avatar_url_cache_key(user_id):
+    # Mesma chave de UserProfile.cached_avatar_url
+    return f'user_avatar_url_{user_id}'
+
+
+# ==============================================================================
+# Requisição: validação e armazenamento temporário
+# ==============================================================================
+
+def validate_upload(kind, uploaded_file):
+    """Valida tamanho e tipo lendo só o cabeçalho da imagem (sem decodificar)."""
+    spec = PROFILE_IMAGE_SPECS[kind]
+    if uploaded_file.size > spec['max_bytes']:
+        limit_mb = spec['max_bytes'] // (1024 * 1024)
+        raise ProfileImageError(f'Arquivo muito grande. Tamanho máximo: {limit_mb}MB')
+    if not (uploaded_file.content_type or '').startswith('image/'):
+        raise ProfileImageError('Arquivo deve ser uma imagem')
+    try:
+        with Image.open(uploaded_file) as img:
+            image_format = img.format
+    except Exception:
+        raise ProfileImageError('Arquivo deve ser uma imagem')
+    finally:
+        uploaded_file.seek(0)
+    if image_format not in ACCEPTED_FORMATS:
+        raise ProfileImageError('Formato de imagem não suportado')
+
+
+def stage_upload(user, kind, uploaded_file):
+    """
+    Grava o arquivo original no armazenamento temporário e marca o upload
+    como pendente. Retorna o nome do arquivo temporário.
+    """
+    _, ext = os.path.splitext(uploaded_file.name or '')
+    staged = temp_storage().save(f'{kind}/{user.id}_{uuid.uuid4().hex}{ext.lower()[:10]}', uploaded_file)
+    cache.set(
+        status_cache_key(user.id, kind),
+        {'state': STATE_PENDING, 'staged': staged},
+        get_profile_image_settings()['STATUS_TIMEOUT'],
+    )
+    return staged
+
+
+def schedule_processing(user_id, kind, staged):
+    """Agenda a task após o commit; sem broker, processa na própria requisição."""
+    def enqueue():
+        try:
+            from accounts.tasks import process_profile_image
+            process_profile_image.delay(user_id, kind, staged)
+        except Exception as e:
+            logger.error(f"[PROFILE IMAGE] ❌ Falha ao agendar processamento ({kind} #{user_id}): {e}. Processando agora")
+            try:
+                process_staged_upload(user_id, kind, staged)
+            except Exception as exc:
+                logger.error(f"[PROFILE IMAGE] ❌ Falha ao processar {kind} do usuário #{user_id}: {exc}")
+
+    transaction.on_commit(enqueue)
+
+
+def get_upload_status(profile, kind):
+    """
+    Estado do último upload: {'pending': bool, 'error': str|None, 'url': str|None}.
+    """
+    status = cache.get(status_cache_key(profile.user_id, kind)) or {}
+    field_file = getattr(profile, PROFILE_IMAGE_SPECS[kind]['field'])
+    url = None
+    if status.get('state') != STATE_PENDING and field_file and field_file.name:
+        url = profile.cached_avatar_url if kind == 'avatar' else field_file.url
+    return {
+        'pending': status.get('state') == STATE_PENDING,
+        'error': status.get('error') if status.get('state') == STATE_ERROR else None,
+        'url': url,
+    }
+
+
+# ==============================================================================
+# Task: decodificação, redimensionamento, WebP e upload
+# ==============================================================================
+
+def _draft_size(width, height, target, mode):
+    """Menor tamanho que a imagem decodificada precisa ter para o resultado final."""
+    target_width, target_height = target
+    if mode == 'fit':
+        scale = min(target_width / width, target_height / height, 1)
+    elif mode == 'square':
+        scale = min(target_width / min(width, height), 1)
+    else:
+        scale = max(target_width / width, target_height / height)
+    return math.ceil(width * scale), math.ceil(height * scale)
+
+
+def render_profile_image(fh, kind):
+    """Decodifica, ajusta e codifica a imagem em WebP. Retorna os bytes."""
+    spec = PROFILE_IMAGE_SPECS[kind]
+    target = spec['size']
+    quality = get_profile_image_settings()['QUALITY'].get(kind, 85)
+
+    with Image.open(fh) as img:
+        # draft() só tem efeito em JPEG: reduz a imagem já na decodificação.
+        # O tamanho mínimo é calculado na orientação exibida (foto girada 90°).
+        rotated = img.getexif().get(ExifTags.Base.Orientation, 1) > 4
+        width, height = (img.height, img.width) if rotated else img.size
+        draft_width, draft_height = _draft_size(width, height, target, spec['mode'])
+        img.draft('RGB', (draft_height, draft_width) if rotated else (draft_width, draft_height))
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        if spec['mode'] == 'fit':
+            img.thumbnail(target, Image.Resampling.LANCZOS)
+        elif spec['mode'] == 'square':
+            # Recorte central quadrado; nunca amplia
+            side = min(img.size)
+            img = ImageOps.fit(img, (side, side), Image.Resampling.LANCZOS)
+            if side > target[0]:
+                img = img.resize(target, Image.Resampling.LANCZOS)
+        else:
+            img = ImageOps.fit(img, target, Image.Resampling.LANCZOS)
+
+        output = BytesIO()
+        img.save(output, format='WEBP', quality=quality, method=4)
+    return output.getvalue()
+
+
+def process_staged_upload(user_id, kind, staged):
+    """
+    Processa um upload pendente e atualiza o perfil. Uploads substituídos por
+    um mais novo do mesmo tipo são descartados. O arquivo temporário é sempre
+    removido.
+
+    Returns:
+        str | None: Nome do arquivo salvo no storage
+    """
+    from accounts.models import UserProfile
+
+    spec = PROFILE_IMAGE_SPECS[kind]
+    storage = temp_storage()
+    key = status_cache_key(user_id, kind)
+    try:
+        status = cache.get(key)
+        if status and status.get('staged') != staged:
+            logger.info(f"[PROFILE IMAGE] {kind} do usuário #{user_id} substituído por upload mais novo, descartando")
+            return None
+
+        profile = UserProfile.objects.filter(user_id=user_id).first()
+        if profile is None:
+            cache.delete(key)
+            return None
+
+        try:
+            with storage.open(staged) as fh:
+                data = render_profile_image(fh, kind)
+        except Exception as e:
+            logger.warning(f"[PROFILE IMAGE] Imagem inválida ({kind} #{user_id}): {e}")
+            cache.set(key, {'state': STATE_ERROR, 'staged': staged,
+                            'error': 'Erro ao processar imagem. Tente novamente.'},
+                      get_profile_image_settings()['STATUS_TIMEOUT'])
+            return None
+
+        field_file = getattr(profile, spec['field'])
+        if field_file:
+            field_file.delete(save=False)
+        field_file.save(f"{spec['upload_dir']}/{user_id}_{uuid.uuid4().hex[:12]}.webp", ContentFile(data), save=False)
+        profile.save(update_fields=[spec['field']])
+
+        if kind == 'avatar':
+            cache.delete(avatar_url_cache_key(user_id))
+        # Mantém o nome processado: uma task mais antiga que rode depois é descartada
+        cache.set(key, {'state': STATE_DONE, 'staged': staged}, get_profile_image_settings()['STATUS_TIMEOUT'])
+        logger.info(f"🖼️ {kind} do usuário #{user_id} processado ({len(data) // 1024}KB WebP)")
+        return field_file.name
+    finally:
+        try:
+            storage.delete(staged)
+        except Exception as e:
+            logger.warning(f"[PROFILE IMAGE] Falha ao remover temporário '{staged}': {e}")
@@ -0,0 +1,30 @@
+"""
+Tarefas assíncronas de Accounts.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_profile_image(user_id: int, kind: str, staged: str):
+    """
+    Processa uma imagem de perfil enviada (avatar, banner ou background):
+    decodifica com downscale, converte para WebP, envia ao storage e atualiza
+    o UserProfile. Agendada pelas views de upload
+    (accounts/services/profile_image_service.py).
+
+    Args:
+        user_id: ID do usuário
+        kind: 'avatar', 'banner' ou 'background'
+        staged: Nome do arquivo no armazenamento temporário
+    """
+    from accounts.services.profile_image_service import process_staged_upload
+
+    try:
+        return process_staged_upload(user_id, kind, staged)
+    except Exception as e:
+        logger.error(f"[PROFILE IMAGE] ❌ Falha ao processar {kind} do usuário #{user_id}: {e}", exc_info=True)
+        return None
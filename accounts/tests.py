@@ -208,3 +208,96 @@ class BadgeModelTest(TestCase):
         self.assertEqual(user_badge.user, self.user)
         self.assertEqual(user_badge.badge, self.badge)
         self.assertIsNotNone(user_badge.earned_at)
+
+
+class ProfileImageUploadTest(TestCase):
+    """Testes para o upload de imagens do perfil processado fora da requisição."""
+
+    def setUp(self):
+        import tempfile
+        from unittest.mock import patch
+        from django.core.files.storage import FileSystemStorage
+        from django.test import override_settings
+
+        self.user = User.objects.create_user(username='fotografo', password='testpass123')
+        self.client.force_login(self.user)
+
+        self.remote_dir = tempfile.mkdtemp()
+        self.temp_dir = tempfile.mkdtemp()
+        for field in ('avatar', 'banner'):
+            patcher = patch.object(UserProfile._meta.get_field(field), 'storage',
+                                   FileSystemStorage(location=self.remote_dir))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        settings_override = override_settings(
+            PROFILE_IMAGE_UPLOADS={'TEMP_DIR': self.temp_dir},
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.remote_dir, ignore_errors=True)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _photo(self, size=(4000, 3000), name='foto.jpg'):
+        import io
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buffer, format='JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_returns_immediately_and_task_processes_webp(self):
+        import os
+        from django.core.cache import cache
+        from django.urls import reverse
+        from PIL import Image
+        from accounts.services.profile_image_service import process_staged_upload
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(reverse('accounts:upload_avatar'), {'avatar': self._photo()})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()['pending'])
+        self.assertEqual(len(callbacks), 1)
+        staged = cache.get(f'profile_image_upload_{self.user.id}_avatar')['staged']
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, staged)))
+
+        status_url = response.json()['status_url']
+        self.assertTrue(self.client.get(status_url).json()['pending'])
+
+        cache.set(f'user_avatar_url_{self.user.id}', '/antigo.jpg')
+        name = process_staged_upload(self.user.id, 'avatar', staged)
+
+        self.assertTrue(name.endswith('.webp'))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, staged)))
+        self.assertIsNone(cache.get(f'user_avatar_url_{self.user.id}'))
+        with Image.open(os.path.join(self.remote_dir, name)) as img:
+            self.assertEqual((img.format, img.size), ('WEBP', (500, 500)))
+
+        status = self.client.get(status_url).json()
+        self.assertFalse(status['pending'])
+        self.assertTrue(status['avatar_url'].endswith('.webp'))
+
+    def test_superseded_and_invalid_uploads(self):
+        import os
+        from django.urls import reverse
+        from accounts.services.profile_image_service import process_staged_upload, stage_upload
+
+        older = stage_upload(self.user, 'banner', self._photo(name='velho.jpg'))
+        newer = stage_upload(self.user, 'banner', self._photo(size=(800, 600), name='novo.jpg'))
+        self.assertIsNone(process_staged_upload(self.user.id, 'banner', older))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, older)))
+
+        name = process_staged_upload(self.user.id, 'banner', newer)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.banner.name, name)
+        self.assertEqual(self.user.profile.banner.width, 1200)
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        fake = SimpleUploadedFile('falsa.jpg', b'isto nao e uma imagem', content_type='image/jpeg')
+        response = self.client.post(reverse('accounts:upload_banner'), {'banner': fake})
+        self.assertEqual(response.status_code, 400)
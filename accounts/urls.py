@@ -9,6 +9,7 @@ urlpatterns = [
     path('edit/', views.edit_profile, name='edit_profile'),
     path('upload-avatar/', views.upload_avatar, name='upload_avatar'),
     path('upload-banner/', views.upload_banner, name='upload_banner'),
+    path('image-status/<str:kind>/', views.profile_image_status, name='profile_image_status'),
     path('update-theme/', views.update_theme, name='update_theme'),
     path('update-banner-position/', views.update_banner_position, name='update_banner_position'),
 
@@ -6,14 +6,13 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from django.db import transaction
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.urls import reverse
 from datetime import datetime
-from PIL import Image
-import io
 import json
 import logging
 
@@ -64,135 +63,96 @@ def edit_profile(request):
     return render(request, 'accounts/edit_profile.html', context)
 
 
-@login_required
-@require_POST
-def upload_avatar(request):
+def _accept_profile_image(request, kind, messages_ok):
     """
-    Upload de avatar via AJAX.
-    Valida, redimensiona e salva no Supabase Storage.
+    Valida o arquivo, grava-o no armazenamento temporário e agenda o
+    processamento (accounts/services/profile_image_service.py).
+
+    Responde 202 com status_url enquanto a task processa a imagem; se ela já
+    foi processada (sem broker, na própria requisição), responde como antes
+    com a URL final em '<kind>_url'.
     """
+    from .services.profile_image_service import (
+        ProfileImageError, get_upload_status, schedule_processing, stage_upload, validate_upload,
+    )
+
     try:
-        if 'avatar' not in request.FILES:
+        if kind not in request.FILES:
             return JsonResponse({'success': False, 'error': 'Nenhum arquivo enviado'}, status=400)
 
-        avatar_file = request.FILES['avatar']
+        uploaded_file = request.FILES[kind]
         profile = request.user.profile
 
-        max_size = 5 * 1024 * 1024  # 5MB
-        if avatar_file.size > max_size:
-            return JsonResponse({'success': False, 'error': 'Arquivo muito grande. Tamanho máximo: 5MB'}, status=400)
-
-        if not avatar_file.content_type.startswith('image/'):
-            return JsonResponse({'success': False, 'error': 'Arquivo deve ser uma imagem'}, status=400)
-
         try:
-            img = Image.open(avatar_file)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            max_size_px = (500, 500)
-            img.thumbnail(max_size_px, Image.Resampling.LANCZOS)
-
-            width, height = img.size
-            if width != height:
-                size = min(width, height)
-                left, top = (width - size) // 2, (height - size) // 2
-                right, bottom = left + size, top + size
-                img = img.crop((left, top, right, bottom))
-
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=90, optimize=True)
-            output.seek(0)
-
-            if profile.avatar:
-                profile.avatar.delete(save=False)
-
-            filename = f'users/avatars/{request.user.id}_{avatar_file.name}'
-            profile.avatar.save(filename, output, save=True)
-
+            validate_upload(kind, uploaded_file)
+        except ProfileImageError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        staged = stage_upload(request.user, kind, uploaded_file)
+        schedule_processing(request.user.id, kind, staged)
+
+        profile.refresh_from_db()
+        status = get_upload_status(profile, kind)
+        if status['error']:
+            return JsonResponse({'success': False, 'error': status['error']}, status=500)
+        if status['pending']:
             return JsonResponse({
                 'success': True,
-                'avatar_url': profile.avatar.url,
-                'message': 'Avatar atualizado com sucesso!'
-            })
-        except Exception as e:
-            logger.error(f"Erro ao processar avatar: {e}", exc_info=True)
-            return JsonResponse({'success': False, 'error': 'Erro ao processar imagem. Tente novamente.'}, status=500)
+                'pending': True,
+                'status_url': reverse('accounts:profile_image_status', args=[kind]),
+                'message': 'Imagem recebida! Processando...'
+            }, status=202)
+
+        return JsonResponse({
+            'success': True,
+            f'{kind}_url': status['url'],
+            'message': messages_ok
+        })
 
     except Exception as e:
-        logger.error(f"Erro no upload de avatar: {e}", exc_info=True)
+        logger.error(f"Erro no upload de {kind}: {e}", exc_info=True)
         return JsonResponse({'success': False, 'error': 'Erro no upload. Tente novamente.'}, status=500)
 
 
 @login_required
 @require_POST
-def upload_banner(request):
+def upload_avatar(request):
     """
-    Upload de banner via AJAX.
-    Valida, redimensiona e salva no Supabase Storage.
+    Upload de avatar via AJAX.
+    Valida e agenda o processamento (recorte quadrado, WebP e envio ao storage).
     """
-    try:
-        if 'banner' not in request.FILES:
-            return JsonResponse({'success': False, 'error': 'Nenhum arquivo enviado'}, status=400)
-
-        banner_file = request.FILES['banner']
-        profile = request.user.profile
-
-        max_size = 5 * 1024 * 1024  # 5MB
-        if banner_file.size > max_size:
-            return JsonResponse({'success': False, 'error': 'Arquivo muito grande. Tamanho máximo: 5MB'}, status=400)
-
-        if not banner_file.content_type.startswith('image/'):
-            return JsonResponse({'success': False, 'error': 'Arquivo deve ser uma imagem'}, status=400)
-
-        try:
-            img = Image.open(banner_file)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            target_width, target_height = 1200, 300
-            width, height = img.size
-            aspect, target_aspect = width / height, target_width / target_height
-
-            if aspect > target_aspect:
-                new_height = target_height
-                new_width = int(new_height * aspect)
-            else:
-                new_width = target_width
-                new_height = int(new_width / aspect)
+    return _accept_profile_image(request, 'avatar', 'Avatar atualizado com sucesso!')
 
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
-            left, top = (new_width - target_width) // 2, (new_height - target_height) // 2
-            right, bottom = left + target_width, top + target_height
-            img = img.crop((left, top, right, bottom))
-
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=90, optimize=True)
-            output.seek(0)
+@login_required
+@require_POST
+def upload_banner(request):
+    """
+    Upload de banner via AJAX.
+    Valida e agenda o processamento (recorte 1200x300, WebP e envio ao storage).
+    """
+    return _accept_profile_image(request, 'banner', 'Banner atualizado com sucesso!')
 
-            if profile.banner:
-                profile.banner.delete(save=False)
 
-            filename = f'users/banners/{request.user.id}_{banner_file.name}'
-            profile.banner.save(filename, output, save=True)
+@login_required
+@require_GET
+def profile_image_status(request, kind):
+    """
+    Estado do processamento de uma imagem do perfil enviada (polling via AJAX).
+    """
+    from .services.profile_image_service import PROFILE_IMAGE_SPECS, get_upload_status
 
-            return JsonResponse({
-                'success': True,
-                'banner_url': profile.banner.url,
-                'message': 'Banner atualizado com sucesso!'
-            })
-        except Exception as e:
-            logger.error(f"Erro ao processar banner: {e}", exc_info=True)
-            return JsonResponse({'success': False, 'error': 'Erro ao processar imagem. Tente novamente.'}, status=500)
+    if kind not in PROFILE_IMAGE_SPECS:
+        return JsonResponse({'success': False, 'error': 'Tipo de imagem inválido'}, status=404)
 
-    except Exception as e:
-        logger.error(f"Erro no upload de banner: {e}", exc_info=True)
-        return JsonResponse({'success': False, 'error': 'Erro no upload. Tente novamente.'}, status=500)
+    status = get_upload_status(request.user.profile, kind)
+    if status['error']:
+        return JsonResponse({'success': False, 'error': status['error']})
+    return JsonResponse({
+        'success': True,
+        'pending': status['pending'],
+        f'{kind}_url': status['url'],
+    })
 
 
 @login_required
@@ -280,71 +240,17 @@ def upload_background(request):
     """
     Upload de background personalizado via AJAX.
     APENAS para usuários PREMIUM.
-    Valida, processa e salva no Supabase Storage.
+    Valida e agenda o processamento (até 1920x1080, WebP e envio ao storage).
     """
-    try:
-        # Verificar se é usuário PREMIUM
-        if not request.user.profile.is_premium_active():
-            return JsonResponse({
-                'success': False,
-                'error': 'Recurso exclusivo para membros Premium',
-                'requires_premium': True
-            }, status=403)
-
-        if 'background' not in request.FILES:
-            return JsonResponse({'success': False, 'error': 'Nenhum arquivo enviado'}, status=400)
-
-        background_file = request.FILES['background']
-        profile = request.user.profile
-
-        # Validar tamanho (10MB para backgrounds)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if background_file.size > max_size:
-            return JsonResponse({'success': False, 'error': 'Arquivo muito grande. Tamanho máximo: 10MB'}, status=400)
-
-        # Validar tipo
-        if not background_file.content_type.startswith('image/'):
-            return JsonResponse({'success': False, 'error': 'Arquivo deve ser uma imagem'}, status=400)
-
-        try:
-            img = Image.open(background_file)
-
-            # Converter para RGB se necessário
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            # Redimensionar mantendo proporção (max 1920x1080)
-            max_width, max_height = 1920, 1080
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-            # Salvar com qualidade otimizada
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=85, optimize=True)
-            output.seek(0)
-
-            # Deletar background anterior se existir
-            if profile.custom_background:
-                profile.custom_background.delete(save=False)
-
-            # Salvar novo background
-            filename = f'users/backgrounds/{request.user.id}_{background_file.name}'
-            profile.custom_background.save(filename, output, save=True)
-
-            return JsonResponse({
-                'success': True,
-                'background_url': profile.custom_background.url,
-                'message': 'Background atualizado com sucesso!'
-            })
-
-        except Exception as e:
-            logger.error(f"Erro ao processar background: {e}", exc_info=True)
-            return JsonResponse({'success': False, 'error': 'Erro ao processar imagem. Tente novamente.'}, status=500)
+    # Verificar se é usuário PREMIUM
+    if not request.user.profile.is_premium_active():
+        return JsonResponse({
+            'success': False,
+            'error': 'Recurso exclusivo para membros Premium',
+            'requires_premium': True
+        }, status=403)
 
-    except Exception as e:
-        logger.error(f"Erro no upload de background: {e}", exc_info=True)
-        return JsonResponse({'success': False, 'error': 'Erro no upload. Tente novamente.'}, status=500)
+    return _accept_profile_image(request, 'background', 'Background atualizado com sucesso!')
 
 
 @login_required
@@ -3,6 +3,11 @@ ASGI config for cgbookstore project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Em produção é servido pelos workers Uvicorn do Gunicorn (GUNICORN_ASGI=true em
+config/deployment/gunicorn_config.py). Os middlewares do projeto são
+async-capable, então o endpoint assíncrono do chatbot
+(chatbot_literario.views.send_message_async) não ocupa thread enquanto espera o LLM.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
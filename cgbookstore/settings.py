@@ -84,7 +84,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.gzip.GZipMiddleware',  # OTIMIZAÇÃO: Comprime respostas HTTP (reduz ~80% do tamanho)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve arquivos estáticos em produção
+    'core.middleware.AsyncWhiteNoiseMiddleware',  # Serve arquivos estáticos em produção (WhiteNoise, também no ASGI)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -303,6 +303,24 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=8, minute=0),  # 8h da manhã
         'options': {'expires': 60 * 60},  # Expira após 1h se não executar
     },
+    # Re-tentativa de e-mails pendentes da caixa de saída (finance.EmailOutbox)
+    'dispatch-email-outbox': {
+        'task': 'finance.dispatch_email_outbox',
+        'schedule': crontab(minute='*/15'),  # A cada 15 minutos
+        'options': {'expires': 60 * 14},
+    },
+    # Dashboard de relatórios - recalcula snapshots desatualizados (core.ReportSnapshot)
+    'refresh-report-snapshots': {
+        'task': 'core.tasks.refresh_report_snapshots',
+        'schedule': crontab(minute='*/5'),  # A cada 5 minutos
+        'options': {'expires': 60 * 4},
+    },
+    # Sitemaps XML pré-gerados no storage (core/services/sitemap_service.py)
+    'refresh-sitemaps': {
+        'task': 'core.tasks.refresh_sitemaps',
+        'schedule': crontab(minute='*/30'),  # A cada 30 minutos, se houver mudanças
+        'options': {'expires': 60 * 25},
+    },
     # News Agent System - Geração automática de notícias com IA
     'generate-daily-news': {
         'task': 'news.generate_daily_news',
@@ -347,6 +365,19 @@ WHATSAPP_ADMIN_NUMBER = env('WHATSAPP_ADMIN_NUMBER', default='')
 # API Key recebida do CallMeBot
 CALLMEBOT_API_KEY = env('CALLMEBOT_API_KEY', default='')
 
+# Envio dos alertas (monitoring.alert_dispatcher): alertas que chegam dentro de
+# COALESCE_SECONDS vão em uma única mensagem (até MAX_DIGEST_ITEMS); falhas são
+# re-tentadas com backoff exponencial por até RETRY_WINDOW_HOURS.
+WHATSAPP_ALERTS = {
+    'COALESCE_SECONDS': env.float('WHATSAPP_ALERT_COALESCE_SECONDS', default=30.0),
+    'MAX_DIGEST_ITEMS': env.int('WHATSAPP_ALERT_MAX_DIGEST_ITEMS', default=10),
+    'MIN_SEND_INTERVAL_SECONDS': env.float('WHATSAPP_ALERT_MIN_INTERVAL_SECONDS', default=10.0),
+    'MAX_QUEUE_SIZE': env.int('WHATSAPP_ALERT_MAX_QUEUE_SIZE', default=500),
+    'RETRY_BASE_SECONDS': env.int('WHATSAPP_ALERT_RETRY_BASE_SECONDS', default=30),
+    'RETRY_MAX_SECONDS': env.int('WHATSAPP_ALERT_RETRY_MAX_SECONDS', default=1800),
+    'RETRY_WINDOW_HOURS': env.int('WHATSAPP_ALERT_RETRY_WINDOW_HOURS', default=6),
+}
+
 # ==============================================================================
 # MONITORING CONFIGURATION
 # ==============================================================================
@@ -367,6 +398,9 @@ MONITORING_ALERT_MIN_SEVERITY = env('MONITORING_ALERT_MIN_SEVERITY', default='me
 #   'disabled'     — Nenhum evento rastreado. Zero impacto de performance.
 #   'synchronous'  — Gravação síncrona protegida em try/except. Padrão.
 #                    Impacto estimado: < 5ms por requisição de página.
+#   'buffered'     — Eventos e atualizações de sessão enfileirados em memória
+#                    e gravados em lote (bulk_create) a cada BATCH_SIZE itens
+#                    ou FLUSH_INTERVAL_SECONDS segundos. Sem worker externo.
 #   'celery'       — Gravação assíncrona via Celery (requer worker ativo).
 #                    Fallback automático para modo síncrono se broker indisponível.
 #
@@ -382,6 +416,14 @@ PRODUCT_ANALYTICS = {
     # Retenção de ProductEvent e AnalyticsSession em dias (para purge automático na Fase 2)
     'EVENT_RETENTION_DAYS': env.int('PRODUCT_ANALYTICS_EVENT_RETENTION_DAYS', default=90),
     'SESSION_RETENTION_DAYS': env.int('PRODUCT_ANALYTICS_SESSION_RETENTION_DAYS', default=90),
+    # Modo 'buffered': tamanho do lote, intervalo máximo entre gravações e limite da fila
+    'BATCH_SIZE': env.int('PRODUCT_ANALYTICS_BATCH_SIZE', default=100),
+    'FLUSH_INTERVAL_SECONDS': env.float('PRODUCT_ANALYTICS_FLUSH_INTERVAL_SECONDS', default=2.0),
+    'MAX_BUFFER_SIZE': env.int('PRODUCT_ANALYTICS_MAX_BUFFER_SIZE', default=10000),
+    # Modo 'buffered': o estado da sessão ativa fica no cache e a linha de
+    # AnalyticsSession é gravada N segundos após a atividade pendente mais
+    # antiga, mesmo sem novas visitas (write-behind)
+    'SESSION_FLUSH_INTERVAL_SECONDS': env.int('PRODUCT_ANALYTICS_SESSION_FLUSH_INTERVAL', default=60),
 }
 
 
@@ -452,6 +494,41 @@ else:
 # Google Books API Configuration
 GOOGLE_BOOKS_API_KEY = env('GOOGLE_BOOKS_API_KEY', default='')
 
+# Versões responsivas de capas e avatares (core/services/image_derivative_service.py)
+# AVIF só é gerado se o Pillow instalado tiver suporte (ex.: IMAGE_DERIVATIVE_FORMATS=WEBP,AVIF)
+IMAGE_DERIVATIVES = {
+    'FORMATS': env.list('IMAGE_DERIVATIVE_FORMATS', default=['WEBP']),
+    'COVER_WIDTHS': [160, 320, 480],
+    'AVATAR_WIDTHS': [64, 128, 256],
+    'QUALITY': env.int('IMAGE_DERIVATIVE_QUALITY', default=80),
+}
+
+# Uploads de avatar/banner/background processados via Celery
+# (accounts/services/profile_image_service.py). TEMP_DIR precisa ser
+# compartilhado entre web e worker.
+PROFILE_IMAGE_UPLOADS = {
+    'TEMP_DIR': env('PROFILE_IMAGE_TEMP_DIR', default=os.path.join(MEDIA_ROOT, 'tmp', 'profile_uploads')),
+    'QUALITY': {'avatar': 90, 'banner': 90, 'background': 85},
+    'STATUS_TIMEOUT': 600,
+}
+
+# Sitemaps XML gerados em segundo plano (core/services/sitemap_service.py)
+SITEMAPS = {
+    'BASE_URL': env('SITEMAP_BASE_URL', default='https://www.cgbookstore.com.br'),
+    'STORAGE_DIR': 'sitemaps',
+    'URLS_PER_FILE': env.int('SITEMAP_URLS_PER_FILE', default=10000),
+    'CHUNK_SIZE': 2000,
+    'MAX_AGE_SECONDS': 24 * 3600,
+}
+
+# Download em massa de capas (core.utils.bulk_media_fetcher)
+BULK_MEDIA_FETCHER = {
+    'WORKERS': env.int('BULK_MEDIA_FETCHER_WORKERS', default=4),
+    'RATE_PER_HOST': env.float('BULK_MEDIA_FETCHER_RATE', default=2.0),
+    'MAX_RETRIES': env.int('BULK_MEDIA_FETCHER_MAX_RETRIES', default=4),
+    'TIMEOUT': env.int('BULK_MEDIA_FETCHER_TIMEOUT', default=15),
+}
+
 # ==============================================================================
 # COMMERCIAL PARTNERS
 # ==============================================================================
@@ -530,6 +607,41 @@ AI_RATE_LIMIT_COOLDOWN_SECONDS = env.int(
     default=1200,
 )
 
+# Pool de conexões HTTP compartilhado pelos provedores (keep-alive entre chamadas)
+AI_HTTP_POOL_MAXSIZE = env.int('AI_HTTP_POOL_MAXSIZE', default=10)
+# HTTP/2 no cliente assíncrono (httpx), quando o pacote h2 está instalado
+AI_HTTP2_ENABLED = env.bool('AI_HTTP2_ENABLED', default=True)
+# Segundos de espera antes de disparar o próximo provedor em paralelo (hedging).
+# 0 = corrida entre todos os provedores da cadeia de fallback.
+AI_HEDGE_DELAY_SECONDS = env.float('AI_HEDGE_DELAY_SECONDS', default=2.0)
+
+# Histórico enviado ao LLM: mensagens recentes dentro de TOKEN_BUDGET tokens
+# (estimados) e as anteriores compactadas em um resumo atualizado em background
+CHATBOT_HISTORY = {
+    'TOKEN_BUDGET': env.int('CHATBOT_HISTORY_TOKEN_BUDGET', default=1500),
+    'MAX_MESSAGES': env.int('CHATBOT_HISTORY_MAX_MESSAGES', default=20),
+    'SUMMARY_MAX_TOKENS': env.int('CHATBOT_HISTORY_SUMMARY_MAX_TOKENS', default=300),
+}
+
+# Referências da conversa do chatbot (livro_1, último autor...) por ChatSession,
+# guardadas no cache para valerem em todos os workers
+CHATBOT_REFERENCES = {
+    'TTL_SECONDS': env.int('CHATBOT_REFERENCES_TTL_SECONDS', default=6 * 3600),
+    'MAX_REFERENCES': env.int('CHATBOT_REFERENCES_MAX', default=30),
+}
+
+# Endpoint assíncrono do chatbot (api/send/async/, servido via ASGI):
+# chamadas simultâneas por provedor de IA e espera máxima por uma vaga (503 depois disso)
+CHATBOT_ASYNC = {
+    'PROVIDER_CONCURRENCY': {
+        'groq': env.int('CHATBOT_ASYNC_GROQ_CONCURRENCY', default=20),
+        'gemini': env.int('CHATBOT_ASYNC_GEMINI_CONCURRENCY', default=10),
+        'openrouter': env.int('CHATBOT_ASYNC_OPENROUTER_CONCURRENCY', default=5),
+    },
+    'DEFAULT_CONCURRENCY': 10,
+    'QUEUE_TIMEOUT_SECONDS': env.float('CHATBOT_ASYNC_QUEUE_TIMEOUT', default=10.0),
+}
+
 # Google Gemini AI
 GEMINI_API_KEY = env('GEMINI_API_KEY', default='')
 
@@ -541,8 +653,48 @@ GROQ_MODEL_NAME = env('GROQ_MODEL_NAME', default='llama-3.3-70b-versatile')
 # OpenRouter AI (Provedor gratuito alternativo)
 OPENROUTER_API_KEY = env('OPENROUTER_API_KEY', default='')
 
+# Telemetria de uso da IA (monitoring.AIUsageLog)
+# PROCESSING_MODE:
+#   'synchronous' — INSERT na própria chamada de IA. Padrão.
+#   'buffered'    — Fila em memória gravada com bulk_create por thread de background
+#                   a cada BATCH_SIZE registros ou FLUSH_INTERVAL_SECONDS segundos.
+#   'celery'      — Igual ao 'buffered', mas cada lote vira uma tarefa Celery.
+# MAX_BUFFER_SIZE limita a memória: acima dele os registros são descartados e contados.
+AI_USAGE_LOGGING = {
+    'PROCESSING_MODE': env('AI_USAGE_LOG_PROCESSING_MODE', default='synchronous'),
+    'BATCH_SIZE': env.int('AI_USAGE_LOG_BATCH_SIZE', default=50),
+    'FLUSH_INTERVAL_SECONDS': env.float('AI_USAGE_LOG_FLUSH_INTERVAL', default=5.0),
+    'MAX_BUFFER_SIZE': env.int('AI_USAGE_LOG_MAX_BUFFER', default=5000),
+}
+
+# Profiling por requisição (core.middleware.PerformanceMonitoringMiddleware)
+# Server-Timing com tempo total, banco (queries/N+1), cache e HTTP externo.
+# SAMPLE_RATE: fração das requisições agregadas em monitoring.ViewPerformanceStat
+# por view e janela de BUCKET_MINUTES (mantidas por RETENTION_HOURS).
+# DUPLICATE_QUERY_THRESHOLD: repetições da mesma query para considerar N+1.
+PERFORMANCE_PROFILING = {
+    'ENABLED': env.bool('PERFORMANCE_PROFILING_ENABLED', default=True),
+    'SLOW_REQUEST_SECONDS': 1.5,
+    'DUPLICATE_QUERY_THRESHOLD': env.int('PERFORMANCE_DUPLICATE_QUERY_THRESHOLD', default=5),
+    'SAMPLE_RATE': env.float('PERFORMANCE_SAMPLE_RATE', default=0.1),
+    'BUCKET_MINUTES': 60,
+    'RETENTION_HOURS': 7 * 24,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL_SECONDS': 10.0,
+    'MAX_BUFFER_SIZE': 5000,
+}
+
 # Validação cruzada de IA em tempo real para evitar alucinações
 AI_CROSS_VALIDATION_ENABLED = env.bool('AI_CROSS_VALIDATION_ENABLED', default=True)
+# Modo: 'sync' (valida antes de responder), 'async' (valida em task Celery e
+# corrige depois), 'sampled' (valida perguntas sobre o catálogo + SAMPLE_RATE
+# das demais) ou 'off'. Métricas por modo em monitoring.ChatValidationStat.
+AI_CROSS_VALIDATION = {
+    'MODE': env('AI_CROSS_VALIDATION_MODE', default='sync'),
+    'SAMPLE_RATE': env.float('AI_CROSS_VALIDATION_SAMPLE_RATE', default=0.2),
+    'SAMPLE_CATALOG_MENTIONS': env.bool('AI_CROSS_VALIDATION_SAMPLE_CATALOG_MENTIONS', default=True),
+    'STATUS_TTL_SECONDS': 600,
+}
 
 # Unsplash API (para imagens em posts gerados por IA)
 # Criar conta gratuita em: https://unsplash.com/developers
@@ -555,6 +707,16 @@ MERCADOPAGO_ACCESS_TOKEN = env('MERCADOPAGO_ACCESS_TOKEN', default='')
 MERCADOPAGO_PUBLIC_KEY = env('MERCADOPAGO_PUBLIC_KEY', default='')
 SITE_URL = env('SITE_URL', default='http://localhost:8000')
 
+# Campanhas: usuários por lote na concessão em massa e validade do progresso em cache
+CAMPAIGN_GRANT_CHUNK_SIZE = env.int('CAMPAIGN_GRANT_CHUNK_SIZE', default=500)
+CAMPAIGN_PROGRESS_TTL = 60 * 60 * 24  # 24 horas
+
+# Dashboard de relatórios: idade máxima de um snapshot antes de ser recalculado,
+# mesmo sem alterações (eventos e assinaturas mudam de estado com o tempo)
+REPORT_SNAPSHOTS = {
+    'MAX_AGE_SECONDS': env.int('REPORT_SNAPSHOTS_MAX_AGE', default=60 * 60),
+}
+
 # ==============================================================================
 # EMAIL CONFIGURATION
 # Controlado inteiramente pelas variáveis de ambiente.
@@ -584,6 +746,15 @@ EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=True)
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 
+# Envio em lote (lembretes e win-back Premium) pela caixa de saída finance.EmailOutbox
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': env.int('EMAIL_OUTBOX_BATCH_SIZE', default=50),    # Mensagens por conexão
+    'CONCURRENCY': env.int('EMAIL_OUTBOX_CONCURRENCY', default=4),   # Conexões simultâneas
+    'MAX_ATTEMPTS': env.int('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5),
+    'MAX_PER_RUN': 2000,
+    'CLAIM_TIMEOUT_SECONDS': 30 * 60,  # Reserva de uma execução interrompida volta a valer
+}
+
 # Configurações de Recomendações
 RECOMMENDATIONS_CONFIG = {
     'MIN_INTERACTIONS': 5,  # Mínimo de interações para gerar recomendações personalizadas
@@ -22,6 +22,9 @@ CACHES = {
     }
 }
 
+# Sem amostragem de desempenho por view (gravação em thread de background)
+PERFORMANCE_PROFILING = {**PERFORMANCE_PROFILING, 'SAMPLE_RATE': 0}
+
 # Desabilita envio de emails
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
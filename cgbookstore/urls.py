@@ -1,29 +1,12 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
 from django.http import HttpResponse
 from core.views import copyright_views
 
-from django.contrib.sitemaps.views import sitemap
-from core.sitemaps import (
-    StaticViewSitemap,
-    BookSitemap,
-    AuthorSitemap,
-    CategorySitemap,
-    ArticleSitemap,
-    LiteraryUniverseSitemap,
-)
-
-sitemaps = {
-    'static': StaticViewSitemap,
-    'books': BookSitemap,
-    'authors': AuthorSitemap,
-    'categories': CategorySitemap,
-    'articles': ArticleSitemap,
-    'universes': LiteraryUniverseSitemap,
-}
+from core.views import sitemap_views
 
 def robots_txt(request):
     lines = [
@@ -41,7 +24,9 @@ def robots_txt(request):
 
 urlpatterns = [
     path('robots.txt', robots_txt, name='robots_txt'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    # Sitemaps pré-gerados no storage (core/services/sitemap_service.py)
+    path('sitemap.xml', sitemap_views.sitemap_file, name='sitemap'),
+    re_path(r'^(?P<name>sitemap-[a-z]+-\d+\.xml\.gz)$', sitemap_views.sitemap_file, name='sitemap_part'),
     path('admin/product-analytics/', include('product_analytics.urls', namespace='product_analytics')),
     path('admin/audit/image-copyright/', copyright_views.copyright_audit_dashboard, name='copyright_audit_dashboard'),
     path('admin/audit/image-copyright/compliance-map/', copyright_views.copyright_compliance_map, name='copyright_compliance_map'),
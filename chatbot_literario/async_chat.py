@@ -0,0 +1,196 @@
+"""
+Geração de resposta do endpoint assíncrono do chatbot (api/send/async/).
+
+Servido via ASGI, o endpoint não ocupa uma thread enquanto espera o LLM: os
+provedores usam clientes assíncronos (aget_response / agenerate_text) e só o
+RAG e o ORM passam por sync_to_async. Como nada mais segura a concorrência
+(no WSGI eram os workers/threads do Gunicorn), cada provedor tem um semáforo
+por event loop com PROVIDER_CONCURRENCY vagas; quem não consegue vaga em
+QUEUE_TIMEOUT_SECONDS recebe ProviderBusy (a view responde 503).
+
+A cadeia de fallback é a mesma da view síncrona: quota do provedor principal
+-> o outro provedor (Gemini <-> Groq) -> OpenRouter, com alertas de IA quando
+todos falham. Aqui o OpenRouter entra como hedge (hedged_call): é disparado
+em paralelo se o outro provedor falhar ou não responder em
+AI_HEDGE_DELAY_SECONDS.
+"""
+import asyncio
+import contextlib
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.services.ai_provider_service import hedged_call
+
+from .gemini_service import get_chatbot_service
+
+logger = logging.getLogger(__name__)
+
+# Provedor usado quando a quota do principal acaba
+QUOTA_FALLBACK_PROVIDERS = {'gemini': 'groq', 'groq': 'gemini'}
+
+
+def get_chat_concurrency_settings() -> dict:
+    """Retorna as configurações de concorrência do chatbot assíncrono com valores padrão seguros."""
+    defaults = {
+        'PROVIDER_CONCURRENCY': {},
+        'DEFAULT_CONCURRENCY': 10,
+        'QUEUE_TIMEOUT_SECONDS': 10.0,
+    }
+    return {**defaults, **getattr(settings, 'CHATBOT_ASYNC', {})}
+
+
+class ProviderBusy(Exception):
+    """Nenhuma vaga livre no provedor dentro de QUEUE_TIMEOUT_SECONDS."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        super().__init__(f"Provedor '{provider}' sem vagas para novas conversas")
+
+
+# event loop -> {provedor: asyncio.Semaphore}; semáforos não podem ser
+# compartilhados entre loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def provider_semaphore(provider: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+    semaphore = semaphores.get(provider)
+    if semaphore is None:
+        cfg = get_chat_concurrency_settings()
+        limit = cfg['PROVIDER_CONCURRENCY'].get(provider, cfg['DEFAULT_CONCURRENCY'])
+        semaphore = semaphores[provider] = asyncio.Semaphore(max(1, int(limit)))
+    return semaphore
+
+
+@contextlib.asynccontextmanager
+async def provider_slot(provider: str):
+    """Ocupa uma vaga do provedor durante o bloco; ProviderBusy se a fila demorar demais."""
+    semaphore = provider_semaphore(provider)
+    timeout = get_chat_concurrency_settings()['QUEUE_TIMEOUT_SECONDS']
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Chatbot assíncrono: sem vaga no provedor '{provider}' após {timeout}s")
+        raise ProviderBusy(provider)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def is_quota_error(error: Exception) -> bool:
+    error_str = str(error).lower()
+    return 'quota' in error_str or '429' in error_str or 'exceeded' in error_str or 'rate limit' in error_str
+
+
+def record_ai_alert(session, user, alert_type, severity, provider, error_message):
+    """Registra o AIResponseAlert e dispara o alerta de WhatsApp (nunca levanta exceção)."""
+    try:
+        from monitoring.models import AIResponseAlert
+        from monitoring.tasks import dispatch_whatsapp_alert
+        alert = AIResponseAlert.objects.create(
+            session=session,
+            user=user,
+            alert_type=alert_type,
+            severity=severity,
+            provider=provider,
+            error_message=error_message,
+            ai_response_preview='',
+        )
+        dispatch_whatsapp_alert(ai_alert_id=alert.pk)
+    except Exception as m_err:
+        logger.warning(f"Erro ao registrar alerta de IA: {m_err}")
+
+
+def _provider_service(provider: str):
+    if provider == 'groq':
+        from .groq_service import get_groq_chatbot_service
+        return get_groq_chatbot_service()
+    from .gemini_service import get_gemini_service
+    return get_gemini_service()
+
+
+async def _aget_response(service, message, conversation_history):
+    # Provedores sem cliente assíncrono (UnifiedChatbotService) rodam em thread
+    if hasattr(service, 'aget_response'):
+        return await service.aget_response(message=message, conversation_history=conversation_history)
+    return await sync_to_async(service.get_response)(message=message, conversation_history=conversation_history)
+
+
+async def generate_chat_reply(message, history, ai_provider, session, user) -> str:
+    """
+    Resposta do chatbot para o turno, com a cadeia de fallback da view síncrona.
+
+    Args:
+        message: mensagem do usuário (com o prefixo '[Usuário: nome] ' na 1ª)
+        history: HistoryWindow da sessão (history_manager.build_history)
+        ai_provider: provedor principal (settings.AI_PROVIDER)
+
+    Raises:
+        ProviderBusy: sem vaga no provedor principal
+    """
+    chatbot_service = await sync_to_async(get_chatbot_service)()
+    try:
+        async with provider_slot(ai_provider):
+            return await _aget_response(chatbot_service, message, history.for_provider(ai_provider))
+    except ProviderBusy:
+        raise
+    except Exception as primary_error:
+        quota_error = is_quota_error(primary_error)
+        fallback = QUOTA_FALLBACK_PROVIDERS.get(ai_provider)
+        if not (quota_error and fallback):
+            # [MONITORAMENTO] Registrar erro genérico da IA
+            await sync_to_async(record_ai_alert)(
+                session, user, 'quota_exceeded' if quota_error else 'api_error', 'high',
+                ai_provider, str(primary_error)[:500],
+            )
+            raise
+
+        logger.warning(f"⚠️ Quota {ai_provider} excedida, fazendo fallback para {fallback}...")
+
+        async def call_fallback():
+            fallback_service = await sync_to_async(_provider_service)(fallback)
+            async with provider_slot(fallback):
+                bot_response_text = await fallback_service.aget_response(
+                    message=message,
+                    conversation_history=history.for_provider(fallback),
+                )
+            logger.info(f"✅ Fallback para {fallback} bem-sucedido!")
+            return bot_response_text
+
+        async def call_openrouter():
+            from core.services.ai_provider_service import AIProviderFactory
+            openrouter = AIProviderFactory.get_provider('openrouter')
+            prompt_parts = history.as_prompt_lines()
+            prompt_parts.append(f"Usuário: {message}")
+            async with provider_slot('openrouter'):
+                bot_response_text = await openrouter.agenerate_text(
+                    prompt="\n".join(prompt_parts),
+                    system_instruction=getattr(chatbot_service, 'SYSTEM_PROMPT', 'Você é um assistente literário.'),
+                    feature_name="chatbot",
+                    temperature=0.7,
+                )
+            logger.info("✅ Fallback final para OpenRouter bem-sucedido!")
+            return bot_response_text
+
+        # Com OpenRouter configurado, a contingência final é disparada em
+        # paralelo (hedge) se o fallback falhar ou demorar AI_HEDGE_DELAY_SECONDS
+        with_openrouter = bool(getattr(settings, 'OPENROUTER_API_KEY', ''))
+        calls = [call_fallback, call_openrouter] if with_openrouter else [call_fallback]
+        try:
+            return await hedged_call(calls)
+        except Exception as fallback_error:
+            if with_openrouter:
+                logger.error(f"❌ Fallback para {fallback} e OpenRouter falharam: {fallback_error}")
+                error_message = f"{ai_provider.title()}+{fallback.title()}+OpenRouter falharam: {fallback_error}"
+            else:
+                logger.error(f"❌ Fallback para {fallback} também falhou: {fallback_error}")
+                error_message = f"{ai_provider.title()} quota + {fallback.title()} fallback falhou: {fallback_error}"
+            await sync_to_async(record_ai_alert)(
+                session, user, 'api_error', 'critical', ai_provider, error_message,
+            )
+            raise
@@ -0,0 +1,269 @@
+"""
+Gazetteer do catálogo para o RAG do Chatbot Literário.
+
+Mantém em memória uma trie por palavras com os títulos dos livros, nomes dos
+autores e nomes de séries conhecidas, todos normalizados (minúsculas, sem
+acentos e sem pontuação). Uma mensagem do usuário é percorrida uma única vez
+da esquerda para a direita: em cada posição a trie segue as palavras seguintes
+e fica com a menção mais longa, que já aponta para os IDs dos livros/autores.
+Com isso o enriquecimento do RAG vira um único `id__in`, em vez de buscas
+`icontains` em core_book/core_author a cada mensagem.
+
+O gazetteer é reconstruído quando a sua versão muda
+(core.services.catalog_service.gazetteer_version, incrementada pelos signals
+de Book/Author só quando título, subtítulo, autor ou nome mudam). Curadoria de
+seções, preços ou revisões de IA não descartam o gazetteer.
+"""
+import logging
+import re
+import sys
+import threading
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Séries reconhecidas (forma normalizada). Os livros de cada série são os que
+# têm essas palavras, em sequência, no título ou subtítulo.
+SERIES_KEYWORDS = (
+    'cronicas de narnia', 'narnia', 'harry potter', 'senhor dos aneis', 'hobbit',
+    'fundacao', 'dune', 'duna', 'game of thrones', 'cronicas de gelo e fogo', 'gelo e fogo',
+    'eragon', 'ciclo da heranca', 'percy jackson', 'guia do mochileiro', 'hitchhiker',
+    'jogos vorazes', 'hunger games', 'divergente', 'maze runner', 'correr ou morrer',
+    'crepusculo', 'twilight', 'cinquenta tons', 'turma da monica', 'sitio do picapau amarelo',
+    'witcher', 'roda do tempo',
+)
+
+# Artigos removidos do início dos títulos para gerar um apelido ("O Hobbit" -> "hobbit")
+LEADING_ARTICLES = ('o', 'a', 'os', 'as', 'um', 'uma', 'the')
+
+# Palavras comuns que não são tratadas como menção quando aparecem sozinhas
+COMMON_WORDS = frozenset({
+    'livro', 'livros', 'autor', 'autora', 'autores', 'obra', 'obras', 'sobre', 'quem',
+    'qual', 'quais', 'como', 'onde', 'quando', 'porque', 'para', 'pelo', 'pela', 'mais',
+    'menos', 'outro', 'outra', 'outros', 'outras', 'esse', 'essa', 'este', 'esta', 'isso',
+    'isto', 'tudo', 'nada', 'muito', 'pouco', 'voce', 'ele', 'ela', 'eles', 'elas', 'meu',
+    'minha', 'seu', 'sua', 'tem', 'temos', 'fala', 'fale', 'conte', 'saga', 'serie',
+    'colecao', 'trilogia', 'historia', 'leitura', 'romance', 'fantasia', 'terror',
+    'suspense', 'ficcao', 'amor', 'vida', 'tempo', 'mundo', 'casa', 'hoje', 'ainda',
+    'obrigado', 'obrigada', 'escreveu', 'escrito', 'escritor', 'escritora', 'gostaria',
+    'quero', 'saber', 'indica', 'indique', 'recomenda', 'recomende',
+})
+
+MIN_SINGLE_WORD_LENGTH = 4
+MIN_ALIAS_LENGTH = 6
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_PAYLOAD = None  # chave da trie que guarda a frase completa no nó final
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos e com pontuação virando espaço simples."""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+@dataclass(frozen=True)
+class EntityMention:
+    """
+    Menção encontrada na mensagem.
+
+    kind: 'book', 'series' ou 'author'
+    ids: IDs de livros ('book'/'series') ou de autores ('author')
+    start/end: posição em palavras na mensagem normalizada
+    """
+    phrase: str
+    kind: str
+    ids: Tuple[int, ...]
+    start: int
+    end: int
+
+
+class _WordTrie:
+    """Trie por palavras; cada nó é um dict palavra -> nó (None guarda a frase)."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, phrase: str):
+        node = self.root
+        for word in phrase.split():
+            node = node.setdefault(sys.intern(word), {})
+        node[_PAYLOAD] = phrase
+
+    def scan(self, words: List[str], longest=True) -> Iterable[Tuple[int, int, str]]:
+        """
+        Menções da esquerda para a direita. Com longest=True, só a mais longa
+        em cada posição e sem sobreposição; senão todas as frases encontradas.
+        """
+        i = 0
+        while i < len(words):
+            node, best = self.root, None
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if _PAYLOAD in node:
+                    best = (i, j + 1, node[_PAYLOAD])
+                    if not longest:
+                        yield best
+            if best and longest:
+                yield best
+                i = best[1]
+            else:
+                i += 1
+
+
+def _accepts_phrase(phrase: str) -> bool:
+    words = phrase.split()
+    if not words:
+        return False
+    if len(words) == 1:
+        return len(phrase) >= MIN_SINGLE_WORD_LENGTH and phrase not in COMMON_WORDS and not phrase.isdigit()
+    return not all(word in COMMON_WORDS or word in LEADING_ARTICLES for word in words)
+
+
+def _without_article(phrase: str) -> Optional[str]:
+    first, _, rest = phrase.partition(' ')
+    if first in LEADING_ARTICLES and len(rest) >= MIN_ALIAS_LENGTH:
+        return rest
+    return None
+
+
+class CatalogGazetteer:
+    """Índice em memória de títulos, séries e autores -> IDs."""
+
+    def __init__(self):
+        self._trie = _WordTrie()
+        # frase normalizada -> {'book': [ids], 'series': [ids], 'author': [ids]}
+        self._entries: Dict[str, Dict[str, List[int]]] = {}
+        # autor -> IDs dos livros (mais recentes primeiro)
+        self._author_books: Dict[int, List[int]] = {}
+
+    def add(self, phrase: str, kind: str, entity_id: int):
+        if not _accepts_phrase(phrase):
+            return
+        ids = self._entries.setdefault(phrase, {}).setdefault(kind, [])
+        if entity_id not in ids:
+            ids.append(entity_id)
+        self._trie.add(phrase)
+
+    def add_author_book(self, author_id: int, book_id: int):
+        self._author_books.setdefault(author_id, []).append(book_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -- consulta -----------------------------------------------------------
+
+    def find_mentions(self, message: str) -> List[EntityMention]:
+        """Marca as menções do catálogo na mensagem em uma única passada."""
+        words = normalize_text(message).split()
+        mentions = []
+        for start, end, phrase in self._trie.scan(words):
+            for kind, ids in self._entries[phrase].items():
+                mentions.append(EntityMention(phrase, kind, tuple(ids), start, end))
+        return mentions
+
+    def lookup(self, name: str, kind: str) -> Tuple[int, ...]:
+        """IDs da frase exata (normalizada) para o tipo pedido."""
+        return tuple(self._entries.get(normalize_text(name), {}).get(kind, ()))
+
+    def book_ids_for(self, mentions: Iterable[EntityMention], kinds=('book', 'series', 'author'),
+                     limit: Optional[int] = None) -> List[int]:
+        """IDs de livros das menções (na ordem da mensagem, sem repetição)."""
+        book_ids, seen = [], set()
+        for mention in mentions:
+            if mention.kind not in kinds:
+                continue
+            if mention.kind == 'author':
+                candidates = [
+                    book_id for author_id in mention.ids
+                    for book_id in self._author_books.get(author_id, ())
+                ]
+            else:
+                candidates = mention.ids
+            for book_id in candidates:
+                if book_id not in seen:
+                    seen.add(book_id)
+                    book_ids.append(book_id)
+                    if limit and len(book_ids) >= limit:
+                        return book_ids
+        return book_ids
+
+    def author_book_ids(self, author_ids: Iterable[int], limit: Optional[int] = None) -> List[int]:
+        book_ids = [book_id for author_id in author_ids for book_id in self._author_books.get(author_id, ())]
+        return book_ids[:limit] if limit else book_ids
+
+
+def build_catalog_gazetteer() -> CatalogGazetteer:
+    """Monta o gazetteer lendo apenas as colunas necessárias de Book e Author."""
+    from core.models import Author, Book
+
+    gazetteer = CatalogGazetteer()
+
+    series_trie = _WordTrie()
+    for keyword in SERIES_KEYWORDS:
+        series_trie.add(keyword)
+
+    books = Book.objects.order_by('-created_at', '-pk').values_list('id', 'title', 'subtitle', 'author_id')
+    for book_id, title, subtitle, author_id in books.iterator(chunk_size=2000):
+        normalized = normalize_text(title)
+        gazetteer.add(normalized, 'book', book_id)
+        alias = _without_article(normalized)
+        if alias:
+            gazetteer.add(alias, 'book', book_id)
+        if author_id:
+            gazetteer.add_author_book(author_id, book_id)
+        title_words = f"{normalized} {normalize_text(subtitle)}".split()
+        for _, _, keyword in series_trie.scan(title_words, longest=False):
+            gazetteer.add(keyword, 'series', book_id)
+
+    authors = list(Author.objects.values_list('id', 'name'))
+    surname_counts = {}
+    for _, name in authors:
+        words = normalize_text(name).split()
+        if len(words) > 1:
+            surname_counts[words[-1]] = surname_counts.get(words[-1], 0) + 1
+    for author_id, name in authors:
+        normalized = normalize_text(name)
+        gazetteer.add(normalized, 'author', author_id)
+        words = normalized.split()
+        # Sobrenome sozinho ("Tolkien") quando não for ambíguo
+        if len(words) > 1 and surname_counts[words[-1]] == 1 and len(words[-1]) >= 5:
+            gazetteer.add(words[-1], 'author', author_id)
+
+    return gazetteer
+
+
+_gazetteer = None
+_gazetteer_token = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_catalog_gazetteer() -> CatalogGazetteer:
+    """
+    Gazetteer da versão atual dos nomes do catálogo (reconstruído quando ela muda).
+
+    Cada versão tem um token em cache: se o cache for limpo, a versão volta a
+    1 mas o token some, e o gazetteer antigo deste processo não é reaproveitado.
+    """
+    global _gazetteer, _gazetteer_token
+    from django.core.cache import cache
+    from core.services.catalog_service import gazetteer_version
+
+    token_key = f'catalog_gazetteer_v{gazetteer_version()}'
+    token = cache.get(token_key)
+    if _gazetteer is not None and token is not None and token == _gazetteer_token:
+        return _gazetteer
+    with _gazetteer_lock:
+        token = cache.get(token_key)
+        if _gazetteer is None or token is None or token != _gazetteer_token:
+            gazetteer = build_catalog_gazetteer()
+            cache.add(token_key, uuid.uuid4().hex, None)
+            _gazetteer, _gazetteer_token = gazetteer, cache.get(token_key)
+            logger.info(f"📚 Gazetteer do catálogo reconstruído: {len(gazetteer)} frases ({token_key})")
+    return _gazetteer
@@ -0,0 +1,112 @@
+"""
+Referências da conversa por ChatSession (último autor citado, "livro 1",
+"livro 2"...), guardadas no cache (Redis) com TTL.
+
+Os serviços de chat são singletons por processo; as referências não podem
+ficar em atributos deles, senão um usuário enxerga o contexto de outro e o
+contexto se perde entre workers. A view ativa o store da sessão durante a
+requisição (activate_session_references) e KnowledgeRetrieval lê/grava nele. O store
+lê o cache uma única vez por requisição e mantém a cópia em memória (memo).
+
+Fora de uma sessão de chat (scripts, shell) cada chamada recebe um store
+temporário, só em memória, que não fica preso ao contexto: nada vaza para
+a próxima requisição atendida pela mesma thread.
+"""
+import contextvars
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_chat_reference_settings() -> dict:
+    """Retorna as configurações das referências de conversa com valores padrão seguros."""
+    defaults = {
+        'TTL_SECONDS': 6 * 3600,
+        'MAX_REFERENCES': 30,
+    }
+    return {**defaults, **getattr(settings, 'CHATBOT_REFERENCES', {})}
+
+
+def reference_cache_key(session_id) -> str:
+    return f'chat_refs_{session_id}'
+
+
+class ConversationReferenceStore:
+    """Referências de uma sessão de chat; session_id=None mantém só em memória."""
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self._references: Optional[Dict[str, Any]] = None if session_id is not None else {}
+
+    def _load(self) -> Dict[str, Any]:
+        if self._references is None:
+            try:
+                self._references = cache.get(reference_cache_key(self.session_id)) or {}
+            except Exception as e:
+                logger.warning(f"Erro ao ler referências da sessão #{self.session_id}: {e}")
+                self._references = {}
+        return self._references
+
+    def _save(self):
+        if self.session_id is None:
+            return
+        cfg = get_chat_reference_settings()
+        references = self._references
+        if len(references) > cfg['MAX_REFERENCES']:
+            # dicts preservam a ordem de inserção: descarta as mais antigas
+            for key in list(references)[:len(references) - cfg['MAX_REFERENCES']]:
+                references.pop(key)
+        try:
+            cache.set(reference_cache_key(self.session_id), references, cfg['TTL_SECONDS'])
+        except Exception as e:
+            logger.warning(f"Erro ao gravar referências da sessão #{self.session_id}: {e}")
+
+    def get(self, reference_id: str) -> Optional[Dict[str, Any]]:
+        return self._load().get(reference_id)
+
+    def set_many(self, references: Dict[str, Any]):
+        """Grava várias referências com uma única escrita no cache."""
+        if not references:
+            return
+        current = self._load()
+        for reference_id, data in references.items():
+            current.pop(reference_id, None)  # reinsere no fim (mais recente)
+            current[reference_id] = data
+        self._save()
+
+    def set(self, reference_id: str, data: Dict[str, Any]):
+        self.set_many({reference_id: data})
+
+    def clear(self):
+        self._references = {}
+        if self.session_id is not None:
+            cache.delete(reference_cache_key(self.session_id))
+
+
+_active_store = contextvars.ContextVar('chat_reference_store', default=None)
+
+
+def current_reference_store() -> ConversationReferenceStore:
+    """Store da sessão ativa; sem sessão, um temporário que não é vinculado ao contexto."""
+    store = _active_store.get()
+    if store is None:
+        return ConversationReferenceStore()
+    return store
+
+
+def activate_session_references(session_id):
+    """Ativa as referências da ChatSession para a requisição atual."""
+    return _active_store.set(ConversationReferenceStore(session_id))
+
+
+def deactivate_session_references(token):
+    _active_store.reset(token)
+
+
+def clear_session_references(session_id):
+    """Remove as referências guardadas de uma sessão (sessão encerrada)."""
+    ConversationReferenceStore(session_id).clear()
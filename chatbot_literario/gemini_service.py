@@ -8,6 +8,7 @@ import logging
 import re
 from typing import Optional, Dict, List
 from django.conf import settings
+from asgiref.sync import sync_to_async
 import google.generativeai as genai
 from .knowledge_retrieval import get_knowledge_retrieval_service
 from core.services.ai_provider_service import AIProviderFactory
@@ -320,14 +321,10 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
                 if last_author_data and last_author_data.get('name'):
                     author_name = last_author_data['name']
                     logger.info(f"gemini_service RAG: Follow-up detectado. Buscando livros do autor: {author_name}")
-                    books = self.knowledge_service.search_books_by_author(author_name, limit=10)
+                    # Livros já guardados na referência da sessão (sem consultar o catálogo)
+                    books = self.knowledge_service.get_author_books(author_name, limit=10)
                     if books:
                         verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=5)
-                        # Salvar novamente no contexto para manter o encadeamento
-                        self.knowledge_service.store_conversation_reference(
-                            'last_author', 
-                            {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
-                        )
                         return f"{message}\n\n{verified_data}"
                     else:
                         logger.warning(f"gemini_service RAG: Nenhum livro encontrado para o autor '{author_name}'")
@@ -345,6 +342,18 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
 
             # INTENT 2: Detalhes de um livro específico
             elif intent_type == 'book_detail':
+                # Título citado no catálogo (gazetteer, uma única query)
+                mentioned = self.knowledge_service.find_mentioned_books(message, kinds=('book',), limit=1)
+                if mentioned:
+                    book = mentioned[0]
+                    verified_data = self.knowledge_service.format_book_for_prompt(book)
+                    if book.get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': book['author_name'], 'id': book.get('author_id')}
+                        )
+                    return f"{message}\n\n{verified_data}"
+
                 words = message.split()
                 if 'sobre' in message.lower():
                     idx = words.index('sobre') if 'sobre' in words else -1
@@ -363,6 +372,19 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
 
             # INTENT 3: Query sobre autor de um livro específico
             elif intent_type == 'author_query':
+                # Título citado no catálogo (gazetteer, uma única query)
+                mentioned = self.knowledge_service.find_mentioned_books(message, kinds=('book',), limit=1)
+                if mentioned:
+                    book = mentioned[0]
+                    verified_data = self.knowledge_service.format_book_for_prompt(book)
+                    if book.get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': book['author_name'], 'id': book.get('author_id')}
+                        )
+                    logger.info(f"✅ RAG: Livro '{book['title']}' reconhecido! Autor: {book.get('author_name', 'N/A')}")
+                    return f"{message}\n\n{verified_data}"
+
                 query_words = [
                     'gostaria de saber quem escreveu o livro',
                     'gostaria de saber quem escreveu',
@@ -425,6 +447,16 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
 
             # INTENT 4: Livros de um autor
             elif intent_type == 'author_search':
+                # Autor citado no catálogo (gazetteer, uma única query)
+                books = self.knowledge_service.find_mentioned_books(message, kinds=('author',), limit=10)
+                if books:
+                    verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=5)
+                    self.knowledge_service.store_conversation_reference(
+                        'last_author',
+                        {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
+                    )
+                    return f"{message}\n\n{verified_data}"
+
                 words = message.split()
                 if 'do' in words or 'de' in words:
                     idx = words.index('do') if 'do' in words else words.index('de')
@@ -443,6 +475,17 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
 
             # INTENT 5: Informações sobre série
             elif intent_type == 'series_info':
+                # Série citada no catálogo (gazetteer, uma única query)
+                books = self.knowledge_service.find_mentioned_books(message, kinds=('series',), limit=20)
+                if books:
+                    verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=7)
+                    if books[0].get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
+                        )
+                    return f"{message}\n\n{verified_data}"
+
                 series_keywords = {
                     'nárnia': 'Nárnia', 'narnia': 'Nárnia',
                     'harry potter': 'Harry Potter',
@@ -634,100 +677,144 @@ NÃO invente títulos de livros. Se você não tem certeza, diga honestamente qu
             Exception: Se houver erro na comunicação com a API
         """
         try:
-            logger.info(f"gemini_service: Enviando mensagem ao Gemini: {message[:100]}...")
+            enriched_message = self._prepare_message(message, bypass_rag)
 
-            if bypass_rag:
-                logger.info("gemini_service: RAG ignorado por solicitação (bypass_rag=True)")
-                enriched_message = message
+            # Se houver histórico, usar chat session. Caso contrário, gerar conteúdo direto.
+            if conversation_history:
+                chat = self.model.start_chat(history=conversation_history)
+                response = chat.send_message(enriched_message)
             else:
-                # === PRÉ-PROCESSAMENTO: Separar prefixo de contexto da mensagem limpa ===
-                # Na primeira mensagem, a view injeta '[Usuário: nome] ' para personalização.
-                # O RAG/KB precisa receber a mensagem LIMPA (sem prefixo) para fazer match
-                # correto com as perguntas salvas pelos admins na Knowledge Base.
-                user_prefix_match = re.match(r'^\[Usuário: .+?\] ', message)
-                if user_prefix_match:
-                    clean_message = message[user_prefix_match.end():]  # mensagem sem prefixo
-                    logger.info(f"gemini_service: Prefixo de usuário detectado e removido para RAG. Mensagem limpa: '{clean_message[:80]}'")
-                else:
-                    clean_message = message  # sem prefixo, usar diretamente
+                response = self.model.generate_content(
+                    enriched_message,
+                    generation_config=self.generation_config
+                )
 
-                # === RAG STEP 1: Detectar intenção (usando mensagem LIMPA) ===
-                rag_intent = self._detect_rag_intent(clean_message)
+            return self._finish_response(response)
 
-                # === RAG STEP 2: Buscar conhecimento verificado (usando mensagem LIMPA) ===
-                enriched_clean = self._apply_rag_knowledge(clean_message, rag_intent)
+        except Exception as e:
+            return self._handle_error(e)
 
-                # Verificar se o RAG encontrou dados locais
-                rag_found_data = enriched_clean != clean_message
+    async def aget_response(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        bypass_rag: bool = False
+    ) -> str:
+        """
+        Variante assíncrona de get_response (endpoint ASGI do chatbot).
 
-                if rag_found_data:
-                    logger.info("✅ RAG ativado: Mensagem enriquecida com dados verificados do banco")
-                    # Reintegrar prefixo de usuário na mensagem enriquecida (para a IA cumprimentar)
-                    if user_prefix_match:
-                        enriched_message = message[:user_prefix_match.end()] + enriched_clean
-                    else:
-                        enriched_message = enriched_clean
-                else:
-                    logger.info("ℹ️ RAG não ativado: Mensagem sem enriquecimento")
-                    enriched_message = message  # manter mensagem original (com prefixo) para a IA
+        RAG e ORM rodam em thread via sync_to_async; a chamada ao Gemini usa os
+        métodos *_async do SDK, sem ocupar thread enquanto espera a resposta.
+        """
+        try:
+            enriched_message = await sync_to_async(self._prepare_message)(message, bypass_rag)
 
-            # Se houver histórico, usar chat session. Caso contrário, gerar conteúdo direto.
             if conversation_history:
                 chat = self.model.start_chat(history=conversation_history)
-                response = chat.send_message(enriched_message)
+                response = await chat.send_message_async(enriched_message)
             else:
-                response = self.model.generate_content(
+                response = await self.model.generate_content_async(
                     enriched_message,
                     generation_config=self.generation_config
                 )
 
-            # Verificar finish_reason
-            finish_reason = response.candidates[0].finish_reason
-            logger.info(f"gemini_service: Finish reason: {finish_reason}")
-
-            # finish_reason pode ser:
-            # 0 = FINISH_REASON_UNSPECIFIED
-            # 1 = STOP (resposta completa - OK)
-            # 2 = MAX_TOKENS (atingiu limite de tokens)
-            # 3 = SAFETY (bloqueado por segurança)
-            # 4 = RECITATION (bloqueado por recitação/plágio)
-            # 5 = OTHER
-
-            if finish_reason == 1:  # STOP - resposta completa
-                bot_response = response.text.strip()
-                logger.info(f"gemini_service: Resposta recebida com sucesso ({len(bot_response)} chars)")
-                return bot_response
-
-            elif finish_reason == 2:  # MAX_TOKENS
-                logger.warning("gemini_service: Resposta atingiu limite de tokens")
-                if response.text:
-                    return response.text.strip() + "\n\n[Resposta foi cortada por limite de tamanho. Peça para continuar!]"
-                else:
-                    return "Desculpe, a resposta ficou muito longa. Pode reformular a pergunta de forma mais específica? 📚"
-
-            elif finish_reason == 3:  # SAFETY
-                logger.warning("gemini_service: Resposta bloqueada por filtros de segurança")
-                safety_ratings = response.candidates[0].safety_ratings
-                logger.warning(f"gemini_service: Safety ratings: {safety_ratings}")
-
-                return ("Ops! Parece que sua pergunta acionou os filtros de segurança. 🔒 "
-                        "Vamos manter nossa conversa focada em literatura e livros? "
-                        "Posso te ajudar com recomendações, análises literárias ou dúvidas sobre o CG.BookStore! 📚✨")
-
-            elif finish_reason == 4:  # RECITATION
-                logger.warning("gemini_service: Resposta bloqueada por recitação")
-                return ("Essa resposta contém muito conteúdo de fontes existentes. "
-                        "Posso reformular ou dar minha própria perspectiva sobre o assunto? 📖")
-
-            else:  # UNSPECIFIED ou OTHER
-                logger.error(f"gemini_service: Finish reason inesperado: {finish_reason}")
-                if response.text:
-                    return response.text.strip()
+            return self._finish_response(response)
+
+        except Exception as e:
+            return self._handle_error(e)
+
+    def _prepare_message(self, message: str, bypass_rag: bool) -> str:
+        """Aplica o RAG e retorna a mensagem (enriquecida ou original) enviada ao Gemini."""
+        logger.info(f"gemini_service: Enviando mensagem ao Gemini: {message[:100]}...")
+
+        if bypass_rag:
+            logger.info("gemini_service: RAG ignorado por solicitação (bypass_rag=True)")
+            enriched_message = message
+        else:
+            # === PRÉ-PROCESSAMENTO: Separar prefixo de contexto da mensagem limpa ===
+            # Na primeira mensagem, a view injeta '[Usuário: nome] ' para personalização.
+            # O RAG/KB precisa receber a mensagem LIMPA (sem prefixo) para fazer match
+            # correto com as perguntas salvas pelos admins na Knowledge Base.
+            user_prefix_match = re.match(r'^\[Usuário: .+?\] ', message)
+            if user_prefix_match:
+                clean_message = message[user_prefix_match.end():]  # mensagem sem prefixo
+                logger.info(f"gemini_service: Prefixo de usuário detectado e removido para RAG. Mensagem limpa: '{clean_message[:80]}'")
+            else:
+                clean_message = message  # sem prefixo, usar diretamente
+
+            # === RAG STEP 1: Detectar intenção (usando mensagem LIMPA) ===
+            rag_intent = self._detect_rag_intent(clean_message)
+
+            # === RAG STEP 2: Buscar conhecimento verificado (usando mensagem LIMPA) ===
+            enriched_clean = self._apply_rag_knowledge(clean_message, rag_intent)
+
+            # Verificar se o RAG encontrou dados locais
+            rag_found_data = enriched_clean != clean_message
+
+            if rag_found_data:
+                logger.info("✅ RAG ativado: Mensagem enriquecida com dados verificados do banco")
+                # Reintegrar prefixo de usuário na mensagem enriquecida (para a IA cumprimentar)
+                if user_prefix_match:
+                    enriched_message = message[:user_prefix_match.end()] + enriched_clean
                 else:
-                    return ("Hmm, algo inesperado aconteceu. 🤔 "
-                            "Pode tentar perguntar de outra forma? Estou aqui para ajudar! 💬")
+                    enriched_message = enriched_clean
+            else:
+                logger.info("ℹ️ RAG não ativado: Mensagem sem enriquecimento")
+                enriched_message = message  # manter mensagem original (com prefixo) para a IA
+
+        return enriched_message
+
+    def _finish_response(self, response) -> str:
+        """Extrai o texto da resposta conforme o finish_reason."""
+        # Verificar finish_reason
+        finish_reason = response.candidates[0].finish_reason
+        logger.info(f"gemini_service: Finish reason: {finish_reason}")
+
+        # finish_reason pode ser:
+        # 0 = FINISH_REASON_UNSPECIFIED
+        # 1 = STOP (resposta completa - OK)
+        # 2 = MAX_TOKENS (atingiu limite de tokens)
+        # 3 = SAFETY (bloqueado por segurança)
+        # 4 = RECITATION (bloqueado por recitação/plágio)
+        # 5 = OTHER
+
+        if finish_reason == 1:  # STOP - resposta completa
+            bot_response = response.text.strip()
+            logger.info(f"gemini_service: Resposta recebida com sucesso ({len(bot_response)} chars)")
+            return bot_response
+
+        elif finish_reason == 2:  # MAX_TOKENS
+            logger.warning("gemini_service: Resposta atingiu limite de tokens")
+            if response.text:
+                return response.text.strip() + "\n\n[Resposta foi cortada por limite de tamanho. Peça para continuar!]"
+            else:
+                return "Desculpe, a resposta ficou muito longa. Pode reformular a pergunta de forma mais específica? 📚"
+
+        elif finish_reason == 3:  # SAFETY
+            logger.warning("gemini_service: Resposta bloqueada por filtros de segurança")
+            safety_ratings = response.candidates[0].safety_ratings
+            logger.warning(f"gemini_service: Safety ratings: {safety_ratings}")
+
+            return ("Ops! Parece que sua pergunta acionou os filtros de segurança. 🔒 "
+                    "Vamos manter nossa conversa focada em literatura e livros? "
+                    "Posso te ajudar com recomendações, análises literárias ou dúvidas sobre o CG.BookStore! 📚✨")
+
+        elif finish_reason == 4:  # RECITATION
+            logger.warning("gemini_service: Resposta bloqueada por recitação")
+            return ("Essa resposta contém muito conteúdo de fontes existentes. "
+                    "Posso reformular ou dar minha própria perspectiva sobre o assunto? 📖")
+
+        else:  # UNSPECIFIED ou OTHER
+            logger.error(f"gemini_service: Finish reason inesperado: {finish_reason}")
+            if response.text:
+                return response.text.strip()
+            else:
+                return ("Hmm, algo inesperado aconteceu. 🤔 "
+                        "Pode tentar perguntar de outra forma? Estou aqui para ajudar! 💬")
 
-        except genai.types.StopCandidateException as e:
+    def _handle_error(self, e: Exception) -> str:
+        """Conteúdo bloqueado vira mensagem amigável; quota e demais erros são propagados."""
+        if isinstance(e, genai.types.StopCandidateException):
             # Erro específico de conteúdo bloqueado
             logger.warning(f"gemini_service: Conteúdo bloqueado pelo filtro: {e}")
             return ("Não consigo processar essa solicitação específica. 🔒\n\n"
@@ -736,14 +823,13 @@ NÃO invente títulos de livros. Se você não tem certeza, diga honestamente qu
                     "📰 Nossa seção de **Notícias**\n"
                     "📚 Explorar nosso acervo na **Loja**\n\n"
                     "Posso ajudar com outra pergunta sobre livros? 📖")
-        except Exception as e:
-            error_str = str(e).lower()
-            # Se for erro de quota, propagar para a view fazer fallback
-            if 'quota' in error_str or '429' in error_str or 'exceeded' in error_str or 'resourceexhausted' in error_str:
-                logger.warning(f"gemini_service: Quota excedida, propagando para fallback: {e}")
-                raise Exception(f"quota_exceeded: {e}")
-            logger.error(f"gemini_service: Erro ao gerar resposta do chatbot: {e}")
-            raise Exception(f"Erro ao processar mensagem: {e}")
+        error_str = str(e).lower()
+        # Se for erro de quota, propagar para a view fazer fallback
+        if 'quota' in error_str or '429' in error_str or 'exceeded' in error_str or 'resourceexhausted' in error_str:
+            logger.warning(f"gemini_service: Quota excedida, propagando para fallback: {e}")
+            raise Exception(f"quota_exceeded: {e}")
+        logger.error(f"gemini_service: Erro ao gerar resposta do chatbot: {e}")
+        raise Exception(f"Erro ao processar mensagem: {e}")
 
     def format_history_for_gemini(
         self,
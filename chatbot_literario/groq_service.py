@@ -4,11 +4,15 @@ Alternativa rápida e gratuita ao Google Gemini.
 
 Integrado com RAG (Retrieval-Augmented Generation) para reduzir alucinações.
 """
+import asyncio
 import logging
 import re
+import weakref
 from typing import Optional, Dict, List
 from django.conf import settings
-from groq import Groq
+from asgiref.sync import sync_to_async
+from groq import AsyncGroq, Groq
+from core.services.ai_provider_service import get_async_http_client
 from .knowledge_retrieval import get_knowledge_retrieval_service
 
 logger = logging.getLogger(__name__)
@@ -144,6 +148,9 @@ ESCOPO:
         # - gemma2-9b-it (eficiente e rápido)
         self.model_name = getattr(settings, 'GROQ_MODEL_NAME', 'llama-3.3-70b-versatile')
         self._client = None
+        # Clientes assíncronos por event loop (o httpx.AsyncClient não pode ser
+        # compartilhado entre loops)
+        self._async_clients = weakref.WeakKeyDictionary()
 
         # Configurações de geração - temperatura muito baixa para mínima alucinação
         self.generation_config = {
@@ -170,6 +177,18 @@ ESCOPO:
 
         return self._client
 
+    def get_async_client(self) -> AsyncGroq:
+        """Cliente AsyncGroq do event loop corrente, sobre o pool HTTP compartilhado."""
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY não configurada nas variáveis de ambiente")
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncGroq(api_key=self.api_key, http_client=get_async_http_client())
+            self._async_clients[loop] = client
+        return client
+
     def is_available(self) -> bool:
         """Verifica se o serviço está disponível."""
         try:
@@ -301,14 +320,10 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
                 if last_author_data and last_author_data.get('name'):
                     author_name = last_author_data['name']
                     logger.info(f"RAG: Follow-up detectado. Buscando livros do autor em contexto: {author_name}")
-                    books = self.knowledge_service.search_books_by_author(author_name, limit=10)
+                    # Livros já guardados na referência da sessão (sem consultar o catálogo)
+                    books = self.knowledge_service.get_author_books(author_name, limit=10)
                     if books:
                         verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=5)
-                        # Salvar novamente no contexto para manter o encadeamento
-                        self.knowledge_service.store_conversation_reference(
-                            'last_author', 
-                            {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
-                        )
                         return f"{message}\n\n{verified_data}"
                     else:
                         logger.warning(f"RAG: Nenhum livro encontrado para o autor '{author_name}'")
@@ -329,6 +344,18 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
             elif intent_type == 'book_detail':
                 # Extrair nome do livro da mensagem (simplificado)
                 # Exemplo: "Me fale sobre O Príncipe Caspian"
+                # Título citado no catálogo (gazetteer, uma única query)
+                mentioned = self.knowledge_service.find_mentioned_books(message, kinds=('book',), limit=1)
+                if mentioned:
+                    book = mentioned[0]
+                    verified_data = self.knowledge_service.format_book_for_prompt(book)
+                    if book.get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': book['author_name'], 'id': book.get('author_id')}
+                        )
+                    return f"{message}\n\n{verified_data}"
+
                 words = message.split()
                 if 'sobre' in message.lower():
                     idx = words.index('sobre') if 'sobre' in words else -1
@@ -392,6 +419,16 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
             elif intent_type == 'author_search':
                 # Extrair nome do autor (simplificado)
                 # Exemplo: "Livros do C.S. Lewis"
+                # Autor citado no catálogo (gazetteer, uma única query)
+                books = self.knowledge_service.find_mentioned_books(message, kinds=('author',), limit=10)
+                if books:
+                    verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=5)
+                    self.knowledge_service.store_conversation_reference(
+                        'last_author',
+                        {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
+                    )
+                    return f"{message}\n\n{verified_data}"
+
                 words = message.split()
                 if 'do' in words or 'de' in words:
                     idx = words.index('do') if 'do' in words else words.index('de')
@@ -410,6 +447,17 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
 
             # INTENT 5: Informações sobre série
             elif intent_type == 'series_info':
+                # Série citada no catálogo (gazetteer, uma única query)
+                books = self.knowledge_service.find_mentioned_books(message, kinds=('series',), limit=20)
+                if books:
+                    verified_data = self.knowledge_service.format_multiple_books_for_prompt(books, max_books=7)
+                    if books[0].get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': books[0]['author_name'], 'id': books[0].get('author_id')}
+                        )
+                    return f"{message}\n\n{verified_data}"
+
                 # Buscar série mencionada (expandida com mais séries populares)
                 series_keywords = {
                     # Fantasia
@@ -479,6 +527,20 @@ Se o FAQ responder completamente, NÃO adicione informações extras."""
                 # Extrair título do livro da mensagem
                 # Exemplos: "Quem escreveu Quarta Asa?", "Quem é o autor de Neuromancer?"
 
+                # Título citado no catálogo (gazetteer, uma única query)
+                mentioned = self.knowledge_service.find_mentioned_books(message, kinds=('book',), limit=1)
+                if mentioned:
+                    book = mentioned[0]
+                    verified_data = self.knowledge_service.format_book_for_prompt(book)
+                    if book.get('author_name'):
+                        self.knowledge_service.store_conversation_reference(
+                            'last_author',
+                            {'name': book['author_name'], 'id': book.get('author_id')}
+                        )
+                    logger.info(f"✅ RAG: Livro '{book['title']}' reconhecido! Autor: {book.get('author_name', 'N/A')}")
+                    return f"{message}\n\n{verified_data}"
+
+
                 # Remover palavras de query para isolar o título (ordenadas da mais específica para a menos)
                 query_words = [
                     'gostaria de saber quem escreveu o livro',
@@ -717,99 +779,143 @@ NÃO invente títulos de livros. Se você não tem certeza, diga honestamente qu
             Exception: Se houver erro na comunicação com a API
         """
         try:
-            logger.info(f"Enviando mensagem ao Groq: {message[:100]}...")
-
-            if bypass_rag:
-                logger.info("groq_service: RAG ignorado por solicitação (bypass_rag=True)")
-                enriched_message = message
-                rag_intent = {}
-            else:
-                # === PRÉ-PROCESSAMENTO: Separar prefixo de contexto da mensagem limpa ===
-                # Na primeira mensagem, a view injeta '[Usuário: nome] ' para personalização.
-                # O RAG/KB precisa receber a mensagem LIMPA (sem prefixo) para fazer match
-                # correto com as perguntas salvas pelos admins na Knowledge Base.
-                user_prefix_match = re.match(r'^\[Usuário: .+?\] ', message)
-                if user_prefix_match:
-                    clean_message = message[user_prefix_match.end():]  # mensagem sem prefixo
-                    logger.info(f"Prefixo de usuário detectado e removido para RAG. Mensagem limpa: '{clean_message[:80]}'")
-                else:
-                    clean_message = message  # sem prefixo, usar diretamente
-
-                # === RAG STEP 1: Detectar intenção (usando mensagem LIMPA) ===
-                rag_intent = self._detect_rag_intent(clean_message)
+            messages, enriched_message, rag_intent = self._prepare_request(message, conversation_history, bypass_rag)
 
-                # === RAG STEP 2: Buscar conhecimento verificado (usando mensagem LIMPA) ===
-                enriched_clean = self._apply_rag_knowledge(clean_message, rag_intent)
+            # Fazer chamada à API Groq
+            chat_completion = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model_name,
+                **self.generation_config
+            )
 
-                # Verificar se o RAG encontrou dados locais
-                rag_found_data = enriched_clean != clean_message
+            return self._finish_response(chat_completion, enriched_message, rag_intent)
 
-                if rag_found_data:
-                    logger.info("✅ RAG ativado: Mensagem enriquecida com dados verificados do banco")
-                    # Reintegrar prefixo de usuário na mensagem enriquecida (para a IA cumprimentar)
-                    if user_prefix_match:
-                        enriched_message = message[:user_prefix_match.end()] + enriched_clean
-                    else:
-                        enriched_message = enriched_clean
-                else:
-                    logger.info("ℹ️ RAG não ativado: Mensagem sem enriquecimento")
-                    enriched_message = message  # manter mensagem original (com prefixo) para a IA
-
-            # Preparar mensagens para a API
-            messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta com Groq: {e}")
+            raise Exception(f"Erro ao processar mensagem com Groq: {e}")
 
-            # Adicionar histórico se fornecido
-            if conversation_history:
-                messages.extend(conversation_history)
+    async def aget_response(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        bypass_rag: bool = False
+    ) -> str:
+        """
+        Variante assíncrona de get_response (endpoint ASGI do chatbot).
 
-            # Adicionar mensagem enriquecida (com RAG se aplicável)
-            messages.append({"role": "user", "content": enriched_message})
+        RAG e ORM rodam em thread via sync_to_async; a chamada à API usa o
+        cliente assíncrono, sem ocupar thread enquanto espera o Groq.
+        """
+        try:
+            messages, enriched_message, rag_intent = await sync_to_async(self._prepare_request)(
+                message, conversation_history, bypass_rag
+            )
 
-            # Fazer chamada à API Groq
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.get_async_client().chat.completions.create(
                 messages=messages,
                 model=self.model_name,
                 **self.generation_config
             )
 
-            # Extrair resposta
-            bot_response = chat_completion.choices[0].message.content.strip()
+            return await sync_to_async(self._finish_response)(chat_completion, enriched_message, rag_intent)
 
-            # === RAG STEP 3: Armazenar referências de livros mencionados ===
-            if rag_intent.get('intent_type') in ['book_recommendation', 'author_search', 'category_search', 'series_info']:
-                self._store_book_references(enriched_message)
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta com Groq (async): {e}")
+            raise Exception(f"Erro ao processar mensagem com Groq: {e}")
 
-            # Verificar finish_reason
-            finish_reason = chat_completion.choices[0].finish_reason
-            logger.info(f"Groq finish reason: {finish_reason}")
+    def _prepare_request(self, message: str, conversation_history, bypass_rag: bool):
+        """
+        Aplica o RAG e monta a lista de mensagens da API.
 
-            # finish_reason pode ser: "stop", "length", "content_filter", etc.
+        Returns:
+            tuple: (messages, enriched_message, rag_intent)
+        """
+        logger.info(f"Enviando mensagem ao Groq: {message[:100]}...")
+
+        if bypass_rag:
+            logger.info("groq_service: RAG ignorado por solicitação (bypass_rag=True)")
+            enriched_message = message
+            rag_intent = {}
+        else:
+            # === PRÉ-PROCESSAMENTO: Separar prefixo de contexto da mensagem limpa ===
+            # Na primeira mensagem, a view injeta '[Usuário: nome] ' para personalização.
+            # O RAG/KB precisa receber a mensagem LIMPA (sem prefixo) para fazer match
+            # correto com as perguntas salvas pelos admins na Knowledge Base.
+            user_prefix_match = re.match(r'^\[Usuário: .+?\] ', message)
+            if user_prefix_match:
+                clean_message = message[user_prefix_match.end():]  # mensagem sem prefixo
+                logger.info(f"Prefixo de usuário detectado e removido para RAG. Mensagem limpa: '{clean_message[:80]}'")
+            else:
+                clean_message = message  # sem prefixo, usar diretamente
 
-            if finish_reason == "stop":
-                logger.info(f"Resposta Groq recebida com sucesso ({len(bot_response)} chars)")
-                return bot_response
+            # === RAG STEP 1: Detectar intenção (usando mensagem LIMPA) ===
+            rag_intent = self._detect_rag_intent(clean_message)
 
-            elif finish_reason == "length":
-                logger.warning("Resposta Groq atingiu limite de tokens")
-                return bot_response + "\n\n[Resposta foi cortada por limite de tamanho. Peça para continuar!]"
+            # === RAG STEP 2: Buscar conhecimento verificado (usando mensagem LIMPA) ===
+            enriched_clean = self._apply_rag_knowledge(clean_message, rag_intent)
 
-            elif finish_reason == "content_filter":
-                logger.warning("Resposta Groq bloqueada por filtros de conteúdo")
-                return ("Ops! Parece que sua pergunta acionou os filtros de segurança. 🔒 "
-                       "Vamos manter nossa conversa focada em literatura e livros? "
-                       "Posso te ajudar com recomendações, análises literárias ou dúvidas sobre o CG.BookStore! 📚✨")
+            # Verificar se o RAG encontrou dados locais
+            rag_found_data = enriched_clean != clean_message
 
-            else:
-                logger.warning(f"Groq finish_reason inesperado: {finish_reason}")
-                if bot_response:
-                    return bot_response
+            if rag_found_data:
+                logger.info("✅ RAG ativado: Mensagem enriquecida com dados verificados do banco")
+                # Reintegrar prefixo de usuário na mensagem enriquecida (para a IA cumprimentar)
+                if user_prefix_match:
+                    enriched_message = message[:user_prefix_match.end()] + enriched_clean
                 else:
-                    return ("Hmm, algo inesperado aconteceu. 🤔 "
-                           "Pode tentar perguntar de outra forma? Estou aqui para ajudar! 💬")
+                    enriched_message = enriched_clean
+            else:
+                logger.info("ℹ️ RAG não ativado: Mensagem sem enriquecimento")
+                enriched_message = message  # manter mensagem original (com prefixo) para a IA
 
-        except Exception as e:
-            logger.error(f"Erro ao gerar resposta com Groq: {e}")
-            raise Exception(f"Erro ao processar mensagem com Groq: {e}")
+        # Preparar mensagens para a API
+        messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
+
+        # Adicionar histórico se fornecido
+        if conversation_history:
+            messages.extend(conversation_history)
+
+        # Adicionar mensagem enriquecida (com RAG se aplicável)
+        messages.append({"role": "user", "content": enriched_message})
+
+        return messages, enriched_message, rag_intent
+
+    def _finish_response(self, chat_completion, enriched_message: str, rag_intent: Dict) -> str:
+        """Extrai o texto da resposta da API e guarda as referências de livros."""
+        # Extrair resposta
+        bot_response = chat_completion.choices[0].message.content.strip()
+
+        # === RAG STEP 3: Armazenar referências de livros mencionados ===
+        if rag_intent.get('intent_type') in ['book_recommendation', 'author_search', 'category_search', 'series_info']:
+            self._store_book_references(enriched_message)
+
+        # Verificar finish_reason
+        finish_reason = chat_completion.choices[0].finish_reason
+        logger.info(f"Groq finish reason: {finish_reason}")
+
+        # finish_reason pode ser: "stop", "length", "content_filter", etc.
+
+        if finish_reason == "stop":
+            logger.info(f"Resposta Groq recebida com sucesso ({len(bot_response)} chars)")
+            return bot_response
+
+        elif finish_reason == "length":
+            logger.warning("Resposta Groq atingiu limite de tokens")
+            return bot_response + "\n\n[Resposta foi cortada por limite de tamanho. Peça para continuar!]"
+
+        elif finish_reason == "content_filter":
+            logger.warning("Resposta Groq bloqueada por filtros de conteúdo")
+            return ("Ops! Parece que sua pergunta acionou os filtros de segurança. 🔒 "
+                   "Vamos manter nossa conversa focada em literatura e livros? "
+                   "Posso te ajudar com recomendações, análises literárias ou dúvidas sobre o CG.BookStore! 📚✨")
+
+        else:
+            logger.warning(f"Groq finish_reason inesperado: {finish_reason}")
+            if bot_response:
+                return bot_response
+            else:
+                return ("Hmm, algo inesperado aconteceu. 🤔 "
+                       "Pode tentar perguntar de outra forma? Estou aqui para ajudar! 💬")
 
     def _store_book_references(self, enriched_message: str):
         """
@@ -826,16 +932,32 @@ NÃO invente títulos de livros. Se você não tem certeza, diga honestamente qu
                 # Extrair livros numerados (formato: "1. **Título** (Autor)")
                 book_pattern = r'(\d+)\.\s+\*\*(.+?)\*\*\s+\((.+?)\)'
                 matches = re.findall(book_pattern, enriched_message)
+                if not matches:
+                    return
+
+                # Títulos resolvidos pelo gazetteer e buscados em uma única query
+                gazetteer = self.knowledge_service._get_gazetteer()
+                title_ids = {}
+                for _, title, _ in matches:
+                    ids = gazetteer.lookup(title, 'book') if gazetteer else ()
+                    if len(ids) == 1:
+                        title_ids[title] = ids[0]
+                books_by_id = {
+                    book['id']: book
+                    for book in self.knowledge_service.get_books_by_ids(title_ids.values())
+                }
 
-                for match in matches:
-                    book_num, title, author = match
-                    ref_id = f"livro_{book_num}"
-
-                    # Buscar livro completo no banco
-                    book_data = self.knowledge_service.get_book_by_exact_title(title)
+                references = {}
+                for book_num, title, author in matches:
+                    book_data = books_by_id.get(title_ids.get(title))
+                    if book_data is None:
+                        book_data = self.knowledge_service.get_book_by_exact_title(title)
                     if book_data:
-                        self.knowledge_service.store_conversation_reference(ref_id, book_data)
-                        logger.info(f"Referência armazenada: {ref_id} = '{title}'")
+                        references[f"livro_{book_num}"] = book_data
+
+                self.knowledge_service.store_conversation_references(references)
+                if references:
+                    logger.info(f"Referências armazenadas: {sorted(references)}")
 
         except Exception as e:
             logger.error(f"Erro ao armazenar referências de livros: {e}", exc_info=True)
@@ -0,0 +1,223 @@
+"""
+Histórico da conversa enviado ao LLM com orçamento de tokens.
+
+A cada turno só as mensagens mais recentes que cabem em TOKEN_BUDGET vão
+literalmente para o provedor. As mais antigas são compactadas em um resumo
+acumulado (ChatSession.summary, também em cache) que cobre as mensagens até
+ChatSession.summary_until_id. Quando mensagens saem da janela sem estarem no
+resumo, a task refresh_chat_summary atualiza o resumo em segundo plano; até
+lá o turno segue com o resumo anterior, sem esperar pelo LLM.
+
+Os tokens são estimados por caracteres (CHARS_PER_TOKEN), sem depender do
+tokenizer de cada provedor.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = '[Resumo da conversa até aqui]'
+SUMMARY_ACK = 'Entendido, vou considerar esse contexto.'
+
+
+def get_chat_history_settings() -> dict:
+    """Retorna as configurações do histórico da conversa com valores padrão seguros."""
+    defaults = {
+        'TOKEN_BUDGET': 1500,
+        'MAX_MESSAGES': 20,
+        'MIN_RECENT_MESSAGES': 2,
+        'CHARS_PER_TOKEN': 4,
+        'SUMMARY_MAX_TOKENS': 300,
+        'SUMMARY_CACHE_SECONDS': 24 * 3600,
+        'SUMMARY_LOCK_SECONDS': 120,
+    }
+    return {**defaults, **getattr(settings, 'CHATBOT_HISTORY', {})}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or '') / get_chat_history_settings()['CHARS_PER_TOKEN'])
+
+
+def summary_cache_key(session_id) -> str:
+    return f'chat_summary_{session_id}'
+
+
+def summary_lock_key(session_id) -> str:
+    return f'chat_summary_refresh_{session_id}'
+
+
+@dataclass
+class HistoryWindow:
+    """Mensagens recentes (ordem cronológica) e o resumo das anteriores."""
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ''
+    has_history: bool = False
+
+    def for_groq(self) -> List[Dict[str, str]]:
+        history = []
+        if self.summary:
+            history.append({'role': 'user', 'content': f'{SUMMARY_PREFIX}\n{self.summary}'})
+            history.append({'role': 'assistant', 'content': SUMMARY_ACK})
+        for msg in self.messages:
+            history.append({
+                'role': 'user' if msg['role'] == 'user' else 'assistant',
+                'content': msg['content'],
+            })
+        return history
+
+    def for_gemini(self) -> List[Dict]:
+        history = []
+        if self.summary:
+            history.append({'role': 'user', 'parts': [f'{SUMMARY_PREFIX}\n{self.summary}']})
+            history.append({'role': 'model', 'parts': [SUMMARY_ACK]})
+        for msg in self.messages:
+            history.append({
+                'role': 'user' if msg['role'] == 'user' else 'model',
+                'parts': [msg['content']],
+            })
+        return history
+
+    def for_provider(self, provider: str):
+        return self.for_groq() if provider == 'groq' else self.for_gemini()
+
+    def as_prompt_lines(self) -> List[str]:
+        """Histórico em texto corrido (provedores sem chat, ex: OpenRouter)."""
+        lines = [f'{SUMMARY_PREFIX} {self.summary}'] if self.summary else []
+        for msg in self.messages:
+            role = 'Usuário' if msg['role'] == 'user' else 'Assistente'
+            lines.append(f"{role}: {msg['content']}")
+        return lines
+
+
+def get_session_summary(session) -> Dict:
+    """{'text', 'until_id'} do resumo da sessão (cache, depois banco)."""
+    summary = cache.get(summary_cache_key(session.id))
+    if summary is None:
+        summary = {'text': session.summary, 'until_id': session.summary_until_id or 0}
+        cache.set(summary_cache_key(session.id), summary, get_chat_history_settings()['SUMMARY_CACHE_SECONDS'])
+    return summary
+
+
+def build_history(session, exclude_id=None) -> HistoryWindow:
+    """
+    Janela do histórico para o próximo turno: mensagens recentes dentro do
+    orçamento de tokens + resumo das anteriores. Agenda a atualização do
+    resumo quando há mensagens fora da janela ainda não resumidas.
+    """
+    cfg = get_chat_history_settings()
+    queryset = session.messages.order_by('-created_at', '-id')
+    if exclude_id is not None:
+        queryset = queryset.exclude(id=exclude_id)
+    # Uma a mais que o limite: indica se há mensagens anteriores à janela
+    rows = list(queryset.values_list('id', 'role', 'content', 'corrected_content', 'has_correction')
+                [:cfg['MAX_MESSAGES'] + 1])
+    if not rows:
+        return HistoryWindow()
+
+    summary = get_session_summary(session)
+    budget = cfg['TOKEN_BUDGET'] - estimate_tokens(summary['text'])
+    window = []
+    for msg_id, role, content, corrected_content, has_correction in rows[:cfg['MAX_MESSAGES']]:
+        if msg_id <= summary['until_id']:
+            break
+        # Usar conteúdo corrigido se a mensagem foi corrigida pelo administrador
+        text = corrected_content if has_correction and corrected_content else content
+        tokens = estimate_tokens(text)
+        if len(window) >= cfg['MIN_RECENT_MESSAGES'] and tokens > budget:
+            break
+        budget -= tokens
+        window.append({'id': msg_id, 'role': role, 'content': text})
+
+    # Mensagens mais antigas que a janela e ainda fora do resumo
+    oldest_in_window = window[-1]['id'] if window else None
+    dropped = [row[0] for row in rows if row[0] > summary['until_id']
+               and (oldest_in_window is None or row[0] < oldest_in_window)]
+    if dropped:
+        schedule_summary_refresh(session.id, max(dropped))
+
+    window.reverse()
+    return HistoryWindow(messages=window, summary=summary['text'], has_history=True)
+
+
+def schedule_summary_refresh(session_id, until_id):
+    """Agenda (uma vez por sessão) a task que resume as mensagens até until_id."""
+    if not cache.add(summary_lock_key(session_id), until_id, get_chat_history_settings()['SUMMARY_LOCK_SECONDS']):
+        return
+
+    def enqueue():
+        try:
+            from .tasks import refresh_chat_summary
+            refresh_chat_summary.delay(session_id, until_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao agendar resumo da sessão #{session_id}: {e}")
+            cache.delete(summary_lock_key(session_id))
+
+    transaction.on_commit(enqueue)
+
+
+def _summary_prompt(previous_summary: str, messages) -> str:
+    max_words = get_chat_history_settings()['SUMMARY_MAX_TOKENS'] * 3 // 4
+    lines = [
+        'Atualize o resumo de uma conversa entre um usuário e o Dbit, assistente literário da CG.BookStore.',
+        f'Escreva em português, em no máximo {max_words} palavras, mantendo livros, autores, gostos e '
+        'pedidos do usuário que ainda possam ser úteis. Responda apenas com o resumo.',
+        '',
+        f'RESUMO ATUAL: {previous_summary or "(vazio)"}',
+        '',
+        'NOVAS MENSAGENS:',
+    ]
+    for role, text in messages:
+        lines.append(f"{'Usuário' if role == 'user' else 'Assistente'}: {text}")
+    return '\n'.join(lines)
+
+
+def refresh_session_summary(session_id, until_id) -> bool:
+    """
+    Incorpora ao resumo as mensagens com summary_until_id < id <= until_id.
+    Retorna True se o resumo foi atualizado.
+    """
+    from core.services.ai_provider_service import AIProviderFactory
+    from .models import ChatSession
+
+    try:
+        session = ChatSession.objects.get(pk=session_id)
+        if until_id <= (session.summary_until_id or 0):
+            return False
+
+        rows = session.messages.filter(
+            id__gt=session.summary_until_id or 0, id__lte=until_id,
+        ).order_by('created_at', 'id').values_list('role', 'content', 'corrected_content', 'has_correction')
+        messages = [
+            (role, corrected if has_correction and corrected else content)
+            for role, content, corrected, has_correction in rows
+        ]
+        if not messages:
+            return False
+
+        cfg = get_chat_history_settings()
+        text = AIProviderFactory.get_provider().generate_text(
+            prompt=_summary_prompt(session.summary, messages),
+            system_instruction='Você resume conversas de forma fiel e concisa.',
+            user=session.user,
+            feature_name='chatbot_summary',
+            temperature=0.2,
+            max_tokens=cfg['SUMMARY_MAX_TOKENS'],
+        ).strip()
+        if not text:
+            return False
+
+        ChatSession.objects.filter(pk=session_id).update(summary=text, summary_until_id=until_id)
+        cache.set(summary_cache_key(session_id), {'text': text, 'until_id': until_id}, cfg['SUMMARY_CACHE_SECONDS'])
+        logger.info(f"📝 Resumo da sessão #{session_id} atualizado até a mensagem #{until_id}")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao atualizar resumo da sessão #{session_id}: {e}")
+        return False
+    finally:
+        cache.delete(summary_lock_key(session_id))
@@ -8,12 +8,22 @@ Pilares do RAG:
 1. Base de Conhecimento Estruturada: Busca no banco de dados real
 2. Mecanismo de Busca Refinado: Contexto persistente + busca inteligente
 3. Validação de Respostas: Dados verificados injetados no prompt
+
+Livros, séries e autores citados na mensagem são reconhecidos em memória pelo
+gazetteer do catálogo (catalog_gazetteer.py) e buscados com um único
+`id__in`; as buscas `icontains` ficam como fallback.
+
+As referências da conversa (livro_1, last_author...) ficam no store da
+ChatSession ativa (conversation_references.py), no cache com TTL, e não neste
+serviço, que é compartilhado por todos os usuários do processo.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from django.db.models import Q
 from core.models import Book, Author, Category
+from .catalog_gazetteer import get_catalog_gazetteer
+from .conversation_references import current_reference_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +39,50 @@ class KnowledgeRetrieval:
     - Manter contexto de referências na conversa
     """
 
-    def __init__(self):
-        """Inicializa o serviço de Knowledge Retrieval."""
-        self.conversation_context = {}  # Armazena contexto da conversa (ex: livro mencionado)
+    def _get_gazetteer(self):
+        try:
+            return get_catalog_gazetteer()
+        except Exception as e:
+            logger.error(f"Erro ao carregar gazetteer do catálogo: {e}", exc_info=True)
+            return None
+
+    def get_books_by_ids(self, book_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Busca livros por ID em uma única query, mantendo a ordem recebida.
+
+        Args:
+            book_ids: IDs dos livros
+
+        Returns:
+            Lista de dicionários com dados estruturados dos livros
+        """
+        book_ids = list(book_ids)
+        if not book_ids:
+            return []
+        books = Book.objects.filter(id__in=book_ids).select_related('author', 'category').in_bulk()
+        return [self._serialize_book(books[book_id]) for book_id in book_ids if book_id in books]
+
+    def find_mentioned_books(self, message: str, kinds=('book', 'series', 'author'),
+                             limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Livros citados na mensagem (por título, série ou autor), reconhecidos
+        pelo gazetteer do catálogo e buscados com um único `id__in`.
+
+        Args:
+            message: Mensagem do usuário
+            kinds: Tipos de menção considerados ('book', 'series', 'author')
+            limit: Número máximo de livros
+
+        Returns:
+            Lista de dicionários com dados estruturados dos livros
+        """
+        gazetteer = self._get_gazetteer()
+        if gazetteer is None:
+            return []
+        mentions = gazetteer.find_mentions(message)
+        if mentions:
+            logger.info(f"Gazetteer: menções {[(m.kind, m.phrase) for m in mentions]}")
+        return self.get_books_by_ids(gazetteer.book_ids_for(mentions, kinds=kinds, limit=limit))
 
     def search_books_by_title(self, title: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -66,6 +117,12 @@ class KnowledgeRetrieval:
             Lista de dicionários com dados estruturados dos livros
         """
         try:
+            # Nome completo (ou sobrenome inequívoco) conhecido pelo gazetteer
+            gazetteer = self._get_gazetteer()
+            author_ids = gazetteer.lookup(author_name, 'author') if gazetteer else ()
+            if author_ids:
+                return self.get_books_by_ids(gazetteer.author_book_ids(author_ids, limit=limit))
+
             books = Book.objects.filter(
                 author__name__icontains=author_name
             ).select_related('author', 'category')[:limit]
@@ -160,6 +217,12 @@ class KnowledgeRetrieval:
             Lista de livros da série (se detectado)
         """
         try:
+            gazetteer = self._get_gazetteer()
+            if gazetteer is not None:
+                book_ids = gazetteer.book_ids_for(gazetteer.find_mentions(title), kinds=('series',), limit=20)
+                if book_ids:
+                    return self.get_books_by_ids(book_ids)
+
             # Padrões comuns de séries
             series_keywords = [
                 'Crônicas', 'Harry Potter', 'Senhor dos Anéis', 'Hobbit',
@@ -185,7 +248,16 @@ class KnowledgeRetrieval:
             reference_id: Identificador da referência (ex: "livro_1", "livro_2")
             book_data: Dados do livro a armazenar
         """
-        self.conversation_context[reference_id] = book_data
+        current_reference_store().set(reference_id, book_data)
+
+    def store_conversation_references(self, references: Dict[str, Dict[str, Any]]):
+        """
+        Armazena várias referências de uma vez (uma única escrita no cache).
+
+        Args:
+            references: Dicionário reference_id -> dados
+        """
+        current_reference_store().set_many(references)
 
     def get_conversation_reference(self, reference_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -197,11 +269,39 @@ class KnowledgeRetrieval:
         Returns:
             Dados do livro ou None se não encontrado
         """
-        return self.conversation_context.get(reference_id)
+        return current_reference_store().get(reference_id)
 
     def clear_conversation_context(self):
         """Limpa o contexto da conversa (quando usuário inicia nova conversa)."""
-        self.conversation_context.clear()
+        current_reference_store().clear()
+
+    def get_author_books(self, author_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Livros do autor citado anteriormente na conversa ("outros livros dele").
+
+        Usa os livros guardados em 'last_author' quando o autor é o mesmo, sem
+        consultar o catálogo; senão busca e guarda a referência para os
+        próximos follow-ups.
+
+        Args:
+            author_name: Nome do autor
+            limit: Número máximo de resultados
+
+        Returns:
+            Lista de dicionários com dados estruturados dos livros
+        """
+        reference = self.get_conversation_reference('last_author') or {}
+        if reference.get('name') == author_name and reference.get('books') is not None:
+            return reference['books'][:limit]
+
+        books = self.search_books_by_author(author_name, limit=limit)
+        author_id = books[0].get('author_id') if books else reference.get('id')
+        self.store_conversation_reference('last_author', {
+            'name': author_name,
+            'id': author_id,
+            'books': books,
+        })
+        return books
 
     def format_book_for_prompt(self, book_data: Dict[str, Any]) -> str:
         """
@@ -0,0 +1,187 @@
+"""
+Teste de carga do chatbot literário com provedor de IA simulado.
+Uso: python manage.py loadtest_chatbot --sessions 40 --messages 3 --latency 0.5
+
+Abre N sessões de chat simultâneas (cada uma envia --messages mensagens em
+sequência) contra as views reais, com o provedor substituído por um mock com
+latência fixa, e compara:
+  1. SendMessageAPIView (síncrona) atendida por --sync-workers threads, como
+     os workers gthread do Gunicorn (2 workers x 4 threads em produção);
+  2. send_message_async (ASGI), com os semáforos por provedor de CHATBOT_ASYNC.
+
+Grava no banco configurado: cada sessão usa um usuário temporário (evita o
+detector de spam do monitoramento), removido no final junto com as sessões
+criadas. A validação cruzada segue o modo configurado
+(AI_CROSS_VALIDATION['MODE'], ou --validation-mode), com o validador também
+simulado (latência --validation-latency, por padrão igual à do LLM), para que
+a vazão medida inclua o caminho que vai para produção. Os alertas de WhatsApp
+e a amostragem de performance ficam desligados durante o teste.
+"""
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from chatbot_literario.validation_service import get_validation_settings
+
+
+class MockChatService:
+    """Serviço de chat com latência fixa no lugar do LLM."""
+    SYSTEM_PROMPT = 'Você é um assistente literário.'
+
+    def __init__(self, latency, reply=None):
+        self.latency = latency
+        self.reply = reply
+
+    def _reply(self, message):
+        return self.reply or f"Resposta simulada para: {message[:60]}"
+
+    def get_response(self, message, conversation_history=None, bypass_rag=False):
+        time.sleep(self.latency)
+        return self._reply(message)
+
+    async def aget_response(self, message, conversation_history=None, bypass_rag=False):
+        await asyncio.sleep(self.latency)
+        return self._reply(message)
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão do chatbot com N sessões simultâneas contra um provedor simulado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20, help='Sessões de chat simultâneas')
+        parser.add_argument('--messages', type=int, default=3, help='Mensagens por sessão')
+        parser.add_argument('--latency', type=float, default=0.5, help='Latência simulada do LLM (segundos)')
+        parser.add_argument('--sync-workers', type=int, default=8, help='Threads que atendem a view síncrona')
+        parser.add_argument('--skip-sync', action='store_true', help='Mede apenas o endpoint assíncrono')
+        parser.add_argument(
+            '--validation-mode', choices=['sync', 'async', 'sampled', 'off'],
+            help="Modo da validação cruzada (padrão: AI_CROSS_VALIDATION['MODE'] das settings)"
+        )
+        parser.add_argument(
+            '--validation-latency', type=float,
+            help='Latência simulada do validador (padrão: a mesma do LLM)'
+        )
+
+    def handle(self, *args, **options):
+        sessions = options['sessions']
+        messages = options['messages']
+        latency = options['latency']
+        sync_workers = options['sync_workers']
+        validation = get_validation_settings()
+        if options['validation_mode']:
+            validation['MODE'] = options['validation_mode']
+        validation_latency = options['validation_latency']
+        if validation_latency is None:
+            validation_latency = latency
+
+        self.stdout.write("=" * 70)
+        self.stdout.write("  ⏱️  TESTE DE CARGA - CHATBOT LITERÁRIO (PROVEDOR SIMULADO)")
+        self.stdout.write("=" * 70)
+        self.stdout.write(
+            f"  {sessions} sessões x {messages} mensagens | latência do LLM: {latency * 1000:.0f}ms"
+        )
+        self.stdout.write(
+            f"  validação cruzada: {validation['MODE']} | latência do validador: {validation_latency * 1000:.0f}ms"
+        )
+
+        prefix = f'loadtest_{uuid.uuid4().hex[:8]}_'
+        service = MockChatService(latency)
+        validator = MockChatService(validation_latency, reply='APROVADO')
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=['*'],
+                AI_CROSS_VALIDATION_ENABLED=True,
+                AI_CROSS_VALIDATION=validation,
+                PERFORMANCE_PROFILING={'SAMPLE_RATE': 0},
+            ), mock.patch('chatbot_literario.views.get_chatbot_service', return_value=service), \
+                    mock.patch('chatbot_literario.async_chat.get_chatbot_service', return_value=service), \
+                    mock.patch('chatbot_literario.validation_service._validator_service', return_value=validator), \
+                    mock.patch('chatbot_literario.tasks.validate_chat_response.delay'), \
+                    mock.patch('monitoring.tasks.dispatch_whatsapp_alert'):
+                if not options['skip_sync']:
+                    users = self._create_users(f'{prefix}sync_', sessions)
+                    timings, errors, wall = self._run_sync(users, messages, sync_workers)
+                    self._report(f"Síncrono ({sync_workers} threads)", timings, errors, wall)
+
+                users = self._create_users(f'{prefix}async_', sessions)
+                timings, errors, wall = asyncio.run(self._run_async(users, messages))
+                self._report("Assíncrono (ASGI)", timings, errors, wall)
+        finally:
+            get_user_model().objects.filter(username__startswith=prefix).delete()
+
+    def _create_users(self, prefix, count):
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(username=f'{prefix}{index}', password=make_password(None)) for index in range(count)
+        ])
+        return list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+
+    def _run_sync(self, users, messages, workers):
+        url = reverse('chatbot_literario:api_send_message')
+
+        def run_session(user):
+            client = Client()
+            client.force_login(user)
+            timings, errors, session_id = [], 0, None
+            for turn in range(messages):
+                payload = {'message': f'Me indique um livro de fantasia ({turn})'}
+                if session_id:
+                    payload['session_id'] = session_id
+                start = time.perf_counter()
+                response = client.post(url, payload, content_type='application/json')
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                session_id = response.json()['session_id']
+            return timings, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_session, users))
+        wall = time.perf_counter() - start
+        return [t for timings, _ in results for t in timings], sum(e for _, e in results), wall
+
+    async def _run_async(self, users, messages):
+        url = reverse('chatbot_literario:api_send_message_async')
+
+        async def run_session(user):
+            client = AsyncClient()
+            await client.aforce_login(user)
+            timings, errors, session_id = [], 0, None
+            for turn in range(messages):
+                payload = {'message': f'Me indique um livro de fantasia ({turn})'}
+                if session_id:
+                    payload['session_id'] = session_id
+                start = time.perf_counter()
+                response = await client.post(url, payload, content_type='application/json')
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                session_id = response.json()['session_id']
+            return timings, errors
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_session(user) for user in users))
+        wall = time.perf_counter() - start
+        return [t for timings, _ in results for t in timings], sum(e for _, e in results), wall
+
+    def _report(self, label, timings, errors, wall):
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        self.stdout.write(
+            f"\n📊 {label}\n"
+            f"   mensagens: {len(timings)} | erros: {errors} | total: {wall:.2f}s | "
+            f"vazão: {len(timings) / wall:.1f} msg/s\n"
+            f"   p50: {statistics.median(ordered) * 1000:.0f}ms | p95: {p95 * 1000:.0f}ms"
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot_literario', '0004_alter_chatbotknowledge_knowledge_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary',
+            field=models.TextField(blank=True, help_text='Resumo acumulado das mensagens antigas, enviado ao LLM no lugar delas', verbose_name='Resumo da Conversa'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary_until_id',
+            field=models.PositiveBigIntegerField(blank=True, help_text='ID da última mensagem incorporada ao resumo', null=True, verbose_name='Resumo até a Mensagem'),
+        ),
+    ]
@@ -66,6 +66,17 @@ class ChatSession(models.Model):
         verbose_name='Sessão Ativa',
         help_text='Se False, a sessão foi encerrada pelo usuário'
     )
+    summary = models.TextField(
+        blank=True,
+        verbose_name='Resumo da Conversa',
+        help_text='Resumo acumulado das mensagens antigas, enviado ao LLM no lugar delas'
+    )
+    summary_until_id = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Resumo até a Mensagem',
+        help_text='ID da última mensagem incorporada ao resumo'
+    )
 
     class Meta:
         verbose_name = 'Sessão de Chat'
@@ -0,0 +1,31 @@
+"""
+Tasks assíncronas do Chatbot Literário.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def validate_chat_response(message_id: int, user_message: str, provider: str):
+    """
+    Validação cruzada de uma resposta já entregue ao usuário (modo 'async'
+    de chatbot_literario/validation_service.py).
+    """
+    from .validation_service import validate_stored_response
+
+    state = validate_stored_response(message_id, user_message, provider)
+    logger.info(f"🔍 Validação cruzada da mensagem #{message_id}: {state}")
+    return state
+
+
+@shared_task
+def refresh_chat_summary(session_id: int, until_id: int):
+    """
+    Atualiza o resumo acumulado da sessão com as mensagens que saíram da
+    janela do histórico (chatbot_literario/history_manager.py).
+    """
+    from .history_manager import refresh_session_summary
+
+    return refresh_session_summary(session_id, until_id)
@@ -2,9 +2,21 @@
 Testes automatizados para o app Chatbot Literário.
 Cobertura: ChatSession, ChatMessage, ChatbotKnowledge
 """
-from django.test import TestCase
+from datetime import date
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
+from chatbot_literario.catalog_gazetteer import get_catalog_gazetteer
+from chatbot_literario.conversation_references import (
+    activate_session_references, clear_session_references, current_reference_store,
+    deactivate_session_references,
+)
+from chatbot_literario.knowledge_retrieval import KnowledgeRetrieval
 from chatbot_literario.models import ChatSession, ChatMessage, ChatbotKnowledge, ConversationContext
+from core.models import Author, Book
 
 
 class ChatSessionModelTest(TestCase):
@@ -234,3 +246,422 @@ class FAQServiceTest(TestCase):
         self.assertTrue(len(results) > 0)
         self.assertEqual(results[0]["category"], "Debates Literários")
         self.assertIn("voto", results[0]["question"].lower())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CatalogGazetteerTest(TestCase):
+    """Testes para o gazetteer do catálogo usado no RAG."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        cls.yarros = Author.objects.create(name='Rebecca Yarros')
+        cls.hobbit = Book.objects.create(title='O Hobbit', author=cls.tolkien, publication_date=date(1937, 9, 21))
+        cls.sociedade = Book.objects.create(
+            title='A Sociedade do Anel', subtitle='O Senhor dos Anéis', author=cls.tolkien,
+            publication_date=date(1954, 7, 29),
+        )
+        cls.quarta_asa = Book.objects.create(title='Quarta Asa', author=cls.yarros, publication_date=date(2023, 5, 2))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tags_titles_series_and_authors_in_one_pass(self):
+        gazetteer = get_catalog_gazetteer()
+
+        mentions = gazetteer.find_mentions('Quem escreveu QUARTA ASA? E os livros do Tolkien, da saga Senhor dos Anéis?')
+
+        found = {(m.kind, m.phrase) for m in mentions}
+        self.assertEqual(found, {
+            ('book', 'quarta asa'), ('author', 'tolkien'), ('series', 'senhor dos aneis'),
+        })
+        self.assertEqual(gazetteer.find_mentions('Me fale sobre o hobbit')[0].ids, (self.hobbit.pk,))
+
+    def test_mentioned_books_are_fetched_with_a_single_query(self):
+        service = KnowledgeRetrieval()
+        get_catalog_gazetteer()
+
+        with self.assertNumQueries(1):
+            books = service.find_mentioned_books('Quero os livros de J. R. R. Tolkien', kinds=('author',))
+
+        self.assertEqual([book['id'] for book in books], [self.sociedade.pk, self.hobbit.pk])
+
+    def test_catalog_change_rebuilds_gazetteer(self):
+        self.assertFalse(get_catalog_gazetteer().find_mentions('Chama de Ferro'))
+
+        Book.objects.create(title='Chama de Ferro', author=self.yarros, publication_date=date(2023, 11, 7))
+
+        mentions = get_catalog_gazetteer().find_mentions('Chama de Ferro')
+        self.assertEqual([m.kind for m in mentions], ['book'])
+        self.assertEqual(
+            [book['title'] for book in KnowledgeRetrieval().search_books_by_author('Rebecca Yarros')],
+            ['Chama de Ferro', 'Quarta Asa'],
+        )
+
+    def test_unrelated_book_saves_keep_gazetteer(self):
+        from decimal import Decimal
+        from core.services.catalog_service import gazetteer_version
+
+        gazetteer = get_catalog_gazetteer()
+        version = gazetteer_version()
+
+        # LocMemCache não tem delete_pattern: home/universos cairiam no cache.clear()
+        with mock.patch('core.signals.cache_signals.invalidate_home_cache'), \
+                mock.patch('core.signals.cache_signals.invalidate_universe_cache'):
+            self.hobbit.ai_review = {'summary': 'Clássico'}
+            self.hobbit.save(update_fields=['ai_review', 'updated_at'])
+            self.hobbit.price = Decimal('39.90')
+            self.hobbit.save()  # save completo sem mudar título/subtítulo/autor
+
+        self.assertEqual(gazetteer_version(), version)
+        self.assertIs(get_catalog_gazetteer(), gazetteer)
+
+    def test_title_and_author_name_changes_rebuild_gazetteer(self):
+        get_catalog_gazetteer()
+
+        self.hobbit.title = 'Lá e de Volta Outra Vez'
+        self.hobbit.save()
+        self.yarros.name = 'R. Yarros Castro'
+        self.yarros.save(update_fields=['name'])
+
+        gazetteer = get_catalog_gazetteer()
+        self.assertEqual(gazetteer.lookup('la e de volta outra vez', 'book'), (self.hobbit.pk,))
+        self.assertEqual(gazetteer.lookup('r yarros castro', 'author'), (self.yarros.pk,))
+        self.assertFalse(gazetteer.lookup('rebecca yarros', 'author'))
+
+    def test_rag_author_query_uses_recognized_title(self):
+        from chatbot_literario.groq_service import GroqChatbotService
+
+        service = GroqChatbotService.__new__(GroqChatbotService)
+        service.knowledge_service = KnowledgeRetrieval()
+        message = 'E o livro Quarta Asa, quem escreveu?'
+
+        # Store só em memória, ativo como a view faria com a sessão do chat
+        token = activate_session_references(None)
+        try:
+            enriched = service._apply_rag_knowledge(message, {'intent_type': 'author_query', 'message': message})
+            last_author = service.knowledge_service.get_conversation_reference('last_author')
+        finally:
+            deactivate_session_references(token)
+
+        self.assertIn('Autor: Rebecca Yarros', enriched)
+        self.assertEqual(last_author['name'], 'Rebecca Yarros')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConversationReferenceStoreTest(TestCase):
+    """Testes para as referências da conversa guardadas por ChatSession."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leitor', password='testpass123')
+        cls.author = Author.objects.create(name='Rebecca Yarros')
+        cls.book = Book.objects.create(title='Quarta Asa', author=cls.author, publication_date=date(2023, 5, 2))
+
+    def setUp(self):
+        cache.clear()
+        self.session_a = ChatSession.objects.create(user=self.user)
+        self.session_b = ChatSession.objects.create(user=self.user)
+
+    def _in_session(self, session, func):
+        token = activate_session_references(session.id)
+        try:
+            return func(KnowledgeRetrieval())
+        finally:
+            deactivate_session_references(token)
+
+    def test_references_are_isolated_per_session_and_shared_across_instances(self):
+        self._in_session(self.session_a, lambda service: service.store_conversation_reference(
+            'livro_1', {'id': self.book.pk, 'title': 'Quarta Asa'},
+        ))
+
+        self.assertIsNone(self._in_session(
+            self.session_b, lambda service: service.get_conversation_reference('livro_1'),
+        ))
+        # Outra instância (outro worker) lê a mesma referência do cache
+        self.assertEqual(self._in_session(
+            self.session_a, lambda service: service.get_conversation_reference('livro_1'),
+        )['title'], 'Quarta Asa')
+
+    def test_follow_up_author_resolves_from_cached_reference(self):
+        first = self._in_session(self.session_a, lambda service: service.get_author_books('Rebecca Yarros'))
+        self.assertEqual([book['id'] for book in first], [self.book.pk])
+
+        with self.assertNumQueries(0):
+            books = self._in_session(self.session_a, lambda service: service.get_author_books('Rebecca Yarros'))
+
+        self.assertEqual(books, first)
+
+    def test_unbound_store_does_not_leak_into_next_request(self):
+        """Sem sessão ativa, as referências não ficam presas à thread para a próxima requisição."""
+        KnowledgeRetrieval().store_conversation_reference('last_author', {'name': 'Rebecca Yarros'})
+
+        self.assertIsNone(KnowledgeRetrieval().get_conversation_reference('last_author'))
+        self.assertIsNone(current_reference_store().session_id)
+
+    def test_support_chat_uses_session_references(self):
+        """O chat de suporte ativa as referências da própria sessão durante a resposta."""
+        seen = []
+
+        def get_response(message, conversation_history):
+            seen.append(current_reference_store().session_id)
+            return 'Resposta do suporte'
+
+        support = mock.Mock(**{'get_response.side_effect': get_response})
+        with mock.patch('chatbot_literario.support_service.get_support_chatbot_service', return_value=support):
+            response = self.client.post(
+                '/chatbot/api/suporte/send/', {'message': 'Como troco meu avatar?'}, content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [response.json()['session_id']])
+        self.assertIsNone(current_reference_store().session_id)
+
+    def test_clear_session_references(self):
+        self._in_session(self.session_a, lambda service: service.store_conversation_reference(
+            'last_author', {'name': 'Rebecca Yarros', 'id': self.author.pk},
+        ))
+
+        clear_session_references(self.session_a.id)
+
+        self.assertIsNone(self._in_session(
+            self.session_a, lambda service: service.get_conversation_reference('last_author'),
+        ))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    AI_CROSS_VALIDATION_ENABLED=True,
+)
+class CrossValidationModesTest(TestCase):
+    """Testes para os modos da validação cruzada (sync/async/sampled)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leitor', password='testpass123')
+        cls.author = Author.objects.create(name='Rebecca Yarros')
+        Book.objects.create(title='Quarta Asa', author=cls.author, publication_date=date(2023, 5, 2))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sampled_mode_validates_catalog_questions(self):
+        from chatbot_literario import validation_service as vs
+
+        with self.settings(AI_CROSS_VALIDATION={'MODE': 'sampled', 'SAMPLE_RATE': 0}):
+            self.assertEqual(vs.plan_validation('Quem escreveu Quarta Asa?'), vs.VALIDATION_MODE_SYNC)
+            self.assertEqual(vs.plan_validation('Bom dia, tudo bem?'), vs.VALIDATION_MODE_OFF)
+        with self.settings(AI_CROSS_VALIDATION={'MODE': 'sampled', 'SAMPLE_RATE': 1}):
+            self.assertEqual(vs.plan_validation('Bom dia, tudo bem?'), vs.VALIDATION_MODE_SYNC)
+
+    def test_async_validation_corrects_stored_message(self):
+        from chatbot_literario import validation_service as vs
+        from monitoring.models import AIResponseAlert
+
+        session = ChatSession.objects.create(user=self.user)
+        message = ChatMessage.objects.create(session=session, role='assistant', content='Quarta Asa é de Tolkien.')
+        vs._set_validation_status(message.id, vs.STATE_PENDING)
+
+        with mock.patch.object(vs, 'validate_and_correct_response',
+                               return_value=('Quarta Asa é de Rebecca Yarros.', True)), \
+                mock.patch.object(vs, 'record_validation_metrics') as metrics:
+            state = vs.validate_stored_response(message.id, 'Quem escreveu Quarta Asa?', 'groq')
+
+        message.refresh_from_db()
+        self.assertEqual(state, vs.STATE_CORRECTED)
+        self.assertEqual(message.content, 'Quarta Asa é de Rebecca Yarros.')
+        self.assertEqual(vs.get_validation_status(message.id), vs.STATE_CORRECTED)
+        self.assertTrue(AIResponseAlert.objects.filter(message=message, alert_type='hallucination_suspected').exists())
+        self.assertEqual(metrics.call_args.kwargs['corrected'], True)
+
+    def test_async_mode_returns_draft_and_schedules_validation(self):
+        from chatbot_literario import validation_service as vs
+
+        self.client.force_login(self.user)
+        chatbot = mock.Mock(**{'get_response.return_value': 'Rascunho da resposta'})
+        with self.settings(AI_CROSS_VALIDATION={'MODE': 'async'}), \
+                mock.patch('chatbot_literario.views.get_chatbot_service', return_value=chatbot), \
+                mock.patch.object(vs, 'validate_and_correct_response') as validate, \
+                mock.patch('chatbot_literario.views.record_validation_metrics') as metrics, \
+                mock.patch('chatbot_literario.tasks.validate_chat_response.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/chatbot/api/send/', {'message': 'Quem escreveu Quarta Asa?'}, content_type='application/json',
+            )
+
+        bot_message = response.json()['bot_message']
+        self.assertEqual(bot_message['content'], 'Rascunho da resposta')
+        self.assertEqual(bot_message['validation'], vs.STATE_PENDING)
+        validate.assert_not_called()
+        self.assertEqual(metrics.call_args.kwargs['validation_ms'], None)
+        delay.assert_called_once_with(bot_message['id'], 'Quem escreveu Quarta Asa?', mock.ANY)
+
+        status_response = self.client.get(f"/chatbot/api/messages/{bot_message['id']}/validation/")
+        self.assertEqual(status_response.json()['state'], vs.STATE_PENDING)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CHATBOT_HISTORY={'TOKEN_BUDGET': 60, 'MAX_MESSAGES': 20, 'CHARS_PER_TOKEN': 4},
+)
+class ChatHistoryManagerTest(TestCase):
+    """Testes para o histórico com orçamento de tokens e resumo acumulado."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leitor', password='testpass123')
+        self.session = ChatSession.objects.create(user=self.user)
+        # 6 mensagens de ~25 tokens: só as 2 mais recentes cabem em 60 tokens
+        self.messages = [
+            ChatMessage.objects.create(
+                session=self.session, role='user' if i % 2 == 0 else 'assistant', content=f'{i} ' + 'x' * 98,
+            )
+            for i in range(6)
+        ]
+
+    def test_window_respects_token_budget_and_schedules_summary(self):
+        from chatbot_literario.history_manager import build_history
+
+        with mock.patch('chatbot_literario.tasks.refresh_chat_summary.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            history = build_history(self.session)
+
+        self.assertEqual([m['id'] for m in history.messages], [m.id for m in self.messages[-2:]])
+        self.assertTrue(history.has_history)
+        delay.assert_called_once_with(self.session.id, self.messages[3].id)
+        self.assertEqual(history.for_groq()[0]['role'], 'user')
+        self.assertEqual(history.for_gemini()[1]['role'], 'model')
+
+    def test_summary_replaces_older_messages(self):
+        from chatbot_literario.history_manager import build_history, refresh_session_summary
+
+        provider = mock.Mock(**{'generate_text.return_value': 'Usuário pediu fantasia.'})
+        with mock.patch('core.services.ai_provider_service.AIProviderFactory.get_provider', return_value=provider):
+            self.assertTrue(refresh_session_summary(self.session.id, self.messages[3].id))
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary_until_id, self.messages[3].id)
+        self.assertIn('0 xxx', provider.generate_text.call_args.kwargs['prompt'])
+
+        with mock.patch('chatbot_literario.tasks.refresh_chat_summary.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            history = build_history(self.session)
+
+        self.assertEqual(history.summary, 'Usuário pediu fantasia.')
+        self.assertEqual([m['id'] for m in history.messages], [m.id for m in self.messages[4:]])
+        delay.assert_not_called()
+        self.assertIn('Usuário pediu fantasia.', history.for_groq()[0]['content'])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    AI_PROVIDER='groq',
+    AI_CROSS_VALIDATION={'MODE': 'off'},
+    CHATBOT_ASYNC={'PROVIDER_CONCURRENCY': {'groq': 2}, 'QUEUE_TIMEOUT_SECONDS': 0.05},
+)
+class AsyncChatEndpointTest(TestCase):
+    """Testes para o endpoint assíncrono do chatbot e os limites por provedor."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leitor', password='testpass123')
+
+    async def test_async_endpoint_saves_turn(self):
+        chatbot = mock.Mock(spec=['aget_response'])
+        chatbot.aget_response = mock.AsyncMock(return_value='Recomendo O Hobbit.')
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('chatbot_literario.async_chat.get_chatbot_service', return_value=chatbot), \
+                mock.patch('chatbot_literario.views.record_validation_metrics'):
+            response = await self.async_client.post(
+                '/chatbot/api/send/async/', {'message': 'Me indica um livro?'}, content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['bot_message']['content'], 'Recomendo O Hobbit.')
+        self.assertEqual(data['bot_message']['validation'], 'skipped')
+        self.assertTrue(chatbot.aget_response.call_args.kwargs['message'].startswith('[Usuário: leitor]'))
+        self.assertEqual(await ChatMessage.objects.filter(session_id=data['session_id']).acount(), 2)
+
+    async def test_sync_validation_awaits_async_validator(self):
+        """No modo sync, o endpoint assíncrono valida com aget_response, sem thread bloqueada."""
+        chatbot = mock.Mock(spec=['aget_response'])
+        chatbot.aget_response = mock.AsyncMock(return_value='Quarta Asa é de Tolkien.')
+        validator = mock.Mock(spec=['aget_response'])
+        validator.aget_response = mock.AsyncMock(return_value='Quarta Asa é de Rebecca Yarros.')
+        await self.async_client.aforce_login(self.user)
+        with self.settings(AI_CROSS_VALIDATION_ENABLED=True, AI_CROSS_VALIDATION={'MODE': 'sync'}), \
+                mock.patch('chatbot_literario.async_chat.get_chatbot_service', return_value=chatbot), \
+                mock.patch('chatbot_literario.validation_service._validator_service', return_value=validator), \
+                mock.patch('chatbot_literario.views.record_validation_metrics'), \
+                mock.patch('chatbot_literario.views.record_correction_alert'):
+            response = await self.async_client.post(
+                '/chatbot/api/send/async/', {'message': 'Quem escreveu Quarta Asa?'}, content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        bot_message = response.json()['bot_message']
+        self.assertEqual(bot_message['content'], 'Quarta Asa é de Rebecca Yarros.')
+        self.assertEqual(bot_message['validation'], 'corrected')
+        self.assertTrue(validator.aget_response.call_args.kwargs['bypass_rag'])
+
+    async def test_provider_slots_bound_concurrency(self):
+        import asyncio
+        from chatbot_literario.async_chat import ProviderBusy, provider_slot
+
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            async with provider_slot('groq'):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        with self.settings(CHATBOT_ASYNC={'PROVIDER_CONCURRENCY': {'groq': 2}, 'QUEUE_TIMEOUT_SECONDS': 5}):
+            await asyncio.gather(*(call() for _ in range(6)))
+        self.assertEqual(peak, 2)
+
+        async with provider_slot('groq'), provider_slot('groq'):
+            with self.assertRaises(ProviderBusy):
+                async with provider_slot('groq'):
+                    pass
+
+    async def test_quota_error_falls_back_to_other_provider(self):
+        from chatbot_literario.async_chat import generate_chat_reply
+        from chatbot_literario.history_manager import HistoryWindow
+
+        primary = mock.Mock(spec=['aget_response'])
+        primary.aget_response = mock.AsyncMock(side_effect=Exception('429 quota exceeded'))
+        fallback = mock.Mock(spec=['aget_response'])
+        fallback.aget_response = mock.AsyncMock(return_value='Resposta do Gemini')
+        with mock.patch('chatbot_literario.async_chat.get_chatbot_service', return_value=primary), \
+                mock.patch('chatbot_literario.async_chat._provider_service', return_value=fallback):
+            text = await generate_chat_reply('Oi', HistoryWindow(), 'groq', None, self.user)
+
+        self.assertEqual(text, 'Resposta do Gemini')
+        self.assertEqual(fallback.aget_response.call_args.kwargs['conversation_history'], [])
+
+    async def test_slow_fallback_is_hedged_with_openrouter(self):
+        import asyncio
+        from chatbot_literario.async_chat import generate_chat_reply
+        from chatbot_literario.history_manager import HistoryWindow
+
+        async def slow_answer(**kwargs):
+            await asyncio.sleep(5)
+            return 'Resposta do Gemini'
+
+        primary = mock.Mock(spec=['aget_response'])
+        primary.aget_response = mock.AsyncMock(side_effect=Exception('429 quota exceeded'))
+        fallback = mock.Mock(spec=['aget_response'])
+        fallback.aget_response = slow_answer
+        openrouter = mock.Mock(spec=['agenerate_text'])
+        openrouter.agenerate_text = mock.AsyncMock(return_value='Resposta do OpenRouter')
+        with self.settings(OPENROUTER_API_KEY='chave', AI_HEDGE_DELAY_SECONDS=0.01), \
+                mock.patch('chatbot_literario.async_chat.get_chatbot_service', return_value=primary), \
+                mock.patch('chatbot_literario.async_chat._provider_service', return_value=fallback), \
+                mock.patch('core.services.ai_provider_service.AIProviderFactory.get_provider', return_value=openrouter):
+            text = await generate_chat_reply('Oi', HistoryWindow(), 'groq', None, self.user)
+
+        self.assertEqual(text, 'Resposta do OpenRouter')
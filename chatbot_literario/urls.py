@@ -16,6 +16,9 @@ urlpatterns = [
     # Enviar mensagem ao chatbot literário
     path('api/send/', views.SendMessageAPIView.as_view(), name='api_send_message'),
 
+    # Enviar mensagem ao chatbot literário (versão assíncrona, servida via ASGI)
+    path('api/send/async/', views.send_message_async, name='api_send_message_async'),
+
     # Listar todas as sessões literárias do usuário
     path('api/sessions/', views.ChatSessionListAPIView.as_view(), name='api_session_list'),
 
@@ -28,6 +31,9 @@ urlpatterns = [
     # Encerrar/limpar sessão literária
     path('api/sessions/<int:session_id>/clear/', views.ClearSessionAPIView.as_view(), name='api_clear_session'),
 
+    # Estado da validação cruzada assíncrona de uma resposta
+    path('api/messages/<int:message_id>/validation/', views.MessageValidationAPIView.as_view(), name='api_message_validation'),
+
     # Contexto de conversa do usuário
     path('api/context/', views.ConversationContextAPIView.as_view(), name='api_conversation_context'),
 
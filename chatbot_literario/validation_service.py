@@ -2,44 +2,61 @@
 Serviço de Validação Cruzada (Cross-Validation) de IA em tempo real.
 Utiliza uma segunda IA (ex: Groq Llama se o principal for Gemini) para revisar
 e auto-corrigir possíveis alucinações literárias antes de exibir ao usuário.
+
+Modos (AI_CROSS_VALIDATION['MODE']):
+- 'sync': valida toda resposta antes de devolvê-la (latência da segunda IA
+  somada à resposta);
+- 'async': devolve o rascunho na hora e valida em uma task Celery; se houver
+  correção, a mensagem é atualizada e o front-end recebe a versão corrigida
+  consultando o estado da validação;
+- 'sampled': valida (de forma síncrona) só as respostas cuja pergunta cita
+  livros/autores/séries do catálogo e uma fração SAMPLE_RATE das demais;
+- 'off': não valida.
+
+O endpoint assíncrono do chatbot valida com avalidate_and_correct_response,
+que usa os clientes assíncronos dos provedores.
+
+A latência e a taxa de correção de cada modo vão para
+monitoring.ChatValidationStat.
 """
 import logging
+import random
+import time
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
 from .gemini_service import get_gemini_service
 from .groq_service import get_groq_chatbot_service
 
 logger = logging.getLogger(__name__)
 
 
-def validate_and_correct_response(user_message: str, draft_response: str) -> tuple:
-    """
-    Valida a resposta gerada pelo provedor de IA principal usando o provedor secundário.
-    Corrige alucinações ou erros factuais literários em tempo real.
+VALIDATOR_SYSTEM_INSTRUCTION = "Você é um validador de fatos literários de alta precisão."
 
-    Args:
-        user_message: Mensagem original do usuário.
-        draft_response: Resposta provisória gerada pela IA principal.
-
-    Returns:
-        tuple: (response_text, was_corrected)
-    """
-    # 1. Verificar se a validação cruzada está ativada nas configurações
-    if not getattr(settings, 'AI_CROSS_VALIDATION_ENABLED', True):
-        return draft_response, False
 
+def _validator_provider() -> str:
+    """Provedor secundário: o oposto do principal (settings.AI_PROVIDER)."""
     primary_provider = getattr(settings, 'AI_PROVIDER', 'gemini').lower()
+    return 'groq' if primary_provider == 'gemini' else 'gemini'
+
 
-    # Se o provedor secundário for o mesmo ou não estiver configurado corretamente, aborta
-    if primary_provider == 'gemini':
-        validator_provider = 'groq'
+def _validator_service(validator_provider: str):
+    """Serviço do validador, ou None se ele estiver indisponível."""
+    if validator_provider == 'groq':
+        service = get_groq_chatbot_service()
     else:
-        validator_provider = 'gemini'
+        service = get_gemini_service()
+    if not service.is_available():
+        logger.warning(f"⚠️ Validador {validator_provider.title()} indisponível, ignorando validação")
+        return None
+    return service
 
-    logger.info(f"🔍 Validação Cruzada: Iniciando validação com o provedor secundário '{validator_provider}'")
 
-    try:
-        # Configurar prompt de validação
-        prompt = f"""Você é um validador de fatos literários de alta precisão.
+def _validation_prompt(user_message: str, draft_response: str) -> str:
+    return f"""Você é um validador de fatos literários de alta precisão.
 Sua missão é detectar erros factuais e alucinações nas respostas geradas por outro modelo de IA sobre livros, autores e dados literários.
 
 PERGUNTA DO USUÁRIO: "{user_message}"
@@ -57,39 +74,62 @@ REGRAS DE RETORNO:
 - Se você detectar QUALQUER erro de fato, reescreva a resposta por completo, corrigindo os erros. O seu retorno deve ser DIRETAMENTE o texto final corrigido que será enviado ao usuário. Não inclua introduções, notas, metadiscussões ou explicações como "a resposta do outro modelo contém erros" ou "resposta corrigida:". Escreva como se você fosse o próprio chatbot literário respondendo ao usuário final de forma direta, correta e polida. Mantenha o mesmo tom e estilo do rascunho original.
 """
 
-        # 2. Chamar o provedor secundário
-        if validator_provider == 'groq':
-            # Validador é o Groq
-            groq_service = get_groq_chatbot_service()
-            if not groq_service.is_available():
-                logger.warning("⚠️ Validador Groq indisponível, ignorando validação")
-                return draft_response, False
 
-            validation_response = groq_service.get_response(message=prompt, conversation_history=[], bypass_rag=True)
-        else:
-            # Validador é o Gemini
-            gemini_service = get_gemini_service()
-            if not gemini_service.is_available():
-                logger.warning("⚠️ Validador Gemini indisponível, ignorando validação")
-                return draft_response, False
+def _review_result(validation_response: str, draft_response: str, label: str = '') -> tuple:
+    """Interpreta o retorno do validador: (response_text, was_corrected)."""
+    validation_response = validation_response.strip()
+    validation_response_clean = validation_response.lower().replace('.', '').replace('"', '').replace("'", "")
+    draft_response_clean = draft_response.strip().lower().replace('.', '').replace('"', '').replace("'", "")
 
-            validation_response = gemini_service.get_response(message=prompt, conversation_history=[], bypass_rag=True)
+    if "aprovado" in validation_response.lower() or validation_response == "APROVADO" or validation_response_clean == draft_response_clean:
+        logger.info(f"✅ Validação Cruzada{label}: Resposta aprovada sem alterações.")
+        return draft_response, False
+    logger.warning(
+        f"⚠️ Validação Cruzada{label}: ERRO DETECTADO. Resposta corrigida de:\n"
+        f"'{draft_response}'\npara:\n'{validation_response}'"
+    )
+    return validation_response, True
 
-        validation_response = validation_response.strip()
 
-        # 3. Analisar a resposta do validador
-        validation_response_clean = validation_response.strip().lower().replace('.', '').replace('"', '').replace("'", "")
-        draft_response_clean = draft_response.strip().lower().replace('.', '').replace('"', '').replace("'", "")
+def _log_validation_failure(err: Exception):
+    # Silenciar traceback se for apenas estouro de limite de cota da API externa
+    err_str = str(err).lower()
+    is_quota_err = 'quota' in err_str or '429' in err_str or 'exceeded' in err_str or 'rate' in err_str or 'limit' in err_str or 'exhausted' in err_str
+    if is_quota_err:
+        logger.warning(f"⚠️ Validação cruzada de IA pulada por estouro de cota/limite de requisições: {err}")
+    else:
+        logger.error(f"❌ Erro ao executar a validação cruzada da IA: {err}", exc_info=True)
+
+
+def validate_and_correct_response(user_message: str, draft_response: str) -> tuple:
+    """
+    Valida a resposta gerada pelo provedor de IA principal usando o provedor secundário.
+    Corrige alucinações ou erros factuais literários em tempo real.
+
+    Args:
+        user_message: Mensagem original do usuário.
+        draft_response: Resposta provisória gerada pela IA principal.
+
+    Returns:
+        tuple: (response_text, was_corrected)
+    """
+    # 1. Verificar se a validação cruzada está ativada nas configurações
+    if not getattr(settings, 'AI_CROSS_VALIDATION_ENABLED', True):
+        return draft_response, False
 
-        if "aprovado" in validation_response.lower() or validation_response == "APROVADO" or validation_response_clean == draft_response_clean:
-            logger.info("✅ Validação Cruzada: Resposta aprovada sem alterações.")
+    validator_provider = _validator_provider()
+    logger.info(f"🔍 Validação Cruzada: Iniciando validação com o provedor secundário '{validator_provider}'")
+    prompt = _validation_prompt(user_message, draft_response)
+
+    try:
+        # 2. Chamar o provedor secundário
+        service = _validator_service(validator_provider)
+        if service is None:
             return draft_response, False
-        else:
-            logger.warning(
-                f"⚠️ Validação Cruzada: ERRO DETECTADO. Resposta corrigida de:\n"
-                f"'{draft_response}'\npara:\n'{validation_response}'"
-            )
-            return validation_response, True
+        validation_response = service.get_response(message=prompt, conversation_history=[], bypass_rag=True)
+
+        # 3. Analisar a resposta do validador
+        return _review_result(validation_response, draft_response)
 
     except Exception as err:
         # Tentar usar o OpenRouter como validador de contingência final
@@ -100,33 +140,224 @@ REGRAS DE RETORNO:
                 provider = AIProviderFactory.get_provider('openrouter')
                 validation_response = provider.generate_text(
                     prompt=prompt,
-                    system_instruction="Você é um validador de fatos literários de alta precisão.",
+                    system_instruction=VALIDATOR_SYSTEM_INSTRUCTION,
                     feature_name="chatbot_validation",
                     temperature=0.3
                 )
-                validation_response = validation_response.strip()
-                validation_response_clean = validation_response.strip().lower().replace('.', '').replace('"', '').replace("'", "")
-                draft_response_clean = draft_response.strip().lower().replace('.', '').replace('"', '').replace("'", "")
-
-                if "aprovado" in validation_response.lower() or validation_response == "APROVADO" or validation_response_clean == draft_response_clean:
-                    logger.info("✅ Validação Cruzada (OpenRouter): Resposta aprovada sem alterações.")
-                    return draft_response, False
-                else:
-                    logger.warning(
-                        f"⚠️ Validação Cruzada (OpenRouter): ERRO DETECTADO. Resposta corrigida de:\n"
-                        f"'{draft_response}'\npara:\n'{validation_response}'"
-                    )
-                    return validation_response, True
+                return _review_result(validation_response, draft_response, ' (OpenRouter)')
             except Exception as openrouter_err:
                 logger.warning(f"⚠️ Validador OpenRouter de contingência também falhou: {openrouter_err}")
 
-        # Silenciar traceback se for apenas estouro de limite de cota da API externa
-        err_str = str(err).lower()
-        is_quota_err = 'quota' in err_str or '429' in err_str or 'exceeded' in err_str or 'rate' in err_str or 'limit' in err_str or 'exhausted' in err_str
-        if is_quota_err:
-            logger.warning(f"⚠️ Validação cruzada de IA pulada por estouro de cota/limite de requisições: {err}")
-        else:
-            logger.error(f"❌ Erro ao executar a validação cruzada da IA: {err}", exc_info=True)
-            
+        _log_validation_failure(err)
         # Em caso de falha na validação, retornar a resposta original para não indisponibilizar o serviço
         return draft_response, False
+
+
+async def avalidate_and_correct_response(user_message: str, draft_response: str) -> tuple:
+    """
+    Variante assíncrona de validate_and_correct_response (endpoint ASGI).
+
+    O validador usa aget_response e o OpenRouter agenerate_text: a espera pela
+    segunda IA não ocupa uma thread.
+    """
+    if not getattr(settings, 'AI_CROSS_VALIDATION_ENABLED', True):
+        return draft_response, False
+
+    validator_provider = _validator_provider()
+    logger.info(f"🔍 Validação Cruzada: Iniciando validação com o provedor secundário '{validator_provider}'")
+    prompt = _validation_prompt(user_message, draft_response)
+
+    try:
+        service = await sync_to_async(_validator_service)(validator_provider)
+        if service is None:
+            return draft_response, False
+        validation_response = await service.aget_response(message=prompt, conversation_history=[], bypass_rag=True)
+        return _review_result(validation_response, draft_response)
+
+    except Exception as err:
+        if getattr(settings, 'OPENROUTER_API_KEY', ''):
+            logger.info("🔄 Validador secundário falhou. Tentando OpenRouter como validador de contingência...")
+            try:
+                from core.services.ai_provider_service import AIProviderFactory
+                provider = AIProviderFactory.get_provider('openrouter')
+                validation_response = await provider.agenerate_text(
+                    prompt=prompt,
+                    system_instruction=VALIDATOR_SYSTEM_INSTRUCTION,
+                    feature_name="chatbot_validation",
+                    temperature=0.3
+                )
+                return _review_result(validation_response, draft_response, ' (OpenRouter)')
+            except Exception as openrouter_err:
+                logger.warning(f"⚠️ Validador OpenRouter de contingência também falhou: {openrouter_err}")
+
+        _log_validation_failure(err)
+        return draft_response, False
+
+
+# ==============================================================================
+# Modos de validação (sync / async / sampled)
+# ==============================================================================
+
+VALIDATION_MODE_SYNC = 'sync'
+VALIDATION_MODE_ASYNC = 'async'
+VALIDATION_MODE_SAMPLED = 'sampled'
+VALIDATION_MODE_OFF = 'off'
+
+STATE_PENDING = 'pending'
+STATE_APPROVED = 'approved'
+STATE_CORRECTED = 'corrected'
+STATE_SKIPPED = 'skipped'
+
+
+def get_validation_settings() -> dict:
+    """Retorna as configurações da validação cruzada com valores padrão seguros."""
+    defaults = {
+        'MODE': VALIDATION_MODE_SYNC,
+        'SAMPLE_RATE': 0.2,
+        'SAMPLE_CATALOG_MENTIONS': True,
+        'STATUS_TTL_SECONDS': 600,
+    }
+    return {**defaults, **getattr(settings, 'AI_CROSS_VALIDATION', {})}
+
+
+def get_validation_mode() -> str:
+    if not getattr(settings, 'AI_CROSS_VALIDATION_ENABLED', True):
+        return VALIDATION_MODE_OFF
+    return get_validation_settings()['MODE']
+
+
+def _mentions_catalog(user_message: str) -> bool:
+    from .catalog_gazetteer import get_catalog_gazetteer
+    try:
+        return bool(get_catalog_gazetteer().find_mentions(user_message))
+    except Exception as e:
+        logger.warning(f"⚠️ Gazetteer indisponível para amostragem da validação: {e}")
+        return False
+
+
+def plan_validation(user_message: str) -> str:
+    """
+    Decide o que fazer com a resposta desta mensagem: VALIDATION_MODE_SYNC
+    (validar antes de responder), VALIDATION_MODE_ASYNC (validar depois, em
+    task) ou VALIDATION_MODE_OFF (não validar).
+    """
+    mode = get_validation_mode()
+    if mode in (VALIDATION_MODE_SYNC, VALIDATION_MODE_ASYNC):
+        return mode
+    if mode == VALIDATION_MODE_SAMPLED:
+        cfg = get_validation_settings()
+        if cfg['SAMPLE_CATALOG_MENTIONS'] and _mentions_catalog(user_message):
+            return VALIDATION_MODE_SYNC
+        if random.random() < cfg['SAMPLE_RATE']:
+            return VALIDATION_MODE_SYNC
+    return VALIDATION_MODE_OFF
+
+
+def validate_timed(user_message: str, draft_response: str) -> tuple:
+    """validate_and_correct_response medindo o tempo: (texto, corrigida, ms)."""
+    start = time.perf_counter()
+    response_text, was_corrected = validate_and_correct_response(user_message, draft_response)
+    return response_text, was_corrected, (time.perf_counter() - start) * 1000
+
+
+async def avalidate_timed(user_message: str, draft_response: str) -> tuple:
+    """avalidate_and_correct_response medindo o tempo: (texto, corrigida, ms)."""
+    start = time.perf_counter()
+    response_text, was_corrected = await avalidate_and_correct_response(user_message, draft_response)
+    return response_text, was_corrected, (time.perf_counter() - start) * 1000
+
+
+def record_validation_metrics(mode: str, response_ms: float = None, validation_ms: float = None,
+                              corrected: bool = False):
+    """Registra latência/correção do modo em monitoring.ChatValidationStat."""
+    try:
+        from monitoring.telemetry import record_chat_validation
+        record_chat_validation({
+            'mode': mode,
+            'response_ms': response_ms,
+            'validation_ms': validation_ms,
+            'corrected': corrected,
+        })
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao registrar métricas da validação cruzada: {e}")
+
+
+def record_correction_alert(message, original_draft: str, provider: str):
+    """Cria o AIResponseAlert de uma resposta corrigida pela validação cruzada."""
+    try:
+        from monitoring.models import AIResponseAlert
+        AIResponseAlert.objects.create(
+            session=message.session,
+            message=message,
+            user=message.session.user,
+            alert_type='hallucination_suspected',
+            severity='low',
+            provider=provider,
+            ai_response_preview=original_draft[:500],
+            error_message=(
+                f"Resposta original corrigida por validação cruzada.\nOriginal:\n{original_draft}"
+                f"\n\nCorrigida:\n{message.content}"
+            ),
+        )
+    except Exception as alert_err:
+        logger.warning(f"⚠️ Erro ao registrar alerta de auto-correção: {alert_err}")
+
+
+def validation_status_key(message_id: int) -> str:
+    return f'chat_validation_{message_id}'
+
+
+def get_validation_status(message_id: int):
+    """Estado da validação assíncrona da mensagem ou None se não houver."""
+    return cache.get(validation_status_key(message_id))
+
+
+def _set_validation_status(message_id: int, state: str):
+    cache.set(validation_status_key(message_id), state, get_validation_settings()['STATUS_TTL_SECONDS'])
+
+
+def schedule_validation(message, user_message: str, provider: str):
+    """
+    Marca a validação da resposta como pendente e agenda a task após o
+    commit. Sem broker, a resposta fica sem validação (não bloqueia o usuário).
+    """
+    _set_validation_status(message.id, STATE_PENDING)
+
+    def enqueue():
+        try:
+            from .tasks import validate_chat_response
+            validate_chat_response.delay(message.id, user_message, provider)
+        except Exception as e:
+            logger.error(f"❌ Falha ao agendar validação cruzada da mensagem #{message.id}: {e}")
+            _set_validation_status(message.id, STATE_SKIPPED)
+
+    transaction.on_commit(enqueue)
+
+
+def validate_stored_response(message_id: int, user_message: str, provider: str) -> str:
+    """
+    Valida uma resposta já entregue (modo async). Se corrigida, atualiza a
+    ChatMessage (o histórico passa a usar a versão correta) e registra o
+    alerta. Retorna o novo estado da validação.
+    """
+    from .models import ChatMessage
+
+    try:
+        message = ChatMessage.objects.select_related('session__user').get(pk=message_id)
+    except ChatMessage.DoesNotExist:
+        logger.warning(f"ChatMessage #{message_id} não encontrada para validação cruzada")
+        return STATE_SKIPPED
+
+    original_draft = message.content
+    response_text, was_corrected, validation_ms = validate_timed(user_message, original_draft)
+    record_validation_metrics(VALIDATION_MODE_ASYNC, validation_ms=validation_ms, corrected=was_corrected)
+
+    if was_corrected:
+        message.content = response_text
+        message.save(update_fields=['content'])
+        record_correction_alert(message, original_draft, provider)
+        state = STATE_CORRECTED
+    else:
+        state = STATE_APPROVED
+    _set_validation_status(message_id, state)
+    return state
@@ -2,9 +2,13 @@
 Views para o Chatbot Literário e Chat de Suporte.
 Inclui views para interface web e API REST.
 """
+import json
 import time
 import logging
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
@@ -22,6 +26,17 @@ from .serializers import (
     ConversationContextSerializer
 )
 from .gemini_service import get_chatbot_service
+from .async_chat import ProviderBusy, generate_chat_reply, provider_slot
+from .conversation_references import (
+    activate_session_references, clear_session_references, deactivate_session_references,
+)
+from .history_manager import build_history
+from .validation_service import (
+    STATE_APPROVED, STATE_CORRECTED, STATE_PENDING, STATE_SKIPPED,
+    VALIDATION_MODE_ASYNC, VALIDATION_MODE_SYNC,
+    get_validation_mode, get_validation_status, plan_validation, record_correction_alert,
+    avalidate_timed, record_validation_metrics, schedule_validation, validate_timed,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +53,121 @@ class ChatbotView(LoginRequiredMixin, TemplateView):
 # ==================== API REST ====================
 
 
+def _client_ip(request):
+    return (
+        request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
+        or request.META.get('REMOTE_ADDR')
+    )
+
+
+def _open_chat_turn(user, session_id, user_message_text, ip_address):
+    """
+    Passos 1-3 do turno do chatbot literário (views síncrona e assíncrona):
+    sessão, mensagem do usuário, monitoramento de conduta e histórico.
+
+    Raises:
+        ChatSession.DoesNotExist: session_id não existe ou é de outro usuário
+    """
+    # 1. Obter ou criar sessão
+    if session_id:
+        session = ChatSession.objects.get(id=session_id, user=user)
+    else:
+        # Criar nova sessão
+        session = ChatSession.objects.create(user=user)
+
+    # 2. Salvar mensagem do usuário
+    user_message = ChatMessage.objects.create(
+        session=session,
+        role='user',
+        content=user_message_text
+    )
+
+    # 2b. [MONITORAMENTO] Analisar conduta da mensagem de forma assíncrona
+    try:
+        from monitoring.detector import SuspiciousActivityDetector
+        from monitoring.tasks import dispatch_whatsapp_alert
+        detector = SuspiciousActivityDetector()
+        suspicious = detector.analyze_message(
+            user_message=user_message,
+            session=session,
+            user=user,
+            ip_address=ip_address,
+        )
+        if suspicious and suspicious.severity in ('medium', 'high', 'critical'):
+            dispatch_whatsapp_alert(activity_id=suspicious.pk)
+    except Exception as monitor_err:
+        logger.warning(f"⚠️ Erro no monitoramento de conduta (não crítico): {monitor_err}")
+
+    # 3. Obter histórico da conversa (janela com orçamento de tokens + resumo)
+    history = build_history(session, exclude_id=user_message.id)
+
+    return session, user_message, history
+
+
+def _message_with_context(user, user_message_text, history):
+    # Adicionar contexto do usuário APENAS na primeira mensagem (quando não há histórico)
+    if not history.has_history:
+        # Primeira mensagem: incluir nome (first_name ou username) para saudação personalizada
+        return f"[Usuário: {user.first_name or user.username}] {user_message_text}"
+    # Mensagens seguintes: enviar apenas o texto, sem contexto de nome
+    return user_message_text
+
+
+def _close_chat_turn(session, user_message, bot_response_text, response_time, ai_provider,
+                     validation_mode, validation_plan, validation_ms, was_corrected, original_draft):
+    """
+    Passos 5-7 do turno: salva a resposta, registra correção/validação e
+    retorna o corpo da resposta da API.
+    """
+    # 5. Salvar resposta do chatbot
+    bot_message = ChatMessage.objects.create(
+        session=session,
+        role='assistant',
+        content=bot_response_text,
+        response_time=response_time
+    )
+
+    # Criar alerta de monitoramento se foi corrigido
+    if was_corrected:
+        record_correction_alert(bot_message, original_draft, ai_provider)
+
+    if validation_plan == VALIDATION_MODE_ASYNC:
+        schedule_validation(bot_message, user_message.content, ai_provider)
+        validation_state = STATE_PENDING
+    elif validation_ms is not None:
+        validation_state = STATE_CORRECTED if was_corrected else STATE_APPROVED
+    else:
+        validation_state = STATE_SKIPPED
+    record_validation_metrics(
+        validation_mode, response_ms=response_time * 1000,
+        validation_ms=validation_ms, corrected=was_corrected,
+    )
+
+    # 6. Gerar título da sessão se for a primeira mensagem do usuário
+    if not session.title:
+        session.generate_title()
+
+    # 7. Preparar resposta
+    return {
+        'session_id': session.id,
+        'user_message': {
+            'id': user_message.id,
+            'role': user_message.role,
+            'content': user_message.content,
+            'created_at': user_message.created_at,
+        },
+        'bot_message': {
+            'id': bot_message.id,
+            'role': bot_message.role,
+            'content': bot_message.content,
+            'created_at': bot_message.created_at,
+            'response_time': bot_message.response_time,
+            'validation': validation_state,
+        },
+        'session_title': session.title
+    }
+
+
 class SendMessageAPIView(APIView):
     """
     API para enviar mensagem ao chatbot e receber resposta.
@@ -69,88 +199,32 @@ class SendMessageAPIView(APIView):
 
         user_message_text = serializer.validated_data['message']
         session_id = serializer.validated_data.get('session_id')
+        references_token = None
 
         try:
-            # 1. Obter ou criar sessão
-            if session_id:
-                try:
-                    session = ChatSession.objects.get(id=session_id, user=request.user)
-                except ChatSession.DoesNotExist:
-                    return Response(
-                        {'error': 'Sessão não encontrada ou não pertence ao usuário'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-            else:
-                # Criar nova sessão
-                session = ChatSession.objects.create(user=request.user)
-
-            # 2. Salvar mensagem do usuário
-            user_message = ChatMessage.objects.create(
-                session=session,
-                role='user',
-                content=user_message_text
-            )
-
-            # 2b. [MONITORAMENTO] Analisar conduta da mensagem de forma assíncrona
+            # 1-3. Sessão, mensagem do usuário, monitoramento de conduta e histórico
             try:
-                from monitoring.detector import SuspiciousActivityDetector
-                from monitoring.tasks import dispatch_whatsapp_alert
-                detector = SuspiciousActivityDetector()
-                ip_address = (
-                    request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
-                    or request.META.get('REMOTE_ADDR')
+                session, user_message, history = _open_chat_turn(
+                    request.user, session_id, user_message_text, _client_ip(request)
                 )
-                suspicious = detector.analyze_message(
-                    user_message=user_message,
-                    session=session,
-                    user=request.user,
-                    ip_address=ip_address,
+            except ChatSession.DoesNotExist:
+                return Response(
+                    {'error': 'Sessão não encontrada ou não pertence ao usuário'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
-                if suspicious and suspicious.severity in ('medium', 'high', 'critical'):
-                    dispatch_whatsapp_alert(activity_id=suspicious.pk)
-            except Exception as monitor_err:
-                logger.warning(f"⚠️ Erro no monitoramento de conduta (não crítico): {monitor_err}")
-
-            # 3. Obter histórico da conversa (últimas 10 mensagens mais recentes)
-            previous_messages = list(session.messages.exclude(id=user_message.id).order_by('-created_at')[:10])
-            previous_messages.reverse()  # Ordenar cronologicamente
-            conversation_history = []
-
-            # Obter nome do usuário (first_name ou username)
-            user_name = request.user.first_name or request.user.username
 
             # 4. Obter resposta do chatbot
+            # Referências da conversa (livro_1, last_author...) desta sessão
+            references_token = activate_session_references(session.id)
             chatbot_service = get_chatbot_service()
 
             # Detectar qual provedor está sendo usado
             from django.conf import settings
             ai_provider = getattr(settings, 'AI_PROVIDER', 'gemini').lower()
 
-            # Adicionar histórico de mensagens anteriores no formato correto
-            for msg in previous_messages:
-                # Usar conteúdo corrigido se a mensagem foi corrigida pelo administrador
-                content_to_send = msg.corrected_content if msg.has_correction and msg.corrected_content else msg.content
-
-                if ai_provider == 'groq':
-                    # Formato OpenAI/Groq
-                    conversation_history.append({
-                        "role": msg.role if msg.role == "user" else "assistant",
-                        "content": content_to_send
-                    })
-                else:
-                    # Formato Gemini
-                    conversation_history.append({
-                        "role": msg.role if msg.role == "user" else "model",
-                        "parts": [content_to_send]
-                    })
-
-            # Adicionar contexto do usuário APENAS na primeira mensagem (quando não há histórico)
-            if not conversation_history:
-                # Primeira mensagem: incluir nome para saudação personalizada
-                message_with_context = f"[Usuário: {user_name}] {user_message_text}"
-            else:
-                # Mensagens seguintes: enviar apenas o texto, sem contexto de nome
-                message_with_context = user_message_text
+            # Histórico no formato do provedor
+            conversation_history = history.for_provider(ai_provider)
+            message_with_context = _message_with_context(request.user, user_message_text, history)
 
             start_time = time.time()
             
@@ -171,17 +245,9 @@ class SendMessageAPIView(APIView):
                         from .groq_service import get_groq_chatbot_service
                         groq_service = get_groq_chatbot_service()
 
-                        # Converter histórico para formato Groq (OpenAI)
-                        groq_history = []
-                        for msg in previous_messages:
-                            groq_history.append({
-                                "role": msg.role if msg.role == "user" else "assistant",
-                                "content": msg.content
-                            })
-
                         bot_response_text = groq_service.get_response(
                             message=message_with_context,
-                            conversation_history=groq_history
+                            conversation_history=history.for_groq()
                         )
                         logger.info("✅ Fallback para Groq bem-sucedido!")
                     except Exception as fallback_error:
@@ -191,10 +257,7 @@ class SendMessageAPIView(APIView):
                             try:
                                 from core.services.ai_provider_service import AIProviderFactory
                                 openrouter = AIProviderFactory.get_provider('openrouter')
-                                prompt_parts = []
-                                for msg in previous_messages:
-                                    role = "Usuário" if msg.role == "user" else "Assistente"
-                                    prompt_parts.append(f"{role}: {msg.content}")
+                                prompt_parts = history.as_prompt_lines()
                                 prompt_parts.append(f"Usuário: {message_with_context}")
                                 prompt = "\n".join(prompt_parts)
                                 
@@ -248,18 +311,10 @@ class SendMessageAPIView(APIView):
                         from .gemini_service import get_gemini_service
                         gemini_service = get_gemini_service()
 
-                        # Converter histórico para formato Gemini
-                        gemini_history = []
-                        for msg in previous_messages:
-                            content_to_send = msg.corrected_content if msg.has_correction and msg.corrected_content else msg.content
-                            gemini_history.append({
-                                "role": msg.role if msg.role == "user" else "model",
-                                "parts": [content_to_send]
-                            })
 
                         bot_response_text = gemini_service.get_response(
                             message=message_with_context,
-                            conversation_history=gemini_history
+                            conversation_history=history.for_gemini()
                         )
                         logger.info("✅ Fallback para Gemini bem-sucedido!")
                     except Exception as fallback_error:
@@ -269,10 +324,7 @@ class SendMessageAPIView(APIView):
                             try:
                                 from core.services.ai_provider_service import AIProviderFactory
                                 openrouter = AIProviderFactory.get_provider('openrouter')
-                                prompt_parts = []
-                                for msg in previous_messages:
-                                    role = "Usuário" if msg.role == "user" else "Assistente"
-                                    prompt_parts.append(f"{role}: {msg.content}")
+                                prompt_parts = history.as_prompt_lines()
                                 prompt_parts.append(f"Usuário: {message_with_context}")
                                 prompt = "\n".join(prompt_parts)
                                 
@@ -340,67 +392,34 @@ class SendMessageAPIView(APIView):
                     # Não é erro de quota ou não é Gemini/Groq, propagar erro
                     raise primary_error
             
-            # Validação Cruzada (Anti-Alucinação)
+            # Validação Cruzada (Anti-Alucinação): síncrona, assíncrona ou amostrada
+            validation_mode = get_validation_mode()
+            validation_plan = plan_validation(user_message_text)
             was_corrected = False
+            validation_ms = None
             original_draft = bot_response_text
-            try:
-                from .validation_service import validate_and_correct_response
-                bot_response_text, was_corrected = validate_and_correct_response(
-                    user_message=user_message_text,
-                    draft_response=bot_response_text
-                )
-            except Exception as val_err:
-                logger.error(f"Erro ao executar validação cruzada: {val_err}", exc_info=True)
-
-            response_time = time.time() - start_time
-
-            # 5. Salvar resposta do chatbot
-            bot_message = ChatMessage.objects.create(
-                session=session,
-                role='assistant',
-                content=bot_response_text,
-                response_time=response_time
-            )
-
-            # Criar alerta de monitoramento se foi corrigido
-            if was_corrected:
+            if validation_plan == VALIDATION_MODE_SYNC:
                 try:
-                    from monitoring.models import AIResponseAlert
-                    AIResponseAlert.objects.create(
-                        session=session,
-                        message=bot_message,
-                        user=request.user,
-                        alert_type='hallucination_suspected',
-                        severity='low',
-                        provider=ai_provider,
-                        ai_response_preview=original_draft[:500],
-                        error_message=f"Resposta original corrigida por validação cruzada.\nOriginal:\n{original_draft}\n\nCorrigida:\n{bot_response_text}"
+                    bot_response_text, was_corrected, validation_ms = validate_timed(
+                        user_message=user_message_text,
+                        draft_response=bot_response_text
                     )
-                except Exception as alert_err:
-                    logger.warning(f"⚠️ Erro ao registrar alerta de auto-correção: {alert_err}")
+                except Exception as val_err:
+                    logger.error(f"Erro ao executar validação cruzada: {val_err}", exc_info=True)
 
-            # 6. Gerar título da sessão se for a primeira mensagem do usuário
-            if not session.title:
-                session.generate_title()
+            response_time = time.time() - start_time
 
-            # 7. Preparar resposta
-            response_data = {
-                'session_id': session.id,
-                'user_message': {
-                    'id': user_message.id,
-                    'role': user_message.role,
-                    'content': user_message.content,
-                    'created_at': user_message.created_at,
-                },
-                'bot_message': {
-                    'id': bot_message.id,
-                    'role': bot_message.role,
-                    'content': bot_message.content,
-                    'created_at': bot_message.created_at,
-                    'response_time': bot_message.response_time,
-                },
-                'session_title': session.title
-            }
+            # 5-7. Salvar resposta, validação assíncrona, métricas e título da sessão
+            response_data = _close_chat_turn(
+                session, user_message, bot_response_text,
+                response_time=response_time,
+                ai_provider=ai_provider,
+                validation_mode=validation_mode,
+                validation_plan=validation_plan,
+                validation_ms=validation_ms,
+                was_corrected=was_corrected,
+                original_draft=original_draft,
+            )
 
             return Response(response_data, status=status.HTTP_200_OK)
 
@@ -410,6 +429,108 @@ class SendMessageAPIView(APIView):
                 {'error': f'Erro ao processar mensagem: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            if references_token is not None:
+                deactivate_session_references(references_token)
+
+
+@require_POST
+async def send_message_async(request):
+    """
+    Versão assíncrona de SendMessageAPIView (mesmo corpo e mesma resposta).
+
+    POST /chatbot/api/send/async/
+
+    Servida via ASGI (cgbookstore/asgi.py), não prende uma thread enquanto o
+    LLM responde: o ORM e o RAG rodam em sync_to_async e as chamadas aos
+    provedores (inclusive a validação cruzada) usam clientes assíncronos,
+    limitadas por provedor (settings.CHATBOT_ASYNC). Sem vaga no provedor,
+    responde 503.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'As credenciais de autenticação não foram fornecidas.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = SendMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    user_message_text = serializer.validated_data['message']
+    session_id = serializer.validated_data.get('session_id')
+    references_token = None
+
+    try:
+        try:
+            session, user_message, history = await sync_to_async(_open_chat_turn)(
+                user, session_id, user_message_text, _client_ip(request)
+            )
+        except ChatSession.DoesNotExist:
+            return JsonResponse(
+                {'error': 'Sessão não encontrada ou não pertence ao usuário'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Referências da conversa (livro_1, last_author...) desta sessão
+        references_token = activate_session_references(session.id)
+        ai_provider = getattr(settings, 'AI_PROVIDER', 'gemini').lower()
+        message_with_context = _message_with_context(user, user_message_text, history)
+
+        start_time = time.time()
+        bot_response_text = await generate_chat_reply(
+            message_with_context, history, ai_provider, session, user
+        )
+
+        # Validação Cruzada (Anti-Alucinação): síncrona, assíncrona ou amostrada
+        validation_mode = get_validation_mode()
+        validation_plan = await sync_to_async(plan_validation)(user_message_text)
+        was_corrected = False
+        validation_ms = None
+        original_draft = bot_response_text
+        if validation_plan == VALIDATION_MODE_SYNC:
+            try:
+                async with provider_slot('validation'):
+                    bot_response_text, was_corrected, validation_ms = await avalidate_timed(
+                        user_message=user_message_text,
+                        draft_response=bot_response_text
+                    )
+            except Exception as val_err:
+                logger.error(f"Erro ao executar validação cruzada: {val_err}", exc_info=True)
+
+        response_data = await sync_to_async(_close_chat_turn)(
+            session, user_message, bot_response_text,
+            response_time=time.time() - start_time,
+            ai_provider=ai_provider,
+            validation_mode=validation_mode,
+            validation_plan=validation_plan,
+            validation_ms=validation_ms,
+            was_corrected=was_corrected,
+            original_draft=original_draft,
+        )
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+    except ProviderBusy as e:
+        return JsonResponse(
+            {'error': 'O Dbit está atendendo muitas conversas agora. Tente novamente em instantes.',
+             'provider': e.provider},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '5'},
+        )
+    except Exception as e:
+        logger.error(f"Erro ao processar mensagem (async): {e}", exc_info=True)
+        return JsonResponse(
+            {'error': f'Erro ao processar mensagem: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    finally:
+        if references_token is not None:
+            deactivate_session_references(references_token)
 
 
 class ReportAIResponseAPIView(APIView):
@@ -539,6 +660,34 @@ class ChatSessionDetailAPIView(APIView):
             )
 
 
+class MessageValidationAPIView(APIView):
+    """
+    API para consultar a validação cruzada assíncrona de uma resposta.
+
+    GET /api/chatbot/messages/<id>/validation/
+
+    Response: {
+        "state": "pending" | "approved" | "corrected" | "skipped",
+        "content": "..."  (texto atual da mensagem)
+    }
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, message_id):
+        """Retorna o estado da validação e o conteúdo atual da mensagem."""
+        try:
+            message = ChatMessage.objects.get(id=message_id, session__user=request.user, role='assistant')
+        except ChatMessage.DoesNotExist:
+            return Response(
+                {'error': 'Mensagem não encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(
+            {'state': get_validation_status(message.id) or STATE_SKIPPED, 'content': message.content},
+            status=status.HTTP_200_OK
+        )
+
+
 class ClearSessionAPIView(APIView):
     """
     API para limpar/encerrar uma sessão de chat.
@@ -557,6 +706,7 @@ class ClearSessionAPIView(APIView):
             session = ChatSession.objects.get(id=session_id, user=request.user)
             session.is_active = False
             session.save()
+            clear_session_references(session.id)
             return Response(
                 {'message': 'Sessão encerrada com sucesso'},
                 status=status.HTTP_200_OK
@@ -673,6 +823,7 @@ class SupportSendMessageAPIView(APIView):
             request.session.create()
         session_key = request.session.session_key
 
+        references_token = None
         try:
             # 1. Obter ou criar sessão de suporte
             if session_id:
@@ -726,11 +877,8 @@ class SupportSendMessageAPIView(APIView):
             except Exception as monitor_err:
                 logger.warning(f"⚠️ Erro no monitoramento de suporte (não crítico): {monitor_err}")
 
-            # 3. Obter histórico da conversa (últimas 10 mensagens)
-            previous_messages = list(
-                session.messages.exclude(id=user_message.id).order_by('-created_at')[:10]
-            )
-            previous_messages.reverse()
+            # 3. Obter histórico da conversa (janela com orçamento de tokens + resumo)
+            history = build_history(session, exclude_id=user_message.id)
 
             # 4. Preparar nome do usuário para personalização
             if request.user.is_authenticated:
@@ -740,22 +888,10 @@ class SupportSendMessageAPIView(APIView):
 
             # 5. Montar histórico para a AI
             ai_provider = getattr(settings, 'AI_PROVIDER', 'gemini').lower()
-            conversation_history = []
-            for msg in previous_messages:
-                content = msg.corrected_content if msg.has_correction and msg.corrected_content else msg.content
-                if ai_provider == 'groq':
-                    conversation_history.append({
-                        'role': msg.role if msg.role == 'user' else 'assistant',
-                        'content': content
-                    })
-                else:
-                    conversation_history.append({
-                        'role': msg.role if msg.role == 'user' else 'model',
-                        'parts': [content]
-                    })
+            conversation_history = history.for_provider(ai_provider)
 
             # Adicionar contexto de nome apenas na primeira mensagem
-            if not conversation_history:
+            if not history.has_history:
                 message_with_context = f"[Usuário: {user_name}] {user_message_text}"
             else:
                 message_with_context = user_message_text
@@ -763,6 +899,8 @@ class SupportSendMessageAPIView(APIView):
             # 6. Obter resposta do assistente de suporte
             from .support_service import get_support_chatbot_service
 
+            # Referências da conversa (livro_1, last_author...) desta sessão
+            references_token = activate_session_references(session.id)
             start_time = time.time()
             support_service = get_support_chatbot_service()
             bot_response_text = support_service.get_response(
@@ -807,6 +945,9 @@ class SupportSendMessageAPIView(APIView):
                 {'error': f'Erro ao processar mensagem: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            if references_token is not None:
+                deactivate_session_references(references_token)
 
 
 class SupportSessionListAPIView(APIView):
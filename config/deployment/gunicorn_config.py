@@ -58,5 +58,12 @@ proc_name = 'cgbookstore'
 # Django WSGI
 wsgi_app = 'cgbookstore.wsgi:application'
 
+# ⚡ ASGI opcional (GUNICORN_ASGI=true): workers Uvicorn com cgbookstore.asgi.
+# O endpoint /chatbot/api/send/async/ deixa de prender uma thread durante a
+# espera pelo LLM; as views síncronas seguem rodando em threads do Django.
+if os.getenv('GUNICORN_ASGI', 'false').lower() == 'true':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'cgbookstore.asgi:application'
+
 # Worker connections
 worker_connections = 1000
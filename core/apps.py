@@ -6,6 +6,9 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        """Registra signals para invalidação de cache."""
+        """Registra signals de cache, snapshots de relatórios, versões de imagens e sitemaps."""
         # Importar signals aqui para evitar importações circulares
         from core.signals import cache_signals  # noqa: F401
+        from core.signals import report_signals  # noqa: F401
+        from core.signals import image_signals  # noqa: F401
+        from core.signals import sitemap_signals  # noqa: F401
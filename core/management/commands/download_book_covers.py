@@ -1,12 +1,17 @@
 """
 Management command para baixar capas de livros via Google Books API.
-Uso: python manage.py download_book_covers --author "Anne Rice"
+Uso: python manage.py download_book_covers --author "Anne Rice" [--workers 8] [--rate 2]
+
+Os downloads rodam em paralelo pelo BulkMediaFetcher (core.utils.bulk_media_fetcher),
+com rate limit por host e checkpoint: se interrompido, basta rodar de novo.
 """
 
 from django.core.management.base import BaseCommand, CommandError
 from core.models import Book, Author
-from core.utils.google_books_api import update_book_cover_from_google
-import time
+from core.utils.bulk_media_fetcher import (
+    DUPLICATE, ERROR, SAVED, FetchJob, add_fetcher_arguments, fetcher_from_options,
+)
+from core.utils.google_books_api import google_cover_resolver
 
 
 class Command(BaseCommand):
@@ -34,6 +39,7 @@ class Command(BaseCommand):
             action='store_true',
             help='Simula sem baixar capas'
         )
+        add_fetcher_arguments(parser)
 
     def handle(self, *args, **options):
         author_name = options.get('author')
@@ -49,7 +55,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.NOTICE("\n🔍 MODO SIMULAÇÃO - Nenhum download será feito\n"))
 
         # Filtrar livros
-        books = Book.objects.all()
+        books = Book.objects.select_related('author')
         
         if author_name:
             author = Author.objects.filter(name__icontains=author_name).first()
@@ -76,34 +82,41 @@ class Command(BaseCommand):
         failed = 0
         skipped = 0
 
-        for book in books:
-            self.stdout.write(f"\n📖 Processando: {book.title}")
-            
-            if book.cover_image and not force:
-                self.stdout.write(f"   ⏭️  Já tem capa")
-                skipped += 1
-                continue
-            
-            if dry_run:
+        if dry_run:
+            for book in books:
+                self.stdout.write(f"\n📖 {book.title}")
                 self.stdout.write(f"   📗 [SIMULAÇÃO] Buscaria capa no Google Books")
                 success += 1
-                continue
-            
-            try:
-                result = update_book_cover_from_google(book, force=force)
-                if result:
-                    self.stdout.write(self.style.SUCCESS(f"   ✅ Capa baixada com sucesso!"))
+        else:
+            fetcher = fetcher_from_options('download_book_covers', options)
+            jobs = (
+                FetchJob(
+                    key=f'book:{book.pk}',
+                    filename=f'books/covers/{book.slug}.jpg',
+                    resolve=google_cover_resolver(book.title, book.author.name if book.author else None),
+                    payload=book,
+                )
+                for book in books
+            )
+
+            for result in fetcher.run(jobs):
+                book = result.job.payload
+                self.stdout.write(f"\n📖 {book.title}")
+
+                if result.status in (SAVED, DUPLICATE):
+                    book.cover_image = result.path
+                    book.save()
+                    reused = " (imagem já enviada, reaproveitada)" if result.status == DUPLICATE else ""
+                    self.stdout.write(self.style.SUCCESS(f"   ✅ Capa baixada com sucesso!{reused}"))
                     success += 1
+                elif result.status == ERROR:
+                    self.stdout.write(self.style.ERROR(f"   ❌ Erro: {result.error}"))
+                    failed += 1
                 else:
                     self.stdout.write(self.style.WARNING(f"   ⚠️  Capa não encontrada"))
                     failed += 1
-                
-                # Delay para não sobrecarregar a API
-                time.sleep(1)
-                
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"   ❌ Erro: {e}"))
-                failed += 1
+
+            skipped = fetcher.stats['resumed']
 
         # Resumo
         self.stdout.write("\n" + "=" * 70)
@@ -111,7 +124,7 @@ class Command(BaseCommand):
         self.stdout.write("=" * 70)
         self.stdout.write(f"\n✅ Capas baixadas: {success}")
         self.stdout.write(f"⚠️  Não encontradas: {failed}")
-        self.stdout.write(f"⏭️  Já tinham capa: {skipped}")
+        self.stdout.write(f"⏭️  Já processados (checkpoint): {skipped}")
         
         if dry_run:
             self.stdout.write(self.style.NOTICE(
@@ -2,14 +2,18 @@
 Management command para corrigir capas de livros.
 Remove referências a arquivos inexistentes e baixa novas capas.
 
-Uso: python manage.py fix_book_covers
+Uso: python manage.py fix_book_covers [--download] [--workers 8]
+
+Os downloads rodam em paralelo pelo BulkMediaFetcher (core.utils.bulk_media_fetcher),
+com rate limit por host e checkpoint: se interrompido, basta rodar de novo.
 """
 
 from django.core.management.base import BaseCommand
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from core.models import Book
-import requests
+from core.utils.bulk_media_fetcher import (
+    DUPLICATE, SAVED, FetchJob, add_fetcher_arguments, fetcher_from_options,
+)
 import os
 
 
@@ -22,6 +26,7 @@ class Command(BaseCommand):
             action='store_true',
             help='Baixa novas capas placeholder para livros sem capa',
         )
+        add_fetcher_arguments(parser)
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('=' * 70))
@@ -69,45 +74,32 @@ class Command(BaseCommand):
                 success = 0
                 failed = 0
 
-                for i, book in enumerate(books_without_cover, 1):
-                    self.stdout.write(f'   [{i}/{total}] {book.title[:50]}...')
-
-                    try:
-                        # Usar Lorem Picsum com seed baseado no ID
-                        seed = book.id
-                        url = f'https://picsum.photos/seed/{seed}/400/600'
-
-                        response = requests.get(url, timeout=10)
-
-                        if response.status_code == 200:
-                            # Nome do arquivo
-                            filename = f'books/covers/{book.slug}.jpg'
-
-                            # Salvar arquivo
-                            path = default_storage.save(
-                                filename,
-                                ContentFile(response.content)
-                            )
-
-                            # Atualizar registro
-                            book.cover_image = path
-                            book.save()
+                fetcher = fetcher_from_options('fix_book_covers', options)
+                jobs = (
+                    FetchJob(
+                        key=f'book:{book.pk}',
+                        filename=f'books/covers/{book.slug}.jpg',
+                        # Lorem Picsum com seed baseado no ID
+                        url=f'https://picsum.photos/seed/{book.id}/400/600',
+                        payload=book,
+                    )
+                    for book in books_without_cover
+                )
 
-                            success += 1
-                            self.stdout.write(f'      ✓ Capa salva: {path}')
-                        else:
-                            failed += 1
-                            self.stdout.write(
-                                self.style.WARNING(f'      ⚠️  HTTP {response.status_code}')
-                            )
+                for i, result in enumerate(fetcher.run(jobs), 1):
+                    book = result.job.payload
+                    self.stdout.write(f'   [{i}/{total}] {book.title[:50]}...')
 
-                    except requests.exceptions.Timeout:
-                        failed += 1
-                        self.stdout.write(self.style.ERROR('      ❌ Timeout'))
+                    if result.status in (SAVED, DUPLICATE):
+                        # Atualizar registro
+                        book.cover_image = result.path
+                        book.save()
 
-                    except Exception as e:
+                        success += 1
+                        self.stdout.write(f'      ✓ Capa salva: {result.path}')
+                    else:
                         failed += 1
-                        self.stdout.write(self.style.ERROR(f'      ❌ Erro: {e}'))
+                        self.stdout.write(self.style.ERROR(f'      ❌ Erro: {result.error or "imagem não encontrada"}'))
 
                 self.stdout.write(f'\n   ✓ Sucesso: {success}')
                 self.stdout.write(f'   ❌ Falhas: {failed}')
@@ -0,0 +1,82 @@
+"""
+Management command para gerar as versões responsivas (WebP/AVIF) de capas e
+avatares já existentes (backfill).
+Uso: python manage.py generate_image_derivatives [--type cover|avatar] [--force] [--sync] [--limit N]
+CG.BookStore v3
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.services.image_derivative_service import (
+    IMAGE_SPECS,
+    generate_derivatives,
+    needs_derivatives,
+)
+
+
+class Command(BaseCommand):
+    help = 'Gera versões responsivas (WebP/AVIF) das capas e avatares existentes'
+
+    def add_arguments(self, parser):
+        """Adiciona argumentos ao comando"""
+        parser.add_argument(
+            '--type',
+            choices=sorted(IMAGE_SPECS),
+            help='Processa apenas capas (cover) ou avatares (avatar). Padrão: ambos',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenera mesmo as imagens que já têm versões atualizadas',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Processa neste processo em vez de enfileirar no Celery',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Número máximo de imagens por tipo',
+        )
+
+    def handle(self, *args, **options):
+        """Executa o backfill"""
+        spec_keys = [options['type']] if options['type'] else list(IMAGE_SPECS)
+        for spec_key in spec_keys:
+            self._process(spec_key, options['force'], options['sync'], options['limit'])
+
+    def _process(self, spec_key, force, sync, limit):
+        spec = IMAGE_SPECS[spec_key]
+        model = apps.get_model(spec['model'])
+        field = spec['field']
+
+        queryset = model.objects.exclude(Q(**{f'{field}__isnull': True}) | Q(**{field: ''})).order_by('pk')
+        candidates = queryset.only('pk', field, spec['derivatives_field']).iterator(chunk_size=500)
+
+        self.stdout.write(f'\n🖼️ {model._meta.verbose_name_plural}: verificando {queryset.count()} imagens...')
+
+        processed = errors = 0
+        for instance in candidates:
+            if limit is not None and processed >= limit:
+                break
+            if not force and not needs_derivatives(instance, spec_key):
+                continue
+
+            if sync:
+                try:
+                    generate_derivatives(instance, spec_key)
+                except Exception as e:
+                    errors += 1
+                    self.stdout.write(self.style.ERROR(f'  ❌ #{instance.pk}: {e}'))
+                    continue
+            else:
+                from core.tasks import generate_image_derivatives
+                generate_image_derivatives.delay(spec_key, instance.pk)
+            processed += 1
+
+        action = 'processadas' if sync else 'enfileiradas'
+        self.stdout.write(self.style.SUCCESS(f'✅ {processed} imagens {action}' + (f', {errors} com erro' if errors else '')))
@@ -0,0 +1,20 @@
+"""
+Gera os sitemaps XML no storage (índice + partes gzip).
+Uso: python manage.py generate_sitemaps
+
+Normalmente a task core.tasks.refresh_sitemaps cuida disso; o comando serve
+para o deploy e para forçar a regeneração.
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.sitemap_service import generate_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Gera os sitemaps XML pré-renderizados no storage'
+
+    def handle(self, *args, **options):
+        manifest = generate_sitemaps()
+        for name, entry in manifest['files'].items():
+            self.stdout.write(f"   {name}: {entry['urls']} entradas")
+        self.stdout.write(self.style.SUCCESS(f"✅ Sitemaps gerados (geração {manifest['generation']})"))
@@ -1,12 +1,16 @@
 """
 Management command para atualizar capas de livros usando Google Books API.
+
+Os downloads rodam em paralelo pelo BulkMediaFetcher (core.utils.bulk_media_fetcher),
+com rate limit por host e checkpoint: se interrompido, basta rodar de novo.
 """
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from core.models import Book
-from core.utils.google_books_api import update_book_cover_from_google
-import time
+from core.utils.bulk_media_fetcher import (
+    DUPLICATE, ERROR, SAVED, FetchJob, add_fetcher_arguments, fetcher_from_options,
+)
+from core.utils.google_books_api import google_cover_resolver
 
 
 class Command(BaseCommand):
@@ -32,9 +36,10 @@ class Command(BaseCommand):
         parser.add_argument(
             '--delay',
             type=float,
-            default=1.0,
-            help='Delay em segundos entre requisições (padrão: 1.0)',
+            default=None,
+            help='Intervalo mínimo em segundos entre requisições ao mesmo host (equivale a --rate 1/delay)',
         )
+        add_fetcher_arguments(parser)
 
     def handle(self, *args, **options):
         force = options['force']
@@ -58,12 +63,16 @@ class Command(BaseCommand):
                 if not books.exists():
                     self.stdout.write(self.style.ERROR(f'Livro com ID {book_id} nao encontrado'))
                     return
+                if not force and books.exclude(cover_image__isnull=True).exclude(cover_image='').exists():
+                    self.stdout.write(self.style.WARNING('Livro ja tem capa (use --force para substituir)'))
+                    return
             else:
                 if force:
                     books = Book.objects.all()
                 else:
                     books = Book.objects.filter(cover_image__isnull=True) | Book.objects.filter(cover_image='')
 
+            books = books.select_related('author')
             if limit:
                 books = books[:limit]
 
@@ -77,38 +86,44 @@ class Command(BaseCommand):
             self.stdout.write('')
 
             # Processar livros
-            for index, book in enumerate(books, start=1):
+            fetcher = fetcher_from_options(
+                'update_covers_google', options, rate=1 / delay if delay else None,
+            )
+            jobs = (
+                FetchJob(
+                    key=f'book:{book.pk}',
+                    filename=f'books/covers/{book.slug}.jpg',
+                    resolve=google_cover_resolver(book.title, book.author.name if book.author else None),
+                    payload=book,
+                )
+                for book in books
+            )
+
+            index = 0
+            for result in fetcher.run(jobs):
+                index += 1
+                book = result.job.payload
                 self.stdout.write(f'[{index}/{total_books}] Processando: {book.title}')
 
-                try:
-                    success = update_book_cover_from_google(book, force=force)
-
-                    if success:
-                        success_count += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'  Capa atualizada com sucesso')
-                        )
-                    else:
-                        if book.cover_image and not force:
-                            skipped_count += 1
-                            self.stdout.write(
-                                self.style.WARNING(f'  Livro ja tem capa (use --force para substituir)')
-                            )
-                        else:
-                            failed_count += 1
-                            self.stdout.write(
-                                self.style.WARNING(f'  Nao foi possivel encontrar capa')
-                            )
-
-                    # Delay entre requisições para não sobrecarregar a API
-                    if index < total_books:
-                        time.sleep(delay)
-
-                except Exception as e:
+                if result.status in (SAVED, DUPLICATE):
+                    book.cover_image = result.path
+                    book.save()
+                    success_count += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(f'  Capa atualizada com sucesso')
+                    )
+                elif result.status == ERROR:
                     failed_count += 1
                     self.stdout.write(
-                        self.style.ERROR(f'  Erro: {str(e)}')
+                        self.style.ERROR(f'  Erro: {result.error}')
                     )
+                else:
+                    failed_count += 1
+                    self.stdout.write(
+                        self.style.WARNING(f'  Nao foi possivel encontrar capa')
+                    )
+
+            skipped_count = fetcher.stats['resumed']
 
             # Resumo final
             self.stdout.write('')
@@ -118,7 +133,7 @@ class Command(BaseCommand):
             self.stdout.write(f'Total processado: {total_books}')
             self.stdout.write(self.style.SUCCESS(f'Sucesso: {success_count}'))
             self.stdout.write(self.style.WARNING(f'Falhas: {failed_count}'))
-            self.stdout.write(self.style.WARNING(f'Pulados: {skipped_count}'))
+            self.stdout.write(self.style.WARNING(f'Pulados (checkpoint): {skipped_count}'))
 
             # Cobertura
             total_books_db = Book.objects.count()
@@ -2,21 +2,51 @@
 Middlewares customizados.
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.deprecation import MiddlewareMixin
 from django_ratelimit.exceptions import Ratelimited
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 
-class RateLimitMiddleware:
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
     """
-    Middleware para tratar exceções de rate limiting.
+    WhiteNoise que também roda no modo assíncrono (ASGI).
+
+    O WhiteNoiseMiddleware é só síncrono: sob ASGI o Django passaria cada
+    requisição por uma thread (sync_to_async) já na segunda camada da cadeia,
+    e o endpoint assíncrono do chatbot voltaria a ocupar uma thread durante a
+    espera pelo LLM. Aqui só a entrega do arquivo estático vai para thread.
     """
+    sync_capable = True
+    async_capable = True
 
-    def __init__(self, get_response):
-        self.get_response = get_response
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        return self.get_response(request)
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """
+    Middleware para tratar exceções de rate limiting.
+    """
 
     def process_exception(self, request, exception):
         if isinstance(exception, Ratelimited):
@@ -34,8 +64,12 @@ class RateLimitMiddleware:
 
         return None
 
-import time
 import logging
+import random
+
+from django.utils import timezone
+
+from monitoring import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -43,27 +77,101 @@ class PerformanceMonitoringMiddleware:
     """
     Middleware para monitorar e registrar o tempo de resposta das requisições.
     Útil para identificar gargalos de performance em produção (Render, etc).
+
+    Além do tempo total, mede por requisição (monitoring/profiling.py):
+    queries SQL e tempo no banco, queries repetidas (N+1), hits/misses de
+    cache e tempo em HTTP externo (Google Books, IA, Supabase). Tudo vai no
+    header Server-Timing; uma amostra (PERFORMANCE_PROFILING['SAMPLE_RATE'])
+    alimenta a tabela monitoring.ViewPerformanceStat.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        profiling.install_instrumentation()
 
     def __call__(self, request):
-        start_time = time.time()
-        
-        # Processa a requisição
-        response = self.get_response(request)
-        
-        duration = time.time() - start_time
-        
+        if self.async_mode:
+            return self.__acall__(request)
+
+        cfg = profiling.get_profiling_settings()
+        if not cfg['ENABLED']:
+            return self.get_response(request)
+
+        profiling.instrument_caches()
+        profiling.instrument_connections()
+        profile = profiling.RequestProfile()
+        token = profiling.activate_profile(profile)
+        try:
+            # Processa a requisição
+            response = self.get_response(request)
+        finally:
+            profiling.deactivate_profile(token)
+        return self._finish(request, response, profile, cfg)
+
+    async def __acall__(self, request):
+        """
+        Versão assíncrona (ASGI). O ORM roda na thread do sync_to_async da
+        requisição (thread_sensitive), então o wrapper de queries é instalado
+        nas conexões dessa thread; queries feitas em sync_to_async com
+        thread_sensitive=False não entram na contagem. Requisições simultâneas
+        dividem essa thread e o mesmo wrapper, que atribui cada query ao
+        perfil da ContextVar (copiada pelo sync_to_async).
+        """
+        cfg = profiling.get_profiling_settings()
+        if not cfg['ENABLED']:
+            return await self.get_response(request)
+
+        profiling.instrument_caches()
+        await sync_to_async(profiling.instrument_connections)()
+        profile = profiling.RequestProfile()
+        token = profiling.activate_profile(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.deactivate_profile(token)
+        return self._finish(request, response, profile, cfg)
+
+    def _finish(self, request, response, profile, cfg):
+        profile.finish()
+
+        if request.resolver_match is not None:
+            profile.view_name = request.resolver_match.view_name or request.resolver_match._func_path
+
         # Adiciona header de Server-Timing para inspeção no DevTools do navegador
-        response['Server-Timing'] = f"backend;dur={duration * 1000:.2f};desc=\"Django Backend Processing\""
-        
-        # Loga requisições lentas (mais de 1.5 segundos) como WARNING para fácil visualização
-        if duration > 1.5:
-            logger.warning(f"[PERFORMANCE ALERTA] Requisição Lenta: {request.method} {request.path} levou {duration:.2f}s")
-        # Descomente a linha abaixo se quiser registrar TODAS as requisições no log (pode gerar muito volume)
-        # else:
-        #     logger.info(f"[PERFORMANCE] {request.method} {request.path} levou {duration:.2f}s")
-            
+        response['Server-Timing'] = profile.server_timing()
+        # Usado por QueryBudgetAssertionsMixin nos testes
+        response.request_profile = profile
+
+        self._log(request, profile, cfg)
+        if profile.view_name and random.random() < cfg['SAMPLE_RATE']:
+            from monitoring.telemetry import record_view_performance
+            record_view_performance({**profile.as_sample(), 'recorded_at': timezone.now()})
+
         return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = profiling.current_profile()
+        if profile is not None:
+            profile.query_budget = getattr(view_func, 'query_budget', None)
+        return None
+
+    def _log(self, request, profile, cfg):
+        # Loga requisições lentas (mais de 1.5 segundos) como WARNING para fácil visualização
+        if profile.duration > cfg['SLOW_REQUEST_SECONDS']:
+            logger.warning(
+                f"[PERFORMANCE ALERTA] Requisição Lenta: {request.method} {request.path} levou {profile.duration:.2f}s "
+                f"({profile.queries} queries, {profile.db_time:.2f}s no banco)"
+            )
+        for shape, count in profile.duplicate_shapes():
+            logger.warning(f"[PERFORMANCE N+1] {request.path}: {count}x {shape[:300]}")
+        if profile.budget_exceeded:
+            logger.warning(
+                f"[PERFORMANCE ORÇAMENTO] {profile.view_name} executou {profile.queries} queries "
+                f"(orçamento: {profile.query_budget})"
+            )
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:09
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0057_alter_video_options_remove_video_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module', models.CharField(choices=[('books', 'Livros'), ('authors', 'Autores'), ('videos', 'Vídeos'), ('events', 'Eventos'), ('finance', 'Financeiro')], max_length=20, unique=True, verbose_name='Módulo')),
+                ('data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Dados')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado em')),
+                ('compute_ms', models.PositiveIntegerField(default=0, verbose_name='Tempo de cálculo (ms)')),
+                ('is_stale', models.BooleanField(default=False, help_text='Dados de origem mudaram desde o último cálculo', verbose_name='Desatualizado')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Relatório',
+                'verbose_name_plural': 'Snapshots de Relatórios',
+                'ordering': ['module'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0058_report_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Gerado automaticamente (core/services/image_derivative_service.py)', verbose_name='Versões Responsivas da Capa'),
+        ),
+    ]
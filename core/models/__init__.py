@@ -14,6 +14,7 @@ from .event import Event
 from .banner import Banner
 from .featured_author_settings import FeaturedAuthorSettings
 from .image_rights import ImageRightsRecord
+from .report_snapshot import ReportSnapshot
 from .literary_universe import (
     LiteraryUniverse,
     UniverseContentItem,
@@ -37,6 +38,7 @@ __all__ = [
     'Banner',
     'FeaturedAuthorSettings',
     'ImageRightsRecord',
+    'ReportSnapshot',
     'LiteraryUniverse',
     'UniverseContentItem',
     'UniverseBanner',
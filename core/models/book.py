@@ -95,6 +95,13 @@ class Book(models.Model):
         null=True,
         verbose_name="Imagem de Capa"
     )
+    cover_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Versões Responsivas da Capa",
+        help_text="Gerado automaticamente (core/services/image_derivative_service.py)"
+    )
 
     # ========== CAMPOS DE INTEGRAÇÃO COM GOOGLE BOOKS API ==========
     google_books_id = models.CharField(
@@ -242,6 +249,12 @@ class Book(models.Model):
             models.Index(fields=['title'], name='core_book_title_idx'),
             models.Index(fields=['publication_date'], name='core_book_pub_date_idx'),
             models.Index(fields=['is_presale'], name='core_book_presale_idx'),
+            # Paginação por cursor do catálogo (core/services/catalog_service.py):
+            # um índice (campo, id) por opção de ordenação, percorrido nos dois sentidos
+            models.Index(fields=['created_at', 'id'], name='core_book_created_id_idx'),
+            models.Index(fields=['title', 'id'], name='core_book_title_id_idx'),
+            models.Index(fields=['price', 'id'], name='core_book_price_id_idx'),
+            models.Index(fields=['average_rating', 'id'], name='core_book_rating_id_idx'),
         ]
 
     def save(self, *args, **kwargs):
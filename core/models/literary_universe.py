@@ -396,30 +396,13 @@ class LiteraryUniverse(models.Model):
         1. Livros selecionados manualmente (M2M books)
         2. Livros do autor principal (FK author)
         3. Livros dos autores adicionais (M2M additional_authors)
-        Remove duplicatas e ordena por título.
+        Remove duplicatas (UNION em uma única subquery) e ordena por título.
         """
         from core.models import Book
-        
-        # IDs de livros selecionados manualmente
-        manual_ids = set(self.books.values_list('id', flat=True))
-        
-        # IDs de livros do autor principal
-        author_ids = set(
-            Book.objects.filter(author=self.author).values_list('id', flat=True)
-        )
-        
-        # IDs de livros dos autores adicionais
-        additional_ids = set(
-            Book.objects.filter(
-                author__in=self.additional_authors.all()
-            ).values_list('id', flat=True)
-        )
-        
-        # Combinar todos os IDs
-        all_ids = manual_ids | author_ids | additional_ids
-        
+        from core.services.universe_stats_service import universe_book_ids
+
         return Book.objects.filter(
-            id__in=all_ids
+            id__in=universe_book_ids(self)
         ).select_related('author', 'category').order_by('title')
     
     def get_all_authors(self):
@@ -496,25 +479,12 @@ class LiteraryUniverse(models.Model):
     # === ESTATÍSTICAS ===
     
     def get_stats(self):
-        """Retorna todas as contagens calculadas automaticamente."""
-        all_books = self.get_all_books()
-        total_pages = sum(b.page_count or 0 for b in all_books)
-        
-        return {
-            'books_count': all_books.count(),
-            'authors_count': len(self.get_all_authors()),
-            'articles_count': self.articles.count(),
-            'videos_count': self.videos.count(),
-            'quizzes_count': self.quizzes.count(),
-            'faqs_count': self.faqs.filter(is_active=True).count(),
-            'timeline_count': self.timeline_events.filter(is_active=True).count(),
-            'reading_order_count': self.reading_order.count(),
-            'adaptations_count': self.content_items.filter(
-                content_type__in=['adaptation', 'game'], is_active=True
-            ).count(),
-            'characters_count': self.characters.filter(is_active=True).count(),
-            'total_pages': total_pages,
-        }
+        """
+        Retorna todas as contagens calculadas automaticamente.
+        Em cache por universo (core/services/universe_stats_service.py).
+        """
+        from core.services.universe_stats_service import get_universe_stats
+        return get_universe_stats(self)
     
     # === SISTEMA DE QUALIDADE ===
     
@@ -557,7 +527,7 @@ class LiteraryUniverse(models.Model):
             ('Meta description', bool(self.meta_description), 5, 'SEO'),
             ('Open Graph title', bool(self.og_title), 5, 'SEO'),
             ('Open Graph image', bool(self.og_image), 5, 'SEO'),
-            ('Universos relacionados', self.related_universes.exists(), 5, 'SEO'),
+            ('Universos relacionados', stats['related_universes_count'] >= 1, 5, 'SEO'),
         ]
         
         return checklist
@@ -0,0 +1,57 @@
+"""
+Model de Snapshot de Relatórios.
+Guarda os agregados já calculados de cada módulo do dashboard de relatórios.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ReportSnapshot(models.Model):
+    """
+    Agregados materializados de um módulo do dashboard de relatórios.
+
+    Recalculados pela task periódica (core.tasks.refresh_report_snapshots) e
+    marcados como desatualizados pelos signals quando os dados de origem mudam.
+    """
+
+    MODULE_CHOICES = [
+        ('books', 'Livros'),
+        ('authors', 'Autores'),
+        ('videos', 'Vídeos'),
+        ('events', 'Eventos'),
+        ('finance', 'Financeiro'),
+    ]
+
+    module = models.CharField(
+        max_length=20,
+        choices=MODULE_CHOICES,
+        unique=True,
+        verbose_name="Módulo"
+    )
+    data = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Dados"
+    )
+    computed_at = models.DateTimeField(
+        verbose_name="Calculado em"
+    )
+    compute_ms = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tempo de cálculo (ms)"
+    )
+    is_stale = models.BooleanField(
+        default=False,
+        verbose_name="Desatualizado",
+        help_text="Dados de origem mudaram desde o último cálculo"
+    )
+
+    class Meta:
+        verbose_name = "Snapshot de Relatório"
+        verbose_name_plural = "Snapshots de Relatórios"
+        ordering = ['module']
+
+    def __str__(self):
+        return f"{self.get_module_display()} - {self.computed_at:%d/%m/%Y %H:%M}"
@@ -1,7 +1,7 @@
 import logging
 from django.db.models import Q
 from django.contrib.auth.models import User
-from recommendations.models import AIReaderProfile
+from recommendations.models import AIReaderInterest
 from accounts.models import SystemNotification
 
 logger = logging.getLogger(__name__)
@@ -13,34 +13,47 @@ class AINotificationService:
     de interesse literário gerados por IA.
     """
 
+    # Tamanho dos lotes de usuários no fan-out de notificações
+    FANOUT_CHUNK_SIZE = 500
+
     @classmethod
-    def get_users_interested_in(cls, category_name=None, author_name=None, threshold=0.6) -> list:
+    def get_users_interested_in(cls, category_name=None, author_name=None, threshold=0.6):
         """
-        Retorna a lista de usuários com alta afinidade (afinidade >= threshold)
-        pela categoria ou pelo autor especificados.
+        Retorna um QuerySet dos usuários ativos com alta afinidade
+        (afinidade >= threshold) pela categoria ou pelo autor especificados.
+        Usa o índice (kind, key, score) de AIReaderInterest: uma única query,
+        independente do número de perfis.
         """
-        interested_users = []
-        profiles = AIReaderProfile.objects.all().select_related('user')
-        
-        for p in profiles:
-            has_interest = False
-            
-            # Verificar categoria
-            if category_name and p.categories_interest:
-                score = p.categories_interest.get(category_name, 0.0)
-                if score >= threshold:
-                    has_interest = True
-                    
-            # Verificar autor
-            if author_name and p.authors_interest:
-                score = p.authors_interest.get(author_name, 0.0)
-                if score >= threshold:
-                    has_interest = True
-                    
-            if has_interest and p.user.is_active:
-                interested_users.append(p.user)
-                
-        return interested_users
+        interest_filter = Q()
+        if category_name:
+            interest_filter |= Q(kind=AIReaderInterest.KIND_CATEGORY, key=category_name)
+        if author_name:
+            interest_filter |= Q(kind=AIReaderInterest.KIND_AUTHOR, key=author_name)
+        if not interest_filter:
+            return User.objects.none()
+
+        interested_profiles = AIReaderInterest.objects.filter(
+            interest_filter, score__gte=threshold
+        ).values('profile__user_id')
+
+        return User.objects.filter(id__in=interested_profiles, is_active=True).order_by('id')
+
+    @classmethod
+    def _fan_out(cls, users, create_notifications):
+        """
+        Percorre os usuários em lotes de FANOUT_CHUNK_SIZE, criando as
+        notificações de cada lote com um bulk_create. Retorna o total notificado.
+        """
+        total = 0
+        chunk = []
+        for user in users.only('id').iterator(chunk_size=cls.FANOUT_CHUNK_SIZE):
+            chunk.append(user)
+            if len(chunk) >= cls.FANOUT_CHUNK_SIZE:
+                total += create_notifications(chunk)
+                chunk = []
+        if chunk:
+            total += create_notifications(chunk)
+        return total
 
     @classmethod
     def notify_book_launch(cls, book):
@@ -52,12 +65,13 @@ class AINotificationService:
             author_name = book.author.name if book.author else None
             
             users = cls.get_users_interested_in(category_name, author_name, threshold=0.6)
-            
-            if users:
-                logger.info(f"[AI NOTIFICATION] Notificando {len(users)} usuários sobre lançamento do livro: {book.title}")
-                SystemNotification.create_book_launch(book=book, users=users)
-                return len(users)
-            return 0
+
+            sent = cls._fan_out(
+                users, lambda chunk: SystemNotification.create_book_launch(book=book, users=chunk)
+            )
+            if sent:
+                logger.info(f"[AI NOTIFICATION] {sent} usuários notificados sobre lançamento do livro: {book.title}")
+            return sent
         except Exception as e:
             logger.error(f"Erro ao disparar notificação de lançamento de livro por IA: {e}")
             return 0
@@ -72,17 +86,19 @@ class AINotificationService:
             category_name = event.category if hasattr(event, 'category') else None
             
             users = cls.get_users_interested_in(category_name=category_name, threshold=0.6)
-            
-            if users:
-                logger.info(f"[AI NOTIFICATION] Notificando {len(users)} usuários sobre evento: {event.title}")
-                SystemNotification.create_literary_event(
+
+            sent = cls._fan_out(
+                users,
+                lambda chunk: SystemNotification.create_literary_event(
                     event_name=event.title,
                     event_date=event.start_date,
                     event_url=f"/events/{event.id}/",
-                    users=users
+                    users=chunk
                 )
-                return len(users)
-            return 0
+            )
+            if sent:
+                logger.info(f"[AI NOTIFICATION] {sent} usuários notificados sobre evento: {event.title}")
+            return sent
         except Exception as e:
             logger.error(f"Erro ao disparar notificação de evento por IA: {e}")
             return 0
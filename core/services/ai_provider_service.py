@@ -1,10 +1,18 @@
+import asyncio
+import importlib.util
 import time
 import json
 import re
 import logging
+import threading
+import weakref
 import requests
+from requests.adapters import HTTPAdapter
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from monitoring.models import AIUsageLog
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from monitoring.telemetry import record_ai_usage
 
 logger = logging.getLogger(__name__)
 
@@ -22,15 +30,17 @@ MODEL_PRICING = {
 
 def log_ai_usage(user, feature_name, provider, model_name, prompt_tokens, completion_tokens, response_time, status, error_message=""):
     """
-    Registra no banco de dados o log de telemetria e calcula os custos.
+    Registra o log de telemetria e calcula os custos.
+    Conforme AI_USAGE_LOGGING, grava na hora ou enfileira para gravação em lote
+    (ver monitoring.telemetry).
     """
     try:
         # Calcular custo
         pricing = MODEL_PRICING.get(model_name, {'input': 0.0, 'output': 0.0})
         cost = (prompt_tokens / 1000.0 * pricing['input']) + (completion_tokens / 1000.0 * pricing['output'])
         
-        AIUsageLog.objects.create(
-            user=user if user and user.is_authenticated else None,
+        record_ai_usage(dict(
+            user_id=user.pk if user and user.is_authenticated else None,
             feature_name=feature_name,
             provider=provider,
             model_name=model_name,
@@ -41,10 +51,85 @@ def log_ai_usage(user, feature_name, provider, model_name, prompt_tokens, comple
             response_time_seconds=response_time,
             status=status,
             error_message=error_message
-        )
+        ))
     except Exception as e:
         logger.error(f"Erro ao salvar log de uso da IA: {e}")
 
+
+# ==============================================================================
+# CLIENTES HTTP COMPARTILHADOS (keep-alive)
+# ==============================================================================
+# Uma única requests.Session por processo mantém as conexões TLS abertas entre
+# chamadas aos provedores. No caminho assíncrono, cada event loop recebe seu
+# próprio httpx.AsyncClient (clientes httpx não podem ser compartilhados entre
+# loops), com HTTP/2 quando o pacote `h2` está disponível. O cliente é fechado
+# (aclose) quando o loop encerra, via shutdown_asyncgens (asyncio.run, asgiref,
+# uvicorn).
+
+_http_session = None
+_http_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_async_client_closers = weakref.WeakKeyDictionary()
+
+
+def get_http_session() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada pelos provedores de IA."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                pool_size = int(getattr(settings, 'AI_HTTP_POOL_MAXSIZE', 10))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def get_async_http_client():
+    """Retorna o httpx.AsyncClient do event loop corrente."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        pool_size = int(getattr(settings, 'AI_HTTP_POOL_MAXSIZE', 10))
+        http2 = (
+            getattr(settings, 'AI_HTTP2_ENABLED', True)
+            and importlib.util.find_spec('h2') is not None
+        )
+        client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+        closer = _close_on_loop_shutdown(client)
+        # Iniciar o gerador o registra no loop; shutdown_asyncgens o finaliza
+        asyncio.ensure_future(closer.__anext__())
+        _async_clients[loop] = client
+        _async_client_closers[loop] = closer
+    return client
+
+
+async def _close_on_loop_shutdown(client):
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def close_http_clients():
+    """Fecha a sessão HTTP compartilhada; a próxima chamada cria uma nova."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+
 class BaseAIProvider:
     def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
         raise NotImplementedError
@@ -53,6 +138,20 @@ class BaseAIProvider:
         text = self.generate_text(prompt, system_instruction, user, feature_name, temperature, max_tokens)
         return self._parse_json(text)
 
+    async def agenerate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
+        """
+        Variante assíncrona de generate_text.
+        Provedores baseados em SDK síncrono rodam em thread separada para não
+        bloquear o event loop; provedores HTTP sobrescrevem com httpx.
+        """
+        return await sync_to_async(self.generate_text, thread_sensitive=False)(
+            prompt, system_instruction, user, feature_name, temperature, max_tokens
+        )
+
+    async def agenerate_json(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> dict:
+        text = await self.agenerate_text(prompt, system_instruction, user, feature_name, temperature, max_tokens)
+        return self._parse_json(text)
+
     def _parse_json(self, text: str) -> dict:
         if not text:
             return {}
@@ -228,7 +327,119 @@ class GroqAIProvider(BaseAIProvider):
                 status="failure",
                 error_message=str(e)
             )
-class OpenRouterAIProvider(BaseAIProvider):
+class HTTPAIProvider(BaseAIProvider):
+    """
+    Base para provedores acessados diretamente por API HTTP.
+    Centraliza o ciclo requisição → parse → telemetria, tanto no caminho
+    síncrono (requests.Session compartilhada) quanto no assíncrono (httpx).
+    Subclasses definem apenas o formato da requisição e da resposta.
+    """
+    provider_key = ''
+    display_name = ''
+    api_key_setting = None
+    endpoint = ''
+    request_timeout = 15.0
+
+    def __init__(self):
+        self.api_key = getattr(settings, self.api_key_setting, '') if self.api_key_setting else ''
+
+    def _check_configured(self):
+        if self.api_key_setting and not self.api_key:
+            raise Exception(f"{self.api_key_setting} não configurada.")
+
+    def _candidate_models(self):
+        return [self.model_name]
+
+    def _build_request(self, model_id, prompt, system_instruction, temperature, max_tokens):
+        """Retorna (headers, payload) da chamada para o modelo informado."""
+        raise NotImplementedError
+
+    def _parse_response(self, model_id, response, prompt):
+        """Retorna (content, model_name, prompt_tokens, completion_tokens) ou levanta erro."""
+        raise NotImplementedError
+
+    def _ensure_ok(self, response):
+        if response.status_code != 200:
+            raise Exception(f"{self.display_name} API error {response.status_code}: {response.text}")
+
+    def _on_model_error(self, model_id, error):
+        """Hook chamado quando um modelo candidato falha (antes de tentar o próximo)."""
+
+    def _success_log(self, user, feature_name, model, prompt_tokens, completion_tokens, response_time):
+        return dict(
+            user=user,
+            feature_name=feature_name,
+            provider=self.provider_key,
+            model_name=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            response_time=response_time,
+            status="success"
+        )
+
+    def _failure_log(self, user, feature_name, error, response_time):
+        return dict(
+            user=user,
+            feature_name=feature_name,
+            provider=self.provider_key,
+            model_name=self.model_name,
+            prompt_tokens=0,
+            completion_tokens=0,
+            response_time=response_time,
+            status="failure",
+            error_message=str(error)
+        )
+
+    def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
+        self._check_configured()
+
+        start_time = time.time()
+        last_error = None
+        session = get_http_session()
+        for model_id in self._candidate_models():
+            try:
+                headers, payload = self._build_request(model_id, prompt, system_instruction, temperature, max_tokens)
+                response = session.post(self.endpoint, headers=headers, json=payload, timeout=self.request_timeout)
+                content, model, prompt_tokens, completion_tokens = self._parse_response(model_id, response, prompt)
+            except Exception as e:
+                last_error = e
+                self._on_model_error(model_id, e)
+                continue
+
+            log_ai_usage(**self._success_log(
+                user, feature_name, model, prompt_tokens, completion_tokens, time.time() - start_time
+            ))
+            return content
+
+        log_ai_usage(**self._failure_log(user, feature_name, last_error, time.time() - start_time))
+        raise last_error or Exception(f"{self.display_name}: nenhum modelo disponível")
+
+    async def agenerate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
+        self._check_configured()
+
+        start_time = time.time()
+        last_error = None
+        client = get_async_http_client()
+        for model_id in self._candidate_models():
+            try:
+                headers, payload = self._build_request(model_id, prompt, system_instruction, temperature, max_tokens)
+                response = await client.post(self.endpoint, headers=headers, json=payload, timeout=self.request_timeout)
+                content, model, prompt_tokens, completion_tokens = self._parse_response(model_id, response, prompt)
+            except Exception as e:
+                last_error = e
+                self._on_model_error(model_id, e)
+                continue
+
+            await sync_to_async(log_ai_usage)(**self._success_log(
+                user, feature_name, model, prompt_tokens, completion_tokens, time.time() - start_time
+            ))
+            return content
+
+        await sync_to_async(log_ai_usage)(**self._failure_log(user, feature_name, last_error, time.time() - start_time))
+        raise last_error or Exception(f"{self.display_name}: nenhum modelo disponível")
+
+
+class OpenRouterAIProvider(HTTPAIProvider):
     """
     Provedor OpenRouter com fallback sequencial de modelos.
     Tenta cada modelo individualmente em vez de usar o array `models`
@@ -242,284 +453,193 @@ class OpenRouterAIProvider(BaseAIProvider):
         "openrouter/auto",
     ]
 
+    provider_key = 'openrouter'
+    display_name = 'OpenRouter'
+    api_key_setting = 'OPENROUTER_API_KEY'
+    endpoint = 'https://openrouter.ai/api/v1/chat/completions'
+
     def __init__(self):
-        self.api_key = getattr(settings, 'OPENROUTER_API_KEY', '')
+        super().__init__()
         self.model_name = 'openrouter/auto'
 
-    def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
-        if not self.api_key:
-            raise Exception("OPENROUTER_API_KEY não configurada.")
-            
-        start_time = time.time()
-        last_error = None
-        
-        for model_id in self.FALLBACK_MODELS:
-            try:
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://www.cgbookstore.com.br",
-                    "X-Title": "CG BookStore"
-                }
-                messages = []
-                if system_instruction:
-                    messages.append({"role": "system", "content": system_instruction})
-                messages.append({"role": "user", "content": prompt})
-                
-                payload = {
-                    "model": model_id,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
-                
-                response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=15.0)
-                
-                if response.status_code != 200:
-                    logger.warning(f"⚠️ OpenRouter modelo '{model_id}' retornou {response.status_code}. Tentando próximo...")
-                    last_error = Exception(f"OpenRouter API error {response.status_code}: {response.text[:200]}")
-                    continue
-                    
-                data = response.json()
-                
-                if 'error' in data:
-                    logger.warning(f"⚠️ OpenRouter modelo '{model_id}' retornou erro: {data['error']}. Tentando próximo...")
-                    last_error = Exception(f"OpenRouter error: {data['error']}")
-                    continue
-                
-                content = data['choices'][0]['message']['content']
-                response_time = time.time() - start_time
-                
-                actual_model = data.get('model', model_id)
-                usage = data.get('usage', {})
-                prompt_tokens = usage.get('prompt_tokens', 0)
-                completion_tokens = usage.get('completion_tokens', 0)
-                
-                log_ai_usage(
-                    user=user,
-                    feature_name=feature_name,
-                    provider="openrouter",
-                    model_name=actual_model,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    response_time=response_time,
-                    status="success"
-                )
-                logger.info(f"✅ OpenRouter respondeu com sucesso usando modelo '{actual_model}' em {response_time:.2f}s")
-                return content
-                
-            except requests.exceptions.Timeout:
-                logger.warning(f"⚠️ OpenRouter modelo '{model_id}' timeout. Tentando próximo...")
-                last_error = Exception(f"OpenRouter timeout para modelo {model_id}")
-                continue
-            except Exception as e:
-                logger.warning(f"⚠️ OpenRouter modelo '{model_id}' falhou: {e}")
-                last_error = e
-                continue
-        
+    def _candidate_models(self):
+        return self.FALLBACK_MODELS
+
+    def _build_request(self, model_id, prompt, system_instruction, temperature, max_tokens):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://www.cgbookstore.com.br",
+            "X-Title": "CG BookStore"
+        }
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+
+        payload = {
+            "model": model_id,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return headers, payload
+
+    def _parse_response(self, model_id, response, prompt):
+        if response.status_code != 200:
+            raise Exception(f"OpenRouter API error {response.status_code}: {response.text[:200]}")
+
+        data = response.json()
+        if 'error' in data:
+            raise Exception(f"OpenRouter error: {data['error']}")
+
+        content = data['choices'][0]['message']['content']
+        actual_model = data.get('model', model_id)
+        usage = data.get('usage', {})
+        logger.info(f"✅ OpenRouter respondeu com sucesso usando modelo '{actual_model}'")
+        return content, actual_model, usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+
+    def _on_model_error(self, model_id, error):
+        logger.warning(f"⚠️ OpenRouter modelo '{model_id}' falhou: {error}. Tentando próximo...")
+
+    def _failure_log(self, user, feature_name, error, response_time):
         # Todos os modelos falharam
-        logger.error(f"❌ OpenRouter: todos os modelos falharam. Último erro: {last_error}")
-        log_ai_usage(
+        logger.error(f"❌ OpenRouter: todos os modelos falharam. Último erro: {error}")
+        return dict(
             user=user,
             feature_name=feature_name,
             provider="openrouter",
             model_name="all_failed",
             prompt_tokens=0,
             completion_tokens=0,
-            response_time=time.time() - start_time,
+            response_time=response_time,
             status="error"
         )
-        raise last_error or Exception("OpenRouter: nenhum modelo disponível")
 
-class OpenAIProvider(BaseAIProvider):
+
+class OpenAIProvider(HTTPAIProvider):
+    provider_key = 'openai'
+    display_name = 'OpenAI'
+    api_key_setting = 'OPENAI_API_KEY'
+    endpoint = 'https://api.openai.com/v1/chat/completions'
+
     def __init__(self):
-        self.api_key = getattr(settings, 'OPENAI_API_KEY', '')
+        super().__init__()
         self.model_name = 'gpt-4o-mini'
 
-    def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
-        if not self.api_key:
-            raise Exception("OPENAI_API_KEY não configurada.")
-            
-        start_time = time.time()
-        try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            messages = []
-            if system_instruction:
-                messages.append({"role": "system", "content": system_instruction})
-            messages.append({"role": "user", "content": prompt})
-            
-            payload = {
-                "model": self.model_name,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload, timeout=15.0)
-            response_time = time.time() - start_time
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error {response.status_code}: {response.text}")
-                
-            data = response.json()
-            content = data['choices'][0]['message']['content']
-            
-            prompt_tokens = data['usage']['prompt_tokens']
-            completion_tokens = data['usage']['completion_tokens']
-            
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="openai",
-                model_name=self.model_name,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                response_time=response_time,
-                status="success"
-            )
-            return content
-        except Exception as e:
-            response_time = time.time() - start_time
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="openai",
-                model_name=self.model_name,
-                prompt_tokens=0,
-                completion_tokens=0,
-                response_time=response_time,
-                status="failure",
-                error_message=str(e)
-            )
-            raise e
+    def _build_request(self, model_id, prompt, system_instruction, temperature, max_tokens):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+
+        payload = {
+            "model": model_id,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return headers, payload
+
+    def _parse_response(self, model_id, response, prompt):
+        self._ensure_ok(response)
+        data = response.json()
+        content = data['choices'][0]['message']['content']
+        return content, model_id, data['usage']['prompt_tokens'], data['usage']['completion_tokens']
+
+
+class ClaudeProvider(HTTPAIProvider):
+    provider_key = 'claude'
+    display_name = 'Claude'
+    api_key_setting = 'CLAUDE_API_KEY'
+    endpoint = 'https://api.anthropic.com/v1/messages'
 
-class ClaudeProvider(BaseAIProvider):
     def __init__(self):
-        self.api_key = getattr(settings, 'CLAUDE_API_KEY', '')
+        super().__init__()
         self.model_name = 'claude-3-5-sonnet'
 
-    def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
-        if not self.api_key:
-            raise Exception("CLAUDE_API_KEY não configurada.")
-            
-        start_time = time.time()
-        try:
-            headers = {
-                "content-type": "application/json",
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01"
-            }
-            payload = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            if system_instruction:
-                payload["system"] = system_instruction
-                
-            response = requests.post("https://api.anthropic.com/v1/messages", headers=headers, json=payload, timeout=15.0)
-            response_time = time.time() - start_time
-            
-            if response.status_code != 200:
-                raise Exception(f"Claude API error {response.status_code}: {response.text}")
-                
-            data = response.json()
-            content = data['content'][0]['text']
-            
-            prompt_tokens = data['usage']['input_tokens']
-            completion_tokens = data['usage']['output_tokens']
-            
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="claude",
-                model_name=self.model_name,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                response_time=response_time,
-                status="success"
-            )
-            return content
-        except Exception as e:
-            response_time = time.time() - start_time
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="claude",
-                model_name=self.model_name,
-                prompt_tokens=0,
-                completion_tokens=0,
-                response_time=response_time,
-                status="failure",
-                error_message=str(e)
-            )
-            raise e
+    def _build_request(self, model_id, prompt, system_instruction, temperature, max_tokens):
+        headers = {
+            "content-type": "application/json",
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01"
+        }
+        payload = {
+            "model": model_id,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if system_instruction:
+            payload["system"] = system_instruction
+        return headers, payload
+
+    def _parse_response(self, model_id, response, prompt):
+        self._ensure_ok(response)
+        data = response.json()
+        content = data['content'][0]['text']
+        return content, model_id, data['usage']['input_tokens'], data['usage']['output_tokens']
+
+
+class LocalAIProvider(HTTPAIProvider):
+    provider_key = 'local'
+    display_name = 'Local AI'
+    request_timeout = 25
 
-class LocalAIProvider(BaseAIProvider):
     def __init__(self):
+        super().__init__()
         self.endpoint = getattr(settings, 'LOCAL_AI_ENDPOINT', 'http://localhost:11434/api/generate')
         self.model_name = getattr(settings, 'LOCAL_AI_MODEL', 'llama3')
 
-    def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
-        start_time = time.time()
-        try:
-            full_prompt = prompt
-            if system_instruction:
-                full_prompt = f"System: {system_instruction}\nUser: {prompt}"
-                
-            payload = {
-                "model": self.model_name,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
+    def _build_request(self, model_id, prompt, system_instruction, temperature, max_tokens):
+        full_prompt = prompt
+        if system_instruction:
+            full_prompt = f"System: {system_instruction}\nUser: {prompt}"
+
+        payload = {
+            "model": model_id,
+            "prompt": full_prompt,
+            "stream": False,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
             }
-            response = requests.post(self.endpoint, json=payload, timeout=25)
-            response_time = time.time() - start_time
-            
-            if response.status_code != 200:
-                raise Exception(f"Local AI endpoint error {response.status_code}")
-                
-            data = response.json()
-            content = data.get('response', '')
-            
-            prompt_tokens = len(prompt) // 4
-            completion_tokens = len(content) // 4
-            
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="local",
-                model_name="local",
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                response_time=response_time,
-                status="success"
-            )
-            return content
-        except Exception as e:
-            response_time = time.time() - start_time
-            log_ai_usage(
-                user=user,
-                feature_name=feature_name,
-                provider="local",
-                model_name="local",
-                prompt_tokens=0,
-                completion_tokens=0,
-                response_time=response_time,
-                status="failure",
-                error_message=str(e)
-            )
-            raise e
+        }
+        return None, payload
+
+    def _parse_response(self, model_id, response, prompt):
+        if response.status_code != 200:
+            raise Exception(f"Local AI endpoint error {response.status_code}")
+
+        data = response.json()
+        content = data.get('response', '')
+        return content, "local", len(prompt) // 4, len(content) // 4
+
+    def _failure_log(self, user, feature_name, error, response_time):
+        log = super()._failure_log(user, feature_name, error, response_time)
+        log['model_name'] = "local"
+        return log
 
 class MockAIProvider(BaseAIProvider):
+    def __init__(self, latency: float = 0.0):
+        # Latência artificial em segundos (benchmarks de pooling/hedging)
+        self.latency = latency
+
     def generate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt, user, feature_name)
+
+    async def agenerate_text(self, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await sync_to_async(self._respond)(prompt, user, feature_name)
+
+    def _respond(self, prompt, user, feature_name):
         # Registrar logs para o Mock de IA
         log_ai_usage(
             user=user,
@@ -528,7 +648,7 @@ class MockAIProvider(BaseAIProvider):
             model_name="mock",
             prompt_tokens=len(prompt) // 4,
             completion_tokens=200,
-            response_time=0.01,
+            response_time=self.latency or 0.01,
             status="success"
         )
         prompt_lower = prompt.lower()
@@ -572,22 +692,113 @@ class MockAIProvider(BaseAIProvider):
         return "Resposta simulada do provedor Mock de IA."
 
 class AIProviderFactory:
+    """
+    Registro de provedores de IA.
+    Cada provedor é instanciado uma única vez por processo, preservando clientes
+    de SDK já configurados (Gemini/Groq) e o pool de conexões HTTP entre chamadas.
+    """
+    PROVIDER_CLASSES = {
+        'gemini': GeminiAIProvider,
+        'groq': GroqAIProvider,
+        'openai': OpenAIProvider,
+        'claude': ClaudeProvider,
+        'openrouter': OpenRouterAIProvider,
+        'local': LocalAIProvider,
+        'mock': MockAIProvider,
+    }
+
+    _instances = {}
+    _lock = threading.Lock()
+
     @classmethod
     def get_provider(cls, provider_name: str = None) -> BaseAIProvider:
-        """Cria o provedor solicitado ou, por compatibilidade, o provedor principal."""
+        """Retorna o provedor solicitado ou, por compatibilidade, o provedor principal."""
         ai_provider = (provider_name or getattr(settings, 'AI_PROVIDER', 'mock')).lower()
-        
-        if ai_provider == 'gemini':
-            return GeminiAIProvider()
-        elif ai_provider == 'groq':
-            return GroqAIProvider()
-        elif ai_provider == 'openai':
-            return OpenAIProvider()
-        elif ai_provider == 'claude':
-            return ClaudeProvider()
-        elif ai_provider == 'openrouter':
-            return OpenRouterAIProvider()
-        elif ai_provider == 'local':
-            return LocalAIProvider()
-        else:
-            return MockAIProvider()
+        if ai_provider not in cls.PROVIDER_CLASSES:
+            ai_provider = 'mock'
+
+        provider = cls._instances.get(ai_provider)
+        if provider is None:
+            with cls._lock:
+                provider = cls._instances.get(ai_provider)
+                if provider is None:
+                    provider = cls.PROVIDER_CLASSES[ai_provider]()
+                    cls._instances[ai_provider] = provider
+        return provider
+
+    @classmethod
+    def reset(cls):
+        """Descarta as instâncias em cache (ex.: após troca de chaves de API)."""
+        with cls._lock:
+            cls._instances.clear()
+        close_http_clients()
+
+
+@receiver(setting_changed)
+def _reset_provider_registry(sender, setting, **kwargs):
+    if setting.startswith(('AI_', 'GEMINI_', 'GROQ_', 'OPENAI_', 'CLAUDE_', 'OPENROUTER_', 'LOCAL_AI_')):
+        AIProviderFactory.reset()
+
+
+async def hedged_call(calls, hedge_delay: float = None):
+    """
+    Executa chamadas assíncronas alternativas com requisições "hedged".
+
+    A primeira chamada é disparada imediatamente; se não responder dentro de
+    `hedge_delay` segundos (ou falhar antes disso), a próxima da lista é
+    disparada em paralelo. A primeira resposta bem-sucedida vence e as demais
+    são canceladas. Com `hedge_delay=0` todas correm juntas (race).
+    `calls` são funções sem argumentos que retornam um awaitable.
+    """
+    if hedge_delay is None:
+        hedge_delay = float(getattr(settings, 'AI_HEDGE_DELAY_SECONDS', 2.0))
+
+    pending = list(calls)
+    if not pending:
+        raise Exception("Nenhum provedor de IA informado para o fallback.")
+
+    running = set()
+    last_error = None
+
+    def launch_next():
+        running.add(asyncio.ensure_future(pending.pop(0)()))
+
+    launch_next()
+    try:
+        while running:
+            timeout = hedge_delay if pending else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Nenhuma resposta dentro do prazo: dispara a próxima chamada
+                launch_next()
+                continue
+
+            for task in done:
+                running.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+                logger.warning(f"⚠️ Provedor de IA falhou no fallback hedged: {last_error}")
+
+            if pending and (not running or hedge_delay == 0):
+                launch_next()
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise last_error or Exception("Todos os provedores de IA falharam.")
+
+
+async def hedged_generate_text(providers, prompt: str, system_instruction: str = None, user=None, feature_name="general", temperature=0.3, max_tokens=1000, hedge_delay: float = None) -> str:
+    """
+    Cadeia de fallback de agenerate_text com hedge (ver hedged_call).
+    `providers` aceita nomes do registro ou instâncias de BaseAIProvider.
+    """
+    def make_call(name):
+        def call():
+            provider = name if isinstance(name, BaseAIProvider) else AIProviderFactory.get_provider(name)
+            return provider.agenerate_text(prompt, system_instruction, user, feature_name, temperature, max_tokens)
+        return call
+
+    return await hedged_call([make_call(name) for name in providers], hedge_delay)
@@ -0,0 +1,328 @@
+"""
+core/services/catalog_service.py
+
+Paginação e contadores do catálogo de livros (BookListView).
+
+- Paginação por chave (keyset): em vez de OFFSET, a próxima página é
+  "depois do último livro exibido" segundo a ordenação escolhida, com o pk
+  como desempate. Cada opção de ordenação tem um índice composto
+  (campo, id) em Book, então a página 500 custa o mesmo que a página 1.
+  O cursor vai na querystring (?cursor=...) e guarda o valor do campo, o pk,
+  a direção e o número da página.
+- Campos que aceitam NULL (preço, avaliação) são percorridos em dois trechos
+  que usam o índice: primeiro os livros com valor, depois os sem valor
+  (equivale a NULLS LAST, que o SQLite não aceita em índices).
+- ?page=N (links antigos) continua funcionando com OFFSET.
+- O total de resultados fica em cache por combinação de filtros e a lista de
+  categorias com contagem (facetas) em cache global. Ambos usam uma versão
+  incrementada pelos signals de Book/Category/SectionItem
+  (core/signals/cache_signals.py).
+"""
+import base64
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Q
+
+from core.models import Book, Category
+
+CATALOG_CACHE_TIMEOUT = 600  # 10 minutos
+CATALOG_VERSION_KEY = 'catalog_listing_version'
+GAZETTEER_VERSION_KEY = 'catalog_gazetteer_version'
+
+
+@dataclass(frozen=True)
+class SortSpec:
+    field: str
+    descending: bool
+    nullable: bool = False
+
+
+# Opções de ordenação do catálogo -> campo (cada uma com índice (campo, id) em Book.Meta)
+SORT_OPTIONS = {
+    'newest': SortSpec('created_at', descending=True),
+    'oldest': SortSpec('created_at', descending=False),
+    'price_asc': SortSpec('price', descending=False, nullable=True),
+    'price_desc': SortSpec('price', descending=True, nullable=True),
+    'title_asc': SortSpec('title', descending=False),
+    'title_desc': SortSpec('title', descending=True),
+    'rating': SortSpec('average_rating', descending=True, nullable=True),
+    'popular': SortSpec('average_rating', descending=True, nullable=True),  # Mais vendidos (por rating)
+}
+DEFAULT_SORT = 'newest'
+
+
+def get_sort_spec(sort_by):
+    return SORT_OPTIONS.get(sort_by, SORT_OPTIONS[DEFAULT_SORT])
+
+
+def catalog_ordering(sort_by):
+    """Ordenação equivalente para order_by() (sem valor por último)."""
+    spec = get_sort_spec(sort_by)
+    expression = F(spec.field).desc(nulls_last=True) if spec.descending else F(spec.field).asc(nulls_last=True)
+    return [expression, '-pk' if spec.descending else 'pk']
+
+
+# ==============================================================================
+# Cache (versão, contadores e facetas)
+# ==============================================================================
+
+def _current_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def catalog_version():
+    """Versão atual do catálogo (incrementada a cada mudança em livros, autores e categorias)."""
+    return _current_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog_cache():
+    """Invalida contadores e facetas do catálogo (nova versão das chaves)."""
+    _bump_version(CATALOG_VERSION_KEY)
+
+
+def gazetteer_version():
+    """
+    Versão dos nomes do catálogo lidos pelo gazetteer do chatbot.
+
+    Só muda quando título, subtítulo ou autor de um livro, ou o nome de um
+    autor, mudam (ou quando livros/autores são criados ou removidos).
+    """
+    return _current_version(GAZETTEER_VERSION_KEY)
+
+
+def invalidate_catalog_gazetteer():
+    """Força a reconstrução do gazetteer do chatbot em todos os processos."""
+    _bump_version(GAZETTEER_VERSION_KEY)
+
+
+def filter_cache_key(filters):
+    """Chave estável para uma combinação de filtros (ordem dos valores não importa)."""
+    normalized = {
+        key: sorted(value) if isinstance(value, (list, tuple)) else value
+        for key, value in filters.items()
+        if value
+    }
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f'catalog_count_v{catalog_version()}_{digest}'
+
+
+def get_catalog_count(queryset, filters):
+    """Total de livros da combinação de filtros (COUNT em cache)."""
+    key = filter_cache_key(filters)
+    total = cache.get(key)
+    if total is None:
+        total = queryset.order_by().count()
+        cache.set(key, total, CATALOG_CACHE_TIMEOUT)
+    return total
+
+
+def get_category_facets():
+    """
+    Categorias para o filtro do catálogo com o número de livros, em uma query
+    agrupada e em cache. Mantém a regra de exibir apenas nomes com até duas
+    palavras.
+    """
+    key = f'catalog_facets_v{catalog_version()}'
+    facets = cache.get(key)
+    if facets is None:
+        rows = (
+            Category.objects.annotate(book_count=Count('books'))
+            .order_by('name')
+            .values('name', 'slug', 'book_count')
+        )
+        facets = [row for row in rows if len(row['name'].strip().split()) <= 2]
+        cache.set(key, facets, CATALOG_CACHE_TIMEOUT)
+    return facets
+
+
+# ==============================================================================
+# Cursores
+# ==============================================================================
+
+def _field_value(book, spec):
+    value = getattr(book, spec.field)
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def encode_cursor(sort_by, book, direction, number):
+    spec = get_sort_spec(sort_by)
+    data = {'s': sort_by, 'd': direction, 'v': _field_value(book, spec), 'k': book.pk, 'n': number}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_by):
+    """
+    Retorna (direção, valor, pk, número da página) ou None se o cursor for
+    inválido ou de outra ordenação (nesse caso a listagem volta à página 1).
+    """
+    if not token:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if data['s'] != sort_by or data['d'] not in ('next', 'prev'):
+            return None
+        spec = get_sort_spec(sort_by)
+        value = data['v']
+        if value is not None:
+            value = Book._meta.get_field(spec.field).to_python(value)
+        elif not spec.nullable:
+            return None
+        return data['d'], value, int(data['k']), max(1, int(data['n']))
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None
+
+
+# ==============================================================================
+# Paginação por chave
+# ==============================================================================
+
+@dataclass
+class CatalogPage:
+    """Página do catálogo com a mesma interface usada pelo template (page_obj)."""
+    object_list: list
+    number: int
+    total: int
+    per_page: int
+    has_next: bool
+    has_previous: bool
+    next_cursor: str = ''
+    previous_cursor: str = ''
+    num_pages: int = field(init=False)
+
+    def __post_init__(self):
+        self.num_pages = max(1, math.ceil(self.total / self.per_page)) if self.per_page else 1
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _segments(queryset, spec, position, backward):
+    """
+    Querysets a consumir em sequência a partir de position=(valor, pk) ou do
+    início (None). Com backward=True percorre a ordem inversa.
+    """
+    descending = spec.descending != backward
+    op = 'lt' if descending else 'gt'
+    order = [f'-{spec.field}', '-pk'] if descending else [spec.field, 'pk']
+    pk_order = '-pk' if descending else 'pk'
+
+    valued = queryset.filter(**{f'{spec.field}__isnull': False}) if spec.nullable else queryset
+    empty = queryset.filter(**{f'{spec.field}__isnull': True}) if spec.nullable else None
+
+    if position is None:
+        starts_with_empty = False
+        if backward:
+            # Fim da lista: sem valor vêm por último na ordem normal
+            starts_with_empty = spec.nullable
+        segments = [valued.order_by(*order)]
+        if empty is not None:
+            segments.insert(0 if starts_with_empty else 1, empty.order_by(pk_order))
+        return segments
+
+    value, pk = position
+    if value is None:
+        # Cursor dentro do trecho sem valor
+        segments = [empty.filter(**{f'pk__{op}': pk}).order_by(pk_order)]
+        if backward:
+            segments.append(valued.order_by(*order))
+        return segments
+
+    segments = [
+        valued.filter(
+            Q(**{f'{spec.field}__{op}': value}) | Q(**{spec.field: value, f'pk__{op}': pk})
+        ).order_by(*order)
+    ]
+    if empty is not None and not backward:
+        segments.append(empty.order_by(pk_order))
+    return segments
+
+
+def _collect(segments, limit):
+    rows = []
+    for segment in segments:
+        rows.extend(segment[:limit - len(rows)])
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def paginate_catalog(queryset, sort_by, per_page, filters, cursor=None, page=None):
+    """
+    Página do catálogo para a ordenação sort_by.
+
+    Args:
+        queryset: Livros já filtrados (a ordenação é definida aqui)
+        sort_by: Chave de SORT_OPTIONS
+        per_page: Livros por página
+        filters: Filtros ativos (chave do contador em cache)
+        cursor: Valor de ?cursor= (tem prioridade sobre page)
+        page: Valor de ?page= (links antigos, via OFFSET)
+    """
+    sort_by = sort_by if sort_by in SORT_OPTIONS else DEFAULT_SORT
+    spec = get_sort_spec(sort_by)
+    total = get_catalog_count(queryset, filters)
+    decoded = decode_cursor(cursor, sort_by)
+
+    if decoded is None and page and str(page).isdigit() and int(page) > 1:
+        number = int(page)
+        offset = (number - 1) * per_page
+        rows = list(queryset.order_by(*catalog_ordering(sort_by))[offset:offset + per_page + 1])
+        return _build_page(rows[:per_page], sort_by, number, total, per_page,
+                           has_next=len(rows) > per_page, has_previous=True)
+
+    if decoded is not None:
+        direction, value, pk, number = decoded
+        if direction == 'prev':
+            rows = _collect(_segments(queryset, spec, (value, pk), backward=True), per_page + 1)
+            if len(rows) > per_page:
+                return _build_page(list(reversed(rows[:per_page])), sort_by, number, total, per_page,
+                                   has_next=True, has_previous=True)
+            # Chegou ao início: recomeça pela primeira página
+        else:
+            rows = _collect(_segments(queryset, spec, (value, pk), backward=False), per_page + 1)
+            return _build_page(rows[:per_page], sort_by, number, total, per_page,
+                               has_next=len(rows) > per_page, has_previous=True)
+
+    rows = _collect(_segments(queryset, spec, None, backward=False), per_page + 1)
+    return _build_page(rows[:per_page], sort_by, 1, total, per_page,
+                       has_next=len(rows) > per_page, has_previous=False)
+
+
+def _build_page(books, sort_by, number, total, per_page, has_next, has_previous):
+    page = CatalogPage(
+        object_list=books,
+        number=number,
+        total=total,
+        per_page=per_page,
+        has_next=has_next and bool(books),
+        has_previous=has_previous and bool(books),
+    )
+    if page.has_next:
+        page.next_cursor = encode_cursor(sort_by, books[-1], 'next', number + 1)
+    if page.has_previous:
+        page.previous_cursor = encode_cursor(sort_by, books[0], 'prev', max(1, number - 1))
+    return page
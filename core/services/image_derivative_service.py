@@ -0,0 +1,235 @@
+"""
+core/services/image_derivative_service.py
+
+Versões responsivas (WebP e, opcionalmente, AVIF) de capas de livros e avatares.
+
+O original continua sendo salvo como está (download_cover busca a maior capa
+disponível). Depois do upload ou importação, a task Celery
+core.tasks.generate_image_derivatives gera uma versão por largura fixa e as
+grava ao lado do original:
+
+    books/covers/dom-casmurro.jpg
+    books/covers/dom-casmurro/160w.webp
+    books/covers/dom-casmurro/320w.webp
+    ...
+
+Os caminhos gerados ficam em um JSONField do próprio modelo (cover_derivatives,
+avatar_derivatives), junto com o nome do original de origem. Assim os templates
+montam o srcset sem consultar o storage, e uma troca de imagem invalida as
+versões antigas automaticamente (o 'source' deixa de bater com o campo).
+
+Templates: {% load responsive_images %} e {% cover_srcset book %} /
+{% avatar_srcset profile %} dentro da tag <img>.
+Backfill: python manage.py generate_image_derivatives
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Tipo de imagem -> (modelo, campo de imagem, campo JSON, chave das larguras, sizes padrão)
+IMAGE_SPECS = {
+    'cover': {
+        'model': 'core.Book',
+        'field': 'cover_image',
+        'derivatives_field': 'cover_derivatives',
+        'widths_setting': 'COVER_WIDTHS',
+        'sizes': '(max-width: 576px) 45vw, 220px',
+    },
+    'avatar': {
+        'model': 'accounts.UserProfile',
+        'field': 'avatar',
+        'derivatives_field': 'avatar_derivatives',
+        'widths_setting': 'AVATAR_WIDTHS',
+        'sizes': '64px',
+    },
+}
+
+FORMAT_EXTENSIONS = {
+    'WEBP': 'webp',
+    'AVIF': 'avif',
+}
+
+
+def get_image_derivative_settings():
+    """Retorna as configurações das versões responsivas com valores padrão seguros."""
+    defaults = {
+        'FORMATS': ['WEBP'],
+        'COVER_WIDTHS': [160, 320, 480],
+        'AVATAR_WIDTHS': [64, 128, 256],
+        'QUALITY': 80,
+    }
+    return {**defaults, **getattr(settings, 'IMAGE_DERIVATIVES', {})}
+
+
+def supported_formats():
+    """Formatos configurados que o Pillow instalado consegue gravar."""
+    Image.init()
+    formats = []
+    for fmt in get_image_derivative_settings()['FORMATS']:
+        fmt = fmt.upper()
+        if fmt in FORMAT_EXTENSIONS and fmt in Image.SAVE:
+            formats.append(fmt)
+        else:
+            logger.warning(f"[IMAGES] Formato {fmt} não suportado pelo Pillow instalado, ignorando")
+    return formats
+
+
+def derivative_name(source_name, width, fmt):
+    """books/covers/livro.jpg -> books/covers/livro/320w.webp"""
+    stem, _ = os.path.splitext(source_name)
+    return f'{stem}/{width}w.{FORMAT_EXTENSIONS[fmt]}'
+
+
+def get_derivatives(instance, spec_key):
+    """
+    Versões válidas para a imagem atual: {'WEBP': {'160': nome, ...}}.
+    Retorna {} se ainda não foram geradas para esta imagem.
+    """
+    spec = IMAGE_SPECS[spec_key]
+    field_file = getattr(instance, spec['field'], None)
+    data = getattr(instance, spec['derivatives_field'], None) or {}
+    if not field_file or not field_file.name or data.get('source') != field_file.name:
+        return {}
+    return data.get('formats', {})
+
+
+def needs_derivatives(instance, spec_key):
+    """True se a imagem mudou (ou foi removida) desde a última geração."""
+    spec = IMAGE_SPECS[spec_key]
+    field_file = getattr(instance, spec['field'])
+    data = getattr(instance, spec['derivatives_field']) or {}
+    name = field_file.name if field_file else ''
+    return (name or '') != (data.get('source') or '')
+
+
+def _iter_names(data):
+    for renditions in (data or {}).get('formats', {}).values():
+        yield from renditions.values()
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.warning(f"[IMAGES] Falha ao remover versão antiga '{name}': {e}")
+
+
+def _render(img, width, fmt, quality):
+    height = max(1, round(img.height * width / img.width))
+    resized = img.resize((width, height), Image.LANCZOS)
+    options = {'quality': quality}
+    if fmt == 'WEBP':
+        options['method'] = 6  # compressão mais lenta, arquivos menores
+    buffer = BytesIO()
+    resized.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(instance, spec_key):
+    """
+    Gera (ou regenera) as versões responsivas de uma imagem e grava os
+    caminhos no campo JSON do modelo com um UPDATE (sem disparar signals).
+
+    Returns:
+        dict: Dados gravados ({'source': nome, 'formats': {...}})
+    """
+    spec = IMAGE_SPECS[spec_key]
+    cfg = get_image_derivative_settings()
+    field_file = getattr(instance, spec['field'])
+    storage = field_file.storage
+    source = field_file.name if field_file else ''
+    previous = getattr(instance, spec['derivatives_field']) or {}
+
+    data = {}
+    if source:
+        widths = sorted(cfg[spec['widths_setting']])
+        with storage.open(source) as fh:
+            with Image.open(fh) as img:
+                original_width, original_height = img.size
+                if img.getexif().get(ExifTags.Base.Orientation, 1) > 4:  # foto girada 90°
+                    original_width = original_height
+                # draft() faz o decoder JPEG reduzir a imagem já na leitura
+                img.draft('RGB', (widths[-1], 1))
+                img = ImageOps.exif_transpose(img)
+                img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+                formats = {}
+                # Nunca amplia: larguras maiores que o original são ignoradas
+                for fmt in supported_formats():
+                    renditions = {}
+                    for width in (w for w in widths if w < original_width):
+                        saved = storage.save(
+                            derivative_name(source, width, fmt),
+                            ContentFile(_render(img, width, fmt, cfg['QUALITY'])),
+                        )
+                        renditions[str(width)] = saved
+                    if renditions:
+                        formats[fmt] = renditions
+        data = {'source': source, 'width': original_width, 'formats': formats}
+
+    model = instance.__class__
+    rows = model.objects.filter(pk=instance.pk)
+    if source:
+        # Só grava se a imagem não mudou enquanto as versões eram geradas
+        rows = rows.filter(**{spec['field']: source})
+    updated = rows.update(**{spec['derivatives_field']: data})
+    if not updated and source:
+        _delete_files(storage, _iter_names(data))
+        logger.info(f"[IMAGES] Imagem de {model.__name__} #{instance.pk} mudou durante a geração, descartando")
+        return previous
+
+    kept = set(_iter_names(data))
+    _delete_files(storage, [name for name in _iter_names(previous) if name not in kept])
+    setattr(instance, spec['derivatives_field'], data)
+    logger.info(f"🖼️ Versões responsivas geradas para {model.__name__} #{instance.pk}: {len(kept)} arquivo(s)")
+    return data
+
+
+def generate_derivatives_for(spec_key, pk):
+    """Carrega a instância e gera as versões (usado pela task Celery)."""
+    model = apps.get_model(IMAGE_SPECS[spec_key]['model'])
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    return generate_derivatives(instance, spec_key)
+
+
+def schedule_derivatives(instance, spec_key):
+    """Agenda a geração via Celery depois do commit da transação atual."""
+    def enqueue():
+        try:
+            from core.tasks import generate_image_derivatives
+            generate_image_derivatives.delay(spec_key, instance.pk)
+        except Exception as e:
+            # O comando generate_image_derivatives recupera as pendentes depois
+            logger.error(f"[IMAGES] ❌ Falha ao agendar versões responsivas ({spec_key} #{instance.pk}): {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def srcset_for(instance, spec_key, fmt='WEBP'):
+    """
+    Valor do atributo srcset ('url 160w, url 320w, original 1280w') ou '' se
+    não houver versões. O original entra como maior candidato.
+    """
+    renditions = get_derivatives(instance, spec_key).get(fmt)
+    if not renditions:
+        return ''
+    field_file = getattr(instance, IMAGE_SPECS[spec_key]['field'])
+    candidates = [
+        f'{field_file.storage.url(name)} {width}w'
+        for width, name in sorted(renditions.items(), key=lambda item: int(item[0]))
+    ]
+    original_width = getattr(instance, IMAGE_SPECS[spec_key]['derivatives_field']).get('width')
+    if original_width:
+        candidates.append(f'{field_file.url} {original_width}w')
+    return ', '.join(candidates)
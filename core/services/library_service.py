@@ -0,0 +1,140 @@
+"""
+core/services/library_service.py
+
+Carregamento das prateleiras da Biblioteca pessoal (LibraryView).
+
+Em vez de um COUNT e uma busca por prateleira (padrão e personalizada), usa:
+- get_shelf_counts(): contadores de todas as prateleiras em uma query agrupada;
+- load_library_shelves(): os SHELF_BOOKS_LIMIT livros mais recentes de cada
+  prateleira em uma única query com ROW_NUMBER() OVER (PARTITION BY
+  shelf_type, custom_shelf_name), mais os contadores.
+
+O resultado fica em cache por usuário e é invalidado pelas views AJAX que
+alteram prateleiras (core/views/library_ajax_views.py) e pelas mudanças
+automáticas de prateleira do ReadingProgress. O progresso de leitura NÃO vai
+para o cache (muda a cada página lida): attach_reading_progress() o busca em
+uma query a cada requisição.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Value, When, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from accounts.models import BookShelf, ReadingProgress
+
+logger = logging.getLogger(__name__)
+
+STANDARD_SHELVES = ['favorites', 'to_read', 'reading', 'read', 'abandoned']
+SHELF_BOOKS_LIMIT = 50
+LIBRARY_CACHE_TIMEOUT = 600  # 10 minutos
+
+
+def library_cache_key(user_id):
+    return f'library_shelves_{user_id}'
+
+
+def invalidate_library_cache(user_id):
+    """Remove do cache as prateleiras carregadas do usuário."""
+    cache.delete(library_cache_key(user_id))
+
+
+def _shelf_name():
+    # Prateleiras padrão são agrupadas só pelo tipo ('' ou NULL no nome)
+    return Case(
+        When(shelf_type='custom', then=Coalesce('custom_shelf_name', Value(''))),
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def get_shelf_counts(user):
+    """
+    Contadores de todas as prateleiras do usuário em uma query.
+
+    Returns:
+        dict: {'standard': {shelf_type: n}, 'custom': {nome: n}}
+    """
+    rows = (
+        BookShelf.objects.filter(user=user)
+        .annotate(shelf_name=_shelf_name())
+        .values('shelf_type', 'shelf_name')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    counts = {'standard': dict.fromkeys(STANDARD_SHELVES, 0), 'custom': {}}
+    for row in rows:
+        if row['shelf_type'] == 'custom':
+            counts['custom'][row['shelf_name']] = row['total']
+        else:
+            counts['standard'][row['shelf_type']] = row['total']
+    return counts
+
+
+def _fetch_shelf_items(user, limit):
+    """Primeiros `limit` itens (mais recentes) de cada prateleira, em uma query."""
+    items = (
+        BookShelf.objects.filter(user=user)
+        .annotate(
+            shelf_name=_shelf_name(),
+            shelf_position=Window(
+                RowNumber(),
+                partition_by=[F('shelf_type'), _shelf_name()],
+                order_by=[F('date_added').desc(), F('id').desc()],
+            ),
+        )
+        .filter(shelf_position__lte=limit)
+        .select_related('book', 'book__author', 'book__category')
+        .order_by('shelf_type', 'shelf_name', 'shelf_position')
+    )
+
+    shelves = {shelf_type: [] for shelf_type in STANDARD_SHELVES}
+    custom = {}
+    for item in items:
+        if item.shelf_type == 'custom':
+            custom.setdefault(item.shelf_name, []).append(item)
+        else:
+            shelves.setdefault(item.shelf_type, []).append(item)
+    return shelves, custom
+
+
+def load_library_shelves(user):
+    """
+    Prateleiras do usuário (até SHELF_BOOKS_LIMIT livros cada) e contadores.
+
+    Returns:
+        dict com:
+        - counts: retorno de get_shelf_counts()
+        - shelves: {shelf_type: [BookShelf]} das prateleiras padrão
+        - custom_shelves: {nome: [BookShelf]} das personalizadas
+    """
+    key = library_cache_key(user.id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    shelves, custom = _fetch_shelf_items(user, SHELF_BOOKS_LIMIT)
+    data = {
+        'counts': get_shelf_counts(user),
+        'shelves': shelves,
+        'custom_shelves': custom,
+    }
+    try:
+        cache.set(key, data, LIBRARY_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"[LIBRARY] Falha ao gravar prateleiras no cache: {e}")
+    return data
+
+
+def attach_reading_progress(user, items):
+    """Define item.progress (ReadingProgress ou None) com uma única query."""
+    items = list(items)
+    if not items:
+        return
+    progress_by_book = {
+        progress.book_id: progress
+        for progress in ReadingProgress.objects.filter(user=user, book_id__in={item.book_id for item in items})
+    }
+    for item in items:
+        item.progress = progress_by_book.get(item.book_id)
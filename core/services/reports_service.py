@@ -0,0 +1,279 @@
+"""
+core/services/reports_service.py
+
+Agregados do dashboard de relatórios (Livros, Autores, Vídeos, Eventos, Financeiro).
+
+Os agregados são materializados na tabela ReportSnapshot, uma linha por módulo:
+- get_dashboard_snapshots() lê todos os módulos em uma única query; o dashboard
+  não recalcula nada ao abrir (só calcula um módulo que ainda não tenha snapshot);
+- mark_stale() é chamado pelos signals (core/signals/report_signals.py) quando os
+  dados de origem mudam e só marca o módulo como desatualizado;
+- refresh_due_snapshots() roda no Celery Beat e recalcula apenas os módulos
+  desatualizados ou mais velhos que MAX_AGE_SECONDS (eventos e assinaturas
+  mudam de estado com o tempo, sem nenhum save);
+- refresh_snapshot() recalcula um módulo na hora (ação manual do dashboard).
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from core.models import Author, Book, Category, Event, ReportSnapshot, Video
+
+# Importar modelos opcionais
+try:
+    from finance.models import Subscription, Campaign
+except ImportError:
+    Subscription = None
+    Campaign = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_report_snapshot_settings():
+    """Retorna as configurações dos snapshots com valores padrão seguros."""
+    defaults = {
+        'MAX_AGE_SECONDS': 60 * 60,
+    }
+    return {**defaults, **getattr(settings, 'REPORT_SNAPSHOTS', {})}
+
+
+# ============================================
+# COLETA DE DADOS POR MÓDULO
+# ============================================
+
+def get_books_module_data():
+    """Coleta dados do módulo de livros."""
+    total_books = Book.objects.count()
+    books_with_cover = Book.objects.filter(cover_image__isnull=False).exclude(cover_image='').count()
+    books_from_google = Book.objects.exclude(Q(google_books_id='') | Q(google_books_id__isnull=True)).count()
+
+    # Livros por categoria
+    books_by_category = Category.objects.annotate(
+        book_count=Count('books')
+    ).filter(book_count__gt=0).order_by('-book_count')[:10]
+
+    # Top 10 autores por quantidade de livros
+    top_authors = Author.objects.annotate(
+        book_count=Count('books')
+    ).filter(book_count__gt=0).order_by('-book_count')[:10]
+
+    # Estatísticas gerais
+    avg_rating = Book.objects.aggregate(avg=Avg('average_rating'))['avg'] or 0
+
+    return {
+        'total_books': total_books,
+        'books_with_cover': books_with_cover,
+        'books_without_cover': total_books - books_with_cover,
+        'books_from_google': books_from_google,
+        'cover_percentage': round((books_with_cover / total_books * 100), 1) if total_books > 0 else 0,
+        'avg_rating': round(float(avg_rating), 1),
+        'books_by_category': list(books_by_category.values('name', 'book_count')),
+        'top_authors': list(top_authors.values('name', 'book_count')),
+        'chart_labels': [c['name'] for c in books_by_category.values('name')],
+        'chart_values': [c['book_count'] for c in books_by_category.values('book_count')],
+    }
+
+
+def get_authors_module_data():
+    """Coleta dados do módulo de autores."""
+    total_authors = Author.objects.count()
+
+    # Autores por quantidade de livros
+    authors_by_books = Author.objects.annotate(
+        book_count=Count('books')
+    ).order_by('-book_count')[:10]
+
+    # Autores sem livros
+    authors_without_books = Author.objects.annotate(
+        book_count=Count('books')
+    ).filter(book_count=0).count()
+
+    return {
+        'total_authors': total_authors,
+        'authors_with_books': total_authors - authors_without_books,
+        'authors_without_books': authors_without_books,
+        'authors_by_books': list(authors_by_books.values('name', 'book_count')),
+        'chart_labels': [a['name'] for a in authors_by_books.values('name')],
+        'chart_values': [a['book_count'] for a in authors_by_books.values('book_count')],
+    }
+
+
+def get_videos_module_data():
+    """Coleta dados do módulo de vídeos."""
+    total_videos = Video.objects.count()
+
+    # Estatísticas básicas
+    active_videos = Video.objects.filter(active=True).count() if hasattr(Video, 'active') else total_videos
+
+    return {
+        'total_videos': total_videos,
+        'active_videos': active_videos,
+        'inactive_videos': total_videos - active_videos,
+    }
+
+
+def get_finance_module_data():
+    """Coleta dados do módulo financeiro (se disponível)."""
+    if not Subscription:
+        return None
+
+    now = timezone.now()
+
+    # Assinaturas
+    total_subscriptions = Subscription.objects.count()
+    active_subscriptions = Subscription.objects.filter(
+        status='ativa',
+        expiration_date__gte=now
+    ).count()
+
+    # Receita total
+    total_revenue = Subscription.objects.filter(status='ativa').aggregate(
+        total=Sum('price')
+    )['total'] or 0
+
+    # Assinaturas por mês (últimos 6 meses)
+    subscriptions_by_month = []
+    for i in range(6):
+        month_start = now - timedelta(days=30 * (5 - i))
+        month_end = now - timedelta(days=30 * (4 - i)) if i < 5 else now
+        count = Subscription.objects.filter(
+            created_at__gte=month_start,
+            created_at__lt=month_end
+        ).count()
+        subscriptions_by_month.append({
+            'month': month_start.strftime('%b/%y'),
+            'count': count
+        })
+
+    # Campanhas
+    if Campaign:
+        total_campaigns = Campaign.objects.count()
+        active_campaigns = Campaign.objects.filter(
+            status='active',
+            start_date__lte=now,
+            end_date__gte=now
+        ).count()
+    else:
+        total_campaigns = 0
+        active_campaigns = 0
+
+    return {
+        'total_subscriptions': total_subscriptions,
+        'active_subscriptions': active_subscriptions,
+        'total_revenue': float(total_revenue),
+        'total_campaigns': total_campaigns,
+        'active_campaigns': active_campaigns,
+        'subscriptions_by_month': subscriptions_by_month,
+        'chart_labels': [s['month'] for s in subscriptions_by_month],
+        'chart_values': [s['count'] for s in subscriptions_by_month],
+    }
+
+
+def get_events_module_data():
+    """Coleta dados do módulo de eventos."""
+    now = timezone.now()
+
+    total_events = Event.objects.count()
+    upcoming = Event.objects.filter(start_date__gt=now, active=True).count()
+    happening = Event.objects.filter(start_date__lte=now, end_date__gte=now, active=True).count()
+    finished = Event.objects.filter(end_date__lt=now).count()
+
+    return {
+        'total_events': total_events,
+        'upcoming': upcoming,
+        'happening': happening,
+        'finished': finished,
+        'chart_labels': ['Próximos', 'Acontecendo', 'Finalizados'],
+        'chart_values': [upcoming, happening, finished],
+    }
+
+
+MODULE_COLLECTORS = {
+    'books': get_books_module_data,
+    'authors': get_authors_module_data,
+    'videos': get_videos_module_data,
+    'events': get_events_module_data,
+    'finance': get_finance_module_data,
+}
+
+
+# ============================================
+# SNAPSHOTS MATERIALIZADOS
+# ============================================
+
+def refresh_snapshot(module):
+    """
+    Recalcula e grava o snapshot de um módulo.
+
+    O flag is_stale é limpo ANTES do cálculo: um save que aconteça durante o
+    cálculo volta a marcar o módulo e ele é recalculado na próxima execução.
+
+    Returns:
+        ReportSnapshot atualizado
+    """
+    ReportSnapshot.objects.filter(module=module, is_stale=True).update(is_stale=False)
+
+    started = time.monotonic()
+    data = MODULE_COLLECTORS[module]()
+    compute_ms = int((time.monotonic() - started) * 1000)
+
+    snapshot, _ = ReportSnapshot.objects.update_or_create(
+        module=module,
+        defaults={'data': data, 'computed_at': timezone.now(), 'compute_ms': compute_ms},
+    )
+    logger.info(f"📊 Snapshot '{module}' recalculado em {compute_ms}ms")
+    return snapshot
+
+
+def refresh_all_snapshots():
+    """Recalcula todos os módulos. Retorna a lista de módulos atualizados."""
+    for module in MODULE_COLLECTORS:
+        refresh_snapshot(module)
+    return list(MODULE_COLLECTORS)
+
+
+def refresh_due_snapshots():
+    """
+    Recalcula apenas os módulos desatualizados, sem snapshot ou mais velhos
+    que MAX_AGE_SECONDS. Executada periodicamente via Celery Beat.
+
+    Returns:
+        list: Módulos recalculados
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_report_snapshot_settings()['MAX_AGE_SECONDS'])
+    fresh = set(
+        ReportSnapshot.objects.filter(is_stale=False, computed_at__gte=cutoff).values_list('module', flat=True)
+    )
+    due = [module for module in MODULE_COLLECTORS if module not in fresh]
+
+    refreshed = []
+    for module in due:
+        try:
+            refresh_snapshot(module)
+            refreshed.append(module)
+        except Exception as e:
+            logger.error(f"❌ Erro ao recalcular snapshot '{module}': {e}", exc_info=True)
+    return refreshed
+
+
+def mark_stale(modules):
+    """Marca os módulos como desatualizados (no máximo um UPDATE por chamada)."""
+    ReportSnapshot.objects.filter(module__in=modules, is_stale=False).update(is_stale=True)
+
+
+def get_dashboard_snapshots():
+    """
+    Retorna {módulo: ReportSnapshot} para o dashboard em uma única query.
+
+    Módulos que ainda não têm snapshot (primeiro acesso após o deploy) são
+    calculados na hora.
+    """
+    snapshots = {snapshot.module: snapshot for snapshot in ReportSnapshot.objects.all()}
+    for module in MODULE_COLLECTORS:
+        if module not in snapshots:
+            snapshots[module] = refresh_snapshot(module)
+    return snapshots
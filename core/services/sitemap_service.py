@@ -0,0 +1,272 @@
+"""
+core/services/sitemap_service.py
+
+Geração em segundo plano dos sitemaps XML (índice + partes gzip no storage).
+
+- Cada seção de core/sitemaps.py é lida em blocos de CHUNK_SIZE linhas por
+  paginação por pk, com values_list (sem instanciar modelos).
+- As URLs são gravadas em partes de até URLS_PER_FILE entradas
+  (sitemap-books-1.xml.gz, ...) e um índice (sitemap.xml) que aponta para
+  elas. Todos os arquivos vão gzipados para o storage em uma pasta por
+  geração; o manifest.json (também em cache) aponta para a geração atual e a
+  anterior é removida depois da troca.
+- Mudanças em livros, autores, categorias, artigos e universos só marcam os
+  sitemaps como desatualizados (core/signals/sitemap_signals.py); a task
+  periódica core.tasks.refresh_sitemaps regenera quando necessário.
+- A view core.views.sitemap_views serve os arquivos prontos com
+  Last-Modified, sem consultar o ORM.
+"""
+import gzip
+import json
+import logging
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.sitemaps import SITEMAP_SECTIONS, STATIC_VIEW_NAMES
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_CACHE_KEY = 'sitemaps_manifest'
+STALE_CACHE_KEY = 'sitemaps_stale'
+LOCK_CACHE_KEY = 'sitemaps_generating'
+LOCK_TIMEOUT = 600
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_OPEN = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+
+def get_sitemap_settings():
+    """Retorna as configurações dos sitemaps com valores padrão seguros."""
+    defaults = {
+        'BASE_URL': 'https://www.cgbookstore.com.br',
+        'STORAGE': 'default',
+        'STORAGE_DIR': 'sitemaps',
+        'URLS_PER_FILE': 10000,  # protocolo permite até 50.000
+        'CHUNK_SIZE': 2000,
+        'MAX_AGE_SECONDS': 24 * 3600,
+    }
+    return {**defaults, **getattr(settings, 'SITEMAPS', {})}
+
+
+def _storage():
+    return storages[get_sitemap_settings()['STORAGE']]
+
+
+def _storage_path(*parts):
+    return '/'.join([get_sitemap_settings()['STORAGE_DIR'].strip('/'), *parts])
+
+
+# ==============================================================================
+# Leitura das seções
+# ==============================================================================
+
+def iter_section_rows(section, chunk_size):
+    """Linhas da seção em blocos ordenados por pk (keyset, sem OFFSET)."""
+    queryset = section.queryset().order_by('pk').values_list(*section.fields)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def iter_section_urls(section, chunk_size):
+    """(caminho, lastmod) de cada URL da seção."""
+    if section.queryset is None:
+        for name in STATIC_VIEW_NAMES:
+            yield reverse(name), None
+        return
+    for row in iter_section_rows(section, chunk_size):
+        lastmod = row[section.lastmod_index] if section.lastmod_index is not None else None
+        yield section.location(row), lastmod
+
+
+# ==============================================================================
+# Escrita
+# ==============================================================================
+
+def _lastmod(value):
+    return value.isoformat(timespec='seconds') if hasattr(value, 'isoformat') else None
+
+
+class _GzipXmlWriter:
+    """Acumula um documento XML gzipado em memória."""
+
+    def __init__(self, opening):
+        self.buffer = BytesIO()
+        self.gzip = gzip.GzipFile(fileobj=self.buffer, mode='wb', mtime=0)
+        self.count = 0
+        self.lastmod = None
+        self.gzip.write((XML_HEADER + opening).encode())
+
+    def write_url(self, loc, lastmod, changefreq=None, priority=None):
+        entry = f'<url><loc>{escape(loc)}</loc>'
+        if lastmod:
+            entry += f'<lastmod>{_lastmod(lastmod)}</lastmod>'
+            self.lastmod = lastmod if self.lastmod is None else max(self.lastmod, lastmod)
+        if changefreq:
+            entry += f'<changefreq>{changefreq}</changefreq>'
+        if priority is not None:
+            entry += f'<priority>{priority:.1f}</priority>'
+        self.gzip.write((entry + '</url>\n').encode())
+        self.count += 1
+
+    def write_sitemap(self, loc, lastmod):
+        entry = f'<sitemap><loc>{escape(loc)}</loc>'
+        if lastmod:
+            entry += f'<lastmod>{lastmod}</lastmod>'
+        self.gzip.write((entry + '</sitemap>\n').encode())
+        self.count += 1
+
+    def close(self, closing):
+        self.gzip.write(closing.encode())
+        self.gzip.close()
+        return self.buffer.getvalue()
+
+
+def generate_sitemaps():
+    """
+    Gera todos os arquivos de uma nova geração, publica o manifest e remove a
+    geração anterior. Retorna o manifest.
+    """
+    cfg = get_sitemap_settings()
+    storage = _storage()
+    base_url = cfg['BASE_URL'].rstrip('/')
+    now = timezone.now()
+    generation = now.strftime('%Y%m%d%H%M%S%f')
+    generated_at = now.isoformat(timespec='seconds')
+    files = {}
+    # Limpa antes de ler: mudanças durante a geração marcam de novo
+    cache.delete(STALE_CACHE_KEY)
+
+    def publish(public_name, data, lastmod, urls):
+        path = storage.save(_storage_path(generation, public_name), ContentFile(data))
+        files[public_name] = {'path': path, 'lastmod': lastmod or generated_at, 'urls': urls}
+
+    for section in SITEMAP_SECTIONS:
+        part, writer = 0, None
+        for loc, lastmod in iter_section_urls(section, cfg['CHUNK_SIZE']):
+            if writer is None:
+                writer = _GzipXmlWriter(URLSET_OPEN)
+            writer.write_url(base_url + loc, lastmod, section.changefreq, section.priority)
+            if writer.count >= cfg['URLS_PER_FILE']:
+                part += 1
+                publish(f'sitemap-{section.name}-{part}.xml.gz', writer.close('</urlset>\n'),
+                        _lastmod(writer.lastmod), writer.count)
+                writer = None
+        if writer is not None:
+            part += 1
+            publish(f'sitemap-{section.name}-{part}.xml.gz', writer.close('</urlset>\n'),
+                    _lastmod(writer.lastmod), writer.count)
+
+    index = _GzipXmlWriter(INDEX_OPEN)
+    for public_name, entry in files.items():
+        index.write_sitemap(f'{base_url}/{public_name}', entry['lastmod'])
+    publish(INDEX_NAME, index.close('</sitemapindex>\n'), generated_at, index.count)
+
+    manifest = {'generation': generation, 'generated_at': generated_at, 'files': files}
+    previous = load_manifest()
+
+    manifest_path = _storage_path(MANIFEST_NAME)
+    if storage.exists(manifest_path):
+        storage.delete(manifest_path)
+    storage.save(manifest_path, ContentFile(json.dumps(manifest).encode()))
+    cache.set(MANIFEST_CACHE_KEY, manifest, None)
+
+    if previous and previous.get('generation') != generation:
+        for entry in previous.get('files', {}).values():
+            try:
+                storage.delete(entry['path'])
+            except Exception as e:
+                logger.warning(f"[SITEMAP] Falha ao remover arquivo antigo '{entry['path']}': {e}")
+
+    total = sum(entry['urls'] for name, entry in files.items() if name != INDEX_NAME)
+    logger.info(f"🗺️ Sitemaps gerados: {len(files) - 1} partes, {total} URLs (geração {generation})")
+    return manifest
+
+
+# ==============================================================================
+# Leitura (view) e agendamento
+# ==============================================================================
+
+def load_manifest():
+    """Manifest da geração atual (cache, depois storage) ou None."""
+    manifest = cache.get(MANIFEST_CACHE_KEY)
+    if manifest is not None:
+        return manifest
+    try:
+        with _storage().open(_storage_path(MANIFEST_NAME)) as fh:
+            manifest = json.loads(fh.read())
+    except Exception:
+        return None
+    cache.set(MANIFEST_CACHE_KEY, manifest, None)
+    return manifest
+
+
+def read_sitemap_file(manifest, public_name):
+    """Bytes gzipados de um arquivo da geração do manifest (em cache)."""
+    entry = manifest['files'][public_name]
+    key = f"sitemap_file_{manifest['generation']}_{public_name}"
+    data = cache.get(key)
+    if data is None:
+        with _storage().open(entry['path']) as fh:
+            data = fh.read()
+        cache.set(key, data, get_sitemap_settings()['MAX_AGE_SECONDS'])
+    return data
+
+
+def ensure_manifest():
+    """
+    Manifest atual; na primeira execução (nenhuma geração publicada) gera na
+    hora. Retorna None se outra geração já estiver em andamento.
+    """
+    manifest = load_manifest()
+    if manifest is not None:
+        return manifest
+    if not cache.add(LOCK_CACHE_KEY, True, LOCK_TIMEOUT):
+        return None
+    try:
+        return generate_sitemaps()
+    finally:
+        cache.delete(LOCK_CACHE_KEY)
+
+
+def mark_sitemaps_stale():
+    """Marca os sitemaps para regeneração na próxima execução da task."""
+    cache.set(STALE_CACHE_KEY, True, None)
+
+
+def refresh_sitemaps(force=False):
+    """
+    Regenera se marcado como desatualizado, sem geração publicada ou mais
+    velho que MAX_AGE_SECONDS. Retorna o manifest novo ou None.
+    """
+    manifest = load_manifest()
+    due = force or manifest is None or cache.get(STALE_CACHE_KEY)
+    if not due:
+        generated_at = parse_datetime(manifest.get('generated_at') or '')
+        max_age = get_sitemap_settings()['MAX_AGE_SECONDS']
+        due = generated_at is None or (timezone.now() - generated_at).total_seconds() > max_age
+    if not due:
+        return None
+    if not cache.add(LOCK_CACHE_KEY, True, LOCK_TIMEOUT):
+        logger.info("[SITEMAP] Geração já em andamento, ignorando")
+        return None
+    try:
+        return generate_sitemaps()
+    finally:
+        cache.delete(LOCK_CACHE_KEY)
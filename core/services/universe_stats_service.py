@@ -0,0 +1,131 @@
+"""
+core/services/universe_stats_service.py
+
+Livros e estatísticas dos Universos Literários.
+
+- universe_book_ids(): o conjunto de livros do universo (M2M books + livros do
+  autor principal + livros dos autores adicionais) como um único UNION, usado
+  como subquery — LiteraryUniverse.get_all_books() não precisa mais de três
+  consultas separadas nem de uma lista de IDs em Python.
+- compute_universe_stats(): todos os contadores em duas queries: uma agregação
+  sobre o UNION (livros e total de páginas) e um SELECT do universo com uma
+  subquery de contagem por relação (artigos, vídeos, quizzes, FAQs, etc.).
+- get_universe_stats(): o resultado acima em cache por universo, invalidado
+  pelos signals de cache (core/signals/cache_signals.py) quando o universo, um
+  de seus modelos filhos ou uma relação M2M muda. get_stats(),
+  get_quality_checklist() e get_quality_score() usam este cache.
+"""
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+UNIVERSE_STATS_TIMEOUT = 3600  # 1 hora
+
+# Tipos de UniverseContentItem contados como adaptações no checklist
+ADAPTATION_CONTENT_TYPES = ['adaptation', 'game']
+
+
+def universe_stats_cache_key(universe_id):
+    # Prefixo literary_universe_* : também cai no delete_pattern de invalidate_universe_cache()
+    return f'literary_universe_stats_{universe_id}'
+
+
+def invalidate_universe_stats(universe_id):
+    """Remove do cache as estatísticas de um universo."""
+    cache.delete(universe_stats_cache_key(universe_id))
+
+
+def universe_book_ids(universe):
+    """
+    IDs dos livros do universo em um único UNION (para usar em id__in).
+    order_by() vazio remove a ordenação padrão de Book, que não é permitida
+    dentro de um UNION.
+    """
+    from core.models import Book, LiteraryUniverse
+
+    manual = LiteraryUniverse.books.through.objects.filter(
+        literaryuniverse_id=universe.pk
+    ).values('book_id').order_by()
+    by_author = Book.objects.filter(author_id=universe.author_id).values('id').order_by()
+    by_additional = Book.objects.filter(
+        author_id__in=LiteraryUniverse.additional_authors.through.objects.filter(
+            literaryuniverse_id=universe.pk
+        ).values('author_id')
+    ).values('id').order_by()
+    return manual.union(by_author, by_additional)
+
+
+def _count(queryset, link_field):
+    """Subquery correlacionada com a contagem de queryset por universo."""
+    counted = (
+        queryset.filter(**{link_field: OuterRef('pk')})
+        .order_by()
+        .values(link_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def compute_universe_stats(universe):
+    """Calcula as estatísticas do universo em duas queries (sem cache)."""
+    from core.models import (
+        Book, LiteraryUniverse, UniverseCharacter, UniverseContentItem,
+        UniverseFAQ, UniverseReadingOrder, UniverseTimelineEvent,
+    )
+
+    books = Book.objects.filter(id__in=universe_book_ids(universe)).order_by().aggregate(
+        books_count=Count('id'),
+        total_pages=Coalesce(Sum('page_count'), 0),
+    )
+
+    counters = LiteraryUniverse.objects.filter(pk=universe.pk).annotate(
+        additional_authors_count=_count(
+            LiteraryUniverse.additional_authors.through.objects.exclude(author_id=universe.author_id),
+            'literaryuniverse',
+        ),
+        articles_count=_count(LiteraryUniverse.articles.through.objects.all(), 'literaryuniverse'),
+        videos_count=_count(LiteraryUniverse.videos.through.objects.all(), 'literaryuniverse'),
+        quizzes_count=_count(LiteraryUniverse.quizzes.through.objects.all(), 'literaryuniverse'),
+        related_universes_count=_count(LiteraryUniverse.related_universes.through.objects.all(), 'from_literaryuniverse'),
+        faqs_count=_count(UniverseFAQ.objects.filter(is_active=True), 'universe'),
+        timeline_count=_count(UniverseTimelineEvent.objects.filter(is_active=True), 'universe'),
+        reading_order_count=_count(UniverseReadingOrder.objects.all(), 'universe'),
+        adaptations_count=_count(
+            UniverseContentItem.objects.filter(content_type__in=ADAPTATION_CONTENT_TYPES, is_active=True),
+            'universe',
+        ),
+        characters_count=_count(UniverseCharacter.objects.filter(is_active=True), 'universe'),
+    ).values(
+        'additional_authors_count', 'articles_count', 'videos_count', 'quizzes_count',
+        'related_universes_count', 'faqs_count', 'timeline_count', 'reading_order_count',
+        'adaptations_count', 'characters_count',
+    ).first() or {}
+
+    return {
+        'books_count': books['books_count'],
+        'authors_count': 1 + counters.get('additional_authors_count', 0),
+        'articles_count': counters.get('articles_count', 0),
+        'videos_count': counters.get('videos_count', 0),
+        'quizzes_count': counters.get('quizzes_count', 0),
+        'faqs_count': counters.get('faqs_count', 0),
+        'timeline_count': counters.get('timeline_count', 0),
+        'reading_order_count': counters.get('reading_order_count', 0),
+        'adaptations_count': counters.get('adaptations_count', 0),
+        'characters_count': counters.get('characters_count', 0),
+        'related_universes_count': counters.get('related_universes_count', 0),
+        'total_pages': books['total_pages'],
+    }
+
+
+def get_universe_stats(universe):
+    """Estatísticas do universo, em cache por UNIVERSE_STATS_TIMEOUT."""
+    if not universe.pk:
+        return compute_universe_stats(universe)
+
+    key = universe_stats_cache_key(universe.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_universe_stats(universe)
+        cache.set(key, stats, UNIVERSE_STATS_TIMEOUT)
+    return stats
@@ -4,7 +4,7 @@ Signals para invalidar cache da home page e universos literários quando dados r
 IMPORTANTE: Não invalidar em updates de contadores (views, clicks) pois
 são operações frequentes que não afetam o conteúdo exibido.
 """
-from django.db.models.signals import post_save, post_delete, pre_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
 from django.db.backends.signals import connection_created
 from django.dispatch import receiver
 from django.core.cache import cache
@@ -109,7 +109,9 @@ def video_changed(sender, **kwargs):
 @receiver(post_delete, sender='core.LiteraryUniverse')
 def universe_changed(sender, instance, **kwargs):
     """Invalida cache do universo e da home page."""
+    from core.services.universe_stats_service import invalidate_universe_stats
     invalidate_universe_cache(instance.slug)
+    invalidate_universe_stats(instance.pk)
     invalidate_home_cache()
 
 
@@ -128,7 +130,50 @@ def universe_changed(sender, instance, **kwargs):
 def universe_child_changed(sender, instance, **kwargs):
     """Invalida cache do universo pai quando algum filho muda."""
     if hasattr(instance, 'universe') and instance.universe:
+        from core.services.universe_stats_service import invalidate_universe_stats
         invalidate_universe_cache(instance.universe.slug)
+        invalidate_universe_stats(instance.universe_id)
+
+
+@receiver(m2m_changed, sender='core.LiteraryUniverse_books')
+@receiver(m2m_changed, sender='core.LiteraryUniverse_additional_authors')
+@receiver(m2m_changed, sender='core.LiteraryUniverse_articles')
+@receiver(m2m_changed, sender='core.LiteraryUniverse_videos')
+@receiver(m2m_changed, sender='core.LiteraryUniverse_quizzes')
+@receiver(m2m_changed, sender='core.LiteraryUniverse_related_universes')
+def universe_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalida as estatísticas dos universos cujas relações M2M mudaram."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    from core.services.universe_stats_service import invalidate_universe_stats
+    symmetric = sender._meta.model_name == 'literaryuniverse_related_universes'
+    if pk_set is None and (reverse or symmetric):
+        # clear() sem a lista dos universos afetados do outro lado
+        invalidate_universe_cache()
+        return
+
+    if reverse:
+        # Alterado pelo outro lado (ex.: book.literary_universes.add(universo))
+        universe_ids = set(pk_set)
+    else:
+        universe_ids = {instance.pk}
+        if symmetric:
+            universe_ids |= set(pk_set or ())
+
+    for universe_id in universe_ids:
+        invalidate_universe_stats(universe_id)
+
+
+@receiver(post_delete, sender='core.Video')
+@receiver(post_delete, sender='news.Article')
+@receiver(post_delete, sender='news.Quiz')
+def universe_related_content_deleted(sender, **kwargs):
+    """
+    A deleção em cascata remove as linhas M2M sem disparar m2m_changed:
+    invalida os universos (página e estatísticas).
+    """
+    invalidate_universe_cache()
 
 
 # ==============================================================================
@@ -139,10 +184,15 @@ def universe_child_changed(sender, instance, **kwargs):
 def book_pre_delete_capture_files(sender, instance, **kwargs):
     """
     Captura o nome do arquivo ANTES da deleção e zera o campo.
+
+    Capas idênticas baixadas em massa (core.utils.bulk_media_fetcher) apontam
+    para o mesmo arquivo; nesse caso ele só é removido com o último livro.
     """
     cover_name = None
     if instance.cover_image and instance.cover_image.name:
         cover_name = instance.cover_image.name
+        if sender.objects.filter(cover_image=cover_name).exclude(pk=instance.pk).exists():
+            cover_name = None
 
     instance._pending_file_delete = cover_name
 
@@ -186,6 +236,79 @@ def author_changed(sender, **kwargs):
     invalidate_universe_cache()
 
 
+# ==============================================================================
+# SIGNALS DE CACHE — Catálogo (contadores e facetas do BookListView)
+# ==============================================================================
+
+# Campos lidos pelos filtros (busca, categoria, autor, preço, prateleira) e
+# pelas facetas do BookListView
+CATALOG_FIELDS = {
+    'core.Book': {'title', 'subtitle', 'isbn', 'author', 'category', 'price'},
+    'core.Author': {'name', 'slug'},
+    'core.Category': {'name', 'slug'},
+    'core.SectionItem': {'section', 'content_type', 'object_id', 'active'},
+}
+
+
+@receiver(post_save, sender='core.Book')
+@receiver(post_delete, sender='core.Book')
+@receiver(post_save, sender='core.Category')
+@receiver(post_delete, sender='core.Category')
+@receiver(post_save, sender='core.Author')
+@receiver(post_delete, sender='core.Author')
+@receiver(post_save, sender='core.SectionItem')
+@receiver(post_delete, sender='core.SectionItem')
+def catalog_changed(sender, update_fields=None, **kwargs):
+    """Invalida os totais e facetas do catálogo em cache."""
+    # Saves parciais (contadores, revisões de IA) não mudam totais nem facetas
+    if update_fields and not CATALOG_FIELDS[sender._meta.label].intersection(update_fields):
+        return
+    from core.services.catalog_service import invalidate_catalog_cache
+    invalidate_catalog_cache()
+
+
+# ==============================================================================
+# SIGNALS DE CACHE — Gazetteer do Chatbot (títulos e nomes do catálogo)
+# ==============================================================================
+
+# Campos lidos por chatbot_literario.catalog_gazetteer.build_catalog_gazetteer
+GAZETTEER_FIELDS = {
+    'core.Book': ('title', 'subtitle', 'author'),
+    'core.Author': ('name',),
+}
+
+
+@receiver(pre_save, sender='core.Book')
+@receiver(pre_save, sender='core.Author')
+def gazetteer_fields_checked(sender, instance, update_fields=None, **kwargs):
+    """Marca na instância se o save altera algum campo lido pelo gazetteer."""
+    if instance._state.adding:
+        instance._gazetteer_changed = True
+        return
+    fields = [
+        name for name in GAZETTEER_FIELDS[sender._meta.label]
+        if update_fields is None or name in update_fields
+    ]
+    if not fields:
+        instance._gazetteer_changed = False
+        return
+    attnames = [sender._meta.get_field(name).attname for name in fields]
+    previous = sender._default_manager.filter(pk=instance.pk).values_list(*attnames).first()
+    instance._gazetteer_changed = previous != tuple(getattr(instance, attname) for attname in attnames)
+
+
+@receiver(post_save, sender='core.Book')
+@receiver(post_delete, sender='core.Book')
+@receiver(post_save, sender='core.Author')
+@receiver(post_delete, sender='core.Author')
+def gazetteer_source_changed(sender, instance, **kwargs):
+    """Nova versão do gazetteer quando títulos, subtítulos ou nomes mudam."""
+    if not instance.__dict__.pop('_gazetteer_changed', True):
+        return
+    from core.services.catalog_service import invalidate_catalog_gazetteer
+    invalidate_catalog_gazetteer()
+
+
 @receiver(post_save, sender='news.Article')
 @receiver(post_delete, sender='news.Article')
 def news_article_changed(sender, **kwargs):
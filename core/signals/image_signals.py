@@ -0,0 +1,55 @@
+"""
+Signals que agendam as versões responsivas de capas e avatares.
+
+Qualquer save que troque (ou remova) a imagem agenda a task
+core.tasks.generate_image_derivatives após o commit — cobre uploads pelo admin
+e perfil e as importações que apenas atribuem o caminho salvo por
+download_cover. Ao deletar o registro, as versões geradas também são removidas.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from core.services.image_derivative_service import needs_derivatives, schedule_derivatives
+
+logger = logging.getLogger(__name__)
+
+
+def _schedule_file_deletes(data):
+    names = [name for renditions in (data or {}).get('formats', {}).values() for name in renditions.values()]
+    if not names:
+        return
+
+    def enqueue():
+        from core.tasks import delete_storage_file
+        for name in names:
+            try:
+                delete_storage_file.delay(name)
+            except Exception as e:
+                logger.error(f"[STORAGE] ❌ Falha ao agendar deleção de versão responsiva: {e}")
+                return
+
+    transaction.on_commit(enqueue)
+
+
+@receiver(post_save, sender='core.Book', dispatch_uid='book_cover_derivatives')
+def book_cover_changed(sender, instance, **kwargs):
+    if needs_derivatives(instance, 'cover'):
+        schedule_derivatives(instance, 'cover')
+
+
+@receiver(post_save, sender='accounts.UserProfile', dispatch_uid='profile_avatar_derivatives')
+def profile_avatar_changed(sender, instance, **kwargs):
+    if needs_derivatives(instance, 'avatar'):
+        schedule_derivatives(instance, 'avatar')
+
+
+@receiver(post_delete, sender='core.Book', dispatch_uid='book_cover_derivatives_delete')
+def book_cover_derivatives_delete(sender, instance, **kwargs):
+    _schedule_file_deletes(instance.cover_derivatives)
+
+
+@receiver(post_delete, sender='accounts.UserProfile', dispatch_uid='profile_avatar_derivatives_delete')
+def profile_avatar_derivatives_delete(sender, instance, **kwargs):
+    _schedule_file_deletes(instance.avatar_derivatives)
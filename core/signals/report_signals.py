@@ -0,0 +1,73 @@
+"""
+Signals que marcam os snapshots do dashboard de relatórios como desatualizados.
+
+Um save só marca o módulo (um UPDATE, e nenhum se já estiver marcado); o
+recálculo fica para a task periódica core.tasks.refresh_report_snapshots.
+Saves com update_fields que não tocam campos usados nos agregados (contadores,
+análises de IA, health check de vídeos) são ignorados.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from core.services.reports_service import mark_stale
+
+logger = logging.getLogger(__name__)
+
+# Campos lidos pelos agregados de cada modelo (None = qualquer campo)
+BOOK_REPORT_FIELDS = {'cover_image', 'google_books_id', 'category', 'author', 'average_rating'}
+VIDEO_REPORT_FIELDS = {'active'}
+EVENT_REPORT_FIELDS = {'start_date', 'end_date', 'active'}
+SUBSCRIPTION_REPORT_FIELDS = {'status', 'expiration_date', 'price'}
+CAMPAIGN_REPORT_FIELDS = {'status', 'start_date', 'end_date'}
+
+
+def _mark(modules, relevant_fields=None, update_fields=None):
+    if update_fields and relevant_fields and not relevant_fields.intersection(update_fields):
+        return
+    try:
+        mark_stale(modules)
+    except Exception as e:
+        logger.warning(f"[REPORTS] Falha ao marcar snapshots {modules}: {e}")
+
+
+@receiver(post_save, sender='core.Book')
+@receiver(post_delete, sender='core.Book')
+def book_report_changed(sender, update_fields=None, **kwargs):
+    _mark(['books', 'authors'], BOOK_REPORT_FIELDS, update_fields)
+
+
+@receiver(post_save, sender='core.Author')
+@receiver(post_delete, sender='core.Author')
+def author_report_changed(sender, **kwargs):
+    _mark(['books', 'authors'])
+
+
+@receiver(post_save, sender='core.Category')
+@receiver(post_delete, sender='core.Category')
+def category_report_changed(sender, **kwargs):
+    _mark(['books'])
+
+
+@receiver(post_save, sender='core.Video')
+@receiver(post_delete, sender='core.Video')
+def video_report_changed(sender, update_fields=None, **kwargs):
+    _mark(['videos'], VIDEO_REPORT_FIELDS, update_fields)
+
+
+@receiver(post_save, sender='core.Event')
+@receiver(post_delete, sender='core.Event')
+def event_report_changed(sender, update_fields=None, **kwargs):
+    _mark(['events'], EVENT_REPORT_FIELDS, update_fields)
+
+
+@receiver(post_save, sender='finance.Subscription')
+@receiver(post_delete, sender='finance.Subscription')
+def subscription_report_changed(sender, update_fields=None, **kwargs):
+    _mark(['finance'], SUBSCRIPTION_REPORT_FIELDS, update_fields)
+
+
+@receiver(post_save, sender='finance.Campaign')
+@receiver(post_delete, sender='finance.Campaign')
+def campaign_report_changed(sender, update_fields=None, **kwargs):
+    _mark(['finance'], CAMPAIGN_REPORT_FIELDS, update_fields)
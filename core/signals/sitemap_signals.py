@@ -0,0 +1,40 @@
+"""
+Signals que marcam os sitemaps como desatualizados.
+
+Só grava uma flag no cache; a regeneração fica para a task periódica
+core.tasks.refresh_sitemaps. Saves com update_fields que não tocam campos
+usados no sitemap (contadores, métricas) são ignorados.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from core.services.sitemap_service import mark_sitemaps_stale
+
+logger = logging.getLogger(__name__)
+
+# Campos lidos pelas seções do sitemap (core/sitemaps.py)
+SITEMAP_FIELDS = {'slug', 'updated_at', 'is_published', 'is_active'}
+
+
+def _mark(update_fields=None):
+    if update_fields and not SITEMAP_FIELDS.intersection(update_fields):
+        return
+    try:
+        mark_sitemaps_stale()
+    except Exception as e:
+        logger.warning(f"[SITEMAP] Falha ao marcar sitemaps como desatualizados: {e}")
+
+
+@receiver(post_save, sender='core.Book')
+@receiver(post_delete, sender='core.Book')
+@receiver(post_save, sender='core.Author')
+@receiver(post_delete, sender='core.Author')
+@receiver(post_save, sender='core.Category')
+@receiver(post_delete, sender='core.Category')
+@receiver(post_save, sender='core.LiteraryUniverse')
+@receiver(post_delete, sender='core.LiteraryUniverse')
+@receiver(post_save, sender='news.Article')
+@receiver(post_delete, sender='news.Article')
+def sitemap_content_changed(sender, update_fields=None, **kwargs):
+    _mark(update_fields)
@@ -1,93 +1,99 @@
-from django.contrib.sitemaps import Sitemap
-from django.urls import reverse
-from core.models import Book, Author, Category, LiteraryUniverse
-from news.models import Article
-
-class StaticViewSitemap(Sitemap):
-    priority = 0.8
-    changefreq = 'weekly'
-
-    def items(self):
-        return [
-            'core:home',
-            'core:book_list',
-            'core:author_list',
-            'core:about',
-            'core:contact',
-            'core:faq',
-            'core:events',
-            'core:terms_of_service',
-            'core:privacy_policy',
-            'news:home',
-            'news:all_articles',
-        ]
-
-    def location(self, item):
-        return reverse(item)
-
-
-class BookSitemap(Sitemap):
-    changefreq = 'daily'
-    priority = 0.9
-
-    def items(self):
-        return Book.objects.filter(active=True)
-
-    def lastmod(self, obj):
-        return getattr(obj, 'updated_at', None) or getattr(obj, 'created_at', None)
-
-    def location(self, obj):
-        if hasattr(obj, 'get_absolute_url'):
-            return obj.get_absolute_url()
-        return reverse('core:book_detail', kwargs={'slug': obj.slug})
-
-
-class AuthorSitemap(Sitemap):
-    changefreq = 'weekly'
-    priority = 0.8
-
-    def items(self):
-        return Author.objects.all()
-
-    def location(self, obj):
-        return reverse('core:author_detail', kwargs={'pk': obj.pk})
+"""
+Seções do sitemap XML.
 
+Cada seção lê apenas as colunas necessárias (values_list) em blocos ordenados
+por pk e monta as URLs a partir das tuplas, sem instanciar os modelos. Os
+arquivos são gerados em segundo plano por core/services/sitemap_service.py e
+servidos já prontos (gzip) pela view core.views.sitemap_views.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
 
-class CategorySitemap(Sitemap):
-    changefreq = 'weekly'
-    priority = 0.7
-
-    def items(self):
-        return Category.objects.all()
-
-    def location(self, obj):
-        return f"/livros/?categoria={obj.slug}"
-
-
-class ArticleSitemap(Sitemap):
-    changefreq = 'daily'
-    priority = 0.8
-
-    def items(self):
-        return Article.objects.filter(is_published=True)
-
-    def lastmod(self, obj):
-        return getattr(obj, 'updated_at', None) or getattr(obj, 'published_at', None)
-
-    def location(self, obj):
-        return reverse('news:article_detail', kwargs={'slug': obj.slug})
-
-
-class LiteraryUniverseSitemap(Sitemap):
-    """Sitemap XML para Universos Literários."""
-    changefreq = 'weekly'
-    priority = 0.9
-
-    def items(self):
-        return LiteraryUniverse.objects.filter(is_active=True)
-
-    def lastmod(self, obj):
-        return obj.updated_at
+from django.urls import reverse
 
-    def location(self, obj):
-        return obj.get_absolute_url()
+STATIC_VIEW_NAMES = [
+    'core:home',
+    'core:book_list',
+    'core:author_list',
+    'core:about',
+    'core:contact',
+    'core:faq',
+    'core:events',
+    'core:terms_of_service',
+    'core:privacy_policy',
+    'news:home',
+    'news:all_articles',
+]
+
+
+@dataclass(frozen=True)
+class SitemapSection:
+    """
+    name: prefixo dos arquivos (sitemap-<name>-N.xml.gz)
+    queryset: função que retorna o queryset filtrado (sem ordenação)
+    fields: colunas lidas via values_list; a primeira deve ser o pk
+    location: função (linha) -> caminho da URL
+    lastmod_index: posição da data de modificação na linha (ou None)
+    """
+    name: str
+    changefreq: str
+    priority: float
+    queryset: Optional[Callable] = None
+    fields: tuple = ()
+    location: Optional[Callable] = None
+    lastmod_index: Optional[int] = None
+
+
+def _books():
+    from core.models import Book
+    return Book.objects.exclude(slug='')
+
+
+def _authors():
+    from core.models import Author
+    return Author.objects.exclude(slug='')
+
+
+def _categories():
+    from core.models import Category
+    return Category.objects.exclude(slug='')
+
+
+def _articles():
+    from news.models import Article
+    return Article.objects.filter(is_published=True).exclude(slug='')
+
+
+def _universes():
+    from core.models import LiteraryUniverse
+    return LiteraryUniverse.objects.filter(is_active=True).exclude(slug='')
+
+
+SITEMAP_SECTIONS = [
+    SitemapSection('static', changefreq='weekly', priority=0.8),
+    SitemapSection(
+        'books', changefreq='daily', priority=0.9, queryset=_books,
+        fields=('pk', 'slug', 'updated_at'), lastmod_index=2,
+        location=lambda row: reverse('core:book_detail', kwargs={'slug': row[1]}),
+    ),
+    SitemapSection(
+        'authors', changefreq='weekly', priority=0.8, queryset=_authors,
+        fields=('pk', 'slug'),
+        location=lambda row: reverse('core:author_detail', kwargs={'slug': row[1]}),
+    ),
+    SitemapSection(
+        'categories', changefreq='weekly', priority=0.7, queryset=_categories,
+        fields=('pk', 'slug'),
+        location=lambda row: f"/livros/?categoria={row[1]}",
+    ),
+    SitemapSection(
+        'articles', changefreq='daily', priority=0.8, queryset=_articles,
+        fields=('pk', 'slug', 'updated_at'), lastmod_index=2,
+        location=lambda row: reverse('news:article_detail', kwargs={'slug': row[1]}),
+    ),
+    SitemapSection(
+        'universes', changefreq='weekly', priority=0.9, queryset=_universes,
+        fields=('pk', 'slug', 'updated_at'), lastmod_index=2,
+        location=lambda row: reverse('core:literary_universe', kwargs={'slug': row[1]}),
+    ),
+]
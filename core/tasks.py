@@ -26,6 +26,57 @@ def clear_expired_cache():
 
 
 
+@shared_task
+def refresh_report_snapshots(force=False):
+    """
+    Recalcula os snapshots do dashboard de relatórios.
+    Executada periodicamente via Celery Beat: por padrão só recalcula os
+    módulos marcados como desatualizados ou mais velhos que MAX_AGE_SECONDS.
+    """
+    from core.services.reports_service import refresh_all_snapshots, refresh_due_snapshots
+
+    modules = refresh_all_snapshots() if force else refresh_due_snapshots()
+    if modules:
+        logger.info(f"📊 Snapshots de relatórios atualizados: {', '.join(modules)}")
+    return modules
+
+
+@shared_task
+def refresh_sitemaps(force=False):
+    """
+    Regenera os sitemaps XML no storage.
+    Executada periodicamente via Celery Beat: por padrão só regenera se algum
+    conteúdo mudou (core/signals/sitemap_signals.py) ou a geração atual for
+    mais velha que SITEMAPS['MAX_AGE_SECONDS'].
+    """
+    from core.services.sitemap_service import refresh_sitemaps as refresh
+
+    manifest = refresh(force=force)
+    if manifest:
+        return manifest['generation']
+    return None
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_image_derivatives(self, spec_key: str, pk: int):
+    """
+    Gera as versões responsivas (WebP/AVIF) de uma capa ou avatar.
+    Agendada após upload/importação (core/signals/image_signals.py).
+
+    Args:
+        spec_key: 'cover' (Book.cover_image) ou 'avatar' (UserProfile.avatar)
+        pk: ID do Book ou UserProfile
+    """
+    from core.services.image_derivative_service import generate_derivatives_for
+
+    try:
+        data = generate_derivatives_for(spec_key, pk)
+    except Exception as exc:
+        logger.warning(f"[IMAGES] Falha ao gerar versões de {spec_key} #{pk}: {exc}. Retentando...")
+        raise self.retry(exc=exc)
+    return sum(len(renditions) for renditions in (data or {}).get('formats', {}).values())
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def delete_storage_file(self, file_name: str, storage_backend: str = 'default'):
     """
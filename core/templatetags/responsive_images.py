@@ -0,0 +1,38 @@
+"""
+Template tags para imagens responsivas (capas e avatares).
+
+Uso dentro da tag <img>, mantendo o src original como fallback:
+    {% load responsive_images %}
+    <img src="{{ book.cover_image.url }}"{% cover_srcset book %} alt="...">
+    <img src="{{ profile.cached_avatar_url }}"{% avatar_srcset profile sizes="32px" %} alt="...">
+
+Sem versões geradas (ou para objetos que não são Book/UserProfile) não
+renderiza nada e o navegador usa o src original.
+"""
+from django import template
+from django.utils.html import format_html
+
+from core.services.image_derivative_service import IMAGE_SPECS, srcset_for
+
+register = template.Library()
+
+
+def _srcset_attrs(obj, spec_key, sizes, fmt):
+    if obj is None or not hasattr(obj, IMAGE_SPECS[spec_key]['derivatives_field']):
+        return ''
+    srcset = srcset_for(obj, spec_key, fmt)
+    if not srcset:
+        return ''
+    return format_html(' srcset="{}" sizes="{}"', srcset, sizes or IMAGE_SPECS[spec_key]['sizes'])
+
+
+@register.simple_tag
+def cover_srcset(book, sizes=None, fmt='WEBP'):
+    """Atributos srcset/sizes das versões responsivas da capa de um livro."""
+    return _srcset_attrs(book, 'cover', sizes, fmt)
+
+
+@register.simple_tag
+def avatar_srcset(profile, sizes=None, fmt='WEBP'):
+    """Atributos srcset/sizes das versões responsivas do avatar de um perfil."""
+    return _srcset_attrs(profile, 'avatar', sizes, fmt)
@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.services import ai_provider_service
+from core.services.ai_provider_service import (
+    AIProviderFactory,
+    BaseAIProvider,
+    MockAIProvider,
+    OpenAIProvider,
+    hedged_generate_text,
+)
+
+
+class FailingProvider(BaseAIProvider):
+    async def agenerate_text(self, *args, **kwargs):
+        raise Exception('provedor indisponível')
+
+
+@patch('core.services.ai_provider_service.log_ai_usage')
+class AIProviderRegistryTest(SimpleTestCase):
+    def setUp(self):
+        AIProviderFactory.reset()
+
+    @override_settings(AI_PROVIDER='mock')
+    def test_get_provider_reuses_instance(self, log_ai_usage):
+        self.assertIs(AIProviderFactory.get_provider(), AIProviderFactory.get_provider('mock'))
+
+    def test_setting_change_resets_registry(self, log_ai_usage):
+        provider = AIProviderFactory.get_provider('openai')
+        with override_settings(OPENAI_API_KEY='nova-chave'):
+            self.assertIsNot(AIProviderFactory.get_provider('openai'), provider)
+            self.assertEqual(AIProviderFactory.get_provider('openai').api_key, 'nova-chave')
+
+    @override_settings(OPENAI_API_KEY='test-key')
+    def test_http_provider_uses_shared_session(self, log_ai_usage):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {
+            'choices': [{'message': {'content': 'ok'}}],
+            'usage': {'prompt_tokens': 3, 'completion_tokens': 1},
+        }
+        session = MagicMock()
+        session.post.return_value = response
+
+        with patch.object(ai_provider_service, 'get_http_session', return_value=session):
+            provider = OpenAIProvider()
+            self.assertEqual(provider.generate_text('oi'), 'ok')
+            self.assertEqual(provider.generate_text('oi de novo'), 'ok')
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(log_ai_usage.call_args.kwargs['status'], 'success')
+        self.assertEqual(log_ai_usage.call_args.kwargs['prompt_tokens'], 3)
+
+    @override_settings(OPENAI_API_KEY='test-key')
+    def test_http_provider_logs_failure_and_raises(self, log_ai_usage):
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=500, text='erro interno')
+
+        with patch.object(ai_provider_service, 'get_http_session', return_value=session):
+            with self.assertRaisesMessage(Exception, 'OpenAI API error 500'):
+                OpenAIProvider().generate_text('oi')
+
+        self.assertEqual(log_ai_usage.call_args.kwargs['status'], 'failure')
+
+    def test_async_client_is_closed_when_loop_ends(self, log_ai_usage):
+        async def run():
+            client = ai_provider_service.get_async_http_client()
+            self.assertIs(ai_provider_service.get_async_http_client(), client)
+            return client
+
+        client = asyncio.run(run())
+        self.assertTrue(client.is_closed)
+
+    def test_async_generate_json_with_mock(self, log_ai_usage):
+        result = asyncio.run(MockAIProvider().agenerate_json('Gere resumo literário'))
+        self.assertEqual(result['nota_geral'], 9.5)
+
+
+@patch('core.services.ai_provider_service.log_ai_usage')
+class HedgedGenerateTextTest(SimpleTestCase):
+    def test_hedge_returns_fastest_provider(self, log_ai_usage):
+        slow = MockAIProvider(latency=1.0)
+        fast = MockAIProvider(latency=0.01)
+        fast.agenerate_text = MagicMock(wraps=fast.agenerate_text)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            text = await hedged_generate_text([slow, fast], 'olá', hedge_delay=0.05)
+            return text, loop.time() - start
+
+        text, elapsed = asyncio.run(run())
+
+        self.assertEqual(text, 'Resposta simulada do provedor Mock de IA.')
+        self.assertLess(elapsed, 0.5)
+        fast.agenerate_text.assert_called_once()
+
+    def test_failure_triggers_next_provider_immediately(self, log_ai_usage):
+        text = asyncio.run(hedged_generate_text(
+            [FailingProvider(), MockAIProvider()], 'olá', hedge_delay=10,
+        ))
+        self.assertEqual(text, 'Resposta simulada do provedor Mock de IA.')
+
+    def test_all_failed_raises_last_error(self, log_ai_usage):
+        with self.assertRaisesMessage(Exception, 'provedor indisponível'):
+            asyncio.run(hedged_generate_text([FailingProvider()], 'olá', hedge_delay=0))
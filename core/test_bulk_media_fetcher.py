@@ -0,0 +1,187 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Author, Book
+from core.utils.bulk_media_fetcher import (
+    DUPLICATE, NOT_FOUND, SAVED, BulkMediaFetcher, FetchJob, HostRateLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b'', content_type='image/jpeg', headers=None, data=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'Content-Type': content_type, **(headers or {})}
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Responde por URL; listas são consumidas em ordem (a última se repete)."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        response = self.routes[url]
+        if isinstance(response, list):
+            return response.pop(0) if len(response) > 1 else response[0]
+        return response
+
+
+class HostRateLimiterTest(TestCase):
+    def test_429_pauses_host_and_rate_recovers_gradually(self):
+        clock = FakeClock()
+        limiter = HostRateLimiter(rate=2, clock=clock, sleep=clock.sleep)
+
+        limiter.acquire('books.google.com')
+        limiter.acquire('books.google.com')  # burst de 2 tokens
+        limiter.acquire('books.google.com')
+        self.assertEqual(clock.slept, [0.5])
+
+        limiter.penalize('books.google.com', retry_after=10)
+        self.assertEqual(limiter.current_rate('books.google.com'), 1.0)
+        limiter.acquire('picsum.photos')  # outros hosts não são afetados
+        limiter.acquire('books.google.com')
+        self.assertEqual(clock.now, 10.5)
+
+        limiter.reward('books.google.com')
+        self.assertEqual(limiter.current_rate('books.google.com'), 1.2)
+
+
+class BulkMediaFetcherTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+        self.checkpoint = os.path.join(self.media_root, 'checkpoint.json')
+        self.clock = FakeClock()
+
+    def _fetcher(self, session, **kwargs):
+        kwargs.setdefault('workers', 2)
+        limiter = HostRateLimiter(rate=5, clock=self.clock, sleep=self.clock.sleep)
+        fetcher = BulkMediaFetcher(
+            checkpoint_path=self.checkpoint, storage=default_storage, limiter=limiter, **kwargs
+        )
+        fetcher._session = lambda: session
+        return fetcher
+
+    def test_retries_429_then_dedups_identical_images(self):
+        session = FakeSession({
+            'https://img.test/a': [
+                FakeResponse(429, content_type='text/html', headers={'Retry-After': '3'}),
+                FakeResponse(content=b'same-cover'),
+            ],
+            'https://img.test/b': FakeResponse(content=b'same-cover'),
+            'https://img.test/c': FakeResponse(content=b'<html>', content_type='text/html'),
+        })
+        fetcher = self._fetcher(session, workers=1)
+        jobs = [
+            FetchJob(key='a', filename='books/covers/a.jpg', url='https://img.test/a'),
+            FetchJob(key='b', filename='books/covers/b.jpg', url='https://img.test/b'),
+            FetchJob(key='c', filename='books/covers/c.jpg', url='https://img.test/c'),
+        ]
+
+        results = {r.job.key: r for r in fetcher.run(jobs)}
+
+        self.assertEqual(results['a'].status, SAVED)
+        self.assertEqual((results['b'].status, results['b'].path), (DUPLICATE, results['a'].path))
+        self.assertEqual(results['c'].status, NOT_FOUND)
+        self.assertGreaterEqual(self.clock.now, 3)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'books/covers')), ['a.jpg'])
+        self.assertFalse(os.path.exists(self.checkpoint))  # execução completa descarta o checkpoint
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        routes = {f'https://img.test/{i}': FakeResponse(content=f'cover-{i}'.encode()) for i in range(3)}
+        jobs = lambda: [
+            FetchJob(key=f'book:{i}', filename=f'books/covers/{i}.jpg', url=f'https://img.test/{i}')
+            for i in range(3)
+        ]
+
+        first = self._fetcher(FakeSession(routes), workers=1)
+        run = first.run(jobs())
+        done = next(run)
+        next(run)  # o primeiro resultado foi gravado pelo chamador antes do próximo
+        run.close()  # interrompido
+
+        with open(self.checkpoint) as fh:
+            self.assertIn(done.job.key, json.load(fh)['done'])
+
+        session = FakeSession(routes)
+        second = self._fetcher(session)
+        keys = {r.job.key for r in second.run(jobs())}
+
+        self.assertNotIn(done.job.key, keys)
+        self.assertEqual(second.stats['resumed'], 1)
+        self.assertEqual(len(session.calls), 2)
+
+
+@override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+)
+class DownloadBookCoversCommandTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, BULK_MEDIA_FETCHER={'CHECKPOINT_DIR': media_root})
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_downloads_missing_covers_through_google_books(self):
+        author = Author.objects.create(name='Machado de Assis')
+        book = Book.objects.create(title='Dom Casmurro', author=author, publication_date=date(1899, 1, 1))
+        thumbnail = 'http://books.google.com/books/content?id=x&printsec=frontcover&img=1&zoom=1&edge=curl'
+        search = {'items': [{'id': 'x', 'volumeInfo': {'title': 'Dom Casmurro', 'imageLinks': {'thumbnail': thumbnail}}}]}
+
+        def fake_get(url, **kwargs):
+            if url.startswith('https://www.googleapis.com/books/v1/volumes'):
+                self.assertIn('intitle:Dom Casmurro', kwargs['params']['q'])
+                return FakeResponse(content_type='application/json', data=search)
+            self.assertEqual(url, 'https://books.google.com/books/content?id=x&printsec=frontcover&img=1&zoom=0')
+            return FakeResponse(content=b'jpeg-bytes')
+
+        with patch('requests.Session.get', side_effect=fake_get), \
+                self.captureOnCommitCallbacks(execute=False):
+            call_command('download_book_covers', '--workers', '2', stdout=StringIO())
+
+        book.refresh_from_db()
+        self.assertEqual(book.cover_image.name, 'books/covers/dom-casmurro.jpg')
+        with book.cover_image.open() as fh:
+            self.assertEqual(fh.read(), b'jpeg-bytes')
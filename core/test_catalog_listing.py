@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Author, Book, Category
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogListingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Machado de Assis')
+        cls.romance = Category.objects.create(name='Romance')
+        cls.conto = Category.objects.create(name='Conto')
+        prices = [Decimal('30.00'), None, Decimal('10.00'), Decimal('30.00'), None, Decimal('20.00'), Decimal('30.00')]
+        cls.books = [
+            Book.objects.create(
+                title=f'Livro {i:02d}',
+                author=cls.author,
+                category=cls.romance if i % 3 else cls.conto,
+                price=prices[i % len(prices)],
+                publication_date=date(1899, 1, 1),
+            )
+            for i in range(26)
+        ]
+
+    def _get(self, **params):
+        return self.client.get(reverse('core:book_list'), params)
+
+    def test_cursor_walks_every_book_forward_and_back_with_nulls_last(self):
+        expected = (
+            sorted((b for b in self.books if b.price is not None), key=lambda b: (-b.price, -b.pk))
+            + sorted((b for b in self.books if b.price is None), key=lambda b: -b.pk)
+        )
+
+        pages, response = [], self._get(sort_by='price_desc')
+        while True:
+            page = response.context['page_obj']
+            pages.append([book.pk for book in page])
+            self.assertEqual(page.number, len(pages))
+            if not page.has_next:
+                break
+            response = self._get(sort_by='price_desc', cursor=page.next_cursor)
+
+        self.assertEqual([pk for page in pages for pk in page], [b.pk for b in expected])
+        self.assertEqual([len(page) for page in pages], [12, 12, 2])
+        self.assertEqual(page.num_pages, 3)
+
+        back = self._get(sort_by='price_desc', cursor=page.previous_cursor).context['page_obj']
+        self.assertEqual([book.pk for book in back], pages[1])
+        self.assertEqual(back.number, 2)
+        first = self._get(sort_by='price_desc', cursor=back.previous_cursor).context['page_obj']
+        self.assertEqual([book.pk for book in first], pages[0])
+        self.assertFalse(first.has_previous)
+
+        # Links antigos (?page=N) continuam válidos; cursor inválido volta à página 1
+        self.assertEqual([b.pk for b in self._get(sort_by='price_desc', page=3).context['page_obj']], pages[2])
+        self.assertEqual([b.pk for b in self._get(sort_by='price_desc', cursor='lixo').context['page_obj']], pages[0])
+
+    def test_total_and_facets_are_cached_until_catalog_changes(self):
+        response = self._get(category='romance')
+        self.assertEqual(response.context['total_results'], 17)
+        facets = {f['slug']: f['book_count'] for f in response.context['all_categories']}
+        self.assertEqual(facets, {'romance': 17, 'conto': 9})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get(category='romance', cursor=response.context['page_obj'].next_cursor)
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql'].upper()])
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+        Book.objects.create(title='Iaiá Garcia', author=self.author, category=self.romance,
+                            publication_date=date(1878, 1, 1))
+        response = self._get(category='romance')
+        self.assertEqual(response.context['total_results'], 18)
+        self.assertEqual(response.context['all_categories'][1]['book_count'], 18)
+
+    def test_partial_saves_outside_listing_columns_keep_cache(self):
+        from core.services.catalog_service import catalog_version
+
+        version = catalog_version()
+        book = self.books[0]
+        # LocMemCache não tem delete_pattern: home/universos cairiam no cache.clear()
+        with patch('core.signals.cache_signals.invalidate_home_cache'), \
+                patch('core.signals.cache_signals.invalidate_universe_cache'):
+            book.ai_review = {'summary': 'Resenha'}
+            book.save(update_fields=['ai_review', 'updated_at'])
+            self.author.save(update_fields=['bio'])
+            self.assertEqual(catalog_version(), version)
+
+            book.price = Decimal('99.00')
+            book.save(update_fields=['price', 'updated_at'])
+            self.assertEqual(catalog_version(), version + 1)
+            book.save()
+            self.assertEqual(catalog_version(), version + 2)
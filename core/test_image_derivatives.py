@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.models import Author, Book
+from core.services.image_derivative_service import generate_derivatives_for, get_derivatives
+
+
+def jpeg(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (120, 80, 40)).save(buffer, format='JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+        self.author = Author.objects.create(name='Machado de Assis')
+
+    def _book(self, width=1000, height=1500):
+        book = Book(title='Dom Casmurro', author=self.author, publication_date=date(1899, 1, 1))
+        book.cover_image.save('dom-casmurro.jpg', jpeg(width, height), save=False)
+        with self.captureOnCommitCallbacks(execute=False):
+            book.save()
+        return book
+
+    def test_generates_webp_renditions_next_to_original(self):
+        book = self._book()
+
+        generate_derivatives_for('cover', book.pk)
+        book.refresh_from_db()
+
+        renditions = get_derivatives(book, 'cover')['WEBP']
+        self.assertEqual(sorted(renditions, key=int), ['160', '320', '480'])
+        self.assertEqual(renditions['320'], 'books/covers/dom-casmurro/320w.webp')
+        with default_storage.open(renditions['320']) as fh, Image.open(fh) as img:
+            self.assertEqual((img.format, img.size), ('WEBP', (320, 480)))
+
+        html = Template('{% load responsive_images %}<img src="x"{% cover_srcset book %}>').render(
+            Context({'book': book})
+        )
+        self.assertIn('dom-casmurro/160w.webp 160w', html)
+        self.assertIn('dom-casmurro.jpg 1000w', html)
+        self.assertIn('sizes="(max-width: 576px) 45vw, 220px"', html)
+
+    def test_never_upscales(self):
+        book = self._book(width=200, height=300)
+
+        generate_derivatives_for('cover', book.pk)
+        book.refresh_from_db()
+
+        self.assertEqual(list(get_derivatives(book, 'cover')['WEBP']), ['160'])
+
+    def test_cover_change_schedules_task_and_replaces_old_renditions(self):
+        book = self._book()
+        generate_derivatives_for('cover', book.pk)
+        book.refresh_from_db()
+        old = get_derivatives(book, 'cover')['WEBP']['160']
+
+        with patch('core.tasks.generate_image_derivatives.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                book.save()  # mesma capa: nada a fazer
+            self.assertFalse(delay.called)
+
+            book.cover_image.save('iracema.jpg', jpeg(800, 1200), save=False)
+            with self.captureOnCommitCallbacks(execute=True):
+                book.save()
+            delay.assert_called_once_with('cover', book.pk)
+
+        self.assertEqual(get_derivatives(book, 'cover'), {})  # versões antigas não valem para a nova capa
+        generate_derivatives_for('cover', book.pk)
+
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists('books/covers/iracema/160w.webp'))
+
+    def test_home_sections_render_srcset_without_extra_queries(self):
+        """Os livros das seções da home já trazem capa e versões: cover_srcset não consulta o banco."""
+        from django.contrib.contenttypes.models import ContentType
+
+        from core.models import Section, SectionItem
+        from core.views.home_view import HomeView
+
+        book = self._book()
+        generate_derivatives_for('cover', book.pk)
+        section = Section.objects.create(title='Destaques', content_type='books', active=True)
+        SectionItem.objects.create(
+            section=section, content_type=ContentType.objects.get_for_model(Book), object_id=book.pk
+        )
+
+        obj = HomeView()._build_sections_as_dicts()[0]['items'][0]['obj']
+
+        with self.assertNumQueries(0):
+            html = Template(
+                '{% load responsive_images %}{% if obj.cover_image %}<img src="{{ obj.cover_image.url }}"'
+                '{% cover_srcset obj %}>{% endif %}'
+            ).render(Context({'obj': obj}))
+        self.assertIn('dom-casmurro/160w.webp 160w', html)
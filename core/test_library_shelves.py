@@ -0,0 +1,71 @@
+import json
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import BookShelf
+from core.models import Author, Book
+from core.services.library_service import get_shelf_counts, load_library_shelves
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LibraryShelfLoaderTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='leitor', password='x')
+        author = Author.objects.create(name='Machado de Assis')
+        self.books = [
+            Book.objects.create(title=f'Livro {i}', author=author, publication_date=date(1899, 1, 1))
+            for i in range(4)
+        ]
+        now = timezone.now()
+        for i, book in enumerate(self.books):
+            BookShelf.objects.create(
+                user=self.user, book=book, shelf_type='to_read', date_added=now - timedelta(days=i)
+            )
+        # Prateleiras padrão podem ter o nome vazio ou NULL
+        BookShelf.objects.create(user=self.user, book=self.books[0], shelf_type='favorites', custom_shelf_name='')
+        BookShelf.objects.create(user=self.user, book=self.books[1], shelf_type='favorites', custom_shelf_name=None)
+        for name, books in [('Clássicos', self.books[:3]), ('Releituras', self.books[3:])]:
+            for book in books:
+                BookShelf.objects.create(user=self.user, book=book, shelf_type='custom', custom_shelf_name=name)
+
+    def test_counts_and_first_books_of_every_shelf_in_two_queries(self):
+        with patch('core.services.library_service.SHELF_BOOKS_LIMIT', 2), self.assertNumQueries(2):
+            library = load_library_shelves(self.user)
+
+        self.assertEqual(library['counts']['standard']['to_read'], 4)
+        self.assertEqual(library['counts']['standard']['favorites'], 2)
+        self.assertEqual(library['counts']['standard']['reading'], 0)
+        self.assertEqual(library['counts']['custom'], {'Clássicos': 3, 'Releituras': 1})
+
+        to_read = library['shelves']['to_read']
+        self.assertEqual([item.book.title for item in to_read], ['Livro 0', 'Livro 1'])
+        self.assertEqual(len(library['shelves']['favorites']), 2)
+        self.assertEqual(len(library['custom_shelves']['Clássicos']), 2)
+        self.assertEqual(len(library['custom_shelves']['Releituras']), 1)
+
+    def test_result_is_cached_until_shelf_mutation(self):
+        load_library_shelves(self.user)
+        with self.assertNumQueries(0):
+            load_library_shelves(self.user)
+
+        self.client.force_login(self.user)
+        item = BookShelf.objects.get(user=self.user, book=self.books[3], shelf_type='to_read')
+        response = self.client.post(
+            reverse('core:move_to_shelf'),
+            json.dumps({'bookshelf_id': item.id, 'new_shelf_type': 'read'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.json()['shelf_counts'], get_shelf_counts(self.user)['standard'])
+        library = load_library_shelves(self.user)
+        self.assertEqual(library['counts']['standard']['to_read'], 3)
+        self.assertEqual([i.book.title for i in library['shelves']['read']], ['Livro 3'])
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date
+from unittest import mock
+
+import requests
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Author, Book, Category
+from monitoring.profiling import QueryBudgetAssertionsMixin
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def _offline(adapter, request, **kwargs):
+    raise requests.exceptions.ConnectionError('offline')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('requests.adapters.HTTPAdapter.send', _offline)
+class CatalogQueryBudgetTest(QueryBudgetAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Machado de Assis')
+        category = Category.objects.create(name='Romance')
+        cls.books = [
+            Book.objects.create(
+                title=f'Livro {i:02d}', author=author, category=category,
+                publication_date=date(1899, 1, 1),
+            )
+            for i in range(30)
+        ]
+        cls.user = User.objects.create_user(username='leitor', password='x')
+
+    def _urls(self):
+        return [
+            reverse('core:home'),
+            reverse('core:book_list'),
+            reverse('core:book_detail', kwargs={'slug': self.books[0].slug}),
+        ]
+
+    def test_catalog_views_stay_within_budget(self):
+        for url in self._urls():
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.client.get(url))
+
+    def test_catalog_views_stay_within_budget_when_logged_in(self):
+        self.client.force_login(self.user)
+        for url in self._urls():
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.client.get(url))
+
+    def test_server_timing_reports_db_and_budget(self):
+        response = self.client.get(reverse('core:book_list'))
+
+        timing = response['Server-Timing']
+        self.assertIn('backend;dur=', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'db-budget;desc="\d+/15 queries"')
+        self.assertEqual(response.request_profile.view_name, 'core:book_list')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncQueryProfilingTest(TestCase):
+    async def test_concurrent_requests_keep_their_own_query_counts(self):
+        """Uma requisição que termina antes não tira a contagem de outra ainda em andamento."""
+        from core.middleware import PerformanceMonitoringMiddleware
+
+        second_started = asyncio.Event()
+        first_finished = asyncio.Event()
+
+        async def view(request):
+            await sync_to_async(User.objects.exists)()
+            if request.path == '/primeira/':
+                await second_started.wait()
+            else:
+                second_started.set()
+                await first_finished.wait()
+                await sync_to_async(User.objects.exists)()
+            return HttpResponse()
+
+        middleware = PerformanceMonitoringMiddleware(view)
+
+        async def request(path):
+            response = await middleware(RequestFactory().get(path))
+            if path == '/primeira/':
+                first_finished.set()
+            return response
+
+        first, second = await asyncio.gather(request('/primeira/'), request('/segunda/'))
+
+        self.assertEqual(first.request_profile.queries, 1)
+        self.assertEqual(second.request_profile.queries, 2)
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Author, Book, ReportSnapshot, Video
+from core.services.reports_service import refresh_all_snapshots, refresh_due_snapshots
+
+User = get_user_model()
+
+
+def make_book(title, author):
+    return Book.objects.create(title=title, author=author, publication_date=date(1899, 1, 1))
+
+
+class ReportSnapshotTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', password='x', is_staff=True)
+        self.author = Author.objects.create(name='Machado de Assis')
+        make_book('Dom Casmurro', self.author)
+        self.client.force_login(self.staff)
+
+    def _dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin_tools:reports_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_dashboard_renders_from_snapshots_in_constant_queries(self):
+        refresh_all_snapshots()
+        self._dashboard_queries()  # a primeira visita cria a sessão do product analytics
+        baseline = self._dashboard_queries()
+
+        for i in range(20):
+            make_book(f'Livro {i}', Author.objects.create(name=f'Autor {i}'))
+        refresh_all_snapshots()
+
+        self.assertEqual(self._dashboard_queries(), baseline)
+        response = self.client.get(reverse('admin_tools:reports_dashboard'))
+        self.assertEqual(response.context['books_data']['total_books'], 21)
+        self.assertContains(response, 'Dados de')
+
+    def test_save_marks_module_stale_and_periodic_refresh_recomputes_it(self):
+        refresh_all_snapshots()
+
+        make_book('Memórias Póstumas', self.author)
+        stale = set(ReportSnapshot.objects.filter(is_stale=True).values_list('module', flat=True))
+        self.assertEqual(stale, {'books', 'authors'})
+
+        self.assertEqual(sorted(refresh_due_snapshots()), ['authors', 'books'])
+        books = ReportSnapshot.objects.get(module='books')
+        self.assertFalse(books.is_stale)
+        self.assertEqual(books.data['total_books'], 2)
+
+    def test_counter_updates_do_not_mark_stale(self):
+        video = Video.objects.create(title='Entrevista', video_url='https://youtu.be/x')
+        refresh_all_snapshots()
+
+        video.save(update_fields=['title'])
+        self.assertFalse(ReportSnapshot.objects.filter(is_stale=True).exists())
+
+        video.active = False
+        video.save(update_fields=['active'])
+        self.assertTrue(ReportSnapshot.objects.get(module='videos').is_stale)
+
+    def test_old_snapshots_are_recomputed(self):
+        refresh_all_snapshots()
+        ReportSnapshot.objects.filter(module='events').update(computed_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(refresh_due_snapshots(), ['events'])
+
+    def test_manual_refresh(self):
+        refresh_all_snapshots()
+        Book.objects.all().delete()  # o snapshot continua com 1 livro até ser recalculado
+
+        response = self.client.post(reverse('admin_tools:reports_refresh'), {'module': 'books'})
+
+        self.assertRedirects(response, reverse('admin_tools:reports_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(ReportSnapshot.objects.get(module='books').data['total_books'], 0)
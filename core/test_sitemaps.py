@@ -0,0 +1,76 @@
+import gzip
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from core.models import Author, Book, Category
+from core.services.sitemap_service import STALE_CACHE_KEY, generate_sitemaps, refresh_sitemaps
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SitemapGenerationTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(
+            CACHES=LOCMEM_CACHE,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                            'OPTIONS': {'location': self.media}},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            SITEMAPS={'BASE_URL': 'https://livros.test', 'URLS_PER_FILE': 2, 'CHUNK_SIZE': 2},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+        author = Author.objects.create(name='Machado de Assis', slug='machado')
+        Category.objects.create(name='Romance', slug='romance')
+        for title in ('Dom Casmurro', 'Helena', 'Iaiá Garcia'):
+            Book.objects.create(title=title, author=author, publication_date=date(1899, 1, 1))
+
+    def test_generates_paged_gzip_files_and_serves_without_queries(self):
+        manifest = generate_sitemaps()
+        self.assertEqual(manifest['files']['sitemap-books-1.xml.gz']['urls'], 2)
+        self.assertEqual(manifest['files']['sitemap-books-2.xml.gz']['urls'], 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/sitemap.xml')
+            part = self.client.get('/sitemap-books-2.xml.gz', HTTP_ACCEPT_ENCODING='identity')
+
+        self.assertEqual(response.status_code, 200)
+        index = response.content.decode()
+        self.assertIn('<loc>https://livros.test/sitemap-books-2.xml.gz</loc>', index)
+        self.assertIn('<loc>https://livros.test/sitemap-authors-1.xml.gz</loc>', index)
+        self.assertIn('/livros/iaia-garcia/', gzip.decompress(part.content).decode())
+
+        compressed = self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content).decode(), index)
+
+        not_modified = self.client.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.client.get('/sitemap-books-9.xml.gz').status_code, 404)
+
+    def test_content_change_marks_stale_and_refresh_replaces_generation(self):
+        first = generate_sitemaps()
+        self.assertIsNone(refresh_sitemaps())
+
+        Book.objects.create(title='Memorial de Aires', publication_date=date(1908, 1, 1))
+        self.assertTrue(cache.get(STALE_CACHE_KEY))
+        second = refresh_sitemaps()
+
+        self.assertNotEqual(second['generation'], first['generation'])
+        self.assertEqual(second['files']['sitemap-books-2.xml.gz']['urls'], 2)
+        old_part = first['files']['sitemap-books-1.xml.gz']['path']
+        from django.core.files.storage import default_storage
+        self.assertFalse(default_storage.exists(old_part))
+
+        response = self.client.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
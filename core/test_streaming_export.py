@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Author, Book
+from core.utils.streaming_export import iter_rows
+
+User = get_user_model()
+
+
+class IterRowsTest(TestCase):
+    def setUp(self):
+        for name in ['Machado', 'Clarice', 'Rosa', 'Amado', 'Lispector']:
+            Author.objects.create(name=name)
+
+    def test_keyset_pages_follow_order_field(self):
+        with self.assertNumQueries(3):
+            names = [name for (name,) in iter_rows(Author.objects.all(), ['name'], chunk_size=2, order_field='name')]
+
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 5)
+
+    def test_descending_order_and_limit(self):
+        ids = [pk for (pk,) in iter_rows(Author.objects.all(), ['id'], chunk_size=2, order_field='-pk', limit=3)]
+
+        expected = list(Author.objects.order_by('-pk').values_list('id', flat=True)[:3])
+        self.assertEqual(ids, expected)
+
+
+class ReportStreamingExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', password='x', is_staff=True)
+        author = Author.objects.create(name='J. R. R. Tolkien')
+        for i in range(3):
+            Book.objects.create(
+                title=f'Livro {i}', author=author, publication_date=date(1954, 7, 29), isbn=f'97800000000{i}'
+            )
+        self.client.force_login(self.staff)
+
+    def test_books_csv_is_streamed(self):
+        response = self.client.get(reverse('admin_tools:export_books_csv'))
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertTrue(lines[0].startswith('\ufeffID;Título;Autor'))
+        self.assertEqual(len(lines), 4)
+        self.assertIn('Livro 0;J. R. R. Tolkien;;978000000000;1954;;Não', lines[1])
+
+    def test_authors_markdown_lists_every_author(self):
+        response = self.client.get(reverse('admin_tools:export_authors_markdown'))
+
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('| J. R. R. Tolkien | 3 |', content)
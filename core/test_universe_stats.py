@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+
+from core.models import Author, Book, LiteraryUniverse, UniverseFAQ
+from core.services.universe_stats_service import compute_universe_stats
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UniverseStatsTest(TestCase):
+    def setUp(self):
+        self.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        self.christopher = Author.objects.create(name='Christopher Tolkien')
+        self.other = Author.objects.create(name='C.S. Lewis')
+        self.universe = LiteraryUniverse.objects.create(title='Mundo de Tolkien', slug='tolkien', author=self.tolkien)
+        self.universe.additional_authors.add(self.christopher, self.tolkien)
+
+        def book(title, author, pages):
+            return Book.objects.create(title=title, author=author, page_count=pages, publication_date=date(1954, 1, 1))
+
+        self.hobbit = book('O Hobbit', self.tolkien, 300)
+        book('Contos Inacabados', self.christopher, 500)
+        self.narnia = book('Nárnia', self.other, 200)
+        self.universe.books.add(self.hobbit, self.narnia)  # manual + do autor: contado uma vez
+        UniverseFAQ.objects.create(universe=self.universe, question='Por onde começar?', answer='O Hobbit')
+        UniverseFAQ.objects.create(universe=self.universe, question='Inativa', answer='-', is_active=False)
+
+    def test_books_resolved_once_and_counters_in_two_queries(self):
+        self.assertEqual(
+            [b.title for b in self.universe.get_all_books()],
+            ['Contos Inacabados', 'Nárnia', 'O Hobbit'],
+        )
+
+        with self.assertNumQueries(2):
+            stats = compute_universe_stats(self.universe)
+
+        self.assertEqual(stats['books_count'], 3)
+        self.assertEqual(stats['total_pages'], 1000)
+        self.assertEqual(stats['authors_count'], 2)
+        self.assertEqual(stats['faqs_count'], 1)
+        self.assertEqual(stats['articles_count'], 0)
+        self.assertEqual(stats['related_universes_count'], 0)
+
+    def test_stats_cached_and_invalidated_by_related_changes(self):
+        self.universe.get_quality_score()
+        with self.assertNumQueries(0):
+            self.universe.get_stats()
+            self.universe.get_quality_score()
+
+        UniverseFAQ.objects.create(universe=self.universe, question='Silmarillion?', answer='Depois')
+        self.assertEqual(self.universe.get_stats()['faqs_count'], 2)
+
+        narnia = LiteraryUniverse.objects.create(title='Nárnia', slug='narnia', author=self.other)
+        narnia.get_stats()
+        narnia.related_universes.add(self.universe)  # simétrico: os dois lados mudam
+        self.assertEqual(self.universe.get_stats()['related_universes_count'], 1)
+        self.assertEqual(narnia.get_stats()['related_universes_count'], 1)
+
+        self.narnia.literary_universes.remove(self.universe)  # lado reverso
+        self.assertEqual(self.universe.get_stats()['books_count'], 2)
@@ -1,5 +1,6 @@
 from django.urls import path
 from django.views.decorators.cache import cache_page
+from monitoring.profiling import query_budget
 from core.views import (
     HomeView,
     BookListView,
@@ -100,10 +101,12 @@ urlpatterns = [
     # O cache_page foi removido porque causava cache agressivo no navegador (2ms response),
     # impedindo que usuários logados vissem o estado autenticado da home.
     # O contexto caro (livros, seções, banners) já é cacheado internamente no HomeView.get_context_data.
-    path('', HomeView.as_view(), name='home'),
-    path('livros/', BookListView.as_view(), name='book_list'),
+    # query_budget: máximo de queries por requisição (verificado nos testes e
+    # sinalizado no Server-Timing/log em produção).
+    path('', query_budget(16)(HomeView.as_view()), name='home'),
+    path('livros/', query_budget(15)(BookListView.as_view()), name='book_list'),
     path('livros/<int:book_id>/', BookRedirectView.as_view(), name='book_detail_by_id'),
-    path('livros/<slug:slug>/', BookDetailView.as_view(), name='book_detail'),
+    path('livros/<slug:slug>/', query_budget(30)(BookDetailView.as_view()), name='book_detail'),
     path('autores/', AuthorListView.as_view(), name='author_list'),
     path('autores/<slug:slug>/', AuthorDetailView.as_view(), name='author_detail'),
     path('videos/', VideoListView.as_view(), name='video_list'),
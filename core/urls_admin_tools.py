@@ -18,6 +18,7 @@ from core.views.admin_tools import (
 from core.views.section_autocomplete import section_item_autocomplete
 from core.views.reports_dashboard import (
     reports_dashboard,
+    refresh_reports,
     export_books_csv,
     export_authors_csv,
     export_videos_csv,
@@ -48,6 +49,7 @@ urlpatterns = [
     
     # Dashboard de Relatórios
     path('reports/', reports_dashboard, name='reports_dashboard'),
+    path('reports/refresh/', refresh_reports, name='reports_refresh'),
     
     # Exportação CSV
     path('reports/export/books/csv/', export_books_csv, name='export_books_csv'),
@@ -0,0 +1,463 @@
+"""
+Download em massa de imagens (capas) com concorrência limitada.
+
+Usado pelos comandos download_book_covers, update_covers_google e
+fix_book_covers. Em vez de processar um livro por vez com time.sleep entre
+eles, o BulkMediaFetcher:
+
+- baixa e envia ao storage em um pool de threads (WORKERS);
+- limita as requisições por host com um token bucket (RATE_PER_HOST/s); um
+  429 (ou 503) pausa o host pelo Retry-After, reduz a taxa pela metade e ela
+  volta a subir aos poucos a cada resposta bem-sucedida;
+- calcula o SHA-256 do conteúdo e reaproveita o arquivo já enviado quando a
+  mesma imagem aparece de novo, sem novo upload;
+- grava um checkpoint JSON com os itens concluídos e os hashes enviados, de
+  modo que uma execução interrompida retoma de onde parou.
+
+As threads só fazem HTTP e storage. O resultado de cada item é entregue na
+thread principal (run() é um gerador), onde o comando grava no banco; o item
+só entra no checkpoint depois disso.
+
+Uso:
+    fetcher = BulkMediaFetcher(workers=8, checkpoint_path='/tmp/capas.json')
+    jobs = (FetchJob(key=f'book:{b.pk}', filename=f'books/covers/{b.slug}.jpg', url=...) for b in books)
+    for result in fetcher.run(jobs):
+        if result.path:
+            ...
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Resultados finais: entram no checkpoint e não são refeitos ao retomar.
+# Erros (rede, HTTP 5xx persistente) ficam de fora e são tentados de novo.
+SAVED = 'saved'
+DUPLICATE = 'duplicate'
+NOT_FOUND = 'not_found'
+ERROR = 'error'
+FINAL_STATUSES = {SAVED, DUPLICATE, NOT_FOUND}
+
+# 429/503 indicam sobrecarga do host: além de repetir, freia o host inteiro
+THROTTLE_CODES = {429, 503}
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def get_bulk_media_fetcher_settings():
+    """Retorna as configurações do fetcher com valores padrão seguros."""
+    defaults = {
+        'WORKERS': 4,
+        'RATE_PER_HOST': 2.0,
+        'MAX_RETRIES': 4,
+        'TIMEOUT': 15,
+        'CHECKPOINT_DIR': tempfile.gettempdir(),
+    }
+    return {**defaults, **getattr(settings, 'BULK_MEDIA_FETCHER', {})}
+
+
+class FetchError(Exception):
+    """Falha definitiva ao buscar uma URL (após as tentativas)."""
+
+
+@dataclass
+class FetchJob:
+    """
+    Um item a baixar.
+
+    key: identificador estável do item no checkpoint (ex.: 'book:42')
+    filename: nome desejado no storage
+    url: URL da imagem, ou None se vier de resolve
+    resolve: callable(fetcher) -> URL | None, executado na thread do pool
+             (ex.: busca da capa no Google Books); None = imagem não encontrada
+    payload: dado do chamador devolvido junto com o resultado (ex.: o Book)
+    """
+    key: str
+    filename: str
+    url: Optional[str] = None
+    resolve: Optional[Callable] = None
+    payload: object = None
+
+
+@dataclass
+class FetchResult:
+    job: FetchJob
+    status: str
+    path: Optional[str] = None
+    error: str = ''
+
+
+@dataclass
+class _Bucket:
+    rate: float
+    tokens: float
+    updated: float
+    paused_until: float = 0.0
+    backoff: float = 1.0
+
+
+class HostRateLimiter:
+    """
+    Token bucket por host, compartilhado pelas threads.
+
+    acquire() bloqueia só a thread que pediu, e só pelo tempo necessário para
+    o host ter um token livre. penalize() reage a um 429: pausa o host
+    (Retry-After ou backoff exponencial) e reduz a taxa pela metade; reward()
+    devolve a taxa gradualmente até o limite configurado.
+    """
+
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, rate, burst=None, min_rate=0.1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self.min_rate = min(min_rate, self.rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host, now):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(rate=self.rate, tokens=self.burst, updated=now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+        return bucket
+
+    def acquire(self, host):
+        while True:
+            with self._lock:
+                now = self._clock()
+                bucket = self._bucket(host, now)
+                if now >= bucket.paused_until and bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                wait_for = max(bucket.paused_until - now, (1 - bucket.tokens) / bucket.rate)
+            self._sleep(wait_for)
+
+    def penalize(self, host, retry_after=None):
+        with self._lock:
+            now = self._clock()
+            bucket = self._bucket(host, now)
+            delay = retry_after if retry_after is not None else bucket.backoff
+            bucket.paused_until = max(bucket.paused_until, now + delay)
+            bucket.backoff = min(bucket.backoff * 2, self.MAX_BACKOFF)
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            bucket.tokens = 0
+            return delay
+
+    def reward(self, host):
+        with self._lock:
+            bucket = self._bucket(host, self._clock())
+            bucket.backoff = 1.0
+            bucket.rate = min(self.rate, bucket.rate + self.rate / 10)
+
+    def current_rate(self, host):
+        with self._lock:
+            return self._bucket(host, self._clock()).rate
+
+
+class FetchCheckpoint:
+    """
+    Estado persistente de uma execução: itens concluídos e hashes enviados.
+
+    Sem path, funciona só em memória (deduplicação dentro da execução).
+    A gravação é atômica (arquivo temporário + os.replace) e acontece a cada
+    SAVE_EVERY itens concluídos e ao final.
+    """
+
+    SAVE_EVERY = 25
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = {}
+        self.hashes = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    data = json.load(fh)
+                if data.get('version') == self.VERSION:
+                    self.done = data.get('done', {})
+                    self.hashes = data.get('hashes', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"[FETCHER] Checkpoint ilegível ({path}), começando do zero: {e}")
+
+    def is_done(self, key):
+        return key in self.done
+
+    def mark_done(self, key, status, path=None):
+        with self._lock:
+            self.done[key] = {'status': status, 'path': path}
+            self._pending += 1
+            flush = self._pending >= self.SAVE_EVERY
+        if flush:
+            self.save()
+
+    def known_path(self, digest):
+        with self._lock:
+            return self.hashes.get(digest)
+
+    def remember(self, digest, path):
+        with self._lock:
+            self.hashes[digest] = path
+
+    def forget(self, digest):
+        with self._lock:
+            self.hashes.pop(digest, None)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {'version': self.VERSION, 'done': dict(self.done), 'hashes': dict(self.hashes)}
+            self._pending = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            self.done, self.hashes, self._pending = {}, {}, 0
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class BulkMediaFetcher:
+    """Pool de downloads com rate limit por host, deduplicação e checkpoint."""
+
+    def __init__(self, workers=None, rate=None, checkpoint_path=None, storage=None,
+                 max_retries=None, timeout=None, limiter=None):
+        cfg = get_bulk_media_fetcher_settings()
+        self.workers = max(1, workers or cfg['WORKERS'])
+        self.max_retries = max_retries if max_retries is not None else cfg['MAX_RETRIES']
+        self.timeout = timeout or cfg['TIMEOUT']
+        self.limiter = limiter or HostRateLimiter(rate or cfg['RATE_PER_HOST'])
+        self.storage = storage or default_storage
+        self.checkpoint = FetchCheckpoint(checkpoint_path)
+        self.stats = {'resumed': 0, SAVED: 0, DUPLICATE: 0, NOT_FOUND: 0, ERROR: 0}
+        self._local = threading.local()
+        self._digest_locks = {}
+        self._digest_locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------ HTTP
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        """
+        GET respeitando o rate limit do host. Repete 429/5xx e erros de rede
+        até max_retries vezes; 429/503 freiam o host para todas as threads.
+        Demais respostas (inclusive 404) são devolvidas como estão.
+        """
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        last_error = ''
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(host)
+            try:
+                response = self._session().get(url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                last_error = str(e)
+                self.limiter.penalize(host)
+                continue
+
+            if response.status_code in THROTTLE_CODES:
+                delay = self.limiter.penalize(host, _retry_after_seconds(response))
+                last_error = f'HTTP {response.status_code}'
+                logger.warning(
+                    f"[FETCHER] {host} respondeu {response.status_code}, pausando {delay:.1f}s "
+                    f"(tentativa {attempt + 1}/{self.max_retries + 1})"
+                )
+                continue
+            if response.status_code in RETRYABLE_CODES:
+                last_error = f'HTTP {response.status_code}'
+                continue
+
+            self.limiter.reward(host)
+            return response
+
+        raise FetchError(f'{url}: {last_error}')
+
+    def get_json(self, url, **kwargs):
+        response = self.get(url, **kwargs)
+        if response.status_code != 200:
+            raise FetchError(f'{url}: HTTP {response.status_code}')
+        return response.json()
+
+    # ---------------------------------------------------------------- storage
+
+    def _digest_lock(self, digest):
+        with self._digest_locks_guard:
+            return self._digest_locks.setdefault(digest, threading.Lock())
+
+    def _store(self, filename, content):
+        """Envia o conteúdo, ou reaproveita um arquivo idêntico já enviado."""
+        digest = hashlib.sha256(content).hexdigest()
+        with self._digest_lock(digest):
+            known = self.checkpoint.known_path(digest)
+            if known:
+                if self.storage.exists(known):
+                    return DUPLICATE, known
+                self.checkpoint.forget(digest)
+            path = self.storage.save(filename, ContentFile(content))
+            self.checkpoint.remember(digest, path)
+            return SAVED, path
+
+    # ------------------------------------------------------------------- pool
+
+    def _process(self, job):
+        try:
+            url = job.url or (job.resolve(self) if job.resolve else None)
+            if not url:
+                return FetchResult(job, NOT_FOUND)
+
+            response = self.get(url)
+            if response.status_code == 404:
+                return FetchResult(job, NOT_FOUND)
+            if response.status_code != 200:
+                return FetchResult(job, ERROR, error=f'HTTP {response.status_code}')
+
+            content_type = response.headers.get('Content-Type', '')
+            if 'image' not in content_type or not response.content:
+                return FetchResult(job, NOT_FOUND, error=f'Conteúdo não é imagem: {content_type}')
+
+            status, path = self._store(job.filename, response.content)
+            return FetchResult(job, status, path=path)
+        except Exception as e:
+            logger.warning(f"[FETCHER] Falha em {job.key}: {e}")
+            return FetchResult(job, ERROR, error=str(e))
+
+    def run(self, jobs):
+        """
+        Processa os jobs (qualquer iterável, consumido sob demanda) e entrega
+        os resultados na ordem em que ficam prontos. Itens já concluídos no
+        checkpoint são pulados (contados em stats['resumed']).
+
+        Ao terminar sem erros o checkpoint é removido; com erros ou
+        interrupção ele fica gravado para a próxima execução retomar.
+        """
+        window = self.workers * 2
+        jobs = iter(jobs)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='media-fetcher')
+        pending = set()
+        completed = False
+        try:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < window:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                    elif self.checkpoint.is_done(job.key):
+                        self.stats['resumed'] += 1
+                    else:
+                        pending.add(executor.submit(self._process, job))
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    self.stats[result.status] += 1
+                    yield result
+                    # Só depois que o chamador gravou o resultado no banco
+                    if result.status in FINAL_STATUSES:
+                        self.checkpoint.mark_done(result.job.key, result.status, result.path)
+            completed = True
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if completed and not self.stats[ERROR]:
+                self.checkpoint.clear()
+            else:
+                self.checkpoint.save()
+
+
+# ------------------------------------------------------------------------------
+# Integração com management commands
+# ------------------------------------------------------------------------------
+
+def add_fetcher_arguments(parser):
+    """Opções comuns aos comandos de capas."""
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Downloads simultâneos (padrão: BULK_MEDIA_FETCHER["WORKERS"])',
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=None,
+        help='Requisições por segundo por host (padrão: BULK_MEDIA_FETCHER["RATE_PER_HOST"])',
+    )
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        default=None,
+        help='Arquivo de checkpoint para retomar execuções interrompidas',
+    )
+    parser.add_argument(
+        '--restart',
+        action='store_true',
+        help='Ignora o checkpoint existente e começa do zero',
+    )
+
+
+def fetcher_from_options(command_name, options, rate=None):
+    """Cria o fetcher a partir das opções do comando (checkpoint padrão por comando)."""
+    checkpoint_path = options.get('checkpoint') or os.path.join(
+        get_bulk_media_fetcher_settings()['CHECKPOINT_DIR'], f'cgbookstore_{command_name}.json'
+    )
+    fetcher = BulkMediaFetcher(
+        workers=options.get('workers'),
+        rate=options.get('rate') or rate,
+        checkpoint_path=checkpoint_path,
+    )
+    if options.get('restart'):
+        fetcher.checkpoint.clear()
+    return fetcher
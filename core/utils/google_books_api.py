@@ -19,6 +19,53 @@ logger = logging.getLogger(__name__)
 GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
 
 
+def build_search_params(
+    query: str = None,
+    title: str = None,
+    author: str = None,
+    isbn: str = None,
+    publisher: str = None,
+    max_results: int = 10,
+    start_index: int = 0
+) -> Optional[Dict]:
+    """
+    Monta os parâmetros de busca da API do Google Books.
+
+    Returns:
+        Dict de parâmetros ou None se nenhum termo foi informado
+    """
+    search_terms = []
+
+    if query:
+        search_terms.append(query)
+    if title:
+        search_terms.append(f'intitle:{title}')
+    if author:
+        search_terms.append(f'inauthor:{author}')
+    if isbn:
+        search_terms.append(f'isbn:{isbn}')
+    if publisher:
+        search_terms.append(f'inpublisher:{publisher}')
+
+    if not search_terms:
+        return None
+
+    params = {
+        'q': ' '.join(search_terms),
+        'maxResults': min(max_results, 40),  # Máximo permitido pela API
+        'startIndex': start_index,
+        'langRestrict': 'pt',  # Priorizar resultados em português
+        'printType': 'books'  # Apenas livros
+    }
+
+    # Adicionar API key se configurada
+    api_key = getattr(settings, 'GOOGLE_BOOKS_API_KEY', '')
+    if api_key:
+        params['key'] = api_key
+
+    return params
+
+
 def search_books(
     query: str = None,
     title: str = None,
@@ -44,39 +91,13 @@ def search_books(
         Dict com os resultados da busca
     """
     try:
-        # Construir query string
-        search_terms = []
-
-        if query:
-            search_terms.append(query)
-        if title:
-            search_terms.append(f'intitle:{title}')
-        if author:
-            search_terms.append(f'inauthor:{author}')
-        if isbn:
-            search_terms.append(f'isbn:{isbn}')
-        if publisher:
-            search_terms.append(f'inpublisher:{publisher}')
-
-        if not search_terms:
+        params = build_search_params(
+            query=query, title=title, author=author, isbn=isbn,
+            publisher=publisher, max_results=max_results, start_index=start_index,
+        )
+        if params is None:
             return {'error': 'Nenhum termo de busca fornecido'}
 
-        q = ' '.join(search_terms)
-
-        # Parâmetros da requisição
-        params = {
-            'q': q,
-            'maxResults': min(max_results, 40),  # Máximo permitido pela API
-            'startIndex': start_index,
-            'langRestrict': 'pt',  # Priorizar resultados em português
-            'printType': 'books'  # Apenas livros
-        }
-
-        # Adicionar API key se configurada
-        api_key = getattr(settings, 'GOOGLE_BOOKS_API_KEY', '')
-        if api_key:
-            params['key'] = api_key
-
         # Fazer requisição com retry em caso de Rate Limit (429) ou indisponibilidade (503)
         import time
         max_retries = 3
@@ -256,6 +277,37 @@ def extract_book_info(item: Dict) -> Optional[Dict]:
         return None
 
 
+def optimize_cover_url(image_url: str) -> str:
+    """
+    Ajusta a URL de capa do Google Books para a maior resolução disponível
+    (zoom=0, img=1, sem efeito de página dobrada).
+    """
+    optimized_url = image_url
+
+    # Remover limitadores de qualidade
+    optimized_url = optimized_url.replace('&edge=curl', '')
+    optimized_url = optimized_url.replace('&source=gbs_api', '')
+
+    # Ajustar zoom para máxima qualidade
+    if 'zoom=' in optimized_url:
+        # zoom=0 retorna a melhor qualidade disponível
+        optimized_url = optimized_url.replace('zoom=1', 'zoom=0')
+        optimized_url = optimized_url.replace('zoom=2', 'zoom=0')
+        optimized_url = optimized_url.replace('zoom=3', 'zoom=0')
+    else:
+        # Adicionar zoom=0 se não existir
+        if '?' in optimized_url:
+            optimized_url += '&zoom=0'
+
+    # Adicionar parâmetro para imagem grande se for URL do Google Books
+    if 'books.google.com' in optimized_url and 'img=' in optimized_url:
+        # img=1 retorna maior resolução
+        if 'img=0' in optimized_url:
+            optimized_url = optimized_url.replace('img=0', 'img=1')
+
+    return optimized_url
+
+
 def download_cover(image_url: str, book_slug: str, existing_cover: str = None) -> Optional[str]:
     """
     Baixa uma capa de livro da URL e salva no media storage.
@@ -265,29 +317,7 @@ def download_cover(image_url: str, book_slug: str, existing_cover: str = None) -
         if not image_url:
             return None
 
-        # Otimizar URL para máxima qualidade
-        optimized_url = image_url
-
-        # Remover limitadores de qualidade
-        optimized_url = optimized_url.replace('&edge=curl', '')
-        optimized_url = optimized_url.replace('&source=gbs_api', '')
-
-        # Ajustar zoom para máxima qualidade
-        if 'zoom=' in optimized_url:
-            # zoom=0 retorna a melhor qualidade disponível
-            optimized_url = optimized_url.replace('zoom=1', 'zoom=0')
-            optimized_url = optimized_url.replace('zoom=2', 'zoom=0')
-            optimized_url = optimized_url.replace('zoom=3', 'zoom=0')
-        else:
-            # Adicionar zoom=0 se não existir
-            if '?' in optimized_url:
-                optimized_url += '&zoom=0'
-
-        # Adicionar parâmetro para imagem grande se for URL do Google Books
-        if 'books.google.com' in optimized_url and 'img=' in optimized_url:
-            # img=1 retorna maior resolução
-            if 'img=0' in optimized_url:
-                optimized_url = optimized_url.replace('img=0', 'img=1')
+        optimized_url = optimize_cover_url(image_url)
 
         logger.info(f"Baixando capa otimizada: {optimized_url}")
 
@@ -392,6 +422,24 @@ def update_book_cover_from_google(book, force: bool = False) -> bool:
         return False
 
 
+def google_cover_resolver(title: str, author_name: str = None):
+    """
+    Resolver para o BulkMediaFetcher (core.utils.bulk_media_fetcher): busca o
+    livro no Google Books pelo próprio fetcher, que aplica o rate limit por
+    host e o backoff em 429, e devolve a URL otimizada da capa (ou None).
+    """
+    def resolve(fetcher):
+        params = build_search_params(title=title, author=author_name, max_results=1)
+        data = fetcher.get_json(GOOGLE_BOOKS_API_URL, params=params)
+        items = data.get('items') or []
+        book_info = extract_book_info(items[0]) if items else None
+        if not book_info or not book_info.get('thumbnail'):
+            return None
+        return optimize_cover_url(book_info['thumbnail'])
+
+    return resolve
+
+
 def search_books_by_author(author_name: str, max_results: int = 20) -> Dict:
     """
     Busca todos os livros de um autor específico.
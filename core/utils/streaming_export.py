@@ -0,0 +1,109 @@
+"""
+Exportações em streaming (CSV, Markdown, TXT, HTML).
+
+As views de exportação devolvem um StreamingHttpResponse alimentado por um
+gerador: as linhas são lidas do banco em lotes e escritas no socket à medida
+que ficam prontas, sem montar o arquivo inteiro em memória.
+
+Leitura do banco (iter_rows):
+- com cursores do lado do servidor disponíveis (PostgreSQL sem pooler em modo
+  transaction), usa values_list().iterator(chunk_size);
+- caso contrário (DISABLE_SERVER_SIDE_CURSORS=True no Supabase Pooler, SQLite),
+  pagina por chave (keyset) sobre a ordenação + pk, uma query por lote, já que
+  iterator() carregaria o resultado inteiro de uma vez no cliente.
+"""
+import csv
+
+from django.db import connections
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+DEFAULT_CHUNK_SIZE = 2000
+CSV_BOM = '\ufeff'  # BOM para Excel
+
+
+class _Echo:
+    """Pseudo-buffer para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+def supports_server_side_cursors(using='default'):
+    connection = connections[using]
+    return (
+        connection.vendor == 'postgresql'
+        and not connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS')
+    )
+
+
+def iter_rows(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE, order_field='pk', limit=None):
+    """
+    Itera tuplas (values_list) de `fields` em lotes de `chunk_size`.
+
+    `order_field` define a ordem da exportação ('-campo' para decrescente);
+    o pk é sempre usado como desempate. Anotações podem ser usadas em
+    `fields`, mas não como `order_field` no modo keyset.
+    """
+    descending = order_field.startswith('-')
+    field = order_field.lstrip('-')
+    pk_name = queryset.model._meta.pk.name
+    if field == 'pk':
+        field = pk_name
+
+    ordering = [order_field, f"{'-' if descending else ''}{pk_name}"] if field != pk_name else [order_field]
+    projection = list(fields) + [name for name in (field, pk_name) if name not in fields]
+    rows = queryset.order_by(*ordering).values_list(*projection)
+    width = len(fields)
+
+    if supports_server_side_cursors(queryset.db):
+        if limit is not None:
+            rows = rows[:limit]
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield row[:width]
+        return
+
+    lookup = 'lt' if descending else 'gt'
+    field_index = projection.index(field)
+    pk_index = projection.index(pk_name)
+    remaining = limit
+    page = rows
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        batch = list(page[:size])
+        for row in batch:
+            yield row[:width]
+        if len(batch) < size:
+            return
+        if remaining is not None:
+            remaining -= len(batch)
+
+        last = batch[-1]
+        if field == pk_name:
+            page = rows.filter(**{f'{pk_name}__{lookup}': last[pk_index]})
+        else:
+            page = rows.filter(
+                Q(**{f'{field}__{lookup}': last[field_index]})
+                | Q(**{field: last[field_index], f'{pk_name}__{lookup}': last[pk_index]})
+            )
+
+
+def csv_lines(header, rows, delimiter=';'):
+    """Gera as linhas CSV (já formatadas) a partir do cabeçalho e das linhas."""
+    writer = csv.writer(_Echo(), delimiter=delimiter)
+    yield CSV_BOM + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def streaming_attachment(content, filename, content_type):
+    """StreamingHttpResponse para download de um gerador de strings."""
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_csv(filename, header, rows, delimiter=';'):
+    return streaming_attachment(
+        csv_lines(header, rows, delimiter), filename, 'text/csv; charset=utf-8'
+    )
@@ -3,7 +3,8 @@
 from django.views.generic import ListView
 from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
-from core.models import Book, Category, Section, SectionItem
+from core.models import Book, Section, SectionItem
+from core.services.catalog_service import DEFAULT_SORT, get_category_facets, paginate_catalog
 
 
 class BookListView(ListView):
@@ -17,7 +18,7 @@ class BookListView(ListView):
     - Filtro por faixa de preço (min/max)
     - Busca por título e autor
     - Ordenação (recentes, antigos, preço, título, avaliação, mais vendidos)
-    - Paginação (12 livros por página)
+    - Paginação por cursor (12 livros por página), ver core/services/catalog_service.py
     """
     model = Book
     template_name = 'core/book_list.html'
@@ -145,25 +146,32 @@ class BookListView(ListView):
             except ValueError:
                 pass  # Ignora valores inválidos
 
-        # ========== ORDENAÇÃO ==========
-        sort_by = self.request.GET.get('sort_by', '-created_at')
-
-        # Mapeamento de opções de ordenação
-        sort_options = {
-            'newest': '-created_at',  # Mais recentes
-            'oldest': 'created_at',  # Mais antigos
-            'price_asc': 'price',  # Menor preço
-            'price_desc': '-price',  # Maior preço
-            'title_asc': 'title',  # A-Z
-            'title_desc': '-title',  # Z-A
-            'rating': '-average_rating',  # Melhor avaliação
-            'popular': '-average_rating',  # Populares / Mais vendidos (por rating)
-        }
+        # A ordenação (por cursor) é aplicada em paginate_queryset
+        return queryset
 
-        # Aplica ordenação (padrão: mais recentes)
-        queryset = queryset.order_by(sort_options.get(sort_by, '-created_at'))
+    def get_filters(self):
+        """Filtros ativos, usados como chave do total em cache."""
+        get = self.request.GET
+        return {
+            'q': get.get('q', '').strip(),
+            'category': get.getlist('category'),
+            'author': get.get('author', '').strip(),
+            'price_min': get.get('price_min', '').strip(),
+            'price_max': get.get('price_max', '').strip(),
+            'shelf': get.get('shelf', '').strip(),
+        }
 
-        return queryset
+    def paginate_queryset(self, queryset, page_size):
+        """Paginação por chave (keyset) em vez de OFFSET + COUNT a cada página."""
+        page = paginate_catalog(
+            queryset,
+            sort_by=self.request.GET.get('sort_by', DEFAULT_SORT),
+            per_page=page_size,
+            filters=self.get_filters(),
+            cursor=self.request.GET.get('cursor'),
+            page=self.request.GET.get('page'),
+        )
+        return None, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, **kwargs):
         """
@@ -171,10 +179,8 @@ class BookListView(ListView):
         """
         context = super().get_context_data(**kwargs)
 
-        # Lista de categorias filtradas para o formulário (apenas categorias com até duas palavras)
-        all_cats = Category.objects.all().order_by('name')
-        context['all_categories'] = [cat for cat in all_cats if len(cat.name.strip().split()) <= 2]
-
+        # Categorias (até duas palavras) com contagem de livros, em cache
+        context['all_categories'] = get_category_facets()
 
         # Parâmetros atuais (para manter estado do formulário)
         context['current_search'] = self.request.GET.get('q', '')
@@ -231,8 +237,14 @@ class BookListView(ListView):
         ]
 
 
-        # Total de resultados (para exibir contador)
-        context['total_results'] = self.get_queryset().count()
+        # Total de resultados (COUNT em cache por combinação de filtros)
+        context['total_results'] = context['page_obj'].total
+
+        # Querystring dos links de paginação (sem cursor/página)
+        pagination_query = self.request.GET.copy()
+        pagination_query.pop('cursor', None)
+        pagination_query.pop('page', None)
+        context['pagination_query'] = pagination_query.urlencode()
 
         # Verifica se há filtros ativos
         context['has_filters'] = any([
@@ -192,9 +192,9 @@ class HomeView(TemplateView):
 
         if book_ids:
             # Otimização: usar only() para carregar apenas campos necessários
-            # REMOVIDO 'cover' e 'discount_price' da lista
+            # (capa e versões responsivas incluídas: o template usa cover_srcset)
             books = Book.objects.filter(id__in=book_ids).select_related('category', 'author').only(
-                'id', 'title', 'slug', 'price', 
+                'id', 'title', 'slug', 'price', 'cover_image', 'cover_derivatives',
                 'category__name', 'author__name', 'author__slug'
             )
             books_map = {book.id: book for book in books}
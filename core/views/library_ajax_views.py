@@ -10,6 +10,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from core.models import Book
 from accounts.models import BookShelf, ReadingProgress
+from core.services.library_service import get_shelf_counts, invalidate_library_cache
 import json
 
 @login_required
@@ -71,12 +72,8 @@ def add_to_shelf(request):
                 progress.isbn_scanned = True
                 progress.save()
 
-        shelf_counts = {
-            'favorites': BookShelf.objects.filter(user=request.user, shelf_type='favorites').count(),
-            'to_read': BookShelf.objects.filter(user=request.user, shelf_type='to_read').count(),
-            'reading': BookShelf.objects.filter(user=request.user, shelf_type='reading').count(),
-            'read': BookShelf.objects.filter(user=request.user, shelf_type='read').count(),
-        }
+        invalidate_library_cache(request.user.id)
+        shelf_counts = get_shelf_counts(request.user)['standard']
         shelf_display = bookshelf.get_shelf_display()
 
         return JsonResponse({
@@ -122,14 +119,9 @@ def remove_from_shelf(request):
         # Deletar
         bookshelf.delete()
 
-        # Calcular contadores atualizados
-        shelf_counts = {
-            'favorites': BookShelf.objects.filter(user=request.user, shelf_type='favorites').count(),
-            'to_read': BookShelf.objects.filter(user=request.user, shelf_type='to_read').count(),
-            'reading': BookShelf.objects.filter(user=request.user, shelf_type='reading').count(),
-            'read': BookShelf.objects.filter(user=request.user, shelf_type='read').count(),
-            'abandoned': BookShelf.objects.filter(user=request.user, shelf_type='abandoned').count(),
-        }
+        # Invalidar prateleiras em cache e calcular contadores atualizados
+        invalidate_library_cache(request.user.id)
+        shelf_counts = get_shelf_counts(request.user)['standard']
 
         return JsonResponse({
             'success': True,
@@ -344,14 +336,9 @@ def move_to_shelf(request):
 
         new_shelf_display = bookshelf.get_shelf_display()
 
-        # Calcular contadores atualizados
-        shelf_counts = {
-            'favorites': BookShelf.objects.filter(user=request.user, shelf_type='favorites').count(),
-            'to_read': BookShelf.objects.filter(user=request.user, shelf_type='to_read').count(),
-            'reading': BookShelf.objects.filter(user=request.user, shelf_type='reading').count(),
-            'read': BookShelf.objects.filter(user=request.user, shelf_type='read').count(),
-            'abandoned': BookShelf.objects.filter(user=request.user, shelf_type='abandoned').count(),
-        }
+        # Invalidar prateleiras em cache e calcular contadores atualizados
+        invalidate_library_cache(request.user.id)
+        shelf_counts = get_shelf_counts(request.user)['standard']
 
         return JsonResponse({
             'success': True,
@@ -417,6 +404,8 @@ def delete_custom_shelf(request):
         # Deletar todos os livros da prateleira
         books_in_shelf.delete()
 
+        invalidate_library_cache(request.user.id)
+
         # Remover da lista do profile
         removed = profile.remove_custom_shelf(shelf_name)
 
@@ -507,6 +496,7 @@ def rename_custom_shelf(request):
             shelf_type='custom',
             custom_shelf_name=old_name
         ).update(custom_shelf_name=new_name)
+        invalidate_library_cache(request.user.id)
 
         # Atualizar lista no profile
         profile.remove_custom_shelf(old_name)
@@ -566,6 +556,7 @@ def update_book_notes(request):
         # Atualizar notas
         bookshelf.notes = notes
         bookshelf.save()
+        invalidate_library_cache(request.user.id)
 
         book_title = bookshelf.book.title
         shelf_display = bookshelf.get_shelf_display()
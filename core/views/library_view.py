@@ -5,9 +5,14 @@ Integrada com os models de BookShelf, ReadingProgress, etc.
 
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, F, Prefetch
+from django.db.models import F
 from django.core.cache import cache
-from accounts.models import BookShelf, ReadingProgress, BookReview
+from accounts.models import ReadingProgress, BookReview
+from core.services.library_service import (
+    STANDARD_SHELVES,
+    attach_reading_progress,
+    load_library_shelves,
+)
 
 
 class LibraryView(LoginRequiredMixin, TemplateView):
@@ -47,46 +52,18 @@ class LibraryView(LoginRequiredMixin, TemplateView):
         # Tema visual selecionado pelo usuário
         context['selected_theme'] = profile.theme_preference if profile else 'fantasy'
 
-        # Contadores de prateleiras
-        context['favorites_count'] = BookShelf.objects.filter(
-            user=user, shelf_type='favorites'
-        ).count()
+        # Prateleiras e contadores: uma query agrupada + uma query com ROW_NUMBER(),
+        # em cache por usuário (ver core/services/library_service.py)
+        library = load_library_shelves(user)
+        counts = library['counts']['standard']
+        shelves = library['shelves']
 
-        context['to_read_count'] = BookShelf.objects.filter(
-            user=user, shelf_type='to_read'
-        ).count()
+        for shelf_type in STANDARD_SHELVES:
+            context[f'{shelf_type}_count'] = counts[shelf_type]
+            context[shelf_type] = shelves[shelf_type]
 
-        context['reading_count'] = BookShelf.objects.filter(
-            user=user, shelf_type='reading'
-        ).count()
-
-        context['read_count'] = BookShelf.objects.filter(
-            user=user, shelf_type='read'
-        ).count()
-
-        # Prateleiras com livros (limitar a 50 por prateleira)
-        context['favorites'] = BookShelf.objects.filter(
-            user=user, shelf_type='favorites'
-        ).select_related('book', 'book__author', 'book__category')[:50]
-
-        context['to_read'] = BookShelf.objects.filter(
-            user=user, shelf_type='to_read'
-        ).select_related('book', 'book__author', 'book__category')[:50]
-
-        # Otimização: Prefetch ReadingProgress para evitar N+1 queries
-        reading_progress_prefetch = Prefetch(
-            'book__reading_progress',
-            queryset=ReadingProgress.objects.filter(user=user),
-            to_attr='user_progress'
-        )
-
-        context['reading'] = BookShelf.objects.filter(
-            user=user, shelf_type='reading'
-        ).select_related('book', 'book__author', 'book__category').prefetch_related(reading_progress_prefetch)[:50]
-
-        context['read'] = BookShelf.objects.filter(
-            user=user, shelf_type='read'
-        ).select_related('book', 'book__author', 'book__category')[:50]
+        # Progresso de leitura não vai para o cache: buscado em uma única query
+        attach_reading_progress(user, shelves['reading'] + shelves['abandoned'])
 
         # ========== PRATELEIRAS PERSONALIZADAS (ATUALIZADO) ==========
         custom_shelves_list = []
@@ -97,17 +74,11 @@ class LibraryView(LoginRequiredMixin, TemplateView):
             custom_shelf_names = shelf_names  # <-- Preencha a lista
 
             for shelf_name in shelf_names:
-                # Buscar livros da prateleira (pode estar vazio)
-                books = BookShelf.objects.filter(
-                    user=user,
-                    shelf_type='custom',
-                    custom_shelf_name=shelf_name
-                ).select_related('book', 'book__author', 'book__category')[:50]
-
+                # Livros da prateleira (pode estar vazia)
                 custom_shelves_list.append({
                     'name': shelf_name,
-                    'count': books.count(),
-                    'books': books
+                    'count': library['counts']['custom'].get(shelf_name, 0),
+                    'books': library['custom_shelves'].get(shelf_name, [])
                 })
 
         context['custom_shelves'] = custom_shelves_list
@@ -150,11 +121,6 @@ class LibraryView(LoginRequiredMixin, TemplateView):
             user=user
         ).select_related('book').order_by('-created_at')[:5]
 
-        # Atribuir progresso aos itens da prateleira (otimizado com prefetch)
-        for shelf_item in context['reading']:
-            # O progresso já foi carregado via prefetch_related
-            shelf_item.progress = shelf_item.book.user_progress[0] if hasattr(shelf_item.book, 'user_progress') and shelf_item.book.user_progress else None
-
         # Carregar ou gerar recomendações personalizadas por IA com cache individual por usuário (30 minutos)
         rec_cache_key = f'user_personal_recs_{user.id}'
         personal_recs = cache.get(rec_cache_key)
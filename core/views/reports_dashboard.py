@@ -1,19 +1,30 @@
 """
 Views para Dashboard de Relatórios Modular.
-Área administrativa com gráficos, exportação CSV e Markdown.
+Área administrativa com gráficos, exportação CSV e Markdown (em streaming).
 """
 
-import csv
-from io import StringIO
 from datetime import datetime, timedelta
 
+from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.http import HttpResponse
+from django.views.decorators.http import require_POST
 from django.db.models import Count, Q, Sum, Avg
 from django.utils import timezone
 
 from core.models import Book, Author, Category, Video, Event, Section
+from core.services.reports_service import (
+    MODULE_COLLECTORS,
+    get_authors_module_data,
+    get_books_module_data,
+    get_dashboard_snapshots,
+    get_finance_module_data,
+    get_videos_module_data,
+    refresh_all_snapshots,
+    refresh_snapshot,
+)
+from core.utils.streaming_export import iter_rows, stream_csv, streaming_attachment
 
 # Importar modelos opcionais
 try:
@@ -31,263 +42,130 @@ except ImportError:
     Chapter = None
 
 
-# ============================================
-# FUNÇÕES AUXILIARES DE COLETA DE DADOS
-# ============================================
-
-def get_books_module_data():
-    """Coleta dados do módulo de livros."""
-    total_books = Book.objects.count()
-    books_with_cover = Book.objects.filter(cover_image__isnull=False).exclude(cover_image='').count()
-    books_from_google = Book.objects.exclude(Q(google_books_id='') | Q(google_books_id__isnull=True)).count()
-    
-    # Livros por categoria
-    books_by_category = Category.objects.annotate(
-        book_count=Count('books')
-    ).filter(book_count__gt=0).order_by('-book_count')[:10]
-    
-    # Top 10 autores por quantidade de livros
-    top_authors = Author.objects.annotate(
-        book_count=Count('books')
-    ).filter(book_count__gt=0).order_by('-book_count')[:10]
-    
-    # Estatísticas gerais
-    avg_rating = Book.objects.aggregate(avg=Avg('average_rating'))['avg'] or 0
-    
-    return {
-        'total_books': total_books,
-        'books_with_cover': books_with_cover,
-        'books_without_cover': total_books - books_with_cover,
-        'books_from_google': books_from_google,
-        'cover_percentage': round((books_with_cover / total_books * 100), 1) if total_books > 0 else 0,
-        'avg_rating': round(avg_rating, 1),
-        'books_by_category': list(books_by_category.values('name', 'book_count')),
-        'top_authors': list(top_authors.values('name', 'book_count')),
-        'chart_labels': [c['name'] for c in books_by_category.values('name')],
-        'chart_values': [c['book_count'] for c in books_by_category.values('book_count')],
-    }
-
-
-def get_authors_module_data():
-    """Coleta dados do módulo de autores."""
-    total_authors = Author.objects.count()
-    
-    # Autores por quantidade de livros
-    authors_by_books = Author.objects.annotate(
-        book_count=Count('books')
-    ).order_by('-book_count')[:10]
-    
-    # Autores sem livros
-    authors_without_books = Author.objects.annotate(
-        book_count=Count('books')
-    ).filter(book_count=0).count()
-    
-    return {
-        'total_authors': total_authors,
-        'authors_with_books': total_authors - authors_without_books,
-        'authors_without_books': authors_without_books,
-        'authors_by_books': list(authors_by_books.values('name', 'book_count')),
-        'chart_labels': [a['name'] for a in authors_by_books.values('name')],
-        'chart_values': [a['book_count'] for a in authors_by_books.values('book_count')],
-    }
-
-
-def get_videos_module_data():
-    """Coleta dados do módulo de vídeos."""
-    total_videos = Video.objects.count()
-    
-    # Estatísticas básicas
-    active_videos = Video.objects.filter(active=True).count() if hasattr(Video, 'active') else total_videos
-    
-    return {
-        'total_videos': total_videos,
-        'active_videos': active_videos,
-        'inactive_videos': total_videos - active_videos,
-    }
-
-
-def get_finance_module_data():
-    """Coleta dados do módulo financeiro (se disponível)."""
-    if not Subscription:
-        return None
-    
-    now = timezone.now()
-    
-    # Assinaturas
-    total_subscriptions = Subscription.objects.count()
-    active_subscriptions = Subscription.objects.filter(
-        status='ativa',
-        expiration_date__gte=now
-    ).count()
-    
-    # Receita total
-    total_revenue = Subscription.objects.filter(status='ativa').aggregate(
-        total=Sum('price')
-    )['total'] or 0
-    
-    # Assinaturas por mês (últimos 6 meses)
-    subscriptions_by_month = []
-    for i in range(6):
-        month_start = now - timedelta(days=30 * (5 - i))
-        month_end = now - timedelta(days=30 * (4 - i)) if i < 5 else now
-        count = Subscription.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).count()
-        subscriptions_by_month.append({
-            'month': month_start.strftime('%b/%y'),
-            'count': count
-        })
-    
-    # Campanhas
-    if Campaign:
-        total_campaigns = Campaign.objects.count()
-        active_campaigns = Campaign.objects.filter(
-            status='active',
-            start_date__lte=now,
-            end_date__gte=now
-        ).count()
-    else:
-        total_campaigns = 0
-        active_campaigns = 0
-    
-    return {
-        'total_subscriptions': total_subscriptions,
-        'active_subscriptions': active_subscriptions,
-        'total_revenue': float(total_revenue),
-        'total_campaigns': total_campaigns,
-        'active_campaigns': active_campaigns,
-        'subscriptions_by_month': subscriptions_by_month,
-        'chart_labels': [s['month'] for s in subscriptions_by_month],
-        'chart_values': [s['count'] for s in subscriptions_by_month],
-    }
-
-
-def get_events_module_data():
-    """Coleta dados do módulo de eventos."""
-    now = timezone.now()
-    
-    total_events = Event.objects.count()
-    upcoming = Event.objects.filter(start_date__gt=now, active=True).count()
-    happening = Event.objects.filter(start_date__lte=now, end_date__gte=now, active=True).count()
-    finished = Event.objects.filter(end_date__lt=now).count()
-    
-    return {
-        'total_events': total_events,
-        'upcoming': upcoming,
-        'happening': happening,
-        'finished': finished,
-        'chart_labels': ['Próximos', 'Acontecendo', 'Finalizados'],
-        'chart_values': [upcoming, happening, finished],
-    }
-
-
 # ============================================
 # VIEWS PRINCIPAIS
 # ============================================
 
 @staff_member_required
 def reports_dashboard(request):
-    """Dashboard principal de relatórios."""
-    
+    """
+    Dashboard principal de relatórios.
+
+    Renderiza a partir dos snapshots materializados (ReportSnapshot), com a
+    data de cálculo de cada módulo. Ver core/services/reports_service.py.
+    """
+    snapshots = get_dashboard_snapshots()
+
     context = {
         'title': '',  # Removido para não mostrar texto extra
-        'books_data': get_books_module_data(),
-        'authors_data': get_authors_module_data(),
-        'videos_data': get_videos_module_data(),
-        'events_data': get_events_module_data(),
-        'finance_data': get_finance_module_data(),
-        'generated_at': timezone.now(),
+        'books_data': snapshots['books'].data,
+        'authors_data': snapshots['authors'].data,
+        'videos_data': snapshots['videos'].data,
+        'events_data': snapshots['events'].data,
+        'finance_data': snapshots['finance'].data,
+        'snapshots': snapshots,
+        'generated_at': min(snapshot.computed_at for snapshot in snapshots.values()),
     }
     
     return render(request, 'admin/reports_dashboard.html', context)
 
 
+@staff_member_required
+@require_POST
+def refresh_reports(request):
+    """Recalcula os snapshots do dashboard (um módulo ou todos)."""
+    module = request.POST.get('module')
+    try:
+        if module in MODULE_COLLECTORS:
+            refresh_snapshot(module)
+            messages.success(request, f'✅ Módulo "{module}" recalculado.')
+        else:
+            refresh_all_snapshots()
+            messages.success(request, '✅ Relatórios recalculados.')
+    except Exception as e:
+        messages.error(request, f'❌ Erro ao recalcular relatórios: {e}')
+    return redirect('admin_tools:reports_dashboard')
+
+
 # ============================================
 # EXPORTAÇÃO CSV
 # ============================================
+# As exportações são geradas em streaming (core/utils/streaming_export.py):
+# as linhas saem do banco em lotes direto para a resposta.
+
+def _export_filename(prefix, extension):
+    return f'{prefix}_{datetime.now().strftime("%Y%m%d_%H%M")}.{extension}'
+
 
 @staff_member_required
 def export_books_csv(request):
     """Exporta lista de livros em CSV."""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="livros_{datetime.now().strftime("%Y%m%d_%H%M")}.csv"'
-    response.write('\ufeff')  # BOM para Excel
-    
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(['ID', 'Título', 'Autor', 'Categoria', 'ISBN', 'Ano', 'Avaliação Média', 'Tem Capa'])
-    
-    books = Book.objects.select_related('author', 'category').all()
-    for book in books:
-        writer.writerow([
-            book.id,
-            book.title,
-            book.author.name if book.author else '',
-            book.category.name if book.category else '',
-            getattr(book, 'isbn', ''),
-            getattr(book, 'publication_year', ''),
-            book.average_rating or '',
-            'Sim' if book.cover_image else 'Não'
-        ])
-    
-    return response
+    rows = iter_rows(
+        Book.objects.all(),
+        ['id', 'title', 'author__name', 'category__name', 'isbn', 'publication_date', 'average_rating', 'cover_image'],
+    )
+    return stream_csv(
+        _export_filename('livros', 'csv'),
+        ['ID', 'Título', 'Autor', 'Categoria', 'ISBN', 'Ano', 'Avaliação Média', 'Tem Capa'],
+        (
+            [
+                book_id,
+                title,
+                author_name or '',
+                category_name or '',
+                isbn or '',
+                publication_date.year if publication_date else '',
+                average_rating or '',
+                'Sim' if cover_image else 'Não'
+            ]
+            for book_id, title, author_name, category_name, isbn, publication_date, average_rating, cover_image in rows
+        ),
+    )
 
 
 @staff_member_required
 def export_authors_csv(request):
     """Exporta lista de autores em CSV."""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="autores_{datetime.now().strftime("%Y%m%d_%H%M")}.csv"'
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(['ID', 'Nome', 'Quantidade de Livros', 'Biografia'])
-    
-    authors = Author.objects.annotate(book_count=Count('books')).all()
-    for author in authors:
-        writer.writerow([
-            author.id,
-            author.name,
-            author.book_count,
-            getattr(author, 'bio', '')[:200] if hasattr(author, 'bio') else ''
-        ])
-    
-    return response
+    rows = iter_rows(
+        Author.objects.annotate(book_count=Count('books')),
+        ['id', 'name', 'book_count', 'bio'],
+    )
+    return stream_csv(
+        _export_filename('autores', 'csv'),
+        ['ID', 'Nome', 'Quantidade de Livros', 'Biografia'],
+        ([author_id, name, book_count, (bio or '')[:200]] for author_id, name, book_count, bio in rows),
+    )
 
 
 @staff_member_required
 def export_videos_csv(request):
     """Exporta lista de vídeos em CSV."""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="videos_{datetime.now().strftime("%Y%m%d_%H%M")}.csv"'
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(['ID', 'Título', 'URL', 'Ativo'])
-    
-    videos = Video.objects.all()
-    for video in videos:
-        writer.writerow([
-            video.id,
-            video.title,
-            getattr(video, 'url', getattr(video, 'youtube_url', '')),
-            'Sim' if getattr(video, 'active', True) else 'Não'
-        ])
-    
-    return response
+    rows = iter_rows(Video.objects.all(), ['id', 'title', 'video_url', 'active'])
+    return stream_csv(
+        _export_filename('videos', 'csv'),
+        ['ID', 'Título', 'URL', 'Ativo'],
+        ([video_id, title, video_url or '', 'Sim' if active else 'Não'] for video_id, title, video_url, active in rows),
+    )
 
 
 # ============================================
 # EXPORTAÇÃO MARKDOWN
 # ============================================
 
+def _stream_markdown(prefix, content):
+    return streaming_attachment(
+        content, _export_filename(prefix, 'md'), 'text/markdown; charset=utf-8'
+    )
+
+
 @staff_member_required
 def export_books_markdown(request):
     """Exporta relatório de livros em Markdown."""
     data = get_books_module_data()
     now = datetime.now()
-    
-    md_content = f"""# Relatório de Livros - CGBookStore
+
+    def content():
+        yield f"""# Relatório de Livros - CGBookStore
 
 **Gerado em:** {now.strftime('%d/%m/%Y às %H:%M')}
 
@@ -310,11 +188,11 @@ def export_books_markdown(request):
 | Categoria | Quantidade |
 |-----------|------------|
 """
-    
-    for cat in data['books_by_category']:
-        md_content += f"| {cat['name']} | {cat['book_count']} |\n"
-    
-    md_content += """
+
+        for cat in data['books_by_category']:
+            yield f"| {cat['name']} | {cat['book_count']} |\n"
+
+        yield """
 ---
 
 ## Top 10 Autores (por quantidade de livros)
@@ -322,11 +200,11 @@ def export_books_markdown(request):
 | Autor | Livros |
 |-------|--------|
 """
-    
-    for author in data['top_authors']:
-        md_content += f"| {author['name']} | {author['book_count']} |\n"
-    
-    md_content += """
+
+        for author in data['top_authors']:
+            yield f"| {author['name']} | {author['book_count']} |\n"
+
+        yield """
 ---
 
 ## Lista Completa de Livros
@@ -334,20 +212,20 @@ def export_books_markdown(request):
 | Título | Autor | Categoria | Avaliação |
 |--------|-------|-----------|-----------|
 """
-    
-    books = Book.objects.select_related('author', 'category').all()[:100]  # Limitar a 100
-    for book in books:
-        author_name = book.author.name if book.author else '-'
-        category_name = book.category.name if book.category else '-'
-        rating = f"{book.average_rating} ⭐" if book.average_rating else '-'
-        md_content += f"| {book.title} | {author_name} | {category_name} | {rating} |\n"
-    
-    if Book.objects.count() > 100:
-        md_content += f"\n*... e mais {Book.objects.count() - 100} livros não listados.*\n"
-    
-    response = HttpResponse(md_content, content_type='text/markdown; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_livros_{now.strftime("%Y%m%d_%H%M")}.md"'
-    return response
+
+        books = iter_rows(
+            Book.objects.all(),
+            ['title', 'author__name', 'category__name', 'average_rating'],
+            limit=100,  # Limitar a 100
+        )
+        for title, author_name, category_name, average_rating in books:
+            rating = f"{average_rating} ⭐" if average_rating else '-'
+            yield f"| {title} | {author_name or '-'} | {category_name or '-'} | {rating} |\n"
+
+        if data['total_books'] > 100:
+            yield f"\n*... e mais {data['total_books'] - 100} livros não listados.*\n"
+
+    return _stream_markdown('relatorio_livros', content())
 
 
 @staff_member_required
@@ -355,8 +233,9 @@ def export_authors_markdown(request):
     """Exporta relatório de autores em Markdown."""
     data = get_authors_module_data()
     now = datetime.now()
-    
-    md_content = f"""# Relatório de Autores - CGBookStore
+
+    def content():
+        yield f"""# Relatório de Autores - CGBookStore
 
 **Gerado em:** {now.strftime('%d/%m/%Y às %H:%M')}
 
@@ -377,11 +256,11 @@ def export_authors_markdown(request):
 | Posição | Autor | Livros |
 |---------|-------|--------|
 """
-    
-    for i, author in enumerate(data['authors_by_books'], 1):
-        md_content += f"| {i}º | {author['name']} | {author['book_count']} |\n"
-    
-    md_content += """
+
+        for i, author in enumerate(data['authors_by_books'], 1):
+            yield f"| {i}º | {author['name']} | {author['book_count']} |\n"
+
+        yield """
 ---
 
 ## Lista Completa de Autores
@@ -389,14 +268,16 @@ def export_authors_markdown(request):
 | Nome | Quantidade de Livros |
 |------|---------------------|
 """
-    
-    authors = Author.objects.annotate(book_count=Count('books')).order_by('name')
-    for author in authors:
-        md_content += f"| {author.name} | {author.book_count} |\n"
-    
-    response = HttpResponse(md_content, content_type='text/markdown; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_autores_{now.strftime("%Y%m%d_%H%M")}.md"'
-    return response
+
+        authors = iter_rows(
+            Author.objects.annotate(book_count=Count('books')),
+            ['name', 'book_count'],
+            order_field='name',
+        )
+        for name, book_count in authors:
+            yield f"| {name} | {book_count} |\n"
+
+    return _stream_markdown('relatorio_autores', content())
 
 
 @staff_member_required
@@ -404,8 +285,9 @@ def export_videos_markdown(request):
     """Exporta relatório de vídeos em Markdown."""
     data = get_videos_module_data()
     now = datetime.now()
-    
-    md_content = f"""# Relatório de Vídeos - CGBookStore
+
+    def content():
+        yield f"""# Relatório de Vídeos - CGBookStore
 
 **Gerado em:** {now.strftime('%d/%m/%Y às %H:%M')}
 
@@ -426,15 +308,12 @@ def export_videos_markdown(request):
 | Título | Status |
 |--------|--------|
 """
-    
-    videos = Video.objects.all()
-    for video in videos:
-        status = '✅ Ativo' if getattr(video, 'active', True) else '❌ Inativo'
-        md_content += f"| {video.title} | {status} |\n"
-    
-    response = HttpResponse(md_content, content_type='text/markdown; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_videos_{now.strftime("%Y%m%d_%H%M")}.md"'
-    return response
+
+        for title, active in iter_rows(Video.objects.all(), ['title', 'active']):
+            status = '✅ Ativo' if active else '❌ Inativo'
+            yield f"| {title} | {status} |\n"
+
+    return _stream_markdown('relatorio_videos', content())
 
 
 @staff_member_required
@@ -0,0 +1,69 @@
+"""
+Entrega dos sitemaps XML já gerados (core/services/sitemap_service.py).
+
+Os arquivos vêm prontos do storage (com cache em memória), com Last-Modified
+e resposta 304 para If-Modified-Since — o tráfego de crawlers não consulta o
+ORM. O índice (sitemap.xml) é enviado gzipado com Content-Encoding quando o
+cliente aceita gzip; as partes (.xml.gz) são enviadas como arquivo gzip.
+"""
+import gzip
+import logging
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from core.services.sitemap_service import (
+    INDEX_NAME, MANIFEST_CACHE_KEY, ensure_manifest, read_sitemap_file,
+)
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_CACHE_SECONDS = 3600
+
+
+@require_safe
+def sitemap_file(request, name=INDEX_NAME):
+    """Serve o índice ou uma parte do sitemap da geração atual."""
+    manifest = ensure_manifest()
+    if manifest is None:
+        # Primeira geração em andamento em outro processo
+        response = HttpResponse('Sitemap em geração', status=503, content_type='text/plain')
+        response['Retry-After'] = '60'
+        return response
+
+    entry = manifest['files'].get(name)
+    if entry is None:
+        raise Http404('Sitemap não encontrado')
+
+    last_modified = parse_datetime(manifest['generated_at'])
+    mtime = int(last_modified.timestamp()) if last_modified else None
+    if mtime and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+        return HttpResponseNotModified()
+
+    try:
+        data = read_sitemap_file(manifest, name)
+    except Exception as e:
+        # Manifest em cache apontando para uma geração já removida
+        logger.warning(f"[SITEMAP] Falha ao ler '{name}' da geração {manifest['generation']}: {e}")
+        cache.delete(MANIFEST_CACHE_KEY)
+        raise Http404('Sitemap não encontrado')
+
+    if name == INDEX_NAME:
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(data, content_type='application/xml; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(data), content_type='application/xml; charset=utf-8')
+        patch_vary_headers(response, ['Accept-Encoding'])
+    else:
+        response = HttpResponse(data, content_type='application/gzip')
+
+    if mtime:
+        response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(response, public=True, max_age=SITEMAP_CACHE_SECONDS)
+    return response
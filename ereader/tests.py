@@ -1,3 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Bookmark, EBook, Highlight, ReadingNote
+
+User = get_user_model()
+
+
+class AnnotationExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='leitor', password='x')
+        self.client.force_login(self.user)
+        self.dom_casmurro = EBook.objects.create(title='Dom Casmurro', author='Machado de Assis')
+        self.iracema = EBook.objects.create(title='Iracema', author='José de Alencar')
+
+        Bookmark.objects.create(user=self.user, ebook=self.dom_casmurro, cfi='a', title='Capítulo I')
+        Highlight.objects.create(user=self.user, ebook=self.dom_casmurro, cfi_range='b', text='Olhos de ressaca')
+        ReadingNote.objects.create(user=self.user, ebook=self.iracema, cfi='c', note_text='Virgem dos lábios de mel')
+
+    def _content(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_txt_streams_sections(self):
+        content = self._content(self.client.get(reverse('ereader:export_txt', args=[self.dom_casmurro.id])))
+
+        self.assertIn('ANOTAÇÕES - Dom Casmurro', content)
+        self.assertIn('• Capítulo I', content)
+        self.assertIn('[Amarelo]\n"Olhos de ressaca"', content)
+        self.assertNotIn('📝 NOTAS', content)
+
+    def test_export_all_groups_annotations_by_book(self):
+        content = self._content(self.client.get(reverse('ereader:export_all')))
+
+        dom_casmurro = content.index('📖 Dom Casmurro')
+        iracema = content.index('📖 Iracema')
+        self.assertLess(dom_casmurro, content.index('"Olhos de ressaca"'), iracema)
+        self.assertGreater(content.index('• Virgem dos lábios de mel'), iracema)
+        self.assertEqual(content.count('📖'), 2)
@@ -1,12 +1,16 @@
 """
 Views adicionais para exportação de anotações.
+As respostas são geradas em streaming (core/utils/streaming_export.py).
 """
+import itertools
+from operator import itemgetter
+
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
-from django.template.loader import render_to_string
 from django.utils import timezone
 
+from core.utils.streaming_export import iter_rows, streaming_attachment
+
 from .models import EBook, Bookmark, Highlight, ReadingNote
 
 
@@ -15,66 +19,71 @@ def export_annotations_txt(request, book_id):
     """Exporta anotações de um livro em formato TXT."""
     ebook = get_object_or_404(EBook, id=book_id)
     
-    bookmarks = Bookmark.objects.filter(user=request.user, ebook=ebook)
-    highlights = Highlight.objects.filter(user=request.user, ebook=ebook)
-    notes = ReadingNote.objects.filter(user=request.user, ebook=ebook)
-    
-    lines = []
-    lines.append("=" * 60)
-    lines.append(f"ANOTAÇÕES - {ebook.title}")
-    lines.append(f"Autor: {ebook.author}")
-    lines.append(f"Exportado em: {timezone.now().strftime('%d/%m/%Y %H:%M')}")
-    lines.append("=" * 60)
-    lines.append("")
-    
-    # Marcadores
-    if bookmarks:
-        lines.append("-" * 40)
-        lines.append("📑 MARCADORES")
-        lines.append("-" * 40)
-        for bm in bookmarks:
-            lines.append(f"• {bm.title or bm.chapter_title or 'Sem título'}")
-            lines.append(f"  Criado em: {bm.created_at.strftime('%d/%m/%Y')}")
-            lines.append("")
-    
-    # Destaques
-    if highlights:
-        lines.append("-" * 40)
-        lines.append("✨ DESTAQUES")
-        lines.append("-" * 40)
-        for hl in highlights:
-            lines.append(f"[{hl.get_color_display()}]")
-            lines.append(f'"{hl.text}"')
-            if hl.chapter_title:
-                lines.append(f"  Capítulo: {hl.chapter_title}")
-            lines.append("")
+    bookmarks = _peek(iter_rows(
+        Bookmark.objects.filter(user=request.user, ebook=ebook),
+        ['title', 'chapter_title', 'created_at'], order_field='created_at'
+    ))
+    highlights = _peek(iter_rows(
+        Highlight.objects.filter(user=request.user, ebook=ebook),
+        ['color', 'text', 'chapter_title'], order_field='created_at'
+    ))
+    notes = _peek(iter_rows(
+        ReadingNote.objects.filter(user=request.user, ebook=ebook),
+        ['note_text', 'chapter_title', 'created_at'], order_field='-created_at'
+    ))
+    colors = dict(Highlight.COLOR_CHOICES)
     
-    # Notas
-    if notes:
-        lines.append("-" * 40)
-        lines.append("📝 NOTAS")
-        lines.append("-" * 40)
-        for note in notes:
-            lines.append(f"• {note.note_text}")
-            if note.chapter_title:
-                lines.append(f"  Capítulo: {note.chapter_title}")
-            lines.append(f"  Criado em: {note.created_at.strftime('%d/%m/%Y')}")
-            lines.append("")
-    
-    if not bookmarks and not highlights and not notes:
-        lines.append("Nenhuma anotação encontrada para este livro.")
-    
-    lines.append("=" * 60)
-    lines.append("Exportado via RetroReader - CGBookStore")
-    lines.append("=" * 60)
-    
-    content = "\n".join(lines)
+    def lines():
+        yield "=" * 60
+        yield f"ANOTAÇÕES - {ebook.title}"
+        yield f"Autor: {ebook.author}"
+        yield f"Exportado em: {timezone.now().strftime('%d/%m/%Y %H:%M')}"
+        yield "=" * 60
+        yield ""
+        
+        # Marcadores
+        if bookmarks:
+            yield "-" * 40
+            yield "📑 MARCADORES"
+            yield "-" * 40
+            for title, chapter_title, created_at in bookmarks:
+                yield f"• {title or chapter_title or 'Sem título'}"
+                yield f"  Criado em: {created_at.strftime('%d/%m/%Y')}"
+                yield ""
+        
+        # Destaques
+        if highlights:
+            yield "-" * 40
+            yield "✨ DESTAQUES"
+            yield "-" * 40
+            for color, text, chapter_title in highlights:
+                yield f"[{colors.get(color, color)}]"
+                yield f'"{text}"'
+                if chapter_title:
+                    yield f"  Capítulo: {chapter_title}"
+                yield ""
+        
+        # Notas
+        if notes:
+            yield "-" * 40
+            yield "📝 NOTAS"
+            yield "-" * 40
+            for note_text, chapter_title, created_at in notes:
+                yield f"• {note_text}"
+                if chapter_title:
+                    yield f"  Capítulo: {chapter_title}"
+                yield f"  Criado em: {created_at.strftime('%d/%m/%Y')}"
+                yield ""
+        
+        if not bookmarks and not highlights and not notes:
+            yield "Nenhuma anotação encontrada para este livro."
+        
+        yield "=" * 60
+        yield "Exportado via RetroReader - CGBookStore"
+        yield "=" * 60
     
-    response = HttpResponse(content, content_type='text/plain; charset=utf-8')
     filename = f"anotacoes_{ebook.title[:30].replace(' ', '_')}.txt"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return streaming_attachment(_joined(lines()), filename, 'text/plain; charset=utf-8')
 
 
 @login_required
@@ -82,11 +91,20 @@ def export_annotations_html(request, book_id):
     """Exporta anotações de um livro em formato HTML (para impressão/PDF)."""
     ebook = get_object_or_404(EBook, id=book_id)
     
-    bookmarks = Bookmark.objects.filter(user=request.user, ebook=ebook)
-    highlights = Highlight.objects.filter(user=request.user, ebook=ebook)
-    notes = ReadingNote.objects.filter(user=request.user, ebook=ebook)
+    bookmarks = _peek(iter_rows(
+        Bookmark.objects.filter(user=request.user, ebook=ebook),
+        ['title', 'chapter_title', 'created_at'], order_field='created_at'
+    ))
+    highlights = _peek(iter_rows(
+        Highlight.objects.filter(user=request.user, ebook=ebook),
+        ['color', 'text', 'chapter_title'], order_field='created_at'
+    ))
+    notes = _peek(iter_rows(
+        ReadingNote.objects.filter(user=request.user, ebook=ebook),
+        ['note_text', 'chapter_title', 'created_at'], order_field='-created_at'
+    ))
     
-    html_content = f"""
+    html_head = f"""
     <!DOCTYPE html>
     <html lang="pt-BR">
     <head>
@@ -173,41 +191,44 @@ def export_annotations_html(request, book_id):
         </p>
     """
     
-    if bookmarks:
-        html_content += "<h2>📑 Marcadores</h2>"
-        for bm in bookmarks:
-            html_content += f"""
+    def content():
+        yield html_head
+        
+        if bookmarks:
+            yield "<h2>📑 Marcadores</h2>"
+            for title, chapter_title, created_at in bookmarks:
+                yield f"""
             <div class="bookmark">
-                <strong>{bm.title or bm.chapter_title or 'Marcador'}</strong>
-                <span class="date">({bm.created_at.strftime('%d/%m/%Y')})</span>
+                <strong>{title or chapter_title or 'Marcador'}</strong>
+                <span class="date">({created_at.strftime('%d/%m/%Y')})</span>
             </div>
             """
-    
-    if highlights:
-        html_content += "<h2>✨ Destaques</h2>"
-        for hl in highlights:
-            html_content += f"""
-            <div class="highlight {hl.color}">
-                <blockquote>"{hl.text}"</blockquote>
-                {"<p class='chapter'>Capítulo: " + hl.chapter_title + "</p>" if hl.chapter_title else ""}
+        
+        if highlights:
+            yield "<h2>✨ Destaques</h2>"
+            for color, text, chapter_title in highlights:
+                yield f"""
+            <div class="highlight {color}">
+                <blockquote>"{text}"</blockquote>
+                {"<p class='chapter'>Capítulo: " + chapter_title + "</p>" if chapter_title else ""}
             </div>
             """
-    
-    if notes:
-        html_content += "<h2>📝 Notas</h2>"
-        for note in notes:
-            html_content += f"""
+        
+        if notes:
+            yield "<h2>📝 Notas</h2>"
+            for note_text, chapter_title, created_at in notes:
+                yield f"""
             <div class="note">
-                <p>{note.note_text}</p>
-                {"<p class='chapter'>Capítulo: " + note.chapter_title + "</p>" if note.chapter_title else ""}
-                <span class="date">{note.created_at.strftime('%d/%m/%Y')}</span>
+                <p>{note_text}</p>
+                {"<p class='chapter'>Capítulo: " + chapter_title + "</p>" if chapter_title else ""}
+                <span class="date">{created_at.strftime('%d/%m/%Y')}</span>
             </div>
             """
-    
-    if not bookmarks and not highlights and not notes:
-        html_content += "<p>Nenhuma anotação encontrada para este livro.</p>"
-    
-    html_content += """
+        
+        if not bookmarks and not highlights and not notes:
+            yield "<p>Nenhuma anotação encontrada para este livro.</p>"
+        
+        yield """
         <div class="footer">
             <p>📺 Exportado via <strong>RetroReader</strong> - CGBookStore</p>
         </div>
@@ -215,85 +236,116 @@ def export_annotations_html(request, book_id):
     </html>
     """
     
-    response = HttpResponse(html_content, content_type='text/html; charset=utf-8')
     filename = f"anotacoes_{ebook.title[:30].replace(' ', '_')}.html"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return streaming_attachment(content(), filename, 'text/html; charset=utf-8')
 
 
 @login_required
 def export_all_annotations(request):
     """Exporta todas as anotações do usuário em formato TXT."""
-    bookmarks = Bookmark.objects.filter(user=request.user).select_related('ebook')
-    highlights = Highlight.objects.filter(user=request.user).select_related('ebook')
-    notes = ReadingNote.objects.filter(user=request.user).select_related('ebook')
-    
-    lines = []
-    lines.append("=" * 60)
-    lines.append("TODAS AS MINHAS ANOTAÇÕES - RetroReader")
-    lines.append(f"Usuário: {request.user.username}")
-    lines.append(f"Exportado em: {timezone.now().strftime('%d/%m/%Y %H:%M')}")
-    lines.append("=" * 60)
-    lines.append("")
+    # Cada tipo é lido em streaming, ordenado por livro; as três sequências
+    # são percorridas juntas para montar a seção de cada livro.
+    streams = {
+        'bookmarks': iter_rows(
+            Bookmark.objects.filter(user=request.user),
+            ['ebook_id', 'ebook__title', 'ebook__author', 'title', 'chapter_title'],
+            order_field='ebook_id'
+        ),
+        'highlights': iter_rows(
+            Highlight.objects.filter(user=request.user),
+            ['ebook_id', 'ebook__title', 'ebook__author', 'text'],
+            order_field='ebook_id'
+        ),
+        'notes': iter_rows(
+            ReadingNote.objects.filter(user=request.user),
+            ['ebook_id', 'ebook__title', 'ebook__author', 'note_text'],
+            order_field='ebook_id'
+        ),
+    }
     
-    # Agrupar por livro
-    books_data = {}
-    
-    for bm in bookmarks:
-        book_key = bm.ebook.title
-        if book_key not in books_data:
-            books_data[book_key] = {'bookmarks': [], 'highlights': [], 'notes': [], 'author': bm.ebook.author}
-        books_data[book_key]['bookmarks'].append(bm)
-    
-    for hl in highlights:
-        book_key = hl.ebook.title
-        if book_key not in books_data:
-            books_data[book_key] = {'bookmarks': [], 'highlights': [], 'notes': [], 'author': hl.ebook.author}
-        books_data[book_key]['highlights'].append(hl)
-    
-    for note in notes:
-        book_key = note.ebook.title
-        if book_key not in books_data:
-            books_data[book_key] = {'bookmarks': [], 'highlights': [], 'notes': [], 'author': note.ebook.author}
-        books_data[book_key]['notes'].append(note)
-    
-    for title, data in books_data.items():
-        lines.append("")
-        lines.append("=" * 60)
-        lines.append(f"📖 {title}")
-        lines.append(f"   Autor: {data['author']}")
-        lines.append("=" * 60)
+    def lines():
+        yield "=" * 60
+        yield "TODAS AS MINHAS ANOTAÇÕES - RetroReader"
+        yield f"Usuário: {request.user.username}"
+        yield f"Exportado em: {timezone.now().strftime('%d/%m/%Y %H:%M')}"
+        yield "=" * 60
+        yield ""
         
-        if data['bookmarks']:
-            lines.append("")
-            lines.append("📑 Marcadores:")
-            for bm in data['bookmarks']:
-                lines.append(f"  • {bm.title or bm.chapter_title or 'Sem título'}")
+        has_books = False
+        for data in _group_by_book(streams):
+            has_books = True
+            yield ""
+            yield "=" * 60
+            yield f"📖 {data['title']}"
+            yield f"   Autor: {data['author']}"
+            yield "=" * 60
+            
+            if data['bookmarks']:
+                yield ""
+                yield "📑 Marcadores:"
+                for row in data['bookmarks']:
+                    yield f"  • {row[3] or row[4] or 'Sem título'}"
+            
+            if data['highlights']:
+                yield ""
+                yield "✨ Destaques:"
+                for row in data['highlights']:
+                    text = row[3]
+                    yield f'  "{text[:100]}{"..." if len(text) > 100 else ""}"'
+            
+            if data['notes']:
+                yield ""
+                yield "📝 Notas:"
+                for row in data['notes']:
+                    note_text = row[3]
+                    yield f"  • {note_text[:100]}{'...' if len(note_text) > 100 else ''}"
         
-        if data['highlights']:
-            lines.append("")
-            lines.append("✨ Destaques:")
-            for hl in data['highlights']:
-                lines.append(f'  "{hl.text[:100]}{"..." if len(hl.text) > 100 else ""}"')
+        if not has_books:
+            yield "Você ainda não tem anotações."
         
-        if data['notes']:
-            lines.append("")
-            lines.append("📝 Notas:")
-            for note in data['notes']:
-                lines.append(f"  • {note.note_text[:100]}{'...' if len(note.note_text) > 100 else ''}")
-    
-    if not books_data:
-        lines.append("Você ainda não tem anotações.")
+        yield ""
+        yield "=" * 60
+        yield "Exportado via RetroReader - CGBookStore"
+        yield "=" * 60
     
-    lines.append("")
-    lines.append("=" * 60)
-    lines.append("Exportado via RetroReader - CGBookStore")
-    lines.append("=" * 60)
-    
-    content = "\n".join(lines)
-    
-    response = HttpResponse(content, content_type='text/plain; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="minhas_anotacoes_retroreader.txt"'
+    return streaming_attachment(
+        _joined(lines()), 'minhas_anotacoes_retroreader.txt', 'text/plain; charset=utf-8'
+    )
+
+
+def _peek(rows):
+    """Lê a primeira linha do iterador: retorna None se vazio, senão um iterador completo."""
+    try:
+        first = next(rows)
+    except StopIteration:
+        return None
+    return itertools.chain([first], rows)
+
+
+def _joined(lines):
+    """Equivalente em streaming a "\\n".join(lines)."""
+    first = True
+    for line in lines:
+        yield line if first else f"\n{line}"
+        first = False
+
+
+def _group_by_book(streams):
+    """
+    Percorre em conjunto sequências ordenadas por ebook_id (primeira coluna),
+    produzindo um dict por livro com as linhas de cada tipo.
+    """
+    groups = {kind: itertools.groupby(rows, key=itemgetter(0)) for kind, rows in streams.items()}
+    heads = {kind: next(group, None) for kind, group in groups.items()}
     
-    return response
+    while any(heads.values()):
+        book_id = min(head[0] for head in heads.values() if head)
+        data = {'title': '', 'author': ''}
+        for kind, head in heads.items():
+            if head and head[0] == book_id:
+                data[kind] = list(head[1])
+                data['title'], data['author'] = data[kind][0][1], data[kind][0][2]
+                heads[kind] = next(groups[kind], None)
+            else:
+                data[kind] = []
+        yield data
@@ -5,7 +5,7 @@ from django.shortcuts import redirect
 from django.urls import path, reverse
 from django.http import HttpResponse
 import json
-from .models import Subscription, Product, Order, OrderItem, TransactionLog, Campaign, CampaignGrant
+from .models import Subscription, Product, Order, OrderItem, TransactionLog, Campaign, CampaignGrant, EmailOutbox
 from .services import CampaignService
 
 @admin.register(Subscription)
@@ -82,7 +82,7 @@ class CampaignAdmin(admin.ModelAdmin):
     list_filter = ['status', 'target_type', 'duration_days', 'start_date', 'auto_grant', 'execution_count']
     search_fields = ['name', 'description']
     readonly_fields = ['total_granted', 'total_eligible', 'created_at', 'updated_at', 'created_by',
-                       'execution_count', 'last_execution_date']
+                       'execution_count', 'last_execution_date', 'execution_progress_display']
     inlines = [CampaignGrantInline]
 
     fieldsets = (
@@ -100,7 +100,7 @@ class CampaignAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Controle de Execuções', {
-            'fields': ('execution_count', 'last_execution_date'),
+            'fields': ('execution_count', 'last_execution_date', 'execution_progress_display'),
             'classes': ('collapse',)
         }),
         ('Auditoria', {
@@ -111,6 +111,7 @@ class CampaignAdmin(admin.ModelAdmin):
 
     actions = [
         'execute_campaign',
+        'execute_campaign_background',
         'preview_eligible_users',
         'activate_campaigns',
         'pause_campaigns',
@@ -239,6 +240,53 @@ class CampaignAdmin(admin.ModelAdmin):
             )
     execute_campaign.short_description = "Executar campanhas selecionadas"
 
+    def execute_campaign_background(self, request, queryset):
+        """Action para executar campanhas em lotes via Celery (retoma execuções interrompidas)"""
+        started = []
+        errors = []
+
+        for campaign in queryset:
+            if not campaign.is_active_now():
+                errors.append(f"{campaign.name}: Campanha não está ativa no período")
+                continue
+
+            try:
+                progress = CampaignService.resume_campaign_execution(campaign)
+                if progress is None:
+                    progress = CampaignService.start_campaign_execution(campaign)
+                started.append(f"{campaign.name} ({progress['eligible']} elegíveis)")
+            except Exception as e:
+                errors.append(f"{campaign.name}: {str(e)}")
+
+        if started:
+            self.message_user(
+                request,
+                f"Execução em segundo plano iniciada: {', '.join(started)}",
+                messages.SUCCESS
+            )
+        if errors:
+            self.message_user(
+                request,
+                f"Erros: {'; '.join(errors)}",
+                messages.WARNING
+            )
+    execute_campaign_background.short_description = "Executar em segundo plano (lotes via Celery)"
+
+    def execution_progress_display(self, obj):
+        progress = CampaignService.get_execution_progress(obj.pk) if obj.pk else None
+        if not progress:
+            return '-'
+        status_labels = {'running': 'Em andamento', 'completed': 'Concluída', 'failed': 'Falhou'}
+        text = (
+            f"{status_labels.get(progress['status'], progress['status'])}: "
+            f"{progress['processed']}/{progress['eligible']} processados, "
+            f"{progress['granted']} concedidos em {progress['chunks']} lote(s)"
+        )
+        if progress.get('error'):
+            text += f" — {progress['error']}"
+        return text
+    execution_progress_display.short_description = 'Progresso da Última Execução'
+
     def preview_eligible_users(self, request, queryset):
         """Action para pré-visualizar usuários elegíveis"""
         if queryset.count() > 1:
@@ -351,3 +399,31 @@ class CampaignGrantAdmin(admin.ModelAdmin):
             messages.SUCCESS
         )
     revoke_grants.short_description = "Revogar concessões selecionadas"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'email_type', 'subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'email_type', 'created_at']
+    search_fields = ['to_email', 'subject', 'dedupe_key']
+    readonly_fields = [
+        'email_type', 'dedupe_key', 'user', 'to_email', 'subject', 'text_body', 'html_body',
+        'attempts', 'last_error', 'claim_token', 'claimed_at', 'created_at', 'sent_at'
+    ]
+    date_hierarchy = 'created_at'
+
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        """Volta as mensagens selecionadas para a fila e dispara o envio"""
+        from .bulk_email import dispatch_outbox
+
+        # Mensagens em envio por outra execução ficam com a reserva dela
+        requeued = queryset.exclude(status__in=['sent', 'sending']).update(status='pending', attempts=0, last_error='')
+        result = dispatch_outbox()
+        self.message_user(
+            request,
+            f"{requeued} mensagem(ns) reenfileirada(s). Enviadas: {result['sent']}, falhas: {result['failed']}",
+            messages.SUCCESS if not result['failed'] else messages.WARNING
+        )
+    retry_emails.short_description = "Reenviar mensagens selecionadas"
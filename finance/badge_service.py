@@ -140,6 +140,46 @@ def grant_premium_badge(user):
     return _grant_badge(user, PREMIUM_BADGE_CONFIG)
 
 
+def grant_premium_badge_bulk(user_ids):
+    """
+    Concede o badge 'Membro Premium' a vários usuários de uma vez (campanhas).
+
+    Usa bulk_create para os badges e para as notificações de conquista,
+    ignorando quem já possui o badge.
+
+    Returns:
+        int: Quantidade de badges concedidos
+    """
+    from accounts.models import SystemNotification, UserBadge
+
+    badge = _ensure_badge_exists(PREMIUM_BADGE_CONFIG)
+    owners = set(
+        UserBadge.objects.filter(badge=badge, user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    new_owner_ids = [uid for uid in user_ids if uid not in owners]
+    if not new_owner_ids:
+        return 0
+
+    UserBadge.objects.bulk_create(
+        [UserBadge(user_id=uid, badge=badge) for uid in new_owner_ids],
+        ignore_conflicts=True
+    )
+    message = f"{badge.get_rarity_emoji()} Você ganhou o badge: {badge.name}!"
+    SystemNotification.objects.bulk_create([
+        SystemNotification(
+            user_id=uid,
+            notification_type='badge_earned',
+            message=message,
+            priority=2,
+            is_read=False
+        )
+        for uid in new_owner_ids
+    ])
+
+    logger.info(f"Badge '{badge.name}' concedido a {len(new_owner_ids)} usuário(s) em lote")
+    return len(new_owner_ids)
+
+
 def grant_debate_badge(user):
     """
     Concede o badge 'Voz do Debate' ao usuário na primeira participação em debate.
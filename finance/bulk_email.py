@@ -0,0 +1,233 @@
+"""
+Envio de E-mails em Lote
+CGBookStore v3
+
+Pipeline usado pelas tasks de retenção Premium:
+1. render_once(): renderiza os templates uma única vez por tipo de e-mail,
+   com marcadores no lugar dos campos de cada usuário;
+2. queue_emails(): personaliza as mensagens e grava tudo na caixa de saída
+   (EmailOutbox) com bulk_create;
+3. dispatch_outbox(): reserva as pendentes com um UPDATE condicional (status
+   'sending' + claim_token da execução) e envia só as que reservou, em lotes.
+   Execuções sobrepostas nunca enviam a mesma mensagem. Cada lote usa uma
+   única conexão do backend (sessão SMTP ou cliente HTTP do Brevo/SendGrid)
+   e no máximo CONCURRENCY lotes rodam em paralelo. O resultado por mensagem
+   é gravado com poucos UPDATEs; falhas ficam para a próxima execução.
+   Reservas de uma execução que morreu no meio expiram após
+   CLAIM_TIMEOUT_SECONDS.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+
+def get_email_outbox_settings():
+    """Retorna as configurações da caixa de saída com valores padrão seguros."""
+    defaults = {
+        'BATCH_SIZE': 50,
+        'CONCURRENCY': 4,
+        'MAX_ATTEMPTS': 5,
+        'MAX_PER_RUN': 2000,
+        'CLAIM_TIMEOUT_SECONDS': 30 * 60,
+    }
+    return {**defaults, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+class PreparedEmail:
+    """
+    Templates de um tipo de e-mail já renderizados, com marcadores para os
+    campos que variam por destinatário.
+    """
+
+    def __init__(self, subject, text_body, html_body, fields):
+        self.subject = subject
+        self.text_body = text_body
+        self.html_body = html_body
+        self.fields = fields
+
+    def personalize(self, values):
+        """Retorna (text_body, html_body) com os valores do destinatário."""
+        text_body, html_body = self.text_body, self.html_body
+        for name in self.fields:
+            # Mesmo escape que o autoescape do template aplicaria à variável
+            value = escape(values.get(name, ''))
+            marker = _marker(name)
+            text_body = text_body.replace(marker, value)
+            html_body = html_body.replace(marker, value)
+        return text_body, html_body
+
+
+def _marker(name):
+    return f'[[cgb:{name}]]'
+
+
+def render_once(template_base, subject, context, fields):
+    """
+    Renderiza `<template_base>.txt` e `.html` uma vez, com marcadores no lugar
+    de `fields`. Os campos marcados só podem ser usados como variáveis simples
+    no template (sem filtros ou condições).
+    """
+    render_context = {**context, **{name: _marker(name) for name in fields}}
+    return PreparedEmail(
+        subject=subject,
+        text_body=render_to_string(f'{template_base}.txt', render_context),
+        html_body=render_to_string(f'{template_base}.html', render_context),
+        fields=fields,
+    )
+
+
+def queue_emails(email_type, prepared, recipients):
+    """
+    Grava na caixa de saída uma mensagem por destinatário.
+
+    Args:
+        email_type: Identificador do tipo (ex.: 'premium_expiring')
+        prepared: PreparedEmail retornado por render_once()
+        recipients: Iterável de dicts com dedupe_key, user_id, to_email e values
+
+    Returns:
+        int: Quantidade de destinatários processados (já enfileirados são ignorados)
+    """
+    from .models import EmailOutbox
+
+    messages = []
+    for recipient in recipients:
+        text_body, html_body = prepared.personalize(recipient['values'])
+        messages.append(EmailOutbox(
+            email_type=email_type,
+            dedupe_key=recipient['dedupe_key'],
+            user_id=recipient.get('user_id'),
+            to_email=recipient['to_email'],
+            subject=prepared.subject,
+            text_body=text_body,
+            html_body=html_body,
+        ))
+
+    EmailOutbox.objects.bulk_create(messages, batch_size=500, ignore_conflicts=True)
+    return len(messages)
+
+
+def dispatch_outbox(email_type=None):
+    """
+    Envia as mensagens pendentes (ou que falharam e ainda têm tentativas).
+
+    Returns:
+        dict com sent e failed
+    """
+    from .models import EmailOutbox
+
+    cfg = get_email_outbox_settings()
+    rows = _claim_messages(cfg, email_type)
+    if not rows:
+        return {'sent': 0, 'failed': 0}
+
+    batch_size = cfg['BATCH_SIZE']
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    sent_ids = []
+    failures = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=max(1, min(cfg['CONCURRENCY'], len(batches)))) as pool:
+        for batch_sent, batch_failed in pool.map(_send_batch, batches):
+            sent_ids.extend(batch_sent)
+            for message_id, error in batch_failed:
+                failures[error].append(message_id)
+
+    # Resultado gravado em lote: um UPDATE para os enviados e um por tipo de erro
+    now = timezone.now()
+    claimed = EmailOutbox.objects.filter(claim_token=rows[0]['claim_token'])
+    claimed.filter(id__in=sent_ids).update(
+        status='sent', sent_at=now, attempts=F('attempts') + 1, last_error=''
+    )
+    failed_count = 0
+    for error, ids in failures.items():
+        failed_count += len(ids)
+        claimed.filter(id__in=ids).update(
+            status='failed', attempts=F('attempts') + 1, last_error=error[:1000]
+        )
+
+    logger.info(f"📬 Caixa de saída: {len(sent_ids)} enviados, {failed_count} falharam")
+    return {'sent': len(sent_ids), 'failed': failed_count}
+
+
+def _claim_messages(cfg, email_type=None):
+    """
+    Reserva até MAX_PER_RUN mensagens para esta execução e retorna as linhas
+    reservadas.
+
+    O UPDATE repete a condição de elegibilidade no WHERE: se outra execução
+    reservou a mesma mensagem entre a consulta e o UPDATE, ela fica de fora.
+    Apenas as linhas com o claim_token desta execução são enviadas.
+    """
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=cfg['CLAIM_TIMEOUT_SECONDS'])
+    claimable = EmailOutbox.objects.filter(
+        Q(status__in=['pending', 'failed']) | Q(status='sending', claimed_at__lt=stale_before),
+        attempts__lt=cfg['MAX_ATTEMPTS'],
+    )
+    if email_type:
+        claimable = claimable.filter(email_type=email_type)
+
+    candidate_ids = list(claimable.order_by('id').values_list('id', flat=True)[:cfg['MAX_PER_RUN']])
+    if not candidate_ids:
+        return []
+
+    token = uuid.uuid4().hex
+    claimable.filter(id__in=candidate_ids).update(status='sending', claim_token=token, claimed_at=now)
+    return list(
+        EmailOutbox.objects.filter(claim_token=token, status='sending')
+        .order_by('id')
+        .values('id', 'claim_token', 'to_email', 'subject', 'text_body', 'html_body')
+    )
+
+
+def _send_batch(rows):
+    """Envia um lote por uma única conexão do backend. Roda em thread do pool."""
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Erro ao abrir conexão de e-mail: {e}")
+        return sent, [(row['id'], str(e)) for row in rows]
+
+    try:
+        for row in rows:
+            msg = EmailMultiAlternatives(
+                subject=row['subject'],
+                body=row['text_body'],
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[row['to_email']],
+                connection=connection,
+            )
+            msg.encoding = 'utf-8'
+            if row['html_body']:
+                msg.attach_alternative(row['html_body'], "text/html")
+            try:
+                if connection.send_messages([msg]):
+                    sent.append(row['id'])
+                else:
+                    failed.append((row['id'], 'Backend não confirmou o envio'))
+            except Exception as e:
+                logger.warning(f"Erro ao enviar e-mail para {row['to_email']}: {e}")
+                failed.append((row['id'], str(e)))
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    return sent, failed
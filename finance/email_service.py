@@ -6,6 +6,7 @@ Responsável por enviar e-mails relacionados a assinaturas Premium:
 - Boas-vindas ao Premium
 - Confirmação de pagamento
 - Lembrete de expiração
+- Lembretes e win-back em lote (via caixa de saída, ver bulk_email.py)
 """
 
 import logging
@@ -124,13 +125,7 @@ class PremiumEmailService:
             bool: True se enviado com sucesso, False caso contrário
         """
         try:
-            # Determinar urgência e subject (sem emojis para evitar problemas de encoding)
-            if days_left <= 1:
-                subject = '[CGBookStore] Seu Premium expira amanha - Renove agora'
-            elif days_left <= 3:
-                subject = f'[CGBookStore] Seu Premium expira em {days_left} dias'
-            else:
-                subject = f'[CGBookStore] Lembrete: Seu Premium expira em {days_left} dias'
+            subject = PremiumEmailService._expiring_subject(days_left)
             
             # Garantir nome do usuário sem problemas de encoding
             username = user.get_full_name() or user.username
@@ -169,6 +164,137 @@ class PremiumEmailService:
             logger.error(f"Erro ao enviar lembrete Premium para {user.email}: {e}")
             return False
     
+    @staticmethod
+    def _expiring_subject(days_left):
+        """Determina urgência e subject (sem emojis para evitar problemas de encoding)"""
+        if days_left <= 1:
+            return '[CGBookStore] Seu Premium expira amanha - Renove agora'
+        elif days_left <= 3:
+            return f'[CGBookStore] Seu Premium expira em {days_left} dias'
+        return f'[CGBookStore] Lembrete: Seu Premium expira em {days_left} dias'
+
+    @staticmethod
+    def queue_expiring_reminders(subscriptions, days_left, reference_date):
+        """
+        Enfileira na caixa de saída os lembretes de expiração de um grupo.
+
+        Os templates são renderizados uma única vez para o grupo; apenas nome
+        e data de expiração variam por destinatário.
+
+        Args:
+            subscriptions: Iterável de Subscription (com user carregado)
+            days_left: Dias restantes (int), igual para todo o grupo
+            reference_date: Data da execução (compõe a chave de deduplicação)
+
+        Returns:
+            int: Quantidade de mensagens enfileiradas
+        """
+        from finance.bulk_email import queue_emails, render_once
+
+        prepared = render_once(
+            'emails/premium_expiring',
+            subject=PremiumEmailService._expiring_subject(days_left),
+            context={
+                'days_left': days_left,
+                'site_url': settings.SITE_URL,
+                'current_year': timezone.now().year,
+                'price': '9,90',  # Valor do plano
+            },
+            fields=['username', 'expires_at'],
+        )
+        return queue_emails('premium_expiring', prepared, (
+            {
+                'dedupe_key': f'premium_expiring:{days_left}:{sub.id}:{reference_date.isoformat()}',
+                'user_id': sub.user_id,
+                'to_email': sub.user.email,
+                'values': {
+                    'username': sub.user.get_full_name() or sub.user.username,
+                    'expires_at': sub.expiration_date.strftime('%d/%m/%Y às %H:%M'),
+                },
+            }
+            for sub in subscriptions if sub.user.email
+        ))
+
+    @staticmethod
+    def queue_campaign_welcome_emails(campaign, users, expires_at, badge_context=None):
+        """
+        Enfileira na caixa de saída os e-mails de boas-vindas de um lote de
+        concessões de campanha.
+
+        A caixa de saída não tem anexos: o badge vai pela URL pública em vez
+        da imagem embutida via CID de send_welcome_email.
+
+        Args:
+            campaign: Instância do modelo Campaign (compõe a chave de deduplicação)
+            users: Iterável de User
+            expires_at: Data de expiração do Premium concedido
+            badge_context: Dict com dados do badge Premium (opcional)
+
+        Returns:
+            int: Quantidade de mensagens enfileiradas
+        """
+        from finance.bulk_email import queue_emails, render_once
+
+        if not badge_context:
+            from finance.badge_service import get_premium_badge_context
+            badge_context = get_premium_badge_context()
+
+        prepared = render_once(
+            'emails/premium_welcome',
+            subject='[CGBookStore] 🎉 Bem-vindo ao Premium!',
+            context={
+                'price': '0,00 (Campanha)',
+                'expires_at': expires_at.strftime('%d/%m/%Y'),
+                'site_url': settings.SITE_URL,
+                'current_year': timezone.now().year,
+                'is_free_campaign': True,
+                **badge_context,
+                'badge_image_src': badge_context.get('badge_image_url', ''),
+            },
+            fields=['username'],
+        )
+        return queue_emails('premium_welcome', prepared, (
+            {
+                'dedupe_key': f'premium_welcome:campaign:{campaign.pk}:{user.id}:{expires_at.date().isoformat()}',
+                'user_id': user.id,
+                'to_email': user.email,
+                'values': {'username': user.get_full_name() or user.username},
+            }
+            for user in users if user.email
+        ))
+
+    @staticmethod
+    def queue_winback_emails(subscriptions, reference_date):
+        """
+        Enfileira na caixa de saída os e-mails de win-back de um grupo.
+
+        Returns:
+            int: Quantidade de mensagens enfileiradas
+        """
+        from finance.bulk_email import queue_emails, render_once
+
+        prepared = render_once(
+            'emails/premium_expired',
+            subject='[CGBookStore] 💔 Sentimos sua falta... Volte a ser Premium!',
+            context={
+                'site_url': settings.SITE_URL,
+                'current_year': timezone.now().year,
+            },
+            fields=['username', 'expired_at'],
+        )
+        return queue_emails('premium_expired', prepared, (
+            {
+                'dedupe_key': f'premium_expired:{sub.id}:{reference_date.isoformat()}',
+                'user_id': sub.user_id,
+                'to_email': sub.user.email,
+                'values': {
+                    'username': sub.user.get_full_name() or sub.user.username,
+                    'expired_at': sub.expiration_date.strftime('%d/%m/%Y'),
+                },
+            }
+            for sub in subscriptions if sub.user.email
+        ))
+
     @staticmethod
     def send_payment_confirmation(user, payment_id, amount, payment_method='pix'):
         """
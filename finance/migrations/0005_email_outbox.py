@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_campaign_send_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_type', models.CharField(db_index=True, max_length=50, verbose_name='Tipo de E-mail')),
+                ('dedupe_key', models.CharField(help_text='Evita enfileirar o mesmo e-mail duas vezes (ex.: reexecução da task diária)', max_length=200, unique=True, verbose_name='Chave de Deduplicação')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('subject', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('text_body', models.TextField(verbose_name='Corpo (texto)')),
+                ('html_body', models.TextField(blank=True, verbose_name='Corpo (HTML)')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviado'), ('failed', 'Falhou')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox_emails', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'E-mail na Caixa de Saída',
+                'verbose_name_plural': 'Caixa de Saída de E-mails',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'attempts'], name='idx_outbox_status_attempts')],
+            },
+        ),
+    ]
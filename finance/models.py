@@ -547,3 +547,74 @@ class CampaignGrant(models.Model):
         # Atualiza a assinatura para cancelada
         if self.subscription:
             self.subscription.cancel()
+
+
+class EmailOutbox(models.Model):
+    """
+    Caixa de saída de e-mails transacionais enviados em lote
+
+    Cada mensagem é gravada já renderizada antes do envio. O despachante
+    reserva as mensagens (status 'sending' + claim_token) antes de enviá-las,
+    marca o resultado por mensagem, e falhas ficam pendentes para nova
+    tentativa até MAX_ATTEMPTS.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falhou'),
+    ]
+
+    email_type = models.CharField(
+        max_length=50,
+        db_index=True,
+        verbose_name='Tipo de E-mail'
+    )
+    dedupe_key = models.CharField(
+        max_length=200,
+        unique=True,
+        verbose_name='Chave de Deduplicação',
+        help_text='Evita enfileirar o mesmo e-mail duas vezes (ex.: reexecução da task diária)'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_emails',
+        verbose_name='Usuário'
+    )
+    to_email = models.EmailField(verbose_name='Destinatário')
+    subject = models.CharField(max_length=255, verbose_name='Assunto')
+    text_body = models.TextField(verbose_name='Corpo (texto)')
+    html_body = models.TextField(blank=True, verbose_name='Corpo (HTML)')
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Status'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Tentativas')
+    last_error = models.TextField(blank=True, verbose_name='Último Erro')
+    claim_token = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Reserva',
+        help_text='Execução do despachante que reservou a mensagem para envio'
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='Reservado em')
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Enviado em')
+
+    class Meta:
+        verbose_name = 'E-mail na Caixa de Saída'
+        verbose_name_plural = 'Caixa de Saída de E-mails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'attempts'], name='idx_outbox_status_attempts'),
+        ]
+
+    def __str__(self):
+        return f"{self.email_type} → {self.to_email} ({self.get_status_display()})"
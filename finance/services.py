@@ -1,7 +1,9 @@
 import mercadopago
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
 from django.utils import timezone
 from decimal import Decimal
 from datetime import timedelta
@@ -165,15 +167,31 @@ class CampaignService:
         Returns:
             QuerySet de User
         """
+        users, limit = CampaignService._eligible_users_query(campaign)
+
+        # Limite de quantidade (aplicar DEPOIS do distinct)
+        if limit:
+            users = users[:limit]
+
+        return users
+
+    @staticmethod
+    def _eligible_users_query(campaign):
+        """
+        Monta o QuerySet (sem slice) de elegíveis e o limite por execução.
+
+        Returns:
+            tuple (QuerySet de User, limite ou None)
+        """
         criteria = campaign.criteria
         target_type = campaign.target_type
         users = User.objects.all()
+        limit = None
 
-        # Exclui usuários que já receberam desta campanha
-        already_granted_ids = CampaignGrant.objects.filter(
-            campaign=campaign
-        ).values_list('user_id', flat=True)
-        users = users.exclude(id__in=already_granted_ids)
+        # Exclui usuários que já receberam desta campanha (anti-join via NOT EXISTS)
+        users = users.filter(~Exists(
+            CampaignGrant.objects.filter(campaign=campaign, user_id=OuterRef('pk'))
+        ))
 
         if target_type == 'individual':
             # Usuário individual por ID, username ou email
@@ -199,9 +217,6 @@ class CampaignService:
             elif usernames:
                 users = users.filter(username__in=usernames)
 
-            if limit:
-                users = users[:limit]
-
         elif target_type == 'new_users':
             # Novos usuários cadastrados após uma data
             registered_after = criteria.get('registered_after')
@@ -247,16 +262,10 @@ class CampaignService:
                 ).values_list('user_id', flat=True)
                 users = users.filter(id__in=expired_ids)
 
-        # Aplicar distinct() ANTES do slice
-        users = users.distinct()
-
-        # Limite de quantidade (aplicar DEPOIS do distinct)
-        if target_type == 'custom':
             limit = criteria.get('limit')
-            if limit:
-                users = users[:limit]
 
-        return users
+        # Aplicar distinct() ANTES do slice
+        return users.distinct(), limit
 
     @staticmethod
     def grant_premium(user, campaign, reason=''):
@@ -403,26 +412,202 @@ class CampaignService:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
-    def execute_campaign(campaign, preview=False):
+    def grant_premium_bulk(campaign, user_ids, reason=''):
+        """
+        Concede Premium gratuito para um lote de usuários com operações em conjunto
+
+        A capacidade da campanha é reservada dentro de uma transação com a linha
+        da campanha bloqueada (select_for_update): execuções concorrentes nunca
+        ultrapassam max_grants nem concedem duas vezes ao mesmo usuário.
+
+        Args:
+            campaign: Instância do modelo Campaign
+            user_ids: Lista de IDs de usuários
+            reason: Motivo/observação opcional
+
+        Returns:
+            dict com granted_count, granted_user_ids e capacity_reached
+        """
+        from accounts.models import CampaignNotification, UserProfile
+
+        now = timezone.now()
+        expires_at = now + timedelta(days=campaign.duration_days)
+
+        with transaction.atomic():
+            locked = Campaign.objects.select_for_update().get(pk=campaign.pk)
+
+            already_granted = set(
+                CampaignGrant.objects.filter(
+                    campaign=locked, user_id__in=user_ids
+                ).values_list('user_id', flat=True)
+            )
+            pending = [uid for uid in dict.fromkeys(user_ids) if uid not in already_granted]
+
+            # Reserva de capacidade: corta o lote no que ainda cabe na campanha
+            capacity_reached = False
+            if locked.max_grants is not None:
+                remaining = max(0, locked.max_grants - locked.total_granted)
+                capacity_reached = len(pending) >= remaining
+                pending = pending[:remaining]
+
+            if pending:
+                # Assinaturas: reativa as existentes e cria as que faltam
+                subscriptions = Subscription.objects.filter(user_id__in=pending)
+                existing = set(subscriptions.values_list('user_id', flat=True))
+                subscriptions.update(
+                    status='ativa',
+                    start_date=now,
+                    expiration_date=expires_at,
+                    next_billing_date=None,  # Campanhas gratuitas não têm cobrança
+                    updated_at=now,
+                )
+                Subscription.objects.bulk_create([
+                    Subscription(
+                        user_id=uid,
+                        payment_method='pix',  # Método padrão para campanhas
+                        price=Decimal('0.00'),  # Gratuito
+                        status='ativa',
+                        start_date=now,
+                        expiration_date=expires_at,
+                    )
+                    for uid in pending if uid not in existing
+                ])
+                subscription_ids = dict(
+                    Subscription.objects.filter(user_id__in=pending).values_list('user_id', 'id')
+                )
+
+                grants = CampaignGrant.objects.bulk_create([
+                    CampaignGrant(
+                        campaign=locked,
+                        user_id=uid,
+                        subscription_id=subscription_ids[uid],
+                        expires_at=expires_at,
+                        reason=reason,
+                        is_active=True,
+                        was_notified=False
+                    )
+                    for uid in pending
+                ])
+
+                # Perfis: o bulk_create de Subscription não dispara o post_save
+                # que cria o perfil, então os que faltam são criados aqui
+                with_profile = set(
+                    UserProfile.objects.filter(user_id__in=pending).values_list('user_id', flat=True)
+                )
+                UserProfile.objects.bulk_create([
+                    UserProfile(user_id=uid, theme_preference='fantasy', level=1, total_xp=0)
+                    for uid in pending if uid not in with_profile
+                ], ignore_conflicts=True)
+                UserProfile.objects.filter(user_id__in=pending).update(
+                    is_premium=True,
+                    premium_expires_at=expires_at
+                )
+
+                Campaign.objects.filter(pk=locked.pk).update(
+                    total_granted=F('total_granted') + len(pending)
+                )
+
+                if campaign.send_notification:
+                    try:
+                        with transaction.atomic():
+                            CampaignNotification.objects.bulk_create([
+                                CampaignNotification.build_premium_granted_notification(locked, grant)
+                                for grant in grants
+                            ])
+                    except Exception as e:
+                        logger.warning(f"Erro ao criar notificações da campanha {campaign.name}: {str(e)}")
+
+            campaign.total_granted = locked.total_granted + len(pending)
+
+        if pending:
+            CampaignService._after_bulk_grant(campaign, pending, expires_at)
+            logger.info(f"Premium concedido a {len(pending)} usuário(s) via campanha {campaign.name}")
+
+        return {
+            'granted_count': len(pending),
+            'granted_user_ids': pending,
+            'capacity_reached': capacity_reached,
+            'expires_at': expires_at
+        }
+
+    @staticmethod
+    def _after_bulk_grant(campaign, user_ids, expires_at):
+        """Badge Premium e e-mails de boas-vindas, fora da transação do lote"""
+        from .badge_service import grant_premium_badge_bulk, get_premium_badge_context
+        from .bulk_email import dispatch_outbox
+        from .email_service import PremiumEmailService
+
+        badge_context = {}
+        try:
+            grant_premium_badge_bulk(user_ids)
+            badge_context = get_premium_badge_context()
+        except Exception as e:
+            logger.warning(f"Erro ao conceder badge Premium em lote: {str(e)}")
+
+        # E-mails de boas-vindas pela caixa de saída: renderizados uma vez,
+        # gravados em lote e enviados por conexões reaproveitadas
+        try:
+            users = User.objects.filter(id__in=user_ids).only(
+                'id', 'username', 'email', 'first_name', 'last_name'
+            )
+            PremiumEmailService.queue_campaign_welcome_emails(campaign, users, expires_at, badge_context)
+            dispatch_outbox(email_type='premium_welcome')
+        except Exception as e:
+            logger.warning(f"Erro ao enviar e-mails de boas-vindas da campanha {campaign.name}: {str(e)}")
+
+    @staticmethod
+    def iter_eligible_user_id_chunks(campaign, chunk_size=None):
+        """
+        Percorre os IDs elegíveis em ordem crescente, em lotes de chunk_size,
+        sem carregar todos os usuários em memória.
+        """
+        chunk_size = chunk_size or settings.CAMPAIGN_GRANT_CHUNK_SIZE
+        users, limit = CampaignService._eligible_users_query(campaign)
+        user_ids = users.order_by('id').values_list('id', flat=True)
+        if limit:
+            user_ids = user_ids[:limit]
+
+        chunk = []
+        for user_id in user_ids.iterator(chunk_size=chunk_size):
+            chunk.append(user_id)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def count_eligible_users(campaign):
+        """Conta elegíveis respeitando o limite por execução"""
+        users, limit = CampaignService._eligible_users_query(campaign)
+        count = users.count()
+        return min(count, limit) if limit else count
+
+    @staticmethod
+    def execute_campaign(campaign, preview=False, chunk_size=None):
         """
         Executa uma campanha completa, concedendo Premium aos elegíveis
 
+        Os elegíveis são processados em lotes (grant_premium_bulk), com o
+        progresso publicado em cache a cada lote.
+
         Args:
             campaign: Instância do modelo Campaign
             preview: Se True, apenas conta elegíveis sem conceder
+            chunk_size: Tamanho do lote (padrão: settings.CAMPAIGN_GRANT_CHUNK_SIZE)
 
         Returns:
             dict com estatísticas da execução
         """
         try:
-            eligible_users = CampaignService.get_eligible_users(campaign)
-            eligible_count = eligible_users.count()
+            eligible_count = CampaignService.count_eligible_users(campaign)
 
             # Atualiza total de elegíveis
             campaign.total_eligible = eligible_count
-            campaign.save()
+            campaign.save(update_fields=['total_eligible'])
 
             if preview:
+                eligible_users = CampaignService.get_eligible_users(campaign)
                 return {
                     'success': True,
                     'preview': True,
@@ -430,35 +615,36 @@ class CampaignService:
                     'eligible_users': list(eligible_users.values('id', 'username', 'email'))
                 }
 
-            # Executa concessão
-            granted_count = 0
+            # Executa concessão em lotes
+            progress = CampaignService._start_progress(campaign, eligible_count)
             errors = []
 
-            for user in eligible_users:
+            for chunk in CampaignService.iter_eligible_user_id_chunks(campaign, chunk_size):
                 # Verifica se ainda pode conceder
                 if not campaign.can_grant_more():
                     break
 
-                result = CampaignService.grant_premium(user, campaign)
-                if result['success']:
-                    granted_count += 1
-                else:
-                    errors.append(f"{user.username}: {result.get('error')}")
+                try:
+                    result = CampaignService.grant_premium_bulk(campaign, chunk)
+                except Exception as e:
+                    logger.error(f"Erro no lote da campanha {campaign.name}: {str(e)}")
+                    errors.append(f"Lote a partir do usuário {chunk[0]}: {str(e)}")
+                    continue
 
-            # Atualiza controle de execuções
-            from django.db.models import F
-            campaign.last_execution_date = timezone.now()
-            campaign.execution_count = F('execution_count') + 1
-            campaign.save(update_fields=['last_execution_date', 'execution_count'])
+                progress = CampaignService._advance_progress(
+                    campaign, progress, len(chunk), result['granted_count'], chunk[-1]
+                )
+                if result['capacity_reached']:
+                    break
 
-            # Recarrega para obter o valor atualizado do execution_count
-            campaign.refresh_from_db()
+            CampaignService._finish_execution(campaign, progress)
 
             return {
                 'success': True,
                 'preview': False,
                 'eligible_count': eligible_count,
-                'granted_count': granted_count,
+                'granted_count': progress['granted'],
+                'chunks': progress['chunks'],
                 'errors': errors
             }
 
@@ -469,6 +655,163 @@ class CampaignService:
                 'error': str(e)
             }
 
+    # ========== EXECUÇÃO EM SEGUNDO PLANO (CELERY) ==========
+
+    @staticmethod
+    def start_campaign_execution(campaign, chunk_size=None):
+        """
+        Inicia a execução da campanha em tasks Celery encadeadas (um lote por task)
+
+        Returns:
+            dict de progresso inicial
+        """
+        from .tasks import execute_campaign_chunk
+
+        chunk_size = chunk_size or settings.CAMPAIGN_GRANT_CHUNK_SIZE
+        eligible_count = CampaignService.count_eligible_users(campaign)
+        campaign.total_eligible = eligible_count
+        campaign.save(update_fields=['total_eligible'])
+
+        _, limit = CampaignService._eligible_users_query(campaign)
+        progress = CampaignService._start_progress(
+            campaign, eligible_count, chunk_size=chunk_size, budget=limit
+        )
+        execute_campaign_chunk.delay(campaign.id, 0, chunk_size, limit)
+        return progress
+
+    @staticmethod
+    def resume_campaign_execution(campaign):
+        """
+        Retoma uma execução interrompida a partir do último usuário processado
+
+        Returns:
+            dict de progresso, ou None se não houver execução a retomar
+        """
+        from .tasks import execute_campaign_chunk
+
+        progress = CampaignService.get_execution_progress(campaign.id)
+        if not progress or progress['status'] == 'completed':
+            return None
+
+        progress['status'] = 'running'
+        progress['error'] = ''
+        CampaignService._save_progress(campaign.id, progress)
+        execute_campaign_chunk.delay(
+            campaign.id, progress['last_user_id'], progress['chunk_size'], progress['budget']
+        )
+        return progress
+
+    @staticmethod
+    def execute_campaign_chunk(campaign_id, after_id=0, chunk_size=None, budget=None):
+        """
+        Processa um lote de elegíveis com ID maior que after_id (paginação por chave)
+
+        Returns:
+            dict com granted_count, next_after_id (None quando terminou) e budget restante
+        """
+        chunk_size = chunk_size or settings.CAMPAIGN_GRANT_CHUNK_SIZE
+        campaign = Campaign.objects.get(pk=campaign_id)
+        progress = CampaignService.get_execution_progress(campaign_id) or \
+            CampaignService._start_progress(campaign, campaign.total_eligible, chunk_size, budget)
+
+        users, _ = CampaignService._eligible_users_query(campaign)
+        size = chunk_size if budget is None else min(chunk_size, budget)
+        user_ids = list(
+            users.filter(id__gt=after_id).order_by('id').values_list('id', flat=True)[:size]
+        )
+
+        result = {'granted_count': 0, 'capacity_reached': not campaign.can_grant_more()}
+        if user_ids and not result['capacity_reached']:
+            result = CampaignService.grant_premium_bulk(campaign, user_ids)
+            progress = CampaignService._advance_progress(
+                campaign, progress, len(user_ids), result['granted_count'], user_ids[-1]
+            )
+
+        if budget is not None:
+            budget -= len(user_ids)
+            progress['budget'] = budget
+
+        done = (
+            len(user_ids) < chunk_size
+            or result['capacity_reached']
+            or (budget is not None and budget <= 0)
+        )
+        if done:
+            CampaignService._finish_execution(campaign, progress)
+        else:
+            CampaignService._save_progress(campaign_id, progress)
+
+        return {
+            'granted_count': result['granted_count'],
+            'next_after_id': None if done else user_ids[-1],
+            'budget': budget
+        }
+
+    @staticmethod
+    def get_execution_progress(campaign_id):
+        """Retorna o progresso da execução mais recente da campanha (ou None)"""
+        return cache.get(f'finance:campaign_progress:{campaign_id}')
+
+    @staticmethod
+    def mark_execution_failed(campaign_id, error):
+        progress = CampaignService.get_execution_progress(campaign_id)
+        if progress:
+            progress['status'] = 'failed'
+            progress['error'] = str(error)
+            CampaignService._save_progress(campaign_id, progress)
+
+    @staticmethod
+    def _save_progress(campaign_id, progress):
+        progress['updated_at'] = timezone.now().isoformat()
+        cache.set(
+            f'finance:campaign_progress:{campaign_id}',
+            progress,
+            settings.CAMPAIGN_PROGRESS_TTL
+        )
+
+    @staticmethod
+    def _start_progress(campaign, eligible_count, chunk_size=None, budget=None):
+        progress = {
+            'status': 'running',
+            'eligible': eligible_count,
+            'processed': 0,
+            'granted': 0,
+            'chunks': 0,
+            'last_user_id': 0,
+            'chunk_size': chunk_size or settings.CAMPAIGN_GRANT_CHUNK_SIZE,
+            'budget': budget,
+            'error': '',
+            'started_at': timezone.now().isoformat(),
+        }
+        CampaignService._save_progress(campaign.id, progress)
+        return progress
+
+    @staticmethod
+    def _advance_progress(campaign, progress, processed, granted, last_user_id):
+        progress['processed'] += processed
+        progress['granted'] += granted
+        progress['chunks'] += 1
+        progress['last_user_id'] = last_user_id
+        CampaignService._save_progress(campaign.id, progress)
+        logger.info(
+            f"📦 Campanha {campaign.name}: lote {progress['chunks']} "
+            f"({progress['processed']}/{progress['eligible']} processados, {progress['granted']} concedidos)"
+        )
+        return progress
+
+    @staticmethod
+    def _finish_execution(campaign, progress):
+        # Atualiza controle de execuções
+        campaign.last_execution_date = timezone.now()
+        campaign.execution_count = F('execution_count') + 1
+        campaign.save(update_fields=['last_execution_date', 'execution_count'])
+
+        # Recarrega para obter o valor atualizado do execution_count
+        campaign.refresh_from_db()
+
+        progress['status'] = 'completed'
+        CampaignService._save_progress(campaign.id, progress)
+
     @staticmethod
     def check_expired_grants():
         """
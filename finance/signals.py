@@ -74,8 +74,8 @@ def check_new_user_campaigns(sender, instance, created, **kwargs):
         for campaign in campaigns:
             if campaign.can_grant_more():
                 # Verifica se o usuário é elegível
-                eligible_users = CampaignService.get_eligible_users(campaign)
-                if instance in eligible_users:
+                eligible_users, _ = CampaignService._eligible_users_query(campaign)
+                if eligible_users.filter(pk=instance.pk).exists():
                     result = CampaignService.grant_premium(
                         instance,
                         campaign,
@@ -5,6 +5,8 @@ CGBookStore v3
 Responsável por tarefas agendadas relacionadas a assinaturas Premium:
 - Verificar assinaturas expirando (3 dias, 1 dia)
 - Verificar assinaturas expiradas (enviar win-back)
+- Re-tentar e-mails pendentes da caixa de saída
+- Executar campanhas em lotes encadeados (retomáveis)
 """
 
 from celery import shared_task
@@ -24,11 +26,17 @@ def check_expiring_subscriptions():
     - 3 dias antes da expiração
     - 1 dia antes da expiração
     - No dia da expiração (win-back)
+
+    As mensagens são renderizadas uma vez por grupo, gravadas na caixa de
+    saída (EmailOutbox) e enviadas em lote; falhas são re-tentadas por
+    finance.dispatch_email_outbox.
     """
     from finance.models import Subscription
     from finance.email_service import PremiumEmailService
+    from finance.bulk_email import dispatch_outbox
     
     now = timezone.now()
+    today = timezone.localdate()
     results = {
         'expiring_3_days': 0,
         'expiring_1_day': 0,
@@ -38,77 +46,78 @@ def check_expiring_subscriptions():
     
     logger.info("🔍 Iniciando verificação de assinaturas expirando...")
     
-    # Assinaturas que expiram em exatamente 3 dias
-    date_3_days = now.date() + timedelta(days=3)
-    subscriptions_3days = Subscription.objects.filter(
-        status='ativa',
-        expiration_date__date=date_3_days
-    ).select_related('user')
-    
-    for sub in subscriptions_3days:
-        try:
-            PremiumEmailService.send_expiring_reminder(
-                user=sub.user,
-                days_left=3,
-                expires_at=sub.expiration_date
-            )
-            results['expiring_3_days'] += 1
-        except Exception as e:
-            logger.error(f"Erro ao enviar lembrete 3 dias para {sub.user.email}: {e}")
-            results['errors'] += 1
-    
-    # Assinaturas que expiram amanhã (1 dia)
-    date_1_day = now.date() + timedelta(days=1)
-    subscriptions_1day = Subscription.objects.filter(
-        status='ativa',
-        expiration_date__date=date_1_day
-    ).select_related('user')
-    
-    for sub in subscriptions_1day:
-        try:
-            PremiumEmailService.send_expiring_reminder(
-                user=sub.user,
-                days_left=1,
-                expires_at=sub.expiration_date
-            )
-            results['expiring_1_day'] += 1
-        except Exception as e:
-            logger.error(f"Erro ao enviar lembrete 1 dia para {sub.user.email}: {e}")
-            results['errors'] += 1
+    # Assinaturas que expiram em exatamente 3 dias / amanhã (1 dia)
+    for days_left, key in ((3, 'expiring_3_days'), (1, 'expiring_1_day')):
+        subscriptions = Subscription.objects.filter(
+            status='ativa',
+            expiration_date__date=today + timedelta(days=days_left)
+        ).select_related('user')
+        results[key] = PremiumEmailService.queue_expiring_reminders(subscriptions, days_left, today)
     
     # Assinaturas que expiraram hoje (win-back)
-    subscriptions_expired = Subscription.objects.filter(
-        status='ativa',
-        expiration_date__date=now.date()
-    ).select_related('user')
+    expired = list(
+        Subscription.objects.filter(
+            status='ativa',
+            expiration_date__date=today
+        ).select_related('user')
+    )
+    if expired:
+        # Marcar como expiradas em um único UPDATE
+        _expire_subscriptions([sub.id for sub in expired], now)
+        results['expired_today'] = PremiumEmailService.queue_winback_emails(expired, today)
     
-    for sub in subscriptions_expired:
-        try:
-            # Marcar como expirada
-            sub.status = 'expirada'
-            sub.save()
-            
-            # Enviar email de win-back
-            PremiumEmailService.send_winback_email(
-                user=sub.user,
-                expired_at=sub.expiration_date
-            )
-            results['expired_today'] += 1
-        except Exception as e:
-            logger.error(f"Erro ao processar expiração para {sub.user.email}: {e}")
-            results['errors'] += 1
+    dispatch = dispatch_outbox()
+    results['sent'] = dispatch['sent']
+    results['errors'] = dispatch['failed']
     
     logger.info(
         f"✅ Verificação concluída: "
         f"{results['expiring_3_days']} emails (3 dias), "
         f"{results['expiring_1_day']} emails (1 dia), "
         f"{results['expired_today']} win-backs, "
+        f"{results['sent']} enviados, "
         f"{results['errors']} erros"
     )
     
     return results
 
 
+def _expire_subscriptions(subscription_ids, now):
+    """
+    Marca as assinaturas como expiradas e sincroniza os perfis em lote.
+
+    Equivale ao signal subscription_status_changed (que não roda em
+    queryset.update()): o perfil só perde o Premium se não houver concessão
+    de campanha ainda ativa.
+    """
+    from django.db import transaction
+    from django.db.models import Exists, OuterRef
+    from accounts.models import UserProfile
+    from finance.models import CampaignGrant, Subscription
+
+    with transaction.atomic():
+        Subscription.objects.filter(id__in=subscription_ids).update(status='expirada', updated_at=now)
+        UserProfile.objects.filter(
+            user__subscription__id__in=subscription_ids
+        ).exclude(
+            Exists(CampaignGrant.objects.filter(
+                user_id=OuterRef('user_id'),
+                is_active=True,
+                expires_at__gt=now
+            ))
+        ).update(is_premium=False, premium_expires_at=None)
+
+
+@shared_task(name='finance.dispatch_email_outbox', ignore_result=True)
+def dispatch_email_outbox():
+    """
+    Re-tenta o envio das mensagens pendentes/falhas da caixa de saída.
+    """
+    from finance.bulk_email import dispatch_outbox
+
+    return dispatch_outbox()
+
+
 @shared_task(name='finance.send_test_retention_email')
 def send_test_retention_email(user_id, email_type='expiring'):
     """
@@ -140,3 +149,42 @@ def send_test_retention_email(user_id, email_type='expiring'):
         
     except User.DoesNotExist:
         return {'success': False, 'error': 'User not found'}
+
+
+@shared_task(
+    name='finance.execute_campaign_chunk',
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30,
+)
+def execute_campaign_chunk(self, campaign_id, after_id=0, chunk_size=None, budget=None):
+    """
+    Processa um lote de elegíveis da campanha e agenda o próximo.
+
+    Cada task grava o cursor (último ID processado) no progresso em cache;
+    uma execução interrompida pode ser retomada com
+    CampaignService.resume_campaign_execution().
+
+    Args:
+        campaign_id: ID da campanha
+        after_id: Processa apenas usuários com ID maior que este
+        chunk_size: Tamanho do lote
+        budget: Concessões restantes pelo limite da campanha (None = sem limite)
+    """
+    from finance.services import CampaignService
+
+    try:
+        result = CampaignService.execute_campaign_chunk(campaign_id, after_id, chunk_size, budget)
+    except Exception as e:
+        logger.error(f"Erro no lote da campanha {campaign_id} (após usuário {after_id}): {e}")
+        if self.request.retries >= self.max_retries:
+            CampaignService.mark_execution_failed(campaign_id, e)
+            raise
+        raise self.retry(exc=e)
+
+    if result['next_after_id'] is not None:
+        execute_campaign_chunk.delay(campaign_id, result['next_after_id'], chunk_size, result['budget'])
+    else:
+        logger.info(f"✅ Execução da campanha {campaign_id} concluída")
+
+    return result
@@ -0,0 +1,226 @@
+"""
+Testes automatizados para o envio de e-mails em lote.
+Cobertura: caixa de saída (EmailOutbox) e check_expiring_subscriptions contra
+um servidor SMTP local.
+"""
+import socketserver
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from finance.bulk_email import dispatch_outbox
+from finance.models import EmailOutbox, Subscription
+from finance.tasks import check_expiring_subscriptions
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo em memória, usado no lugar do provedor real."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode(errors='replace').strip()
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip().strip('<>')
+                if address in server.rejected:
+                    self.reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b''):
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append((recipients, b''.join(data).decode(errors='replace')))
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class BulkEmailTest(TestCase):
+    """Testes para a caixa de saída e a task diária de retenção."""
+
+    def setUp(self):
+        now = timezone.now()
+        self.expiring = []
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f'leitor{i}', email=f'leitor{i}@example.com', password='x', first_name=f'Leitor{i}'
+            )
+            self.expiring.append(Subscription.objects.create(
+                user=user, status='ativa', payment_method='pix', expiration_date=now + timedelta(days=3)
+            ))
+        tomorrow_user = User.objects.create_user(username='amanha', email='amanha@example.com', password='x')
+        Subscription.objects.create(
+            user=tomorrow_user, status='ativa', payment_method='pix', expiration_date=now + timedelta(days=1)
+        )
+        self.expired_user = User.objects.create_user(username='hoje', email='hoje@example.com', password='x')
+        self.expired = Subscription.objects.create(
+            user=self.expired_user, status='ativa', payment_method='pix', expiration_date=now
+        )
+
+    def _smtp_settings(self, server):
+        return override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=server.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_OUTBOX={'BATCH_SIZE': 2, 'CONCURRENCY': 2},
+        )
+
+    def test_daily_task_sends_batches_over_pooled_connections(self):
+        """Renderiza uma vez por grupo e envia cada lote por uma única conexão SMTP."""
+        with LocalSMTPServer() as server, self._smtp_settings(server):
+            with patch('finance.bulk_email.render_to_string', wraps=render_to_string) as render:
+                results = check_expiring_subscriptions()
+
+        self.assertEqual(render.call_count, 6)  # 3 grupos x (txt + html)
+        self.assertEqual(results['expiring_3_days'], 5)
+        self.assertEqual(results['expiring_1_day'], 1)
+        self.assertEqual(results['expired_today'], 1)
+        self.assertEqual(results['sent'], 7)
+        self.assertEqual(len(server.messages), 7)
+        self.assertEqual(server.connections, 4)  # 7 mensagens em lotes de 2
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+
+        body = EmailOutbox.objects.get(to_email='leitor3@example.com').text_body
+        self.assertIn('Leitor3', body)
+        self.assertNotIn('[[cgb:', body)
+
+        self.expired.refresh_from_db()
+        self.assertEqual(self.expired.status, 'expirada')
+        self.expired_user.profile.refresh_from_db()
+        self.assertFalse(self.expired_user.profile.is_premium)
+
+    def test_rerun_does_not_duplicate_messages(self):
+        """Reexecutar a task no mesmo dia não reenvia os e-mails."""
+        with LocalSMTPServer() as server, self._smtp_settings(server):
+            check_expiring_subscriptions()
+            results = check_expiring_subscriptions()
+
+        self.assertEqual(results['sent'], 0)
+        self.assertEqual(len(server.messages), 7)
+        self.assertEqual(EmailOutbox.objects.count(), 7)
+
+    def test_failed_message_is_retried(self):
+        """Falhas ficam na caixa de saída e são enviadas na próxima tentativa."""
+        with LocalSMTPServer() as server, self._smtp_settings(server):
+            server.rejected.add('leitor0@example.com')
+            results = check_expiring_subscriptions()
+
+            failed = EmailOutbox.objects.get(to_email='leitor0@example.com')
+            self.assertEqual(results['errors'], 1)
+            self.assertEqual(failed.status, 'failed')
+            self.assertEqual(failed.attempts, 1)
+
+            server.rejected.clear()
+            retry = dispatch_outbox()
+
+        self.assertEqual(retry, {'sent': 1, 'failed': 0})
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'sent')
+        self.assertEqual(failed.attempts, 2)
+
+    def test_overlapping_runs_do_not_send_twice(self):
+        """Uma execução sobreposta não envia mensagens já reservadas por outra."""
+        from finance import bulk_email
+
+        overlapping = []
+        claim_messages = bulk_email._claim_messages
+
+        def claim_with_overlap(cfg, email_type=None):
+            rows = claim_messages(cfg, email_type)
+            # Outra execução do despachante começa logo após esta reservar o lote
+            if not overlapping:
+                overlapping.append(None)
+                overlapping[0] = dispatch_outbox()
+            return rows
+
+        with LocalSMTPServer() as server, self._smtp_settings(server):
+            with patch('finance.bulk_email.dispatch_outbox'):
+                check_expiring_subscriptions()
+            self.assertEqual(EmailOutbox.objects.filter(status='pending').count(), 7)
+
+            with patch('finance.bulk_email._claim_messages', side_effect=claim_with_overlap):
+                results = dispatch_outbox()
+
+        self.assertEqual(overlapping, [{'sent': 0, 'failed': 0}])
+        self.assertEqual(results, {'sent': 7, 'failed': 0})
+        self.assertEqual(len(server.messages), 7)
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+
+    def test_stale_claim_is_taken_over(self):
+        """A reserva de uma execução interrompida expira e a mensagem é enviada."""
+        message = EmailOutbox.objects.create(
+            email_type='premium_expiring', dedupe_key='stale', to_email='leitor0@example.com',
+            subject='Lembrete', text_body='Olá', status='sending', claim_token='morta',
+            claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        EmailOutbox.objects.create(
+            email_type='premium_expiring', dedupe_key='recent', to_email='leitor1@example.com',
+            subject='Lembrete', text_body='Olá', status='sending', claim_token='ativa',
+            claimed_at=timezone.now(),
+        )
+
+        with LocalSMTPServer() as server, self._smtp_settings(server):
+            results = dispatch_outbox()
+
+        self.assertEqual(results, {'sent': 1, 'failed': 0})
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(EmailOutbox.objects.get(dedupe_key='recent').status, 'sending')
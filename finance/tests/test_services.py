@@ -0,0 +1,188 @@
+"""
+Testes automatizados para os serviços do app Finance.
+Cobertura: CampaignService (execução em lotes e retomável)
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import CampaignNotification, UserBadge, UserProfile
+from finance.models import Campaign, CampaignGrant, EmailOutbox, Subscription
+from finance.services import CampaignService
+from finance.tasks import execute_campaign_chunk
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CampaignBatchExecutionTest(TestCase):
+    """Testes para a execução de campanhas em lotes."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'leitor{i}', email=f'leitor{i}@example.com', password='x')
+            for i in range(7)
+        ]
+        self.campaign = self._campaign()
+
+    def _campaign(self, **overrides):
+        params = dict(
+            name='Campanha em Lote',
+            description='Teste',
+            duration_days=7,
+            target_type='custom',
+            criteria={},
+            start_date=timezone.now() - timedelta(days=1),
+            end_date=timezone.now() + timedelta(days=30),
+            status='active',
+        )
+        params.update(overrides)
+        return Campaign.objects.create(**params)
+
+    def test_execute_campaign_grants_everyone_in_chunks(self):
+        """Concede a todos os elegíveis, com assinatura, notificação e perfil Premium."""
+        result = CampaignService.execute_campaign(self.campaign, chunk_size=3)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['granted_count'], 7)
+        self.assertEqual(result['chunks'], 3)
+        self.assertEqual(CampaignGrant.objects.filter(campaign=self.campaign).count(), 7)
+        self.assertEqual(Subscription.objects.filter(status='ativa').count(), 7)
+        self.assertEqual(CampaignNotification.objects.filter(campaign=self.campaign).count(), 7)
+        self.assertEqual(len(mail.outbox), 7)
+
+        self.users[0].profile.refresh_from_db()
+        self.assertTrue(self.users[0].profile.is_premium_active())
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.total_granted, 7)
+        self.assertEqual(self.campaign.execution_count, 1)
+        self.assertEqual(CampaignService.get_execution_progress(self.campaign.id)['status'], 'completed')
+
+    def test_welcome_emails_go_through_outbox(self):
+        """Os e-mails de boas-vindas são enfileirados na caixa de saída e enviados."""
+        CampaignService.execute_campaign(self.campaign, chunk_size=3)
+
+        welcome = EmailOutbox.objects.filter(email_type='premium_welcome')
+        self.assertEqual(welcome.count(), 7)
+        self.assertFalse(welcome.exclude(status='sent').exists())
+        message = welcome.get(user=self.users[0])
+        self.assertIn('leitor0', message.text_body)
+        self.assertIn('/static/images/badges/premium_badge.png', message.html_body)
+
+    def test_user_without_profile_gets_premium_and_badge(self):
+        """Usuário sem perfil recebe o perfil Premium e o badge, como no fluxo individual."""
+        UserProfile.objects.filter(user=self.users[0]).delete()
+
+        CampaignService.execute_campaign(self.campaign, chunk_size=3)
+
+        profile = UserProfile.objects.get(user=self.users[0])
+        self.assertTrue(profile.is_premium_active())
+        self.assertTrue(UserBadge.objects.filter(user=self.users[0], badge__slug='membro-premium').exists())
+
+    def test_max_grants_is_reserved_per_chunk(self):
+        """Não ultrapassa max_grants mesmo com lotes maiores que a capacidade."""
+        campaign = self._campaign(max_grants=4)
+
+        result = CampaignService.execute_campaign(campaign, chunk_size=3)
+
+        self.assertEqual(result['granted_count'], 4)
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.total_granted, 4)
+        self.assertFalse(campaign.can_grant_more())
+
+    def test_existing_subscription_is_reactivated(self):
+        """Assinatura expirada existente é reativada em vez de duplicada."""
+        Subscription.objects.create(user=self.users[0], status='expirada', payment_method='pix')
+
+        CampaignService.execute_campaign(self.campaign, chunk_size=10)
+
+        subscription = Subscription.objects.get(user=self.users[0])
+        self.assertEqual(subscription.status, 'ativa')
+        self.assertTrue(subscription.is_active())
+        self.assertEqual(CampaignGrant.objects.get(user=self.users[0]).subscription, subscription)
+
+    def test_second_run_skips_already_granted(self):
+        """Uma nova execução não concede duas vezes ao mesmo usuário."""
+        CampaignService.execute_campaign(self.campaign, chunk_size=3)
+        result = CampaignService.execute_campaign(self.campaign, chunk_size=3)
+
+        self.assertEqual(result['eligible_count'], 0)
+        self.assertEqual(result['granted_count'], 0)
+        self.assertEqual(CampaignGrant.objects.filter(campaign=self.campaign).count(), 7)
+
+    def test_query_count_does_not_grow_with_chunk(self):
+        """O número de queries por lote é constante, independente do tamanho do lote."""
+        small = self._campaign(criteria={'limit': 2})
+        with CaptureQueriesContext(connection) as small_run:
+            CampaignService.execute_campaign(small, chunk_size=100)
+
+        large = self._campaign(name='Campanha Grande')
+        with CaptureQueriesContext(connection) as large_run:
+            CampaignService.execute_campaign(large, chunk_size=100)
+
+        self.assertEqual(CampaignGrant.objects.filter(campaign=large).count(), 7)
+        self.assertLessEqual(len(large_run), len(small_run) + 2)
+
+    def test_group_limit_applies_per_execution(self):
+        """O limite do grupo continua valendo por execução."""
+        campaign = self._campaign(target_type='group', criteria={
+            'user_ids': [user.id for user in self.users], 'limit': 5
+        })
+
+        result = CampaignService.execute_campaign(campaign, chunk_size=2)
+
+        self.assertEqual(result['granted_count'], 5)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CampaignChunkTaskTest(TestCase):
+    """Testes para a execução retomável via tasks Celery encadeadas."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'leitor{i}', email=f'leitor{i}@example.com', password='x')
+            for i in range(5)
+        ]
+        self.campaign = Campaign.objects.create(
+            name='Campanha Celery',
+            description='Teste',
+            target_type='custom',
+            criteria={},
+            start_date=timezone.now() - timedelta(days=1),
+            end_date=timezone.now() + timedelta(days=30),
+            status='active',
+        )
+
+    def _run_eagerly(self, *args):
+        return execute_campaign_chunk.apply(args=args)
+
+    def test_chunk_tasks_chain_until_done(self):
+        """Cada task processa um lote e agenda a seguinte até terminar."""
+        with patch.object(execute_campaign_chunk, 'delay', side_effect=self._run_eagerly) as delay:
+            progress = CampaignService.start_campaign_execution(self.campaign, chunk_size=2)
+
+        self.assertEqual(progress['eligible'], 5)
+        self.assertEqual(delay.call_count, 3)
+        self.assertEqual(CampaignGrant.objects.filter(campaign=self.campaign).count(), 5)
+
+        progress = CampaignService.get_execution_progress(self.campaign.id)
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['granted'], 5)
+        self.assertEqual(progress['last_user_id'], self.users[-1].id)
+
+    def test_resume_continues_from_last_user(self):
+        """Uma execução interrompida retoma do cursor salvo no progresso."""
+        with patch.object(execute_campaign_chunk, 'delay'):
+            CampaignService.start_campaign_execution(self.campaign, chunk_size=2)
+        CampaignService.execute_campaign_chunk(self.campaign.id, 0, 2)
+
+        with patch.object(execute_campaign_chunk, 'delay') as delay:
+            progress = CampaignService.resume_campaign_execution(self.campaign)
+
+        self.assertEqual(progress['processed'], 2)
+        delay.assert_called_once_with(self.campaign.id, self.users[1].id, 2, None)
@@ -9,7 +9,8 @@ from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
 from django.contrib import messages
-from .models import SuspiciousActivity, AIResponseAlert, AIUsageLog
+from .models import SuspiciousActivity, AIResponseAlert, AIUsageLog, ViewPerformanceStat, ChatValidationStat
+from .telemetry import ai_usage_buffer, latency_percentiles
 from django.db.models import Sum, Avg, Count
 from django.db.models.functions import TruncDay
 from recommendations.models import Recommendation
@@ -683,8 +684,105 @@ class AIUsageLogAdmin(admin.ModelAdmin):
             extra_context = extra_context or {}
             extra_context['chart_data'] = chart_data
             extra_context['stats_summary'] = stats_summary
+            # H. Percentis de latência (histograma agregado) e estado do buffer de telemetria
+            extra_context['latency_percentiles'] = latency_percentiles(queryset)
+            extra_context['telemetry_buffer'] = ai_usage_buffer.stats()
             
             response.context_data.update(extra_context)
             
         return response
 
+
+@admin.register(ViewPerformanceStat)
+class ViewPerformanceStatAdmin(admin.ModelAdmin):
+    """
+    Painel somente leitura do desempenho por view (amostras do
+    PerformanceMonitoringMiddleware agregadas por janela de tempo).
+    """
+    list_display = (
+        'view_name',
+        'bucket_start',
+        'requests',
+        'avg_duration_display',
+        'max_duration_display',
+        'avg_queries_display',
+        'max_queries',
+        'duplicate_queries',
+        'cache_hit_ratio',
+        'external_display',
+        'budget_exceeded',
+    )
+    list_filter = ('bucket_start',)
+    search_fields = ('view_name',)
+    date_hierarchy = 'bucket_start'
+    ordering = ('-bucket_start', 'view_name')
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        """Impedir inserções manuais."""
+        return False
+
+    @admin.display(description='Tempo médio')
+    def avg_duration_display(self, obj):
+        return f"{obj.avg_duration_ms:.0f}ms"
+
+    @admin.display(description='Tempo máximo', ordering='max_duration_ms')
+    def max_duration_display(self, obj):
+        return f"{obj.max_duration_ms:.0f}ms"
+
+    @admin.display(description='Queries (média)')
+    def avg_queries_display(self, obj):
+        return f"{obj.avg_queries:.1f}"
+
+    @admin.display(description='Cache hit')
+    def cache_hit_ratio(self, obj):
+        total = obj.cache_hits + obj.cache_misses
+        return f"{obj.cache_hits / total * 100:.0f}%" if total else '—'
+
+    @admin.display(description='HTTP externo')
+    def external_display(self, obj):
+        if not obj.external_calls:
+            return '—'
+        return f"{obj.external_calls} ({obj.total_external_ms / obj.requests:.0f}ms/req)"
+
+
+@admin.register(ChatValidationStat)
+class ChatValidationStatAdmin(admin.ModelAdmin):
+    """
+    Painel somente leitura da validação cruzada do chatbot por modo
+    (sync/async/sampled), para comparar latência e taxa de correção.
+    """
+    list_display = (
+        'mode',
+        'bucket_start',
+        'answers',
+        'avg_response_display',
+        'validated',
+        'avg_validation_display',
+        'corrected',
+        'correction_rate_display',
+    )
+    list_filter = ('mode', 'bucket_start')
+    date_hierarchy = 'bucket_start'
+    ordering = ('-bucket_start', 'mode')
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        """Impedir inserções manuais."""
+        return False
+
+    @admin.display(description='Resposta (média)')
+    def avg_response_display(self, obj):
+        return f"{obj.avg_response_ms:.0f}ms" if obj.answers else '—'
+
+    @admin.display(description='Validação (média)')
+    def avg_validation_display(self, obj):
+        return f"{obj.avg_validation_ms:.0f}ms" if obj.validated else '—'
+
+    @admin.display(description='Taxa de correção')
+    def correction_rate_display(self, obj):
+        return f"{obj.correction_rate * 100:.1f}%" if obj.validated else '—'
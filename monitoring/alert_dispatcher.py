@@ -0,0 +1,225 @@
+"""
+Despacho dos alertas de WhatsApp em segundo plano.
+
+dispatch_whatsapp_alert (monitoring.tasks) enfileira o alerta aqui em vez de
+abrir uma thread por alerta. Cada processo tem uma fila limitada
+(MAX_QUEUE_SIZE) e uma única thread consumidora:
+
+- após o primeiro alerta, espera COALESCE_SECONDS e envia o que chegou nesse
+  intervalo como uma única mensagem (até MAX_DIGEST_ITEMS alertas); o mesmo
+  registro enfileirado duas vezes conta uma vez só;
+- o WhatsAppNotifier usa sessão HTTP com pool e respeita
+  MIN_SEND_INTERVAL_SECONDS entre mensagens;
+- se o envio falhar, os alertas voltam para a fila com backoff exponencial
+  (RETRY_BASE_SECONDS, dobrando até RETRY_MAX_SECONDS) por até
+  RETRY_WINDOW_HOURS. Depois disso seguem com alert_sent=False no banco e a
+  task check_pending_alerts volta a tentar, também em digests.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .whatsapp_service import get_whatsapp_notifier
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY = 'activity'
+AI_ALERT = 'ai_alert'
+
+
+def get_whatsapp_alert_settings() -> dict:
+    """Retorna as configurações de envio dos alertas de WhatsApp com valores padrão seguros."""
+    defaults = {
+        'COALESCE_SECONDS': 30.0,
+        'MAX_DIGEST_ITEMS': 10,
+        'MIN_SEND_INTERVAL_SECONDS': 10.0,
+        'MAX_QUEUE_SIZE': 500,
+        'RETRY_BASE_SECONDS': 30,
+        'RETRY_MAX_SECONDS': 30 * 60,
+        'RETRY_WINDOW_HOURS': 6,
+    }
+    return {**defaults, **getattr(settings, 'WHATSAPP_ALERTS', {})}
+
+
+def deliver_alert_digest(items) -> bool:
+    """
+    Envia os alertas [(ACTIVITY | AI_ALERT, pk)] em uma mensagem e os marca
+    como enviados. Alertas já enviados (ou removidos) são ignorados.
+    """
+    from .models import AIResponseAlert, SuspiciousActivity
+
+    activity_ids = [pk for kind, pk in items if kind == ACTIVITY]
+    ai_alert_ids = [pk for kind, pk in items if kind == AI_ALERT]
+    activities = list(
+        SuspiciousActivity.objects.filter(pk__in=activity_ids, alert_sent=False).select_related('user')
+    ) if activity_ids else []
+    ai_alerts = list(
+        AIResponseAlert.objects.filter(pk__in=ai_alert_ids, alert_sent=False).select_related('user')
+    ) if ai_alert_ids else []
+    if not activities and not ai_alerts:
+        return True
+    return get_whatsapp_notifier().send_alert_digest(activities, ai_alerts)
+
+
+@dataclass
+class _PendingAlert:
+    kind: str
+    pk: int
+    expires_at: float
+    due_at: float = 0.0
+    attempts: int = 0
+
+
+class AlertDispatcher:
+    """Fila de alertas com uma thread consumidora que agrupa e re-tenta os envios."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (kind, pk) -> _PendingAlert, em ordem de chegada
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def enqueue(self, kind: str, pk: int) -> bool:
+        """Enfileira um alerta. Retorna False se o WhatsApp estiver desligado ou a fila cheia."""
+        if not get_whatsapp_notifier().enabled:
+            logger.warning(f"WhatsApp desabilitado: alerta {kind} #{pk} fica pendente no banco.")
+            return False
+
+        self._reset_after_fork()
+        cfg = get_whatsapp_alert_settings()
+        with self._lock:
+            if (kind, pk) not in self._pending:
+                if len(self._pending) >= cfg['MAX_QUEUE_SIZE']:
+                    self.dropped += 1
+                    logger.warning(f"⚠️ Fila de alertas WhatsApp cheia: alerta {kind} #{pk} fica pendente no banco.")
+                    return False
+                self._pending[(kind, pk)] = _PendingAlert(
+                    kind, pk, expires_at=time.monotonic() + cfg['RETRY_WINDOW_HOURS'] * 3600,
+                )
+
+        self._ensure_worker()
+        self._wakeup.set()
+        return True
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Envia agora, em digests, os alertas cujo horário chegou (todos com
+        force=True). Para na primeira falha. Retorna quantos foram entregues.
+        """
+        delivered = 0
+        while True:
+            batch = self._take_due(force)
+            if not batch:
+                return delivered
+            try:
+                success = deliver_alert_digest([(alert.kind, alert.pk) for alert in batch])
+            except Exception as e:
+                logger.error(f"❌ Erro ao enviar digest de alertas WhatsApp: {e}", exc_info=True)
+                success = False
+            if not success:
+                self._retry_later(batch)
+                return delivered
+            with self._lock:
+                self.sent += len(batch)
+            delivered += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'pending': len(self._pending), 'sent': self.sent, 'dropped': self.dropped, 'failed': self.failed}
+
+    def _take_due(self, force):
+        now = time.monotonic()
+        limit = get_whatsapp_alert_settings()['MAX_DIGEST_ITEMS']
+        with self._lock:
+            batch = [alert for alert in self._pending.values() if force or alert.due_at <= now][:limit]
+            for alert in batch:
+                del self._pending[(alert.kind, alert.pk)]
+        return batch
+
+    def _retry_later(self, batch):
+        cfg = get_whatsapp_alert_settings()
+        now = time.monotonic()
+        with self._lock:
+            self.failed += len(batch)
+            for alert in batch:
+                alert.attempts += 1
+                if now >= alert.expires_at:
+                    logger.error(
+                        f"❌ Alerta {alert.kind} #{alert.pk} sem envio após {alert.attempts} tentativas; "
+                        f"fica pendente para check_pending_alerts"
+                    )
+                    continue
+                delay = min(cfg['RETRY_BASE_SECONDS'] * 2 ** (alert.attempts - 1), cfg['RETRY_MAX_SECONDS'])
+                alert.due_at = now + delay
+                self._pending.setdefault((alert.kind, alert.pk), alert)
+        logger.warning(f"🔄 {len(batch)} alerta(s) WhatsApp serão re-tentados com backoff")
+
+    def _seconds_until_due(self):
+        with self._lock:
+            if not self._pending:
+                return None
+            return max(0.0, min(alert.due_at for alert in self._pending.values()) - time.monotonic())
+
+    def _digest_full(self):
+        now = time.monotonic()
+        limit = get_whatsapp_alert_settings()['MAX_DIGEST_ITEMS']
+        with self._lock:
+            return sum(1 for alert in self._pending.values() if alert.due_at <= now) >= limit
+
+    def _reset_after_fork(self):
+        # Workers do gunicorn herdam o estado do processo pai: descarta a fila
+        # e a thread copiadas para não enviar alertas em duplicidade.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._lock = threading.Lock()
+            self._pending = {}
+            self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='whatsapp-alerts', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            wait = self._seconds_until_due()
+            if wait is None or wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            # Janela de coalescência: alertas do mesmo surto vão na mesma mensagem
+            deadline = time.monotonic() + get_whatsapp_alert_settings()['COALESCE_SECONDS']
+            while not self._digest_full():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.wait(remaining)
+                self._wakeup.clear()
+
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+_dispatcher = AlertDispatcher()
+
+
+def get_alert_dispatcher() -> AlertDispatcher:
+    return _dispatcher
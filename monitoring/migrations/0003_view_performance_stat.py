@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_aiusagelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewPerformanceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=200, verbose_name='View')),
+                ('bucket_start', models.DateTimeField(verbose_name='Início da janela')),
+                ('requests', models.PositiveIntegerField(default=0, verbose_name='Requisições amostradas')),
+                ('total_duration_ms', models.FloatField(default=0.0, verbose_name='Tempo total (ms)')),
+                ('max_duration_ms', models.FloatField(default=0.0, verbose_name='Tempo máximo (ms)')),
+                ('total_queries', models.PositiveIntegerField(default=0, verbose_name='Queries')),
+                ('max_queries', models.PositiveIntegerField(default=0, verbose_name='Máximo de queries')),
+                ('total_db_ms', models.FloatField(default=0.0, verbose_name='Tempo no banco (ms)')),
+                ('duplicate_queries', models.PositiveIntegerField(default=0, verbose_name='Queries repetidas (N+1)')),
+                ('cache_hits', models.PositiveIntegerField(default=0, verbose_name='Cache hits')),
+                ('cache_misses', models.PositiveIntegerField(default=0, verbose_name='Cache misses')),
+                ('external_calls', models.PositiveIntegerField(default=0, verbose_name='Chamadas HTTP externas')),
+                ('total_external_ms', models.FloatField(default=0.0, verbose_name='Tempo HTTP externo (ms)')),
+                ('budget_exceeded', models.PositiveIntegerField(default=0, verbose_name='Orçamento de queries excedido')),
+            ],
+            options={
+                'verbose_name': 'Desempenho por View',
+                'verbose_name_plural': 'Desempenho por View',
+                'ordering': ['-bucket_start', 'view_name'],
+                'indexes': [models.Index(fields=['bucket_start'], name='monitoring__bucket__77f8e5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('view_name', 'bucket_start'), name='uniq_view_perf_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_view_performance_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatValidationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(max_length=20, verbose_name='Modo')),
+                ('bucket_start', models.DateTimeField(verbose_name='Início da janela')),
+                ('answers', models.PositiveIntegerField(default=0, verbose_name='Respostas')),
+                ('total_response_ms', models.FloatField(default=0.0, verbose_name='Tempo total de resposta (ms)')),
+                ('max_response_ms', models.FloatField(default=0.0, verbose_name='Tempo máximo de resposta (ms)')),
+                ('validated', models.PositiveIntegerField(default=0, verbose_name='Respostas validadas')),
+                ('corrected', models.PositiveIntegerField(default=0, verbose_name='Respostas corrigidas')),
+                ('total_validation_ms', models.FloatField(default=0.0, verbose_name='Tempo total de validação (ms)')),
+                ('max_validation_ms', models.FloatField(default=0.0, verbose_name='Tempo máximo de validação (ms)')),
+            ],
+            options={
+                'verbose_name': 'Validação Cruzada do Chatbot',
+                'verbose_name_plural': 'Validação Cruzada do Chatbot',
+                'ordering': ['-bucket_start', 'mode'],
+                'indexes': [models.Index(fields=['bucket_start'], name='monitoring__bucket__704bc0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('mode', 'bucket_start'), name='uniq_chat_validation_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_chat_validation_stat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiusagelog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Registrado em'),
+        ),
+    ]
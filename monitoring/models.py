@@ -490,8 +490,11 @@ class AIUsageLog(models.Model):
         verbose_name="Mensagem de Erro"
     )
     
+    # Momento da chamada, e não da gravação: no modo 'buffered'/'celery' o
+    # registro chega ao banco em lote, depois (ver monitoring.telemetry)
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Registrado em"
     )
 
@@ -510,3 +513,94 @@ class AIUsageLog(models.Model):
         user_str = self.user.username if self.user else 'Anônimo'
         return f"{self.feature_name} ({self.provider}) — {user_str} — {self.created_at.strftime('%d/%m/%Y %H:%M')}"
 
+
+
+class ViewPerformanceStat(models.Model):
+    """
+    Agregado por view e janela de tempo das requisições amostradas pelo
+    PerformanceMonitoringMiddleware (monitoring/profiling.py). Janelas mais
+    antigas que PERFORMANCE_PROFILING['RETENTION_HOURS'] são removidas.
+    """
+
+    view_name = models.CharField(max_length=200, verbose_name="View")
+    bucket_start = models.DateTimeField(verbose_name="Início da janela")
+
+    requests = models.PositiveIntegerField(default=0, verbose_name="Requisições amostradas")
+    total_duration_ms = models.FloatField(default=0.0, verbose_name="Tempo total (ms)")
+    max_duration_ms = models.FloatField(default=0.0, verbose_name="Tempo máximo (ms)")
+    total_queries = models.PositiveIntegerField(default=0, verbose_name="Queries")
+    max_queries = models.PositiveIntegerField(default=0, verbose_name="Máximo de queries")
+    total_db_ms = models.FloatField(default=0.0, verbose_name="Tempo no banco (ms)")
+    duplicate_queries = models.PositiveIntegerField(default=0, verbose_name="Queries repetidas (N+1)")
+    cache_hits = models.PositiveIntegerField(default=0, verbose_name="Cache hits")
+    cache_misses = models.PositiveIntegerField(default=0, verbose_name="Cache misses")
+    external_calls = models.PositiveIntegerField(default=0, verbose_name="Chamadas HTTP externas")
+    total_external_ms = models.FloatField(default=0.0, verbose_name="Tempo HTTP externo (ms)")
+    budget_exceeded = models.PositiveIntegerField(default=0, verbose_name="Orçamento de queries excedido")
+
+    class Meta:
+        verbose_name = "Desempenho por View"
+        verbose_name_plural = "Desempenho por View"
+        ordering = ['-bucket_start', 'view_name']
+        constraints = [
+            models.UniqueConstraint(fields=['view_name', 'bucket_start'], name='uniq_view_perf_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.view_name} — {self.bucket_start.strftime('%d/%m/%Y %H:%M')}"
+
+    @property
+    def avg_duration_ms(self):
+        return self.total_duration_ms / self.requests if self.requests else 0.0
+
+    @property
+    def avg_queries(self):
+        return self.total_queries / self.requests if self.requests else 0.0
+
+
+class ChatValidationStat(models.Model):
+    """
+    Agregado por modo e janela de tempo da validação cruzada das respostas do
+    chatbot (chatbot_literario/validation_service.py): latência percebida
+    pelo usuário, latência da validação e taxa de correção de cada modo.
+    """
+
+    mode = models.CharField(max_length=20, verbose_name="Modo")
+    bucket_start = models.DateTimeField(verbose_name="Início da janela")
+
+    answers = models.PositiveIntegerField(default=0, verbose_name="Respostas")
+    total_response_ms = models.FloatField(default=0.0, verbose_name="Tempo total de resposta (ms)")
+    max_response_ms = models.FloatField(default=0.0, verbose_name="Tempo máximo de resposta (ms)")
+    validated = models.PositiveIntegerField(default=0, verbose_name="Respostas validadas")
+    corrected = models.PositiveIntegerField(default=0, verbose_name="Respostas corrigidas")
+    total_validation_ms = models.FloatField(default=0.0, verbose_name="Tempo total de validação (ms)")
+    max_validation_ms = models.FloatField(default=0.0, verbose_name="Tempo máximo de validação (ms)")
+
+    class Meta:
+        verbose_name = "Validação Cruzada do Chatbot"
+        verbose_name_plural = "Validação Cruzada do Chatbot"
+        ordering = ['-bucket_start', 'mode']
+        constraints = [
+            models.UniqueConstraint(fields=['mode', 'bucket_start'], name='uniq_chat_validation_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.mode} — {self.bucket_start.strftime('%d/%m/%Y %H:%M')}"
+
+    @property
+    def avg_response_ms(self):
+        return self.total_response_ms / self.answers if self.answers else 0.0
+
+    @property
+    def avg_validation_ms(self):
+        return self.total_validation_ms / self.validated if self.validated else 0.0
+
+    @property
+    def correction_rate(self):
+        return self.corrected / self.validated if self.validated else 0.0
@@ -0,0 +1,366 @@
+"""
+Perfil de desempenho por requisição (core.middleware.PerformanceMonitoringMiddleware).
+
+Durante a requisição um RequestProfile fica em uma ContextVar e acumula:
+
+- queries SQL e tempo total no banco (um execute_wrapper fixo por conexão,
+  que encaminha a query ao perfil da ContextVar), agrupando
+  as queries por "forma" (SQL sem literais e com listas IN colapsadas) para
+  detectar N+1: a mesma forma repetida DUPLICATE_QUERY_THRESHOLD vezes ou mais;
+- acertos/falhas de cache (get/get_many dos backends configurados);
+- chamadas HTTP externas e seu tempo (requests e httpx), classificadas por
+  serviço: Google Books, provedores de IA e Supabase.
+
+Views podem declarar um orçamento de queries com @query_budget(n); o
+middleware registra o estouro e os testes verificam com
+QueryBudgetAssertionsMixin.
+"""
+import contextvars
+import functools
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+# Host -> serviço externo (o restante é agrupado em 'other')
+EXTERNAL_SERVICES = (
+    ('googleapis.com', 'google_books'),
+    ('generativelanguage.googleapis.com', 'ai'),
+    ('api.groq.com', 'ai'),
+    ('openrouter.ai', 'ai'),
+    ('api.openai.com', 'ai'),
+    ('api.anthropic.com', 'ai'),
+    ('supabase.co', 'supabase'),
+    ('supabase.in', 'supabase'),
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)', re.IGNORECASE)
+
+
+def get_profiling_settings() -> dict:
+    """Retorna as configurações de profiling com valores padrão seguros."""
+    defaults = {
+        'ENABLED': True,
+        'SLOW_REQUEST_SECONDS': 1.5,
+        'DUPLICATE_QUERY_THRESHOLD': 5,
+        'SAMPLE_RATE': 0.1,
+        'BUCKET_MINUTES': 60,
+        'RETENTION_HOURS': 7 * 24,
+        'BATCH_SIZE': 100,
+        'FLUSH_INTERVAL_SECONDS': 10.0,
+        'MAX_BUFFER_SIZE': 5000,
+    }
+    return {**defaults, **getattr(settings, 'PERFORMANCE_PROFILING', {})}
+
+
+def sql_shape(sql):
+    """SQL sem literais, com listas IN colapsadas: identifica a mesma query."""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    return _IN_LIST.sub('IN (...)', shape)
+
+
+def classify_host(url):
+    host = (urlsplit(str(url)).hostname or '').lower()
+    service = 'other'
+    # O sufixo mais longo vence (generativelanguage.googleapis.com é IA)
+    for suffix, name in sorted(EXTERNAL_SERVICES, key=lambda item: -len(item[0])):
+        if host == suffix or host.endswith('.' + suffix):
+            service = name
+            break
+    return service
+
+
+class RequestProfile:
+    """Métricas acumuladas durante uma requisição."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.external_calls = Counter()
+        self.external_time = Counter()
+        self.view_name = ''
+        self.query_budget = None
+
+    # -- banco --------------------------------------------------------------
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def duplicate_shapes(self, threshold=None):
+        """[(forma, vezes)] das queries repetidas threshold vezes ou mais."""
+        if threshold is None:
+            threshold = get_profiling_settings()['DUPLICATE_QUERY_THRESHOLD']
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    @property
+    def budget_exceeded(self):
+        return self.query_budget is not None and self.queries > self.query_budget
+
+    # -- externos -----------------------------------------------------------
+
+    def record_external(self, url, seconds):
+        service = classify_host(url)
+        self.external_calls[service] += 1
+        self.external_time[service] += seconds
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def server_timing(self):
+        """Valor do header Server-Timing (durações em ms)."""
+        metrics = [
+            f'backend;dur={self.duration * 1000:.2f};desc="Django Backend Processing"',
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        duplicates = self.duplicate_shapes()
+        if duplicates:
+            repeated = sum(count for _, count in duplicates)
+            metrics.append(f'db-dup;desc="{len(duplicates)} formas repetidas ({repeated} queries)"')
+        if self.query_budget is not None:
+            metrics.append(f'db-budget;desc="{self.queries}/{self.query_budget} queries"')
+        if self.cache_hits or self.cache_misses:
+            metrics.append(f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"')
+        for service in sorted(self.external_calls):
+            metrics.append(
+                f'ext-{service};dur={self.external_time[service] * 1000:.2f};'
+                f'desc="{self.external_calls[service]} chamadas"'
+            )
+        return ', '.join(metrics)
+
+    def as_sample(self):
+        """Amostra enviada para monitoring.ViewPerformanceStat."""
+        return {
+            'view_name': self.view_name,
+            'duration_ms': self.duration * 1000,
+            'queries': self.queries,
+            'db_ms': self.db_time * 1000,
+            'duplicate_queries': sum(count for _, count in self.duplicate_shapes()),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'external_calls': sum(self.external_calls.values()),
+            'external_ms': sum(self.external_time.values()) * 1000,
+            'budget_exceeded': self.budget_exceeded,
+        }
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def activate_profile(profile):
+    return _current_profile.set(profile)
+
+
+def deactivate_profile(token):
+    _current_profile.reset(token)
+
+
+# ==============================================================================
+# Orçamento de queries
+# ==============================================================================
+
+def query_budget(max_queries):
+    """
+    Declara o número máximo de queries SQL de uma view (incluindo o que os
+    middlewares executam). Em views baseadas em classe, aplicar sobre o
+    resultado de as_view().
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryBudgetAssertionsMixin:
+    """Mixin de TestCase para verificar o orçamento declarado com @query_budget."""
+
+    def assertWithinQueryBudget(self, response):
+        profile = getattr(response, 'request_profile', None)
+        if profile is None:
+            self.fail('Resposta sem perfil: PerformanceMonitoringMiddleware não está ativo')
+        if profile.query_budget is None:
+            self.fail(f"A view '{profile.view_name}' não declara @query_budget")
+        if profile.budget_exceeded:
+            shapes = '\n'.join(f'  {count}x {shape}' for shape, count in profile.shapes.most_common(5))
+            self.fail(
+                f"'{profile.view_name}' executou {profile.queries} queries "
+                f"(orçamento: {profile.query_budget}). Mais frequentes:\n{shapes}"
+            )
+
+
+# ==============================================================================
+# Instrumentação de cache e HTTP (instalada uma vez por processo)
+# ==============================================================================
+
+_MISSING = object()
+_installed = False
+_install_lock = threading.Lock()
+
+
+def _instrument_cache_class(cache_class):
+    if getattr(cache_class.get, '_profiling_instrumented', False):
+        return
+    original_get = cache_class.get
+    original_get_many = cache_class.get_many
+
+    @functools.wraps(original_get)
+    def get(self, key, default=None, version=None):
+        profile = _current_profile.get()
+        if profile is None:
+            return original_get(self, key, default, version)
+        value = original_get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+
+    @functools.wraps(original_get_many)
+    def get_many(self, keys, version=None):
+        profile = _current_profile.get()
+        if profile is None:
+            return original_get_many(self, keys, version)
+        keys = list(keys)
+        # BaseCache.get_many chama self.get por chave: não conta duas vezes
+        token = _current_profile.set(None)
+        try:
+            result = original_get_many(self, keys, version)
+        finally:
+            _current_profile.reset(token)
+        profile.cache_hits += len(result)
+        profile.cache_misses += max(len(keys) - len(result), 0)
+        return result
+
+    get._profiling_instrumented = True
+    cache_class.get = get
+    cache_class.get_many = get_many
+
+
+def _instrument_requests():
+    import requests
+
+    original_send = requests.Session.send
+    if getattr(original_send, '_profiling_instrumented', False):
+        return
+
+    @functools.wraps(original_send)
+    def send(self, request, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return original_send(self, request, **kwargs)
+        start = time.perf_counter()
+        try:
+            return original_send(self, request, **kwargs)
+        finally:
+            profile.record_external(request.url, time.perf_counter() - start)
+
+    send._profiling_instrumented = True
+    requests.Session.send = send
+
+
+def _instrument_httpx():
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    original_send = httpx.Client.send
+    if not getattr(original_send, '_profiling_instrumented', False):
+        @functools.wraps(original_send)
+        def send(self, request, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return original_send(self, request, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original_send(self, request, **kwargs)
+            finally:
+                profile.record_external(request.url, time.perf_counter() - start)
+
+        send._profiling_instrumented = True
+        httpx.Client.send = send
+
+    original_async_send = httpx.AsyncClient.send
+    if not getattr(original_async_send, '_profiling_instrumented', False):
+        @functools.wraps(original_async_send)
+        async def async_send(self, request, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return await original_async_send(self, request, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await original_async_send(self, request, **kwargs)
+            finally:
+                profile.record_external(request.url, time.perf_counter() - start)
+
+        async_send._profiling_instrumented = True
+        httpx.AsyncClient.send = async_send
+
+
+def instrument_caches():
+    """Instrumenta as classes dos backends de cache configurados (idempotente)."""
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        try:
+            _instrument_cache_class(type(caches[alias]))
+        except Exception:
+            continue
+
+
+def _profile_query(execute, sql, params, many, context):
+    """execute_wrapper fixo das conexões: encaminha a query ao perfil ativo."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def instrument_connections():
+    """
+    Instala _profile_query nas conexões da thread atual (idempotente).
+
+    O wrapper nunca é removido: requisições simultâneas que dividem a thread
+    (ASGI) não mexem nos wrappers umas das outras, e cada query vai para o
+    perfil da própria requisição. Fica no início da lista para que o pop de
+    connection.execute_wrapper() de outro código não o retire.
+    """
+    from django.db import connections
+
+    for connection in connections.all():
+        if _profile_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, _profile_query)
+
+
+def install_instrumentation():
+    """Instala os wrappers de HTTP (idempotente)."""
+    global _installed
+    if _installed:
+        return
+    with _install_lock:
+        if _installed:
+            return
+        _instrument_requests()
+        _instrument_httpx()
+        _installed = True
@@ -1,5 +1,4 @@
 import logging
-import threading
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
@@ -69,28 +68,25 @@ def dispatch_whatsapp_alert(activity_id: int = None, ai_alert_id: int = None):
     """
     Despacha o alerta do WhatsApp de forma assíncrona.
     Se o Celery estiver configurado e FORCE_CELERY_ALERTS estiver ativado, usa Celery (.delay).
-    Caso contrário, executa em uma Thread em background nativa do Python para não bloquear
-    a requisição HTTP e evitar depender de um Celery worker em segundo plano no Render.
+    Caso contrário, enfileira no AlertDispatcher do processo (monitoring.alert_dispatcher),
+    que agrupa os alertas próximos em uma única mensagem e re-tenta com backoff, sem
+    bloquear a requisição HTTP nem depender de um Celery worker no Render.
     """
+    from .alert_dispatcher import ACTIVITY, AI_ALERT, get_alert_dispatcher
+
     force_celery = getattr(settings, 'FORCE_CELERY_ALERTS', False)
 
     if force_celery:
         logger.info(f"Enfileirando alerta via Celery (activity_id={activity_id}, ai_alert_id={ai_alert_id})")
         send_whatsapp_alert_task.delay(activity_id=activity_id, ai_alert_id=ai_alert_id)
+    elif activity_id or ai_alert_id:
+        logger.info(f"Enfileirando alerta no dispatcher local (activity_id={activity_id}, ai_alert_id={ai_alert_id})")
+        if activity_id:
+            get_alert_dispatcher().enqueue(ACTIVITY, activity_id)
+        else:
+            get_alert_dispatcher().enqueue(AI_ALERT, ai_alert_id)
     else:
-        logger.info(f"Disparando alerta em background thread nativa (activity_id={activity_id}, ai_alert_id={ai_alert_id})")
-        def run_in_thread():
-            from django.db import connection
-            try:
-                send_whatsapp_alert_now(activity_id=activity_id, ai_alert_id=ai_alert_id)
-            except Exception as thread_err:
-                logger.error(f"Erro na thread de envio de alerta WhatsApp: {thread_err}")
-            finally:
-                connection.close()  # Libera a conexão do banco de dados
-
-        thread = threading.Thread(target=run_in_thread)
-        thread.daemon = True
-        thread.start()
+        logger.warning("dispatch_whatsapp_alert chamado sem activity_id ou ai_alert_id")
 
 
 @shared_task(
@@ -189,6 +185,7 @@ def check_pending_alerts():
     Útil para recuperação de falhas de rede temporárias.
     """
     from .models import SuspiciousActivity, AIResponseAlert
+    from .alert_dispatcher import ACTIVITY, AI_ALERT, deliver_alert_digest, get_whatsapp_alert_settings
     from datetime import timedelta
 
     # Só retentar alertas das últimas 6 horas
@@ -201,10 +198,6 @@ def check_pending_alerts():
         created_at__gte=cutoff,
     )
 
-    for activity in pending_activities:
-        logger.info(f"🔄 Re-tentando alerta para SuspiciousActivity #{activity.pk}")
-        dispatch_whatsapp_alert(activity_id=activity.pk)
-
     # Alertas de IA pendentes (alta e crítica)
     pending_ai_alerts = AIResponseAlert.objects.filter(
         alert_sent=False,
@@ -212,12 +205,34 @@ def check_pending_alerts():
         created_at__gte=cutoff,
     )
 
-    for alert in pending_ai_alerts:
-        logger.info(f"🔄 Re-tentando alerta para AIResponseAlert #{alert.pk}")
-        dispatch_whatsapp_alert(ai_alert_id=alert.pk)
-
-    total_pending = pending_activities.count() + pending_ai_alerts.count()
+    # Envia em digests (uma mensagem para vários alertas) em vez de um por um
+    items = [(ACTIVITY, pk) for pk in pending_activities.values_list('pk', flat=True)]
+    items += [(AI_ALERT, pk) for pk in pending_ai_alerts.values_list('pk', flat=True)]
+    chunk_size = get_whatsapp_alert_settings()['MAX_DIGEST_ITEMS']
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        logger.info(f"🔄 Re-tentando {len(chunk)} alerta(s) pendentes em um digest")
+        if not deliver_alert_digest(chunk):
+            logger.error("❌ Falha ao re-enviar alertas pendentes; nova tentativa no próximo ciclo")
+            break
+
+    total_pending = len(items)
     if total_pending > 0:
-        logger.info(f"🔄 {total_pending} alertas pendentes re-enfileirados")
+        logger.info(f"🔄 {total_pending} alertas pendentes processados")
     else:
         logger.debug("✅ Nenhum alerta pendente para re-tentar")
+
+
+@shared_task(
+    name='monitoring.write_ai_usage_logs',
+    ignore_result=True,
+)
+def write_ai_usage_logs_task(records: list):
+    """
+    Grava um lote de AIUsageLog enviado pelo buffer de telemetria (modo 'celery').
+    Uma mensagem por lote em vez de uma por chamada de IA.
+    """
+    from .telemetry import write_ai_usage_batch
+
+    write_ai_usage_batch(records)
+    logger.debug(f"📊 {len(records)} registros de uso da IA gravados em lote")
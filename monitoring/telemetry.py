@@ -0,0 +1,401 @@
+"""
+Telemetria de uso da IA gravada em lote.
+
+No modo 'buffered', log_ai_usage() apenas enfileira o registro em memória e
+retorna. Uma thread de background grava a fila com bulk_create a cada
+BATCH_SIZE registros ou FLUSH_INTERVAL_SECONDS segundos. No modo 'celery',
+cada lote vira uma única mensagem para o worker. A fila é limitada por
+MAX_BUFFER_SIZE: quando cheia, novos registros são descartados e contados.
+
+Também expõe o cálculo de latência p50/p95/p99 por provedor/modelo usado no
+painel admin de AIUsageLog e a gravação em lote das amostras de desempenho
+por view (ViewPerformanceStat) coletadas pelo PerformanceMonitoringMiddleware
+e das métricas da validação cruzada do chatbot (ChatValidationStat).
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROCESSING_MODE_SYNC = 'synchronous'
+PROCESSING_MODE_BUFFERED = 'buffered'
+PROCESSING_MODE_CELERY = 'celery'
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+
+
+def get_ai_usage_settings() -> dict:
+    """Retorna as configurações de telemetria com valores padrão seguros."""
+    defaults = {
+        'PROCESSING_MODE': PROCESSING_MODE_SYNC,
+        'BATCH_SIZE': 50,
+        'FLUSH_INTERVAL_SECONDS': 5.0,
+        'MAX_BUFFER_SIZE': 5000,
+    }
+    return {**defaults, **getattr(settings, 'AI_USAGE_LOGGING', {})}
+
+
+class BatchWriter:
+    """
+    Fila em memória, limitada, descarregada em lote por uma thread daemon.
+
+    `write_batch` recebe a lista de itens acumulados. Falhas de escrita não
+    propagam: os itens do lote são contabilizados em `failed`.
+
+    `collect` (opcional) é chamado a cada descarga e devolve itens mantidos
+    fora da fila (ex.: estado coalescido por chave) que entram no mesmo lote.
+    """
+
+    def __init__(self, name, write_batch, batch_size=50, flush_interval=5.0, max_size=5000, collect=None):
+        self.name = name
+        self._write_batch = write_batch
+        self._collect = collect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._items = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def configure(self, batch_size=None, flush_interval=None, max_size=None):
+        if batch_size:
+            self.batch_size = batch_size
+        if flush_interval:
+            self.flush_interval = flush_interval
+        if max_size:
+            self.max_size = max_size
+
+    def add(self, item) -> bool:
+        """Enfileira um item. Retorna False se o buffer estiver cheio."""
+        self._reset_after_fork()
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                self.dropped += 1
+                return False
+            self._items.append(item)
+            batch_ready = len(self._items) >= self.batch_size
+
+        self._ensure_worker()
+        if batch_ready:
+            self._wakeup.set()
+        return True
+
+    def start(self):
+        """Garante a thread de descarga (para itens entregues só por `collect`)."""
+        self._reset_after_fork()
+        self._ensure_worker()
+
+    def flush(self) -> int:
+        """Grava imediatamente tudo o que está na fila. Retorna o total gravado."""
+        with self._lock:
+            batch, self._items = self._items, []
+        if self._collect is not None:
+            batch.extend(self._collect())
+        if not batch:
+            return 0
+
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Erro ao gravar lote de {len(batch)} registros ({self.name}): {e}")
+            return 0
+
+        with self._lock:
+            self.written += len(batch)
+        return len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'pending': len(self._items),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+    def _reset_after_fork(self):
+        # Workers do gunicorn herdam o estado do processo pai: descarta a fila
+        # e a thread copiadas para não gravar registros em duplicidade.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._lock = threading.Lock()
+            self._items = []
+            self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f'{self.name}-flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def write_ai_usage_batch(records):
+    """Persiste uma lista de registros (dicts) de AIUsageLog com bulk_create."""
+    from .models import AIUsageLog
+
+    AIUsageLog.objects.bulk_create([AIUsageLog(**record) for record in records])
+
+
+def _dispatch_ai_usage_batch(records):
+    if get_ai_usage_settings()['PROCESSING_MODE'] == PROCESSING_MODE_CELERY:
+        from .tasks import write_ai_usage_logs_task
+        try:
+            write_ai_usage_logs_task.delay(records)
+            return
+        except Exception as e:
+            logger.warning(f"Broker indisponível para telemetria de IA, gravando direto: {e}")
+    write_ai_usage_batch(records)
+
+
+ai_usage_buffer = BatchWriter('ai-usage', _dispatch_ai_usage_batch)
+atexit.register(ai_usage_buffer.flush)
+
+
+def record_ai_usage(record: dict) -> bool:
+    """
+    Registra um AIUsageLog conforme AI_USAGE_LOGGING['PROCESSING_MODE'].
+    `record` contém os campos do modelo (user_id em vez de user).
+    """
+    # O horário da chamada vai no registro: a gravação em lote acontece depois
+    record.setdefault('created_at', timezone.now())
+    cfg = get_ai_usage_settings()
+    if cfg['PROCESSING_MODE'] in (PROCESSING_MODE_BUFFERED, PROCESSING_MODE_CELERY):
+        ai_usage_buffer.configure(
+            batch_size=cfg['BATCH_SIZE'],
+            flush_interval=cfg['FLUSH_INTERVAL_SECONDS'],
+            max_size=cfg['MAX_BUFFER_SIZE'],
+        )
+        return ai_usage_buffer.add(record)
+
+    write_ai_usage_batch([record])
+    return True
+
+
+# ==============================================================================
+# Desempenho por view (amostras do PerformanceMonitoringMiddleware)
+# ==============================================================================
+
+_SUMMED_FIELDS = {
+    'duration_ms': 'total_duration_ms',
+    'queries': 'total_queries',
+    'db_ms': 'total_db_ms',
+    'duplicate_queries': 'duplicate_queries',
+    'cache_hits': 'cache_hits',
+    'cache_misses': 'cache_misses',
+    'external_calls': 'external_calls',
+    'external_ms': 'total_external_ms',
+}
+
+
+def bucket_start_for(moment, bucket_minutes):
+    """Início da janela de bucket_minutes minutos que contém `moment`."""
+    minutes = (moment.hour * 60 + moment.minute) // bucket_minutes * bucket_minutes
+    return moment.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def _add_to_bucket(model, lookup, totals):
+    """
+    Soma `totals` na linha da janela com um UPDATE com F() (campos max_* com
+    Greatest), criando a linha na primeira amostra da janela.
+    """
+    totals = {
+        field: (value if field.endswith('_ms') else int(value))
+        for field, value in totals.items()
+    }
+    updates = {
+        field: Greatest(field, value) if field.startswith('max_') else F(field) + value
+        for field, value in totals.items()
+    }
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **totals)
+    except IntegrityError:
+        # Outro processo criou a janela entre o UPDATE e o INSERT
+        model.objects.filter(**lookup).update(**updates)
+
+
+def write_view_performance_batch(samples):
+    """
+    Soma as amostras por (view, janela) e aplica um UPDATE com F() por grupo
+    (INSERT na primeira amostra da janela). Remove janelas fora da retenção.
+    """
+    from .models import ViewPerformanceStat
+    from .profiling import get_profiling_settings
+
+    cfg = get_profiling_settings()
+    groups = defaultdict(lambda: defaultdict(float))
+    for sample in samples:
+        key = (sample['view_name'][:200], bucket_start_for(sample['recorded_at'], cfg['BUCKET_MINUTES']))
+        totals = groups[key]
+        totals['requests'] += 1
+        totals['budget_exceeded'] += 1 if sample['budget_exceeded'] else 0
+        totals['max_duration_ms'] = max(totals['max_duration_ms'], sample['duration_ms'])
+        totals['max_queries'] = max(totals['max_queries'], sample['queries'])
+        for source, field in _SUMMED_FIELDS.items():
+            totals[field] += sample[source]
+
+    for (view_name, bucket_start), totals in groups.items():
+        _add_to_bucket(ViewPerformanceStat, {'view_name': view_name, 'bucket_start': bucket_start}, totals)
+
+    cutoff = timezone.now() - timedelta(hours=cfg['RETENTION_HOURS'])
+    ViewPerformanceStat.objects.filter(bucket_start__lt=cutoff).delete()
+
+
+view_performance_buffer = BatchWriter('view-performance', write_view_performance_batch)
+atexit.register(view_performance_buffer.flush)
+
+
+def record_view_performance(sample: dict) -> bool:
+    """Enfileira uma amostra (RequestProfile.as_sample() + recorded_at)."""
+    from .profiling import get_profiling_settings
+
+    cfg = get_profiling_settings()
+    view_performance_buffer.configure(
+        batch_size=cfg['BATCH_SIZE'],
+        flush_interval=cfg['FLUSH_INTERVAL_SECONDS'],
+        max_size=cfg['MAX_BUFFER_SIZE'],
+    )
+    return view_performance_buffer.add(sample)
+
+
+
+# ==============================================================================
+# Validação cruzada do chatbot (latência e taxa de correção por modo)
+# ==============================================================================
+
+def write_chat_validation_batch(samples):
+    """
+    Soma as amostras por (modo, janela) em ChatValidationStat. Usa a janela e
+    a retenção de PERFORMANCE_PROFILING.
+
+    Cada amostra: mode, recorded_at e, opcionalmente, response_ms (resposta
+    entregue ao usuário) e validation_ms/corrected (validação concluída).
+    """
+    from .models import ChatValidationStat
+    from .profiling import get_profiling_settings
+
+    cfg = get_profiling_settings()
+    groups = defaultdict(lambda: defaultdict(float))
+    for sample in samples:
+        key = (sample['mode'][:20], bucket_start_for(sample['recorded_at'], cfg['BUCKET_MINUTES']))
+        totals = groups[key]
+        if sample.get('response_ms') is not None:
+            totals['answers'] += 1
+            totals['total_response_ms'] += sample['response_ms']
+            totals['max_response_ms'] = max(totals['max_response_ms'], sample['response_ms'])
+        if sample.get('validation_ms') is not None:
+            totals['validated'] += 1
+            totals['corrected'] += 1 if sample.get('corrected') else 0
+            totals['total_validation_ms'] += sample['validation_ms']
+            totals['max_validation_ms'] = max(totals['max_validation_ms'], sample['validation_ms'])
+
+    for (mode, bucket_start), totals in groups.items():
+        _add_to_bucket(ChatValidationStat, {'mode': mode, 'bucket_start': bucket_start}, totals)
+
+    cutoff = timezone.now() - timedelta(hours=cfg['RETENTION_HOURS'])
+    ChatValidationStat.objects.filter(bucket_start__lt=cutoff).delete()
+
+
+chat_validation_buffer = BatchWriter('chat-validation', write_chat_validation_batch)
+atexit.register(chat_validation_buffer.flush)
+
+
+def record_chat_validation(sample: dict) -> bool:
+    """Enfileira uma amostra de validação cruzada (ver write_chat_validation_batch)."""
+    from .profiling import get_profiling_settings
+
+    cfg = get_profiling_settings()
+    chat_validation_buffer.configure(
+        batch_size=cfg['BATCH_SIZE'],
+        flush_interval=cfg['FLUSH_INTERVAL_SECONDS'],
+        max_size=cfg['MAX_BUFFER_SIZE'],
+    )
+    sample.setdefault('recorded_at', timezone.now())
+    return chat_validation_buffer.add(sample)
+
+def latency_percentiles(queryset, percentiles=(0.5, 0.95, 0.99)):
+    """
+    Calcula percentis de latência por (provedor, modelo) a partir de um
+    histograma agregado no banco (uma única query, portável entre SQLite e
+    PostgreSQL). Os valores são interpolados linearmente dentro do bucket;
+    acima do último limite retorna o próprio limite.
+    """
+    bucket_aggregates = {}
+    lower_filter = Q()
+    for index, upper in enumerate(LATENCY_BUCKETS):
+        bucket_aggregates[f'b{index}'] = Count(
+            'id', filter=lower_filter & Q(response_time_seconds__lte=upper)
+        )
+        lower_filter = Q(response_time_seconds__gt=upper)
+    bucket_aggregates['overflow'] = Count('id', filter=Q(response_time_seconds__gt=LATENCY_BUCKETS[-1]))
+
+    rows = (
+        queryset.order_by()
+        .values('provider', 'model_name')
+        .annotate(calls=Count('id'), **bucket_aggregates)
+        .order_by('-calls')
+    )
+
+    results = []
+    for row in rows:
+        counts = [row[f'b{index}'] for index in range(len(LATENCY_BUCKETS))] + [row['overflow']]
+        total = sum(counts)
+        entry = {'provider': row['provider'], 'model_name': row['model_name'], 'calls': row['calls']}
+        for percentile in percentiles:
+            entry[f'p{int(percentile * 100)}'] = _percentile_from_histogram(counts, total, percentile)
+        results.append(entry)
+    return results
+
+
+def _percentile_from_histogram(counts, total, percentile):
+    if not total:
+        return 0.0
+    target = percentile * total
+    cumulative = 0
+    lower = 0.0
+    for index, count in enumerate(counts):
+        if index == len(LATENCY_BUCKETS):
+            return LATENCY_BUCKETS[-1]
+        upper = LATENCY_BUCKETS[index]
+        if count and cumulative + count >= target:
+            return round(lower + (upper - lower) * (target - cumulative) / count, 3)
+        cumulative += count
+        lower = upper
+    return LATENCY_BUCKETS[-1]
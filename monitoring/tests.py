@@ -0,0 +1,327 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.services.ai_provider_service import log_ai_usage
+from .alert_dispatcher import ACTIVITY, AI_ALERT, AlertDispatcher
+from .models import AIResponseAlert, AIUsageLog, ChatValidationStat, SuspiciousActivity, ViewPerformanceStat
+from .profiling import (
+    RequestProfile, activate_profile, classify_host, deactivate_profile,
+    install_instrumentation, instrument_caches, instrument_connections, sql_shape,
+)
+from .whatsapp_service import WhatsAppNotifier
+from .telemetry import (
+    BatchWriter, ai_usage_buffer, latency_percentiles, write_chat_validation_batch,
+    write_view_performance_batch,
+)
+
+User = get_user_model()
+
+
+class BatchWriterTest(TestCase):
+    def test_flush_writes_accumulated_batch_once(self):
+        batches = []
+        writer = BatchWriter('test', batches.append, batch_size=100, flush_interval=60)
+
+        for i in range(3):
+            writer.add(i)
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(batches, [[0, 1, 2]])
+        self.assertEqual(writer.stats()['written'], 3)
+
+    def test_full_buffer_drops_and_counts(self):
+        writer = BatchWriter('test', lambda batch: None, batch_size=100, flush_interval=60, max_size=2)
+
+        results = [writer.add(i) for i in range(4)]
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(writer.stats()['dropped'], 2)
+        self.assertEqual(writer.stats()['pending'], 2)
+
+    def test_write_failure_is_counted_not_raised(self):
+        def broken(batch):
+            raise RuntimeError('db fora do ar')
+
+        writer = BatchWriter('test', broken, batch_size=100, flush_interval=60)
+        writer.add('x')
+
+        self.assertEqual(writer.flush(), 0)
+        self.assertEqual(writer.stats()['failed'], 1)
+
+
+class AIUsageTelemetryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='leitor', password='x')
+        ai_usage_buffer.flush()
+
+    def _log(self, **overrides):
+        params = dict(
+            user=self.user, feature_name='chatbot', provider='groq',
+            model_name='llama-3.3-70b-versatile', prompt_tokens=100,
+            completion_tokens=50, response_time=0.4, status='success',
+        )
+        params.update(overrides)
+        log_ai_usage(**params)
+
+    def test_synchronous_mode_writes_immediately(self):
+        self._log()
+        self.assertEqual(AIUsageLog.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(AI_USAGE_LOGGING={'PROCESSING_MODE': 'buffered', 'FLUSH_INTERVAL_SECONDS': 3600})
+    def test_buffered_mode_defers_until_flush(self):
+        self._log()
+        self._log(status='failure')
+
+        self.assertFalse(AIUsageLog.objects.exists())
+        with self.assertNumQueries(1):
+            self.assertEqual(ai_usage_buffer.flush(), 2)
+        self.assertEqual(AIUsageLog.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(AI_USAGE_LOGGING={'PROCESSING_MODE': 'buffered', 'FLUSH_INTERVAL_SECONDS': 3600})
+    def test_buffered_record_keeps_call_timestamp(self):
+        called_at = timezone.now() - timedelta(minutes=5)
+        with mock.patch('django.utils.timezone.now', return_value=called_at):
+            self._log()
+
+        ai_usage_buffer.flush()
+        self.assertEqual(AIUsageLog.objects.get(user=self.user).created_at, called_at)
+
+    def test_latency_percentiles_per_provider_model(self):
+        for latency in [0.2] * 90 + [4.0] * 8 + [45.0] * 2:
+            self._log(response_time=latency)
+        self._log(provider='gemini', model_name='gemini-2.5-flash', response_time=1.2)
+
+        with self.assertNumQueries(1):
+            rows = latency_percentiles(AIUsageLog.objects.all())
+
+        groq = next(row for row in rows if row['provider'] == 'groq')
+        self.assertEqual(groq['calls'], 100)
+        self.assertTrue(0.1 < groq['p50'] <= 0.25)
+        self.assertTrue(3.0 < groq['p95'] <= 5.0)
+        self.assertTrue(30.0 < groq['p99'] <= 60.0)
+        self.assertEqual(len(rows), 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RequestProfileTest(TestCase):
+    def setUp(self):
+        install_instrumentation()
+        instrument_caches()
+        self.profile = RequestProfile()
+        self.token = activate_profile(self.profile)
+        self.addCleanup(deactivate_profile, self.token)
+
+    def test_sql_shape_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            sql_shape("SELECT * FROM t WHERE id = 12 AND name = 'O''Brien'"),
+            sql_shape("SELECT * FROM t WHERE id = 7 AND name = 'Ana'"),
+        )
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    def test_counts_queries_and_flags_repeated_shapes(self):
+        users = [User.objects.create_user(username=f'leitor{i}', password='x') for i in range(6)]
+        instrument_connections()
+        profile = RequestProfile()
+        token = activate_profile(profile)
+        try:
+            for user in users:
+                User.objects.filter(pk=user.pk).first()
+            User.objects.count()
+        finally:
+            deactivate_profile(token)
+
+        self.assertEqual(profile.queries, 7)
+        duplicates = profile.duplicate_shapes()
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0][1], 6)
+        self.assertIn('db-dup;desc="1 formas repetidas (6 queries)"', profile.finish().server_timing())
+
+    def test_queries_go_to_the_profile_of_their_own_context(self):
+        """Requisições que dividem a thread não misturam nem removem a contagem uma da outra."""
+        instrument_connections()
+        instrument_connections()
+        self.assertEqual(connection.execute_wrappers.count(connection.execute_wrappers[0]), 1)
+
+        other = RequestProfile()
+        other_token = activate_profile(other)
+        try:
+            # Wrapper de outro código entrando e saindo não retira o do perfil
+            with connection.execute_wrapper(lambda execute, *args: execute(*args)):
+                User.objects.count()
+        finally:
+            deactivate_profile(other_token)
+        User.objects.exists()
+        User.objects.exists()
+
+        self.assertEqual(other.queries, 1)
+        self.assertEqual(self.profile.queries, 2)
+
+    def test_counts_cache_hits_and_misses(self):
+        cache.set('presente', None)
+        cache.set('outro', 1)
+
+        self.assertIsNone(cache.get('presente', 'padrão'))
+        self.assertEqual(cache.get('ausente', 'padrão'), 'padrão')
+        cache.get_many(['outro', 'ausente', 'sumido'])
+
+        self.assertEqual((self.profile.cache_hits, self.profile.cache_misses), (2, 3))
+
+    def test_times_external_http_by_service(self):
+        def fake_send(adapter, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.url = request.url
+            return response
+
+        with mock.patch('requests.adapters.HTTPAdapter.send', fake_send):
+            requests.get('https://www.googleapis.com/books/v1/volumes', timeout=1)
+            requests.post('https://api.groq.com/openai/v1/chat/completions', timeout=1)
+            requests.get('https://generativelanguage.googleapis.com/v1beta/models', timeout=1)
+
+        self.assertEqual(self.profile.external_calls, {'google_books': 1, 'ai': 2})
+        self.assertEqual(classify_host('https://abc.supabase.co/storage/v1'), 'supabase')
+        self.assertIn('ext-ai;dur=', self.profile.finish().server_timing())
+
+
+@override_settings(PERFORMANCE_PROFILING={'BUCKET_MINUTES': 60, 'RETENTION_HOURS': 24})
+class ViewPerformanceStatTest(TestCase):
+    # Nomes próprios: requisições de outros testes também geram amostras
+    # que a thread do buffer pode gravar durante estes testes
+    def _sample(self, recorded_at, **overrides):
+        sample = {
+            'view_name': 'tests:book_list', 'duration_ms': 100.0, 'queries': 4, 'db_ms': 10.0,
+            'duplicate_queries': 0, 'cache_hits': 2, 'cache_misses': 1, 'external_calls': 0,
+            'external_ms': 0.0, 'budget_exceeded': False, 'recorded_at': recorded_at,
+        }
+        sample.update(overrides)
+        return sample
+
+    def test_samples_roll_up_per_view_and_window(self):
+        now = timezone.now().replace(minute=10)
+        write_view_performance_batch([
+            self._sample(now),
+            self._sample(now + timedelta(minutes=5), duration_ms=300.0, queries=9, budget_exceeded=True),
+        ])
+        write_view_performance_batch([
+            self._sample(now + timedelta(minutes=20), duplicate_queries=6),
+            self._sample(now, view_name='tests:home'),
+        ])
+
+        stat = ViewPerformanceStat.objects.get(view_name='tests:book_list')
+        self.assertEqual(stat.bucket_start, now.replace(minute=0, second=0, microsecond=0))
+        self.assertEqual(stat.requests, 3)
+        self.assertEqual(stat.total_queries, 17)
+        self.assertEqual(stat.max_queries, 9)
+        self.assertEqual(stat.max_duration_ms, 300.0)
+        self.assertEqual(stat.duplicate_queries, 6)
+        self.assertEqual(stat.cache_misses, 3)
+        self.assertEqual(stat.budget_exceeded, 1)
+        self.assertEqual(ViewPerformanceStat.objects.filter(view_name__startswith='tests:').count(), 2)
+
+    def test_windows_outside_retention_are_pruned(self):
+        old = datetime(2020, 1, 1, 10, 30, tzinfo=dt_timezone.utc)
+        write_view_performance_batch([self._sample(old)])
+        write_view_performance_batch([self._sample(timezone.now())])
+
+        self.assertEqual(
+            list(ViewPerformanceStat.objects.filter(view_name='tests:book_list')
+                 .values_list('bucket_start__year', flat=True)),
+            [timezone.now().year],
+        )
+
+
+class ChatValidationStatTest(TestCase):
+    def test_answers_and_validations_roll_up_per_mode(self):
+        now = timezone.now()
+        write_chat_validation_batch([
+            {'mode': 'async', 'recorded_at': now, 'response_ms': 800.0},
+            {'mode': 'async', 'recorded_at': now, 'response_ms': 1200.0},
+            {'mode': 'async', 'recorded_at': now, 'validation_ms': 900.0, 'corrected': True},
+        ])
+        write_chat_validation_batch([
+            {'mode': 'async', 'recorded_at': now, 'validation_ms': 500.0, 'corrected': False},
+            {'mode': 'sync', 'recorded_at': now, 'response_ms': 2500.0, 'validation_ms': 1400.0},
+        ])
+
+        stat = ChatValidationStat.objects.get(mode='async')
+        self.assertEqual((stat.answers, stat.validated, stat.corrected), (2, 2, 1))
+        self.assertEqual(stat.avg_response_ms, 1000.0)
+        self.assertEqual(stat.max_validation_ms, 900.0)
+        self.assertEqual(stat.correction_rate, 0.5)
+        sync = ChatValidationStat.objects.get(mode='sync')
+        self.assertEqual((sync.answers, sync.validated, sync.corrected), (1, 1, 0))
+
+
+@override_settings(
+    WHATSAPP_ADMIN_NUMBER='5511999998888',
+    CALLMEBOT_API_KEY='chave',
+    WHATSAPP_ALERTS={'MIN_SEND_INTERVAL_SECONDS': 0, 'RETRY_BASE_SECONDS': 30, 'RETRY_MAX_SECONDS': 100},
+)
+class AlertDispatcherTest(TestCase):
+    def setUp(self):
+        self.notifier = WhatsAppNotifier()
+        self.dispatcher = AlertDispatcher()
+        patcher = mock.patch('monitoring.alert_dispatcher.get_whatsapp_notifier', return_value=self.notifier)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Sem thread consumidora: o teste chama flush() diretamente
+        worker = mock.patch.object(AlertDispatcher, '_ensure_worker')
+        worker.start()
+        self.addCleanup(worker.stop)
+
+    def _activity(self, **kwargs):
+        return SuspiciousActivity.objects.create(
+            activity_type='spam', severity='high', message_content='compre já', **kwargs,
+        )
+
+    def test_burst_of_alerts_is_sent_as_one_digest(self):
+        activities = [self._activity() for _ in range(3)]
+        ai_alert = AIResponseAlert.objects.create(
+            alert_type='api_error', severity='high', provider='groq', error_message='timeout',
+        )
+        for activity in activities:
+            self.dispatcher.enqueue(ACTIVITY, activity.pk)
+        self.dispatcher.enqueue(ACTIVITY, activities[0].pk)  # duplicado
+        self.dispatcher.enqueue(AI_ALERT, ai_alert.pk)
+
+        with mock.patch.object(WhatsAppNotifier, '_request', return_value=True) as request:
+            self.assertEqual(self.dispatcher.flush(), 4)
+
+        request.assert_called_once()
+        self.assertIn('4 alertas de monitoramento', request.call_args.args[0])
+        self.assertFalse(SuspiciousActivity.objects.filter(alert_sent=False).exists())
+        self.assertTrue(AIResponseAlert.objects.get(pk=ai_alert.pk).alert_sent)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        activity = self._activity()
+        self.dispatcher.enqueue(ACTIVITY, activity.pk)
+
+        with mock.patch.object(WhatsAppNotifier, '_request', return_value=False):
+            self.assertEqual(self.dispatcher.flush(), 0)
+            self.assertEqual(self.dispatcher.flush(), 0)  # ainda no backoff: nada a enviar
+
+        self.assertEqual(self.dispatcher.stats()['pending'], 1)
+        self.assertEqual(self.dispatcher.stats()['failed'], 1)
+        self.assertAlmostEqual(self.dispatcher._seconds_until_due(), 30, delta=1)
+        self.assertFalse(SuspiciousActivity.objects.get(pk=activity.pk).alert_sent)
+
+        with mock.patch.object(WhatsAppNotifier, '_request', return_value=True):
+            self.assertEqual(self.dispatcher.flush(force=True), 1)
+        self.assertTrue(SuspiciousActivity.objects.get(pk=activity.pk).alert_sent)
+
+    def test_full_queue_leaves_alert_pending_in_database(self):
+        with self.settings(WHATSAPP_ALERTS={'MAX_QUEUE_SIZE': 1}):
+            self.assertTrue(self.dispatcher.enqueue(ACTIVITY, self._activity().pk))
+            self.assertFalse(self.dispatcher.enqueue(ACTIVITY, self._activity().pk))
+
+        self.assertEqual(self.dispatcher.stats()['dropped'], 1)
@@ -13,10 +13,18 @@ SETUP (5 minutos):
    CALLMEBOT_API_KEY=XXXXXXXX           (key recebida)
 
 Documentação: https://www.callmebot.com/blog/free-api-whatsapp-messages/
+
+Os envios usam uma sessão HTTP com pool (keep-alive) e respeitam
+WHATSAPP_ALERTS['MIN_SEND_INTERVAL_SECONDS'] entre mensagens (limite do
+CallMeBot). Os alertas em tempo real chegam aqui agrupados pelo
+monitoring.alert_dispatcher (send_alert_digest).
 """
 import logging
+import threading
+import time
 import urllib.parse
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.utils import timezone
 
@@ -39,6 +47,13 @@ class WhatsAppNotifier:
         self.api_key = getattr(settings, 'CALLMEBOT_API_KEY', '')
         self.enabled = bool(self.phone and self.api_key)
 
+        # Sessão HTTP reaproveitada entre os envios (pool de conexões)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self._session.mount('https://', adapter)
+        self._send_lock = threading.Lock()
+        self._last_sent_at = None
+
         if not self.enabled:
             logger.warning(
                 "⚠️ WhatsApp não configurado. "
@@ -59,12 +74,31 @@ class WhatsAppNotifier:
             logger.warning("WhatsApp desabilitado: credenciais não configuradas.")
             return False
 
+        # Um envio por vez, com intervalo mínimo entre mensagens (rate limit do CallMeBot)
+        with self._send_lock:
+            self._wait_send_interval()
+            try:
+                return self._request(text)
+            finally:
+                self._last_sent_at = time.monotonic()
+
+    def _wait_send_interval(self):
+        from .alert_dispatcher import get_whatsapp_alert_settings
+
+        if self._last_sent_at is None:
+            return
+        interval = get_whatsapp_alert_settings()['MIN_SEND_INTERVAL_SECONDS']
+        wait = self._last_sent_at + interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _request(self, text: str) -> bool:
         try:
             # CallMeBot aceita texto URL-encoded via GET
             encoded_text = urllib.parse.quote(text)
             url = f"{self.CALLMEBOT_URL}?phone={self.phone}&text={encoded_text}&apikey={self.api_key}"
 
-            response = requests.get(url, timeout=self.REQUEST_TIMEOUT)
+            response = self._session.get(url, timeout=self.REQUEST_TIMEOUT)
             response_text = response.text
 
             # CallMeBot costuma retornar HTTP 200 mesmo em caso de erro, com a mensagem de erro no corpo.
@@ -103,12 +137,15 @@ class WhatsAppNotifier:
         Returns:
             True se enviado com sucesso.
         """
+        success = self._send_message(self.format_suspicious_activity_alert(activity))
+        if success:
+            activity.mark_alert_sent()
+        return success
+
+    def format_suspicious_activity_alert(self, activity) -> str:
+        """Texto completo do alerta de uma atividade suspeita."""
         now = timezone.localtime(activity.created_at)
-        user_label = (
-            f"{activity.user.username} (ID: {activity.user.pk})"
-            if activity.user
-            else f"Anônimo (IP: {activity.user_ip or 'desconhecido'})"
-        )
+        user_label = self._activity_user_label(activity)
 
         # Preview da mensagem (max 150 chars)
         msg_preview = activity.message_content[:150]
@@ -118,7 +155,7 @@ class WhatsAppNotifier:
         # Palavras detectadas
         keywords_str = ', '.join(activity.detected_keywords[:5]) if activity.detected_keywords else 'N/A'
 
-        text = (
+        return (
             f"{activity.severity_emoji} *ALERTA - Conduta Suspeita* {activity.severity_emoji}\n\n"
             f"📋 *Tipo:* {activity.get_activity_type_display()}\n"
             f"⚠️ *Severidade:* {activity.get_severity_display().upper()}\n"
@@ -129,10 +166,11 @@ class WhatsAppNotifier:
             f"🔗 Revisar: {activity.admin_url}"
         )
 
-        success = self._send_message(text)
-        if success:
-            activity.mark_alert_sent()
-        return success
+    @staticmethod
+    def _activity_user_label(activity) -> str:
+        if activity.user:
+            return f"{activity.user.username} (ID: {activity.user.pk})"
+        return f"Anônimo (IP: {activity.user_ip or 'desconhecido'})"
 
     def send_ai_error_alert(self, alert) -> bool:
         """
@@ -144,12 +182,15 @@ class WhatsAppNotifier:
         Returns:
             True se enviado com sucesso.
         """
+        success = self._send_message(self.format_ai_error_alert(alert))
+        if success:
+            alert.mark_alert_sent()
+        return success
+
+    def format_ai_error_alert(self, alert) -> str:
+        """Texto completo do alerta de problema na IA."""
         now = timezone.localtime(alert.created_at)
-        user_label = (
-            f"{alert.user.username} (ID: {alert.user.pk})"
-            if alert.user
-            else 'Anônimo'
-        )
+        user_label = self._alert_user_label(alert)
 
         # Preview da resposta (max 120 chars)
         response_preview = ''
@@ -187,10 +228,60 @@ class WhatsAppNotifier:
         lines.append(f"🕐 *Horário:* {now.strftime('%d/%m/%Y às %H:%M')}")
         lines.append(f"\n🔗 Resolver: {alert.admin_url}")
 
-        text = '\n'.join(lines)
-        success = self._send_message(text)
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _alert_user_label(alert) -> str:
+        return f"{alert.user.username} (ID: {alert.user.pk})" if alert.user else 'Anônimo'
+
+    def send_alert_digest(self, activities, ai_alerts) -> bool:
+        """
+        Envia vários alertas em uma única mensagem (um alerta sozinho usa o
+        texto completo) e marca todos como enviados.
+
+        Args:
+            activities: Instâncias de SuspiciousActivity
+            ai_alerts: Instâncias de AIResponseAlert
+
+        Returns:
+            True se enviado com sucesso.
+        """
+        from .models import AIResponseAlert, SuspiciousActivity
+
+        total = len(activities) + len(ai_alerts)
+        if total == 0:
+            return True
+        if total == 1:
+            if activities:
+                return self.send_suspicious_activity_alert(activities[0])
+            return self.send_ai_error_alert(ai_alerts[0])
+
+        lines = [f"🚨 *{total} alertas de monitoramento* 🚨"]
+        if activities:
+            lines.append("\n🔍 *Condutas suspeitas:*")
+            for activity in activities:
+                lines.append(
+                    f"{activity.severity_emoji} {activity.get_activity_type_display()} | "
+                    f"{self._activity_user_label(activity)}\n   {activity.admin_url}"
+                )
+        if ai_alerts:
+            lines.append("\n🤖 *Problemas na IA:*")
+            for alert in ai_alerts:
+                lines.append(
+                    f"{alert.severity_emoji} {alert.get_alert_type_display()} ({alert.get_provider_display()}) | "
+                    f"{self._alert_user_label(alert)}\n   {alert.admin_url}"
+                )
+        lines.append(f"\n🕐 *Horário:* {timezone.localtime(timezone.now()).strftime('%d/%m/%Y às %H:%M')}")
+
+        success = self._send_message('\n'.join(lines))
         if success:
-            alert.mark_alert_sent()
+            now = timezone.now()
+            SuspiciousActivity.objects.filter(pk__in=[a.pk for a in activities]).update(
+                alert_sent=True, alert_sent_at=now,
+            )
+            AIResponseAlert.objects.filter(pk__in=[a.pk for a in ai_alerts]).update(
+                alert_sent=True, alert_sent_at=now,
+            )
         return success
 
     def send_daily_summary(self, stats: dict) -> bool:
@@ -86,6 +86,7 @@ DEVICE_TYPE_CHOICES = [
 
 PROCESSING_MODE_DISABLED = "disabled"
 PROCESSING_MODE_SYNC = "synchronous"
+PROCESSING_MODE_BUFFERED = "buffered"
 PROCESSING_MODE_CELERY = "celery"
 
 # ==============================================================================
@@ -174,6 +175,8 @@ EXCLUDED_URL_PREFIXES = (
     "/liveness/",
     "/__debug__/",       # Django Debug Toolbar
     "/silk/",            # Django Silk profiler
+    "/sitemap",          # sitemap.xml e partes (core.views.sitemap_views)
+    "/robots.txt",
 )
 
 # User-Agents de robôs conhecidos (lowercase substring match)
@@ -15,6 +15,8 @@ Design:
 """
 import logging
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
 from .constants import EXCLUDED_URL_PREFIXES
 from .utils import (
     get_analytics_settings,
@@ -51,15 +53,24 @@ class AnalyticsMiddleware:
         'product_analytics.middleware.AnalyticsMiddleware',
 
     Configuração via settings.PRODUCT_ANALYTICS:
-        PROCESSING_MODE: 'disabled' | 'synchronous' | 'celery'
+        PROCESSING_MODE: 'disabled' | 'synchronous' | 'buffered' | 'celery'
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self._cfg = get_analytics_settings()
         self._mode = self._cfg.get("PROCESSING_MODE", "synchronous")
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
         # Processa a requisição normalmente (view executa aqui)
         response = self.get_response(request)
 
@@ -67,6 +78,20 @@ class AnalyticsMiddleware:
         if self._mode == "disabled":
             return response
 
+        self._process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        """Versão assíncrona (ASGI): o rastreamento usa o ORM, então roda em thread."""
+        response = await self.get_response(request)
+
+        if self._mode == "disabled":
+            return response
+
+        await sync_to_async(self._process_response)(request, response)
+        return response
+
+    def _process_response(self, request, response):
         # Processa analytics no caminho de RESPOSTA para não bloquear a view
         try:
             if self._should_track(request, response):
@@ -79,8 +104,6 @@ class AnalyticsMiddleware:
                 exc_info=True,
             )
 
-        return response
-
     # --------------------------------------------------------------------------
     # Decisão de rastreamento
     # --------------------------------------------------------------------------
@@ -0,0 +1,206 @@
+"""
+Buffer de escrita do modo 'buffered' (PROCESSING_MODE = 'buffered').
+
+Responsabilidade:
+- Receber eventos de produto e atualizações de sessão sem tocar o banco
+- Gravar tudo em lote: bulk_create de ProductEvent e um único UPDATE por
+  sessão (last_activity_at / exit_page / user) a cada lote
+
+Design:
+- Fila em memória por processo, limitada por MAX_BUFFER_SIZE (cheia = o
+  registro é descartado e contado), reaproveitando monitoring.telemetry.BatchWriter
+- Descarga a cada BATCH_SIZE itens ou FLUSH_INTERVAL_SECONDS segundos, por
+  uma thread daemon, e no encerramento do processo (atexit)
+- A atividade de sessão write-behind (SessionService) fica em dirty_sessions:
+  uma entrada por sessão, sempre com o último valor, gravada pela mesma
+  thread quando completa SESSION_FLUSH_INTERVAL_SECONDS, mesmo que a sessão
+  não receba mais visitas, e no encerramento do processo
+- Um UPDATE de sessão nunca volta last_activity_at para trás (atividade
+  antiga de outro processo não sobrescreve o encerramento da sessão)
+- A deduplicação de page_view é feita na gravação: uma consulta por lote
+  busca o último page_view de cada sessão envolvida
+- created_at dos eventos reflete o momento da gravação do lote (atraso
+  máximo de FLUSH_INTERVAL_SECONDS)
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from monitoring.telemetry import BatchWriter
+
+from ..models import AnalyticsSession, ProductEvent
+from ..utils import get_analytics_settings
+
+logger = logging.getLogger(__name__)
+
+EVENT = "event"
+SESSION_TOUCH = "session_touch"
+
+
+def write_analytics_batch(items) -> None:
+    """
+    Persiste um lote de itens (EVENT | SESSION_TOUCH, payload).
+
+    Atualizações da mesma sessão são consolidadas: prevalece o último valor
+    de cada campo, gerando um UPDATE por sessão em vez de um por page_view.
+    """
+    touches = {}
+    events = []
+    for kind, payload in items:
+        if kind == SESSION_TOUCH:
+            fields = dict(payload)
+            touches.setdefault(fields.pop("session_id"), {}).update(fields)
+        else:
+            events.append(payload)
+
+    events = _drop_repeated_page_views(events)
+    if events:
+        ProductEvent.objects.bulk_create([ProductEvent(**event) for event in events])
+
+    now = timezone.now()
+    for session_id, fields in touches.items():
+        rows = AnalyticsSession.objects.filter(pk=session_id)
+        if "last_activity_at" in fields:
+            rows = rows.filter(
+                Q(last_activity_at__isnull=True) | Q(last_activity_at__lte=fields["last_activity_at"])
+            )
+        rows.update(updated_at=now, **fields)
+
+    logger.debug(
+        "[ProductAnalytics] Lote gravado: %d eventos, %d sessões atualizadas",
+        len(events),
+        len(touches),
+    )
+
+
+def _drop_repeated_page_views(events):
+    """
+    Remove page_views repetidos da mesma página na mesma sessão (refresh),
+    como EventService._record_sync, e desvincula eventos de sessões removidas.
+    """
+    session_ids = {event["session_id"] for event in events if event["session_id"]}
+    if not session_ids:
+        return events
+
+    last_page = dict(
+        AnalyticsSession.objects
+        .filter(pk__in=session_ids)
+        .annotate(
+            last_page=Subquery(
+                ProductEvent.objects
+                .filter(session=OuterRef("pk"), event_type="page_view")
+                .order_by("-created_at")
+                .values("page_name")[:1]
+            )
+        )
+        .order_by()
+        .values_list("pk", "last_page")
+    )
+
+    kept = []
+    for event in events:
+        session_id = event["session_id"]
+        if session_id and session_id not in last_page:
+            event = {**event, "session_id": None}
+        elif session_id and event["event_type"] == "page_view":
+            if last_page[session_id] == event["page_name"]:
+                continue
+            last_page[session_id] = event["page_name"]
+        kept.append(event)
+    return kept
+
+
+class DirtySessions:
+    """
+    Atividade de sessão ainda não gravada, por sessão (write-behind).
+
+    Cada sessão tem uma entrada com os últimos valores e o momento em que
+    ficou suja; take() devolve as entradas sujas há pelo menos max_age
+    segundos como itens SESSION_TOUCH.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # session_id -> (desde, campos)
+        self._pid = os.getpid()
+
+    def mark(self, session_id, fields: dict, max_size: int) -> bool:
+        """Registra a atividade. Retorna False se o limite de sessões for atingido."""
+        self._reset_after_fork()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                if len(self._entries) >= max_size:
+                    return False
+                entry = self._entries[session_id] = (time.monotonic(), {})
+            entry[1].update(fields)
+        return True
+
+    def discard(self, session_id) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def take(self, max_age: float = 0) -> list:
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            due = [session_id for session_id, (since, _) in self._entries.items() if since <= cutoff]
+            entries = [(session_id, self._entries.pop(session_id)[1]) for session_id in due]
+        return [(SESSION_TOUCH, {"session_id": session_id, **fields}) for session_id, fields in entries]
+
+    def _reset_after_fork(self):
+        # Mesmo cuidado do BatchWriter: o worker do gunicorn não grava a
+        # atividade herdada do processo pai
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._lock = threading.Lock()
+            self._entries = {}
+
+
+dirty_sessions = DirtySessions()
+
+
+def _collect_due_sessions():
+    return dirty_sessions.take(get_analytics_settings().get("SESSION_FLUSH_INTERVAL_SECONDS", 60))
+
+
+def _flush_on_exit():
+    for item in dirty_sessions.take():
+        analytics_buffer.add(item)
+    analytics_buffer.flush()
+
+
+analytics_buffer = BatchWriter("product-analytics", write_analytics_batch, collect=_collect_due_sessions)
+atexit.register(_flush_on_exit)
+
+
+def enqueue(kind: str, payload: dict) -> bool:
+    """
+    Enfileira um item para gravação em lote.
+    Retorna False se o buffer estiver cheio (item descartado).
+    """
+    cfg = get_analytics_settings()
+    analytics_buffer.configure(
+        batch_size=cfg.get("BATCH_SIZE"),
+        flush_interval=cfg.get("FLUSH_INTERVAL_SECONDS"),
+        max_size=cfg.get("MAX_BUFFER_SIZE"),
+    )
+    return analytics_buffer.add((kind, payload))
+
+
+def mark_session_dirty(session_id, fields: dict) -> bool:
+    """
+    Guarda a atividade da sessão para gravação write-behind.
+    Retorna False se o limite (MAX_BUFFER_SIZE sessões) for atingido.
+    """
+    cfg = get_analytics_settings()
+    if not dirty_sessions.mark(session_id, fields, cfg.get("MAX_BUFFER_SIZE", 10000)):
+        return False
+    analytics_buffer.configure(flush_interval=cfg.get("FLUSH_INTERVAL_SECONDS"))
+    analytics_buffer.start()
+    return True
@@ -5,12 +5,13 @@ Responsabilidade:
 - Validar event_type contra a allowlist
 - Filtrar metadata para manter apenas chaves permitidas
 - Criar ProductEvent vinculado à sessão ativa
-- Suportar 3 modos de processamento: disabled / synchronous / celery
+- Suportar 4 modos de processamento: disabled / synchronous / buffered / celery
 
 Design:
 - Nunca armazena IP, User-Agent, termos de busca literais
 - Em modo síncrono: escrita protegida em try/except isolado
   (falha no analytics não interrompe a requisição principal)
+- Em modo buffered: apenas enfileira; a gravação é em lote (event_buffer)
 - Deduplicação de page_view: não registra se último evento da sessão
   já é um page_view para a mesma página (evita refresh spam)
 """
@@ -81,6 +82,17 @@ class EventService:
             object_type = ""
             object_id = None
 
+        if mode == "buffered":
+            return EventService._record_buffered(
+                event_type=event_type,
+                session=session,
+                user=user,
+                page_name=page_name,
+                object_type=object_type,
+                object_id=object_id,
+                metadata=clean_metadata,
+            )
+
         if mode == "celery":
             return EventService._record_async(
                 event_type=event_type,
@@ -156,6 +168,36 @@ class EventService:
             )
             return False
 
+    @staticmethod
+    def _record_buffered(
+        event_type: str,
+        session=None,
+        user=None,
+        page_name: str = "",
+        object_type: str = "",
+        object_id: Optional[int] = None,
+        metadata: Optional[dict] = None,
+    ) -> bool:
+        """
+        Enfileira o evento no buffer do processo, sem I/O no banco.
+        A deduplicação de page_view acontece na gravação do lote.
+        """
+        from .event_buffer import EVENT, enqueue
+
+        resolved_user_id = None
+        if user and hasattr(user, "is_authenticated") and user.is_authenticated:
+            resolved_user_id = user.pk
+
+        return enqueue(EVENT, {
+            "session_id": session.pk if session else None,
+            "user_id": resolved_user_id,
+            "event_type": event_type,
+            "page_name": page_name,
+            "object_type": object_type,
+            "object_id": object_id,
+            "metadata": metadata or {},
+        })
+
     @staticmethod
     def _record_async(
         event_type: str,
@@ -8,13 +8,25 @@ Responsabilidade:
 - Detectar quando uma sessão existente expirou e criar uma nova
 
 Design:
-- Sem efeitos colaterais fora de AnalyticsSession
+- Sem efeitos colaterais fora de AnalyticsSession (e do seu estado em cache)
+- O estado da sessão ativa (id, last_activity_at, exit_page, user) fica no
+  cache, por session_key: o page_view de uma sessão conhecida não consulta o
+  banco. Cache vazio (miss, Redis fora do ar) volta à consulta por session_key
+- O TTL do cache é o dobro do timeout: a visita que chega depois do timeout
+  ainda encontra o estado, grava a atividade final e encerra a linha
+- Em modo synchronous, cada atividade vira um UPDATE direto (sem SELECT)
+- Em modo buffered, a linha é write-behind: a atividade fica marcada como
+  suja (event_buffer.dirty_sessions) e a thread do buffer de escrita a grava
+  quando completa SESSION_FLUSH_INTERVAL_SECONDS, mesmo que a sessão fique
+  ociosa. Autenticação do usuário e cache vazio gravam na hora; o
+  encerramento da sessão grava a atividade final diretamente
 - Todas as operações de escrita são atômicas (update_fields explícito)
 - Tolerante a falhas: nunca propaga exceção para o middleware
 - Sem armazenamento de IP ou User-Agent bruto
 """
 import logging
 from typing import Optional
+from django.core.cache import cache
 from django.utils import timezone
 
 from ..models import AnalyticsSession
@@ -22,6 +34,8 @@ from ..utils import get_analytics_settings
 
 logger = logging.getLogger(__name__)
 
+SESSION_CACHE_KEY = "product_analytics:session:{}"
+
 
 class SessionService:
     """
@@ -55,6 +69,9 @@ class SessionService:
 
         Se a sessão expirou, cria uma nova (sem deletar a antiga).
 
+        Com o estado em cache, a sessão existente é montada a partir dele,
+        sem buscar a linha no banco.
+
         Retorna None silenciosamente em caso de erro de banco.
         """
         try:
@@ -62,39 +79,28 @@ class SessionService:
             timeout_minutes = cfg.get("SESSION_TIMEOUT_MINUTES", 30)
             now = timezone.now()
 
-            # Busca sessão existente não encerrada para este session_key
-            existing = (
-                AnalyticsSession.objects
-                .filter(session_key=session_key, ended_at__isnull=True)
-                .order_by("-started_at")
-                .first()
-            )
+            state = SessionService._load_state(session_key)
+            if state is None:
+                # Busca sessão existente não encerrada para este session_key
+                existing = (
+                    AnalyticsSession.objects
+                    .filter(session_key=session_key, ended_at__isnull=True)
+                    .order_by("-started_at")
+                    .first()
+                )
+                if existing:
+                    state = SessionService._state_for(existing)
+                    # Sem estado em cache (expulso ou Redis fora do ar), o
+                    # write-behind não é confiável: grava já a atividade
+                    state["flushed_at"] = None
 
-            if existing:
+            if state:
                 # Verifica se ainda está dentro do timeout
-                elapsed_minutes = (now - existing.last_activity_at).total_seconds() / 60
+                elapsed_minutes = (now - state["last_activity_at"]).total_seconds() / 60
                 if elapsed_minutes < timeout_minutes:
-                    # Sessão ativa: atualiza last_activity_at e exit_page
-                    update_fields = ["last_activity_at", "updated_at"]
-
-                    existing.last_activity_at = now
-
-                    # Atualiza exit_page se a página mudou
-                    if page_name and existing.exit_page != page_name:
-                        existing.exit_page = page_name
-                        update_fields.append("exit_page")
-
-                    # Associa usuário se acabou de autenticar
-                    if user and not existing.user:
-                        existing.user = user
-                        existing.is_authenticated = True
-                        update_fields.extend(["user", "is_authenticated"])
-
-                    existing.save(update_fields=update_fields)
-                    return existing
-                else:
-                    # Sessão expirada: encerra e cria nova
-                    SessionService._close_session(existing, now)
+                    return SessionService._touch(session_key, state, now, page_name, user, cfg)
+                # Sessão expirada: encerra e cria nova
+                SessionService._close_state(state, now)
 
             # Cria nova sessão
             session = AnalyticsSession.objects.create(
@@ -113,6 +119,7 @@ class SessionService:
                 medium=medium,
                 campaign=campaign,
             )
+            SessionService._save_state(session_key, SessionService._state_for(session), cfg)
             return session
 
         except Exception as exc:
@@ -133,6 +140,12 @@ class SessionService:
         """
         try:
             now = timezone.now()
+            state = SessionService._load_state(session_key)
+            if state:
+                SessionService._close_state(state, now)
+                cache.delete(SESSION_CACHE_KEY.format(session_key))
+                return True
+
             session = (
                 AnalyticsSession.objects
                 .filter(session_key=session_key, ended_at__isnull=True)
@@ -151,6 +164,76 @@ class SessionService:
             )
             return False
 
+    @staticmethod
+    def _touch(session_key: str, state: dict, now, page_name: str, user, cfg: dict) -> AnalyticsSession:
+        """
+        Registra atividade na sessão ativa: atualiza o estado em cache e
+        grava a linha (direto ou, em modo buffered, write-behind).
+        """
+        update_fields = ["last_activity_at", "updated_at"]
+        state["last_activity_at"] = now
+
+        # Atualiza exit_page se a página mudou
+        if page_name and state["exit_page"] != page_name:
+            state["exit_page"] = page_name
+            update_fields.append("exit_page")
+
+        # Associa usuário se acabou de autenticar
+        if user and not state["user_id"]:
+            state["user_id"] = user.pk
+            update_fields.extend(["user", "is_authenticated"])
+
+        session = SessionService._from_state(session_key, state)
+        if cfg.get("PROCESSING_MODE") == "buffered":
+            if state["flushed_at"] is None or "user" in update_fields:
+                SessionService._touch_buffered(session, update_fields, state["exit_page"])
+                state["flushed_at"] = now
+            else:
+                SessionService._mark_dirty(session, update_fields, state["exit_page"])
+        else:
+            session.save(update_fields=update_fields)
+            state["flushed_at"] = now
+
+        SessionService._save_state(session_key, state, cfg)
+        return session
+
+    @staticmethod
+    def _touch_buffered(session: AnalyticsSession, update_fields: list, page_name: str) -> None:
+        """
+        Enfileira a atualização de atividade da sessão (modo buffered).
+        Com o buffer cheio, grava diretamente para não perder a atividade.
+
+        exit_page vai sempre que houver página: o valor lido do banco pode
+        estar atrás de atualizações ainda no buffer.
+        """
+        from .event_buffer import SESSION_TOUCH, dirty_sessions, enqueue
+
+        fields = {"session_id": session.pk, "last_activity_at": session.last_activity_at}
+        if page_name:
+            fields["exit_page"] = page_name
+        if "user" in update_fields:
+            fields["user_id"] = session.user_id
+            fields["is_authenticated"] = True
+
+        # A atividade pendente da sessão fica coberta por esta, mais recente
+        dirty_sessions.discard(session.pk)
+        if not enqueue(SESSION_TOUCH, fields):
+            session.save(update_fields=update_fields)
+
+    @staticmethod
+    def _mark_dirty(session: AnalyticsSession, update_fields: list, page_name: str) -> None:
+        """
+        Marca a atividade da sessão para gravação write-behind (modo buffered).
+        Sem espaço para mais sessões, enfileira a atualização na hora.
+        """
+        from .event_buffer import mark_session_dirty
+
+        fields = {"last_activity_at": session.last_activity_at}
+        if page_name:
+            fields["exit_page"] = page_name
+        if not mark_session_dirty(session.pk, fields):
+            SessionService._touch_buffered(session, update_fields, page_name)
+
     @staticmethod
     def _close_session(session: AnalyticsSession, at=None) -> None:
         """
@@ -159,6 +242,71 @@ class SessionService:
         session.ended_at = at or timezone.now()
         session.save(update_fields=["ended_at", "updated_at"])
 
+    @staticmethod
+    def _close_state(state: dict, at) -> None:
+        """
+        Encerra a sessão do estado em cache, gravando a atividade final
+        (que em modo buffered pode ainda não estar no banco).
+        """
+        from .event_buffer import dirty_sessions
+
+        dirty_sessions.discard(state["id"])
+        AnalyticsSession.objects.filter(pk=state["id"]).update(
+            last_activity_at=state["last_activity_at"],
+            exit_page=state["exit_page"],
+            ended_at=at,
+            updated_at=at,
+        )
+
+    # --------------------------------------------------------------------------
+    # Estado em cache
+    # --------------------------------------------------------------------------
+
+    @staticmethod
+    def _state_for(session: AnalyticsSession) -> dict:
+        """Estado em cache de uma sessão lida/gravada no banco."""
+        return {
+            "id": session.pk,
+            "started_at": session.started_at,
+            "last_activity_at": session.last_activity_at,
+            "entry_page": session.entry_page,
+            "exit_page": session.exit_page,
+            "user_id": session.user_id,
+            "flushed_at": session.last_activity_at,
+        }
+
+    @staticmethod
+    def _from_state(session_key: str, state: dict) -> AnalyticsSession:
+        """Monta a AnalyticsSession (já existente no banco) a partir do estado em cache."""
+        session = AnalyticsSession(
+            pk=state["id"],
+            session_key=session_key,
+            user_id=state["user_id"],
+            is_authenticated=bool(state["user_id"]),
+            started_at=state["started_at"],
+            last_activity_at=state["last_activity_at"],
+            entry_page=state["entry_page"],
+            exit_page=state["exit_page"],
+        )
+        session._state.adding = False
+        return session
+
+    @staticmethod
+    def _load_state(session_key: str) -> Optional[dict]:
+        try:
+            return cache.get(SESSION_CACHE_KEY.format(session_key))
+        except Exception as exc:
+            logger.debug("[ProductAnalytics] Cache de sessão indisponível: %s", exc)
+            return None
+
+    @staticmethod
+    def _save_state(session_key: str, state: dict, cfg: dict) -> None:
+        timeout_seconds = cfg.get("SESSION_TIMEOUT_MINUTES", 30) * 60
+        try:
+            cache.set(SESSION_CACHE_KEY.format(session_key), state, timeout_seconds * 2)
+        except Exception as exc:
+            logger.debug("[ProductAnalytics] Cache de sessão indisponível: %s", exc)
+
     @staticmethod
     def get_active_session(session_key: str) -> Optional[AnalyticsSession]:
         """
@@ -170,6 +318,13 @@ class SessionService:
             timeout_minutes = cfg.get("SESSION_TIMEOUT_MINUTES", 30)
             cutoff = timezone.now() - timezone.timedelta(minutes=timeout_minutes)
 
+            # O estado em cache está à frente do banco em modo buffered
+            state = SessionService._load_state(session_key)
+            if state:
+                if state["last_activity_at"] >= cutoff:
+                    return SessionService._from_state(session_key, state)
+                return None
+
             return (
                 AnalyticsSession.objects
                 .filter(
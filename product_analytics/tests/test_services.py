@@ -4,15 +4,21 @@ Testes para services do módulo Product Analytics.
 Cobre:
 - SessionService: get_or_create, timeout, close_session
 - EventService: record, _filter_metadata, _is_valid_event_type, deduplicação
+- Modo buffered: gravação em lote e consolidação das atualizações de sessão
+- Estado da sessão em cache: page_view sem consultas e linha write-behind,
+  gravada também para sessões abandonadas
 """
+import time
 from unittest.mock import patch
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 from product_analytics.models import AnalyticsSession, ProductEvent
-from product_analytics.services.session_service import SessionService
+from product_analytics.services.session_service import SESSION_CACHE_KEY, SessionService
 from product_analytics.services.event_service import EventService
+from product_analytics.services.event_buffer import SESSION_TOUCH, analytics_buffer, write_analytics_batch
 
 ANALYTICS_SYNC_SETTINGS = {
     "PRODUCT_ANALYTICS": {
@@ -21,6 +27,14 @@ ANALYTICS_SYNC_SETTINGS = {
     }
 }
 
+ANALYTICS_BUFFERED_SETTINGS = {
+    "PRODUCT_ANALYTICS": {
+        "PROCESSING_MODE": "buffered",
+        "SESSION_TIMEOUT_MINUTES": 30,
+        "BATCH_SIZE": 100,
+    }
+}
+
 ANALYTICS_DISABLED_SETTINGS = {
     "PRODUCT_ANALYTICS": {
         "PROCESSING_MODE": "disabled",
@@ -304,3 +318,180 @@ class EventServiceTest(TestCase):
         self.assertIn("result_count", result)
         self.assertNotIn("nested_dict", result)
         self.assertNotIn("a_list", result)
+
+
+@override_settings(**ANALYTICS_BUFFERED_SETTINGS)
+class BufferedModeTest(TestCase):
+    """Testa o modo buffered (event_buffer)."""
+
+    SESSION_KEY = "buffkey1234567890123456789012345678"
+
+    def setUp(self):
+        analytics_buffer.flush()
+        # Sem thread de descarga: o teste chama flush() diretamente
+        patcher = patch.object(analytics_buffer, "_ensure_worker")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(analytics_buffer.flush)
+        self.user = User.objects.create_user(
+            username="usuario_buffer",
+            password="senha123",
+        )
+
+    def _page_view(self, page_name, user=None):
+        session = SessionService.get_or_create(
+            session_key=self.SESSION_KEY, user=user, page_name=page_name,
+        )
+        EventService.record(
+            event_type="page_view", session=session, user=user, page_name=page_name,
+        )
+        return session
+
+    def test_events_are_written_in_one_batch(self):
+        session = self._page_view("home")
+        self._page_view("library")
+        self._page_view("book_detail")
+        self.assertEqual(ProductEvent.objects.count(), 0)
+
+        with self.assertNumQueries(3):  # dedup + bulk_create + 1 UPDATE de sessão
+            analytics_buffer.flush()
+
+        self.assertEqual(
+            list(ProductEvent.objects.order_by("created_at").values_list("page_name", flat=True)),
+            ["home", "library", "book_detail"],
+        )
+        self.assertEqual(set(ProductEvent.objects.values_list("session_id", flat=True)), {session.pk})
+
+    def test_session_updates_are_coalesced(self):
+        session = self._page_view("home")
+        first_activity = session.last_activity_at
+        self._page_view("library")
+        self._page_view("search", user=self.user)
+
+        with patch.object(AnalyticsSession, "save") as save:
+            self._page_view("catalog")
+        save.assert_not_called()
+
+        session.refresh_from_db()
+        self.assertEqual(session.exit_page, "home")
+
+        analytics_buffer.flush()
+        session.refresh_from_db()
+        self.assertEqual(session.exit_page, "catalog")
+        self.assertEqual(session.user, self.user)
+        self.assertTrue(session.is_authenticated)
+        self.assertGreater(session.last_activity_at, first_activity)
+
+    def test_repeated_page_view_is_deduplicated_across_batches(self):
+        self._page_view("home")
+        analytics_buffer.flush()
+        self._page_view("home")
+        self._page_view("home")
+        self._page_view("library")
+        analytics_buffer.flush()
+
+        self.assertEqual(
+            list(ProductEvent.objects.order_by("created_at").values_list("page_name", flat=True)),
+            ["home", "library"],
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    **ANALYTICS_BUFFERED_SETTINGS,
+)
+class CachedSessionStateTest(TestCase):
+    """Testa o estado da sessão ativa em cache (write-behind em modo buffered)."""
+
+    SESSION_KEY = "cachekey123456789012345678901234567"
+
+    def setUp(self):
+        cache.clear()
+        analytics_buffer.flush()
+        patcher = patch.object(analytics_buffer, "_ensure_worker")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(analytics_buffer.flush)
+
+    def _page_view(self, page_name):
+        session = SessionService.get_or_create(session_key=self.SESSION_KEY, page_name=page_name)
+        EventService.record(event_type="page_view", session=session, page_name=page_name)
+        return session
+
+    def test_known_session_page_view_runs_no_queries(self):
+        first = self._page_view("home")
+
+        with self.assertNumQueries(0):
+            second = self._page_view("library")
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.exit_page, "library")
+
+    def test_row_is_written_behind_and_on_expiry(self):
+        first = self._page_view("home")
+        self._page_view("library")
+        analytics_buffer.flush()
+        first.refresh_from_db()
+        self.assertEqual(first.exit_page, "home")  # dentro do intervalo de write-behind
+
+        # Visita após o timeout: a atividade final é gravada e a sessão encerrada
+        key = SESSION_CACHE_KEY.format(self.SESSION_KEY)
+        state = cache.get(key)
+        state["last_activity_at"] -= timezone.timedelta(hours=1)
+        cache.set(key, state)
+        new_session = self._page_view("search")
+
+        self.assertNotEqual(new_session.pk, first.pk)
+        first.refresh_from_db()
+        self.assertEqual(first.exit_page, "library")
+        self.assertIsNotNone(first.ended_at)
+
+    @override_settings(PRODUCT_ANALYTICS={"PROCESSING_MODE": "buffered", "SESSION_FLUSH_INTERVAL_SECONDS": 0})
+    def test_activity_is_flushed_after_interval(self):
+        first = self._page_view("home")
+        self._page_view("library")
+        analytics_buffer.flush()
+
+        first.refresh_from_db()
+        self.assertEqual(first.exit_page, "library")
+
+    def test_idle_session_activity_is_flushed_without_revisit(self):
+        first = self._page_view("home")
+        self._page_view("library")
+        analytics_buffer.flush()
+        first.refresh_from_db()
+        self.assertEqual(first.exit_page, "home")
+
+        # Sessão abandonada: ninguém volta, a thread do buffer grava após o intervalo
+        later = time.monotonic() + 61
+        with patch("product_analytics.services.event_buffer.time.monotonic", return_value=later):
+            analytics_buffer.flush()
+
+        first.refresh_from_db()
+        self.assertEqual(first.exit_page, "library")
+        self.assertGreater(first.last_activity_at, first.started_at)
+        self.assertEqual(analytics_buffer.flush(), 0)  # nada mais pendente
+
+    def test_stale_activity_does_not_rewind_closed_session(self):
+        session = self._page_view("home")
+        self._page_view("library")
+        state = cache.get(SESSION_CACHE_KEY.format(self.SESSION_KEY))
+        stale = {"session_id": session.pk, "last_activity_at": session.started_at, "exit_page": "home"}
+
+        self.assertTrue(SessionService.close_session(self.SESSION_KEY))
+        write_analytics_batch([(SESSION_TOUCH, stale)])
+
+        session.refresh_from_db()
+        self.assertEqual(session.exit_page, "library")
+        self.assertEqual(session.last_activity_at, state["last_activity_at"])
+
+    def test_close_session_writes_cached_state(self):
+        session = self._page_view("home")
+        self._page_view("library")
+
+        self.assertTrue(SessionService.close_session(self.SESSION_KEY))
+
+        session.refresh_from_db()
+        self.assertEqual(session.exit_page, "library")
+        self.assertIsNotNone(session.ended_at)
+        self.assertIsNone(cache.get(SESSION_CACHE_KEY.format(self.SESSION_KEY)))
@@ -28,6 +28,11 @@ def get_analytics_settings() -> dict:
         "SESSION_TIMEOUT_MINUTES": 30,
         "EVENT_RETENTION_DAYS": 90,
         "SESSION_RETENTION_DAYS": 90,
+        # Modo 'buffered'
+        "BATCH_SIZE": 100,
+        "FLUSH_INTERVAL_SECONDS": 2.0,
+        "MAX_BUFFER_SIZE": 10000,
+        "SESSION_FLUSH_INTERVAL_SECONDS": 60,
     }
     user_settings = getattr(settings, "PRODUCT_ANALYTICS", {})
     return {**defaults, **user_settings}
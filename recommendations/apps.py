@@ -13,4 +13,5 @@ class RecommendationsConfig(AppConfig):
         App initialization.
         Nota: sklearn foi removido do sistema de recomendações.
         """
-        pass
+        # Acumuladores de pontos do perfil literário de IA
+        import recommendations.signals  # noqa: F401
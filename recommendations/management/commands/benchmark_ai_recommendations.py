@@ -0,0 +1,143 @@
+"""
+Benchmark da pontuação de livros das recomendações personalizadas (IA).
+Uso: python manage.py benchmark_ai_recommendations --books 50000 --runs 5
+
+Cria um catálogo sintético dentro de uma transação que é desfeita no final
+(nada fica gravado no banco) e compara:
+  1. a ordenação antiga: materializa todos os livros elegíveis e ordena em
+     Python com sorted(key=book_score);
+  2. a pontuação no banco: CASE/WHEN sobre os pesos do perfil com
+     ORDER BY ai_score LIMIT n (BookRecommendationService.score_books_for_profile).
+
+Também confere que as duas abordagens retornam os mesmos scores.
+"""
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import Author, Book, Category
+from recommendations.services.recommendation_service import BookRecommendationService
+
+
+class _Rollback(Exception):
+    """Desfaz o catálogo sintético ao final do benchmark."""
+
+
+class Command(BaseCommand):
+    help = 'Compara a ordenação em Python com a pontuação no banco das recomendações personalizadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=50000, help='Livros no catálogo sintético')
+        parser.add_argument('--categories', type=int, default=200, help='Categorias no catálogo sintético')
+        parser.add_argument('--authors', type=int, default=5000, help='Autores no catálogo sintético')
+        parser.add_argument('--interests', type=int, default=15,
+                            help='Categorias e autores com peso no perfil simulado')
+        parser.add_argument('--limit', type=int, default=6, help='Livros recomendados por chamada')
+        parser.add_argument('--runs', type=int, default=5, help='Execuções por cenário')
+
+    def handle(self, *args, **options):
+        self.stdout.write("=" * 70)
+        self.stdout.write("  ⏱️  BENCHMARK - PONTUAÇÃO DAS RECOMENDAÇÕES PERSONALIZADAS")
+        self.stdout.write("=" * 70)
+
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("\n🧹 Catálogo sintético removido (rollback)")
+
+    def _run(self, options):
+        rng = random.Random(42)
+        limit = options['limit']
+
+        start = time.perf_counter()
+        categories, authors = self._seed_catalog(options, rng)
+        self.stdout.write(
+            f"\n📚 Catálogo: {options['books']} livros, {len(categories)} categorias, "
+            f"{len(authors)} autores ({time.perf_counter() - start:.1f}s)"
+        )
+
+        interests = min(options['interests'], len(categories), len(authors))
+        categories_interest = {c.name: round(rng.uniform(0.1, 1.0), 2) for c in rng.sample(categories, interests)}
+        authors_interest = {a.name: round(rng.uniform(0.1, 1.0), 2) for a in rng.sample(authors, interests)}
+        category_names = list(categories_interest)
+        author_names = list(authors_interest)
+
+        def python_sorted():
+            books_qs = Book.objects.filter(
+                Q(category__name__in=category_names) | Q(author__name__in=author_names)
+            ).filter(cover_image__isnull=False).exclude(
+                cover_image=''
+            ).select_related('author', 'category').distinct()
+
+            def book_score(b):
+                score = 0.0
+                if b.category and b.category.name in categories_interest:
+                    score += categories_interest[b.category.name]
+                if b.author and b.author.name in authors_interest:
+                    score += authors_interest[b.author.name] * BookRecommendationService.AUTHOR_WEIGHT_FACTOR
+                return score
+
+            ranked = sorted(books_qs, key=book_score, reverse=True)[:limit]
+            return [round(book_score(b), 6) for b in ranked]
+
+        def database_scored():
+            ranked = BookRecommendationService.score_books_for_profile(
+                categories_interest, authors_interest, category_names, author_names
+            )[:limit]
+            return [round(b.ai_score, 6) for b in ranked]
+
+        legacy_scores = self._measure("Ordenação em Python (sorted)", python_sorted, options['runs'])
+        db_scores = self._measure("Pontuação no banco (CASE/WHEN + LIMIT)", database_scored, options['runs'])
+
+        if legacy_scores != db_scores:
+            raise CommandError(f"Scores divergentes: python={legacy_scores} banco={db_scores}")
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Mesmos scores nas duas abordagens: {db_scores}"))
+
+    def _seed_catalog(self, options, rng):
+        Category.objects.bulk_create(
+            Category(name=f'Bench Categoria {i}', slug=f'bench-categoria-{i}')
+            for i in range(options['categories'])
+        )
+        Author.objects.bulk_create(
+            Author(name=f'Bench Autor {i}', slug=f'bench-autor-{i}')
+            for i in range(options['authors'])
+        )
+        # bulk_create nem sempre devolve pk (ex.: SQLite antigo); relê do banco
+        categories = list(Category.objects.filter(slug__startswith='bench-categoria-'))
+        authors = list(Author.objects.filter(slug__startswith='bench-autor-'))
+
+        Book.objects.bulk_create(
+            (
+                Book(
+                    title=f'Bench Livro {i}',
+                    slug=f'bench-livro-{i}',
+                    author=rng.choice(authors),
+                    category=rng.choice(categories),
+                    cover_image=f'books/covers/bench-{i % 100}.jpg' if i % 10 else '',
+                    publication_date=date(2000, 1, 1),
+                )
+                for i in range(options['books'])
+            ),
+            batch_size=2000,
+        )
+        return categories, authors
+
+    def _measure(self, label, func, runs):
+        timings, result = [], None
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"\n📊 {label}\n"
+            f"   execuções: {runs} | p50: {statistics.median(timings) * 1000:.1f}ms | "
+            f"máx: {max(timings) * 1000:.1f}ms"
+        )
+        return result
@@ -0,0 +1,48 @@
+"""
+Reconstrói os acumuladores de pontos (AIReaderPoints) e os pesos do perfil
+literário de IA a partir de todo o histórico de estantes, avaliações e
+interações.
+
+Uso:
+    python manage.py rebuild_reader_profiles              # todos os perfis existentes
+    python manage.py rebuild_reader_profiles --user joao  # apenas um usuário
+
+Os signals mantêm os acumuladores por delta; este comando corrige o que não
+passa por eles (queryset.update(), bulk_create, livros que trocaram de
+categoria ou autor).
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.models import AIReaderProfile
+from recommendations.services.reader_profile_service import ReaderProfileService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero os pontos e pesos do perfil literário de IA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username de um único usuário')
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        if username:
+            user = User.objects.filter(username=username).first()
+            if not user:
+                raise CommandError(f"Usuário '{username}' não encontrado")
+            users = [user]
+        else:
+            users = User.objects.filter(
+                pk__in=AIReaderProfile.objects.values('user_id')
+            ).order_by('pk').iterator(chunk_size=200)
+
+        rebuilt = failed = 0
+        for user in users:
+            try:
+                ReaderProfileService.update_profile_weights(user, rebuild=True)
+                rebuilt += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"❌ {user.username}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {rebuilt} perfis reconstruídos ({failed} falhas)"))
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_interests(apps, schema_editor):
+    AIReaderProfile = apps.get_model('recommendations', 'AIReaderProfile')
+    AIReaderInterest = apps.get_model('recommendations', 'AIReaderInterest')
+
+    batch = []
+    for profile in AIReaderProfile.objects.only('id', 'categories_interest', 'authors_interest').iterator(chunk_size=500):
+        for kind, interests in (('category', profile.categories_interest), ('author', profile.authors_interest)):
+            for key, score in (interests or {}).items():
+                batch.append(AIReaderInterest(profile_id=profile.id, kind=kind, key=key[:200], score=float(score)))
+        if len(batch) >= 2000:
+            AIReaderInterest.objects.bulk_create(batch)
+            batch = []
+    AIReaderInterest.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_aireaderprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIReaderInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Categoria'), ('author', 'Autor')], max_length=10, verbose_name='Tipo')),
+                ('key', models.CharField(max_length=200, verbose_name='Categoria/Autor')),
+                ('score', models.FloatField(verbose_name='Afinidade')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interests', to='recommendations.aireaderprofile', verbose_name='Perfil')),
+            ],
+            options={
+                'verbose_name': 'Afinidade do Perfil de IA',
+                'verbose_name_plural': 'Afinidades dos Perfis de IA',
+                'db_table': 'recommendations_ai_reader_interest',
+                'indexes': [models.Index(fields=['kind', 'key', '-score'], name='idx_ai_interest_lookup')],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'kind', 'key'), name='uniq_ai_interest_profile_kind_key')],
+            },
+        ),
+        migrations.RunPython(backfill_interests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_ai_reader_interest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aireaderprofile',
+            name='points_initialized',
+            field=models.BooleanField(default=False, help_text='Indica se os acumuladores de pontos (AIReaderPoints) já foram montados para este usuário', verbose_name='Pontos Acumulados'),
+        ),
+        migrations.CreateModel(
+            name='AIReaderPoints',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Categoria'), ('author', 'Autor')], max_length=10, verbose_name='Tipo')),
+                ('key', models.CharField(max_length=200, verbose_name='Categoria/Autor')),
+                ('points', models.IntegerField(default=0, verbose_name='Pontos')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_reader_points', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Pontos do Perfil de IA',
+                'verbose_name_plural': 'Pontos dos Perfis de IA',
+                'db_table': 'recommendations_ai_reader_points',
+                'constraints': [models.UniqueConstraint(fields=('user', 'kind', 'key'), name='uniq_ai_points_user_kind_key')],
+            },
+        ),
+    ]
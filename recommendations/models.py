@@ -261,6 +261,12 @@ class AIReaderProfile(models.Model):
         verbose_name="Último Cálculo"
     )
 
+    points_initialized = models.BooleanField(
+        default=False,
+        verbose_name="Pontos Acumulados",
+        help_text="Indica se os acumuladores de pontos (AIReaderPoints) já foram montados para este usuário"
+    )
+
     class Meta:
         db_table = 'recommendations_ai_reader_profile'
         verbose_name = "Perfil Literário de IA"
@@ -269,3 +275,93 @@ class AIReaderProfile(models.Model):
     def __str__(self):
         return f"AI Profile: {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Mantém o índice normalizado de afinidades em sincronia com os JSONs
+        self.sync_interest_index()
+
+    def sync_interest_index(self):
+        """
+        Reescreve as linhas de AIReaderInterest deste perfil a partir de
+        categories_interest/authors_interest (no máximo ~20 linhas por perfil).
+        """
+        rows = [
+            AIReaderInterest(profile=self, kind=kind, key=key[:200], score=float(score))
+            for kind, interests in (
+                (AIReaderInterest.KIND_CATEGORY, self.categories_interest),
+                (AIReaderInterest.KIND_AUTHOR, self.authors_interest),
+            )
+            for key, score in (interests or {}).items()
+        ]
+        AIReaderInterest.objects.filter(profile=self).delete()
+        AIReaderInterest.objects.bulk_create(rows)
+
+
+class AIReaderInterest(models.Model):
+    """
+    Representação normalizada e indexada das afinidades do AIReaderProfile.
+    Permite consultas como "usuários com afinidade >= 0.6 pela categoria X"
+    em uma única query por índice, sem varrer os JSONs de todos os perfis.
+    """
+    KIND_CATEGORY = 'category'
+    KIND_AUTHOR = 'author'
+    KIND_CHOICES = [
+        (KIND_CATEGORY, 'Categoria'),
+        (KIND_AUTHOR, 'Autor'),
+    ]
+
+    profile = models.ForeignKey(
+        AIReaderProfile,
+        on_delete=models.CASCADE,
+        related_name='interests',
+        verbose_name="Perfil"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Tipo")
+    key = models.CharField(max_length=200, verbose_name="Categoria/Autor")
+    score = models.FloatField(verbose_name="Afinidade")
+
+    class Meta:
+        db_table = 'recommendations_ai_reader_interest'
+        verbose_name = "Afinidade do Perfil de IA"
+        verbose_name_plural = "Afinidades dos Perfis de IA"
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'kind', 'key'], name='uniq_ai_interest_profile_kind_key'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'key', '-score'], name='idx_ai_interest_lookup'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.user.username} - {self.kind}: {self.key} ({self.score})"
+
+
+
+class AIReaderPoints(models.Model):
+    """
+    Acumulador de pontos brutos por (usuário, categoria) e (usuário, autor).
+
+    Atualizado por delta pelos signals de BookShelf, BookReview e
+    UserBookInteraction (recommendations/signals.py). A normalização dos
+    pesos do AIReaderProfile lê apenas estas linhas, sem reprocessar todo o
+    histórico do usuário; o comando rebuild_reader_profiles recalcula tudo.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ai_reader_points',
+        verbose_name="Usuário"
+    )
+    kind = models.CharField(max_length=10, choices=AIReaderInterest.KIND_CHOICES, verbose_name="Tipo")
+    key = models.CharField(max_length=200, verbose_name="Categoria/Autor")
+    points = models.IntegerField(default=0, verbose_name="Pontos")
+
+    class Meta:
+        db_table = 'recommendations_ai_reader_points'
+        verbose_name = "Pontos do Perfil de IA"
+        verbose_name_plural = "Pontos dos Perfis de IA"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'key'], name='uniq_ai_points_user_kind_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.kind}: {self.key} ({self.points})"
@@ -1,10 +1,12 @@
 import json
 import logging
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.contrib.auth.models import User
 from core.models import Book, Category, Author
 from accounts.models import BookShelf, BookReview
-from recommendations.models import AIReaderProfile, UserBookInteraction
+from recommendations.models import AIReaderInterest, AIReaderPoints, AIReaderProfile, UserBookInteraction
 from core.services.ai_provider_service import AIProviderFactory
 
 logger = logging.getLogger(__name__)
@@ -23,119 +25,147 @@ class ReaderProfileService:
         profile, created = AIReaderProfile.objects.get_or_create(user=user)
         return profile
 
+    # Pontos por prateleira (demais tipos, ex.: custom, valem DEFAULT_SHELF_POINTS)
+    SHELF_POINTS = {
+        'favorites': 10,
+        'read': 6,
+        'reading': 5,
+        'to_read': 3,
+        'abandoned': -3,
+    }
+    DEFAULT_SHELF_POINTS = 2
+    TOP_INTERESTS = 10
+
     @classmethod
-    def update_profile_weights(cls, user) -> AIReaderProfile:
+    def shelf_points(cls, shelf_type) -> int:
+        return cls.SHELF_POINTS.get(shelf_type, cls.DEFAULT_SHELF_POINTS)
+
+    @staticmethod
+    def review_points(rating) -> int:
+        rating = float(rating)
+        if rating >= 4.0:
+            return 8
+        if rating >= 3.0:
+            return 4
+        return -4
+
+    @staticmethod
+    def interaction_points(interaction_type) -> int:
+        if interaction_type in ('read', 'completed'):
+            return 3
+        if interaction_type == 'wishlist':
+            return 2
+        return 1
+
+    @classmethod
+    def update_profile_weights(cls, user, rebuild=False) -> AIReaderProfile:
         """
-        Analisa as interações do usuário no banco de dados e calcula pesos de
-        afinidade (de 0.0 a 1.0) para categorias e autores.
+        Calcula pesos de afinidade (de 0.0 a 1.0) para categorias e autores a
+        partir dos acumuladores de pontos (AIReaderPoints), mantidos por delta
+        pelos signals de estantes, avaliações e interações.
+
+        Na primeira vez (ou com rebuild=True) os acumuladores são montados
+        a partir de todo o histórico do usuário (rebuild_profile_points).
         """
         profile = cls.get_or_create_profile(user)
-        
-        category_points = {}
-        author_points = {}
+        if rebuild or not profile.points_initialized:
+            cls.rebuild_profile_points(user, profile)
 
-        # 1. Analisar itens nas prateleiras (BookShelf)
-        shelves = BookShelf.objects.filter(user=user).select_related('book', 'book__category', 'book__author')
-        for item in shelves:
-            book = item.book
-            
-            # Definir pontuação pelo tipo de prateleira
-            points = 2
-            if item.shelf_type == 'favorites':
-                points = 10
-            elif item.shelf_type == 'read':
-                points = 6
-            elif item.shelf_type == 'reading':
-                points = 5
-            elif item.shelf_type == 'to_read':
-                points = 3
-            elif item.shelf_type == 'abandoned':
-                points = -3
-                
-            # Categoria
-            if book.category:
-                cat_name = book.category.name
-                category_points[cat_name] = category_points.get(cat_name, 0) + points
-                
-            # Autor
-            if book.author:
-                aut_name = book.author.name
-                author_points[aut_name] = author_points.get(aut_name, 0) + points
-
-        # 2. Analisar avaliações (BookReview)
-        reviews = BookReview.objects.filter(user=user).select_related('book', 'book__category', 'book__author')
-        for r in reviews:
-            book = r.book
-            rating = float(r.rating)
-            
-            # Pontuação por avaliação
-            points = 0
-            if rating >= 4.0:
-                points = 8
-            elif rating >= 3.0:
-                points = 4
-            else:
-                points = -4
-                
-            # Categoria
-            if book.category:
-                cat_name = book.category.name
-                category_points[cat_name] = category_points.get(cat_name, 0) + points
-                
-            # Autor
-            if book.author:
-                aut_name = book.author.name
-                author_points[aut_name] = author_points.get(aut_name, 0) + points
-
-        # 3. Analisar interações menores (UserBookInteraction)
-        interactions = UserBookInteraction.objects.filter(user=user).select_related('book', 'book__category', 'book__author')
-        for inter in interactions:
-            book = inter.book
-            
-            # Pontuação por tipo de interação
-            points = 1
-            if inter.interaction_type in ('read', 'completed'):
-                points = 3
-            elif inter.interaction_type == 'wishlist':
-                points = 2
-                
-            # Categoria
-            if book.category:
-                cat_name = book.category.name
-                category_points[cat_name] = category_points.get(cat_name, 0) + points
-                
-            # Autor
-            if book.author:
-                aut_name = book.author.name
-                author_points[aut_name] = author_points.get(aut_name, 0) + points
-
-        # Normalizar pesos de 0.0 a 1.0
-        # Categorias
-        normalized_categories = {}
-        if category_points:
-            max_cat_points = max(1, max(category_points.values()))
-            # Filtra pontuações menores ou iguais a zero
-            for cat, pts in category_points.items():
-                if pts > 0:
-                    normalized_categories[cat] = round(pts / max_cat_points, 2)
-                    
-        # Autores
-        normalized_authors = {}
-        if author_points:
-            max_aut_points = max(1, max(author_points.values()))
-            for aut, pts in author_points.items():
-                if pts > 0:
-                    normalized_authors[aut] = round(pts / max_aut_points, 2)
-
-        # Ordenar e limitar top 10 categorias/autores
-        sorted_categories = dict(sorted(normalized_categories.items(), key=lambda x: x[1], reverse=True)[:10])
-        sorted_authors = dict(sorted(normalized_authors.items(), key=lambda x: x[1], reverse=True)[:10])
-
-        profile.categories_interest = sorted_categories
-        profile.authors_interest = sorted_authors
+        rows = AIReaderPoints.objects.filter(user=user, points__gt=0).order_by('-points', 'key')
+        points_by_kind = {AIReaderInterest.KIND_CATEGORY: [], AIReaderInterest.KIND_AUTHOR: []}
+        for kind, key, points in rows.values_list('kind', 'key', 'points'):
+            points_by_kind[kind].append((key, points))
+
+        def normalize(items):
+            # Normalizar pelo maior valor e manter o top 10
+            if not items:
+                return {}
+            max_points = max(1, items[0][1])
+            return {key: round(points / max_points, 2) for key, points in items[:cls.TOP_INTERESTS]}
+
+        profile.categories_interest = normalize(points_by_kind[AIReaderInterest.KIND_CATEGORY])
+        profile.authors_interest = normalize(points_by_kind[AIReaderInterest.KIND_AUTHOR])
         profile.save()
         return profile
 
+    @classmethod
+    def rebuild_profile_points(cls, user, profile=None) -> dict:
+        """
+        Recalcula do zero os acumuladores de pontos do usuário, varrendo
+        estantes, avaliações e interações (uma query enxuta por fonte).
+        Retorna {(tipo, chave): pontos}.
+        """
+        profile = profile or cls.get_or_create_profile(user)
+        totals = {}
+
+        def add(category_name, author_name, points):
+            for kind, key in cls._points_keys(category_name, author_name):
+                totals[(kind, key)] = totals.get((kind, key), 0) + points
+
+        # 1. Itens nas prateleiras (BookShelf)
+        for shelf_type, category_name, author_name in BookShelf.objects.filter(user=user).values_list(
+            'shelf_type', 'book__category__name', 'book__author__name'
+        ):
+            add(category_name, author_name, cls.shelf_points(shelf_type))
+
+        # 2. Avaliações (BookReview)
+        for rating, category_name, author_name in BookReview.objects.filter(user=user).values_list(
+            'rating', 'book__category__name', 'book__author__name'
+        ):
+            add(category_name, author_name, cls.review_points(rating))
+
+        # 3. Interações menores (UserBookInteraction)
+        for interaction_type, category_name, author_name in UserBookInteraction.objects.filter(user=user).values_list(
+            'interaction_type', 'book__category__name', 'book__author__name'
+        ):
+            add(category_name, author_name, cls.interaction_points(interaction_type))
+
+        with transaction.atomic():
+            AIReaderPoints.objects.filter(user=user).delete()
+            AIReaderPoints.objects.bulk_create(
+                AIReaderPoints(user=user, kind=kind, key=key, points=points)
+                for (kind, key), points in totals.items()
+            )
+            AIReaderProfile.objects.filter(pk=profile.pk).update(points_initialized=True)
+        profile.points_initialized = True
+        return totals
+
+    @staticmethod
+    def _points_keys(category_name, author_name):
+        keys = []
+        if category_name:
+            keys.append((AIReaderInterest.KIND_CATEGORY, category_name[:200]))
+        if author_name:
+            keys.append((AIReaderInterest.KIND_AUTHOR, author_name[:200]))
+        return keys
+
+    @classmethod
+    def apply_points_delta(cls, user_id, book_id, delta):
+        """
+        Soma delta aos acumuladores de categoria e autor do livro para o
+        usuário. Ignorado enquanto o perfil não tiver acumuladores montados
+        (o rebuild da primeira atualização já considera o histórico todo).
+        """
+        if not delta or not book_id:
+            return
+        if not AIReaderProfile.objects.filter(user_id=user_id, points_initialized=True).exists():
+            return
+
+        names = Book.objects.filter(pk=book_id).values_list('category__name', 'author__name').first()
+        if not names:
+            return
+
+        for kind, key in cls._points_keys(*names):
+            lookup = {'user_id': user_id, 'kind': kind, 'key': key}
+            if AIReaderPoints.objects.filter(**lookup).update(points=F('points') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    AIReaderPoints.objects.create(points=delta, **lookup)
+            except IntegrityError:
+                # Criado em paralelo por outra requisição
+                AIReaderPoints.objects.filter(**lookup).update(points=F('points') + delta)
+
     @classmethod
     def generate_profile_summary_ai(cls, user, force=False) -> AIReaderProfile:
         """
@@ -1,5 +1,5 @@
 import logging
-from django.db.models import Count, Q
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
 from core.models import Book
 from accounts.models import BookShelf
 from core.utils.google_books_api import search_books
@@ -171,6 +171,42 @@ class BookRecommendationService:
             logger.error(f"Erro ao buscar recomendações do Google Books para {book.title}: {str(e)}")
             return []
 
+    # Peso do autor em relação ao da categoria na pontuação personalizada
+    AUTHOR_WEIGHT_FACTOR = 1.5
+
+    @staticmethod
+    def score_books_for_profile(categories_interest, authors_interest, categories, authors):
+        """
+        Livros com capa da categoria ou autor de interesse, anotados com
+        ai_score (peso da categoria + peso do autor x AUTHOR_WEIGHT_FACTOR) e
+        ordenados do maior para o menor score.
+
+        A pontuação é um CASE/WHEN sobre os pesos do AIReaderProfile, então o
+        banco devolve apenas os primeiros livros após o fatiamento ([:limit])
+        em vez de materializar todo o catálogo elegível para ordenar em Python.
+        Empates seguem a ordenação padrão de Book (mais recentes primeiro).
+        """
+        def weight_case(lookup, weights, factor=1.0):
+            whens = [
+                When(**{lookup: name}, then=Value(float(weight) * factor))
+                for name, weight in weights.items()
+            ]
+            if not whens:
+                return Value(0.0)
+            return Case(*whens, default=Value(0.0), output_field=FloatField())
+
+        return Book.objects.filter(
+            Q(category__name__in=categories) | Q(author__name__in=authors)
+        ).filter(
+            cover_image__isnull=False
+        ).exclude(
+            cover_image=''
+        ).select_related('author', 'category').annotate(
+            ai_score=weight_case('category__name', categories_interest or {})
+            + weight_case('author__name', authors_interest or {},
+                          BookRecommendationService.AUTHOR_WEIGHT_FACTOR),
+        ).order_by(F('ai_score').desc(), '-created_at', '-pk')
+
     @staticmethod
     def get_ai_personalized_recommendations(user, limit=6) -> dict:
         """
@@ -199,25 +235,12 @@ class BookRecommendationService:
         if not authors:
             authors = ['J.R.R. Tolkien', 'George Orwell', 'Stephen King']
 
-        # 2. Recomendar LIVROS
-        books_qs = Book.objects.filter(
-            Q(category__name__in=categories) | Q(author__name__in=authors)
-        ).filter(
-            cover_image__isnull=False
-        ).exclude(
-            cover_image=''
-        ).select_related('author', 'category').distinct()
-        
-        def book_score(b):
-            score = 0.0
-            if b.category and b.category.name in profile.categories_interest:
-                score += profile.categories_interest[b.category.name]
-            if b.author and b.author.name in profile.authors_interest:
-                score += profile.authors_interest[b.author.name] * 1.5
-            return score
-            
-        recommended_books = sorted(books_qs, key=book_score, reverse=True)[:limit]
-        
+        # 2. Recomendar LIVROS (pontuação e ordenação no banco, ORDER BY score LIMIT n)
+        books_qs = BookRecommendationService.score_books_for_profile(
+            profile.categories_interest, profile.authors_interest, categories, authors
+        )
+        recommended_books = list(books_qs[:limit])
+
         if len(recommended_books) < limit:
             needed = limit - len(recommended_books)
             additional_books = Book.objects.filter(
@@ -0,0 +1,87 @@
+"""
+Signals que mantêm os acumuladores de pontos do perfil literário de IA
+(AIReaderPoints) atualizados por delta.
+
+Cada save/delete de BookShelf, BookReview ou UserBookInteraction remove os
+pontos da versão anterior do registro e soma os da nova, sem reprocessar o
+histórico do usuário. Mudanças que não passam por signals (queryset.update(),
+bulk_create, troca de categoria/autor de um livro) são corrigidas pelo comando
+rebuild_reader_profiles.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+import logging
+
+from recommendations.services.reader_profile_service import ReaderProfileService
+
+logger = logging.getLogger(__name__)
+
+# Modelo -> (campo que define os pontos, função de pontuação)
+POINT_SOURCES = {
+    'BookShelf': ('shelf_type', ReaderProfileService.shelf_points),
+    'BookReview': ('rating', ReaderProfileService.review_points),
+    'UserBookInteraction': ('interaction_type', ReaderProfileService.interaction_points),
+}
+
+
+def _source(sender):
+    return POINT_SOURCES.get(sender.__name__)
+
+
+def _contribution(user_id, book_id, points):
+    return (user_id, book_id, points) if user_id and book_id else None
+
+
+def _apply(contribution, sign):
+    if contribution:
+        user_id, book_id, points = contribution
+        ReaderProfileService.apply_points_delta(user_id, book_id, sign * points)
+
+
+def _relevant(field, update_fields):
+    return update_fields is None or bool({field, 'user', 'book'} & set(update_fields))
+
+
+@receiver(pre_save, sender='accounts.BookShelf')
+@receiver(pre_save, sender='accounts.BookReview')
+@receiver(pre_save, sender='recommendations.UserBookInteraction')
+def capture_previous_points(sender, instance, update_fields=None, **kwargs):
+    """Guarda a contribuição da versão atual do registro antes do save."""
+    field, scorer = _source(sender)
+    instance._ai_points_previous = None
+    if not instance.pk or not _relevant(field, update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('user_id', 'book_id', field).first()
+    if previous:
+        instance._ai_points_previous = _contribution(previous[0], previous[1], scorer(previous[2]))
+
+
+@receiver(post_save, sender='accounts.BookShelf')
+@receiver(post_save, sender='accounts.BookReview')
+@receiver(post_save, sender='recommendations.UserBookInteraction')
+def apply_points_on_save(sender, instance, update_fields=None, **kwargs):
+    """Troca a contribuição anterior do registro pela nova."""
+    field, scorer = _source(sender)
+    if not _relevant(field, update_fields):
+        return
+    try:
+        previous = getattr(instance, '_ai_points_previous', None)
+        current = _contribution(instance.user_id, instance.book_id, scorer(getattr(instance, field)))
+        if previous == current:
+            return
+        _apply(previous, -1)
+        _apply(current, 1)
+    except Exception as e:
+        logger.warning(f"[AI PROFILE] Falha ao atualizar pontos de {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender='accounts.BookShelf')
+@receiver(post_delete, sender='accounts.BookReview')
+@receiver(post_delete, sender='recommendations.UserBookInteraction')
+def remove_points_on_delete(sender, instance, **kwargs):
+    """Remove a contribuição do registro excluído."""
+    field, scorer = _source(sender)
+    try:
+        _apply(_contribution(instance.user_id, instance.book_id, scorer(getattr(instance, field))), -1)
+    except Exception as e:
+        logger.warning(f"[AI PROFILE] Falha ao remover pontos de {sender.__name__} {instance.pk}: {e}")
@@ -266,3 +266,188 @@ class SimpleRecommendationEngineTest(TestCase):
             self.assertIn('score', rec)
             self.assertIn('reason', rec)
             self.assertIsInstance(rec['score'], (int, float))
+
+
+class AIReaderInterestIndexTest(TestCase):
+    """Testes para o índice normalizado de afinidades do AIReaderProfile."""
+
+    def setUp(self):
+        from recommendations.models import AIReaderProfile
+
+        self.fan = User.objects.create_user(username='fan_fantasia', password='x')
+        self.casual = User.objects.create_user(username='casual', password='x')
+        self.inactive = User.objects.create_user(username='inativo', password='x', is_active=False)
+
+        AIReaderProfile.objects.create(
+            user=self.fan,
+            categories_interest={'Fantasia': 0.9},
+            authors_interest={'J.R.R. Tolkien': 0.7},
+        )
+        AIReaderProfile.objects.create(user=self.casual, categories_interest={'Fantasia': 0.3})
+        AIReaderProfile.objects.create(user=self.inactive, categories_interest={'Fantasia': 1.0})
+
+    def test_profile_save_syncs_interest_rows(self):
+        from recommendations.models import AIReaderInterest
+
+        profile = self.fan.ai_reader_profile
+        self.assertEqual(
+            set(AIReaderInterest.objects.filter(profile=profile).values_list('kind', 'key', 'score')),
+            {('category', 'Fantasia', 0.9), ('author', 'J.R.R. Tolkien', 0.7)},
+        )
+
+        profile.categories_interest = {'Terror': 0.5}
+        profile.save()
+        self.assertFalse(AIReaderInterest.objects.filter(profile=profile, key='Fantasia').exists())
+        self.assertTrue(AIReaderInterest.objects.filter(profile=profile, key='Terror').exists())
+
+    def test_interested_users_single_indexed_query(self):
+        from core.services.ai_notification_service import AINotificationService
+
+        with self.assertNumQueries(1):
+            users = list(AINotificationService.get_users_interested_in(category_name='Fantasia', threshold=0.6))
+        self.assertEqual(users, [self.fan])
+
+        by_author = AINotificationService.get_users_interested_in(author_name='J.R.R. Tolkien', threshold=0.6)
+        self.assertEqual(list(by_author), [self.fan])
+        self.assertFalse(AINotificationService.get_users_interested_in().exists())
+
+    def test_book_launch_fan_out_in_chunks(self):
+        from unittest.mock import patch
+        from core.services.ai_notification_service import AINotificationService
+        from recommendations.models import AIReaderProfile
+
+        extra = User.objects.create_user(username='fan_2', password='x')
+        AIReaderProfile.objects.create(user=extra, categories_interest={'Fantasia': 0.8})
+        category = Category.objects.create(name='Fantasia', slug='fantasia')
+        book = Book.objects.create(
+            title='O Hobbit', slug='o-hobbit', category=category, publication_date=date(1937, 9, 21)
+        )
+
+        with patch.object(AINotificationService, 'FANOUT_CHUNK_SIZE', 1), \
+                patch('core.services.ai_notification_service.SystemNotification.create_book_launch',
+                      side_effect=lambda book, users: len(users)) as create:
+            sent = AINotificationService.notify_book_launch(book)
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(create.call_count, 2)
+
+
+class AIPersonalizedBookScoringTest(TestCase):
+    """Testes para a pontuação dos livros personalizados feita no banco."""
+
+    def setUp(self):
+        from recommendations.models import AIReaderProfile
+
+        self.user = User.objects.create_user(username='leitor_ia', password='x')
+        fantasia = Category.objects.create(name='Fantasia', slug='fantasia')
+        terror = Category.objects.create(name='Terror', slug='terror')
+        tolkien = Author.objects.create(name='J.R.R. Tolkien', slug='tolkien')
+        king = Author.objects.create(name='Stephen King', slug='king')
+        AIReaderProfile.objects.create(
+            user=self.user,
+            categories_interest={'Fantasia': 0.9, 'Terror': 0.2},
+            authors_interest={'Stephen King': 0.5},
+        )
+
+        def book(title, author, category, cover='books/covers/capa.jpg'):
+            return Book.objects.create(title=title, author=author, category=category,
+                                       cover_image=cover, publication_date=date(2000, 1, 1))
+
+        self.it = book('It', king, terror)                     # 0.2 + 0.5 * 1.5 = 0.95
+        self.hobbit = book('O Hobbit', tolkien, fantasia)      # 0.9
+        self.cemiterio = book('O Cemitério', king, None)       # 0.75
+        self.dracula = book('Drácula', None, terror)           # 0.2
+        book('Sem Capa', king, fantasia, cover='')             # excluído
+
+    def test_books_ranked_by_profile_weights_in_database(self):
+        from recommendations.services.recommendation_service import BookRecommendationService
+
+        profile = self.user.ai_reader_profile
+        books_qs = BookRecommendationService.score_books_for_profile(
+            profile.categories_interest, profile.authors_interest,
+            list(profile.categories_interest), list(profile.authors_interest),
+        )
+        with self.assertNumQueries(1):
+            ranked = list(books_qs[:3])
+
+        self.assertEqual(ranked, [self.it, self.hobbit, self.cemiterio])
+        self.assertAlmostEqual(ranked[0].ai_score, 0.95)
+        self.assertIn('LIMIT 3', str(books_qs[:3].query))
+
+        recs = BookRecommendationService.get_ai_personalized_recommendations(self.user, limit=4)
+        self.assertEqual(recs['books'], [self.it, self.hobbit, self.cemiterio, self.dracula])
+
+    def test_benchmark_command_matches_python_ordering(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('benchmark_ai_recommendations', books=300, categories=10, authors=30,
+                     interests=4, runs=1, stdout=out)
+        self.assertIn('Mesmos scores', out.getvalue())
+        self.assertFalse(Book.objects.filter(slug__startswith='bench-livro-').exists())
+
+
+class AIReaderPointsIncrementalTest(TestCase):
+    """Testes para os acumuladores de pontos do perfil literário (atualização por delta)."""
+
+    def setUp(self):
+        from accounts.models import BookReview
+
+        self.user = User.objects.create_user(username='leitor_delta', password='x')
+        fantasia = Category.objects.create(name='Fantasia', slug='fantasia')
+        terror = Category.objects.create(name='Terror', slug='terror')
+        tolkien = Author.objects.create(name='J.R.R. Tolkien', slug='tolkien')
+        king = Author.objects.create(name='Stephen King', slug='king')
+        self.hobbit = Book.objects.create(title='O Hobbit', author=tolkien, category=fantasia,
+                                          publication_date=date(1937, 9, 21))
+        self.it = Book.objects.create(title='It', author=king, category=terror,
+                                      publication_date=date(1986, 9, 15))
+
+        self.shelf = BookShelf.objects.create(user=self.user, book=self.hobbit, shelf_type='favorites')
+        BookReview.objects.create(user=self.user, book=self.it, rating=2)
+
+    def _points(self):
+        from recommendations.models import AIReaderPoints
+        return dict(AIReaderPoints.objects.filter(user=self.user).values_list('key', 'points'))
+
+    def test_signals_update_points_by_delta_and_match_rebuild(self):
+        from recommendations.services.reader_profile_service import ReaderProfileService
+
+        profile = ReaderProfileService.update_profile_weights(self.user)
+        self.assertTrue(profile.points_initialized)
+        self.assertEqual(profile.categories_interest, {'Fantasia': 1.0})
+        self.assertEqual(self._points(), {'Fantasia': 10, 'J.R.R. Tolkien': 10, 'Terror': -4, 'Stephen King': -4})
+
+        # Deltas: favorites (10) -> reading (5); nova estante (+3) e interação (+3) em It
+        self.shelf.shelf_type = 'reading'
+        self.shelf.save()
+        BookShelf.objects.create(user=self.user, book=self.it, shelf_type='to_read')
+        interaction = UserBookInteraction.objects.create(user=self.user, book=self.it, interaction_type='read')
+        self.assertEqual(self._points(), {'Fantasia': 5, 'J.R.R. Tolkien': 5, 'Terror': 2, 'Stephen King': 2})
+
+        # A normalização lê apenas os acumuladores (perfil, pontos, save + índice de afinidades)
+        with self.assertNumQueries(5):
+            profile = ReaderProfileService.update_profile_weights(self.user)
+        self.assertEqual(profile.categories_interest, {'Fantasia': 1.0, 'Terror': 0.4})
+        self.assertEqual(profile.authors_interest, {'J.R.R. Tolkien': 1.0, 'Stephen King': 0.4})
+
+        interaction.delete()
+        incremental = self._points()
+        ReaderProfileService.rebuild_profile_points(self.user)
+        self.assertEqual(incremental, self._points())
+        self.assertEqual(incremental['Terror'], -1)
+
+    def test_rebuild_command_recovers_changes_outside_signals(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from recommendations.services.reader_profile_service import ReaderProfileService
+
+        ReaderProfileService.update_profile_weights(self.user)
+        BookShelf.objects.filter(pk=self.shelf.pk).update(shelf_type='abandoned')  # sem signals
+        self.assertEqual(self._points()['Fantasia'], 10)
+
+        call_command('rebuild_reader_profiles', stdout=StringIO())
+        self.assertEqual(self._points()['Fantasia'], -3)
+        self.user.ai_reader_profile.refresh_from_db()
+        self.assertEqual(self.user.ai_reader_profile.categories_interest, {})
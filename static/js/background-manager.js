@@ -217,10 +217,10 @@
                 body: formData
             });
 
-            const data = await response.json();
+            const data = await resolveProcessedImage(await response.json());
 
-            if (data.success) {
-                showFeedback(data.message, 'success');
+            if (data.success && data.background_url) {
+                showFeedback(data.message || 'Background atualizado com sucesso!', 'success');
                 elements.previewImage.src = data.background_url;
 
                 // ✅ Habilitar botão de remover após novo upload
@@ -246,6 +246,23 @@
         }
     }
 
+    // Aguarda o processamento da imagem enviada (resposta 202 com status_url)
+    async function resolveProcessedImage(data, attempts = 30, interval = 1000) {
+        if (!data.success || !data.pending || !data.status_url) {
+            return data;
+        }
+
+        for (let i = 0; i < attempts; i++) {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            const response = await fetch(data.status_url);
+            const status = await response.json();
+            if (!status.success || !status.pending) {
+                return status;
+            }
+        }
+        return { success: false, error: 'A imagem ainda está sendo processada. Recarregue a página em instantes.' };
+    }
+
     // ============================================
     // ATUALIZAR PREVIEW
     // ============================================
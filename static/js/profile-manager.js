@@ -83,14 +83,15 @@ class ProfileManager {
                 }
             });
 
-            const data = await response.json();
+            const data = await this.resolveProcessedImage(await response.json(), 'avatar_url');
 
             if (data.success) {
                 this.showToast('Avatar atualizado com sucesso!', 'success');
 
                 // Atualizar imagem na página
                 const avatarImg = document.querySelector('.avatar-frame img');
-                if (avatarImg) {
+                if (avatarImg && data.avatar_url) {
+                    avatarImg.removeAttribute('srcset'); // Versões responsivas antigas
                     avatarImg.src = data.avatar_url + '?t=' + Date.now(); // Cache bust
                 }
 
@@ -146,14 +147,14 @@ class ProfileManager {
                 }
             });
 
-            const data = await response.json();
+            const data = await this.resolveProcessedImage(await response.json(), 'banner_url');
 
             if (data.success) {
                 this.showToast('Banner atualizado com sucesso!', 'success');
 
                 // Atualizar imagem na página
                 const bannerImg = document.querySelector('.profile-banner');
-                if (bannerImg) {
+                if (bannerImg && data.banner_url) {
                     if (bannerImg.tagName === 'IMG') {
                         bannerImg.src = data.banner_url + '?t=' + Date.now(); // Cache bust
                     } else {
@@ -186,6 +187,30 @@ class ProfileManager {
         }
     }
 
+    /**
+     * Aguarda o processamento da imagem enviada (resposta 202 com status_url).
+     * Consulta o status até a URL final ficar disponível.
+     */
+    async resolveProcessedImage(data, urlKey, attempts = 30, interval = 1000) {
+        if (!data.success || !data.pending || !data.status_url) {
+            return data;
+        }
+
+        for (let i = 0; i < attempts; i++) {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            const response = await fetch(data.status_url, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+            });
+            const status = await response.json();
+            if (!status.success || !status.pending) {
+                return status;
+            }
+        }
+
+        // Ainda processando: a imagem aparece no próximo carregamento da página
+        return { success: true, [urlKey]: null };
+    }
+
     /**
      * Atualiza tema visual via AJAX
      */